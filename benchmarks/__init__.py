@@ -0,0 +1 @@
+"""Generador de reportes UFED sintéticos y mediciones de rendimiento (ver ``benchmarks.run`` y ``benchmarks.startup``)."""
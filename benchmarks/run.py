@@ -0,0 +1,223 @@
+"""Mediciones de rendimiento sobre reportes sintéticos (:mod:`benchmarks.synthetic`).
+
+Para cada escala se genera (una vez) el reporte XLSX y se mide cada etapa
+del panel: ingesta al formato columnar, lectura, apertura como paquete de
+caso, búsqueda, temáticas (también con léxicos de miles de términos), grafo
+de contactos y agregados (gráfico, línea de tiempo, mapa y desplazamientos).
+El resultado queda en un JSON con el entorno de la medición; con
+``--baseline`` se compara contra una medición anterior y el proceso termina
+con código 1 si alguna etapa empeoró más de la tolerancia::
+
+    python -m benchmarks.run --rows 10000 100000 1000000
+    python -m benchmarks.run --rows 100000 --baseline benchmarks/results/base.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_workbook, synthetic_lexicon
+from investidata.aggregates import chart_payload
+from investidata.bundle import build_resources, write_resources
+from investidata.cache import ExtractionCache
+from investidata.columnar import load_store
+from investidata.graph import ContactGraph
+from investidata.movement import MovementAnalyzer
+from investidata.parallel import ingest_workbook
+from investidata.search import SearchIndex, TrigramIndex
+from investidata.sheets import locations_frame, messages_frame
+from investidata.spatial import SpatialIndex
+from investidata.timeline import ActivityIndex
+from investidata.topics import TopicScanner
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DATA_DIR = Path(tempfile.gettempdir()) / "investidata-bench"
+DEFAULT_ROWS = (10_000, 100_000)
+# Consultas típicas: palabra común, palabra de un léxico, frase y sin resultados
+QUERIES = ("hola", "pistola", "nos vemos", "inexistente")
+# Búsqueda aproximada: variante con números, error de escritura, prefijo y frase
+FUZZY_QUERIES = ("pistol4", "fiero", "pist*", "nos vemos")
+# Léxicos grandes para el escáner de temáticas: su costo no debe crecer con ellos
+LEXICON_TERMS = (1_000, 5_000)
+# Diferencias menores que esto (segundos) son ruido, aunque superen la tolerancia
+NOISE_SECONDS = 0.05
+
+
+def _peak_rss_mb():
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _timed(stages, name, repeat, work):
+    """Ejecuta ``work`` ``repeat`` veces; guarda el mínimo y la mediana."""
+    times, value = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = work()
+        times.append(time.perf_counter() - start)
+    stages[name] = {
+        "seconds": round(min(times), 4),
+        "median": round(float(np.median(times)), 4),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+    return value
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).parent, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import pyarrow
+
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pyarrow.__version__,
+    }
+
+
+def bench_scale(rows, repeat=3, seed=0, data_dir=DATA_DIR, workers=None) -> dict:
+    """Tiempos de cada etapa para un reporte de ``rows`` filas."""
+    data_dir = Path(data_dir)
+    workbook = data_dir / f"ufed_{rows}_{seed}.xlsx"
+    generated = None
+    if not workbook.exists():
+        start = time.perf_counter()
+        generate_workbook(workbook, rows, seed=seed)
+        generated = round(time.perf_counter() - start, 2)
+
+    stages = {}
+    store = Path(tempfile.mkdtemp(dir=data_dir, prefix=".store-")) / "extraccion"
+    try:
+        # La ingesta escribe en disco: se mide una sola vez
+        _timed(stages, "ingest", 1, lambda: ingest_workbook(workbook, store, max_workers=workers))
+        frames = _timed(stages, "load", repeat, lambda: load_store(store))
+        # Paquete de caso: hojas y motores guardados, abiertos por una caché vacía
+        write_resources(store, build_resources(frames)[0])
+        _timed(stages, "bundle_open", repeat, lambda: ExtractionCache(disk_dir=store.parent).get(store.name))
+    finally:
+        shutil.rmtree(store.parent, ignore_errors=True)
+
+    messages = _timed(stages, "messages", repeat, lambda: messages_frame(frames))
+    index = _timed(stages, "search_build", repeat, lambda: SearchIndex.build(messages))
+    _timed(stages, "search_query", repeat, lambda: [index.search(q) for q in QUERIES])
+    _timed(stages, "fuzzy_build", repeat, lambda: TrigramIndex.build(index.vocabulary))
+    index.fuzzy_index()
+    _timed(stages, "fuzzy_query", repeat, lambda: [index.search(q, fuzzy=True) for q in FUZZY_QUERIES])
+
+    scanner = TopicScanner()
+    summary = _timed(stages, "topic_scan", repeat, lambda: scanner.summarize(scanner.scan(messages)))
+    _timed(stages, "chart", repeat, lambda: chart_payload(summary["por_palabra"]))
+    for terms in LEXICON_TERMS:
+        large = TopicScanner(synthetic_lexicon(terms, seed=seed))
+        _timed(stages, f"topic_scan_{terms}", repeat, lambda: large.scan(messages))
+
+    _timed(stages, "graph_build", repeat, lambda: ContactGraph.from_frames(frames))
+    # Centralidad y comunidades quedan en caché en el grafo: un grafo nuevo cada vez
+    _timed(stages, "graph_key_contacts", repeat, lambda: ContactGraph.from_frames(frames).key_contacts())
+
+    activity = _timed(stages, "timeline_build", repeat, lambda: ActivityIndex.from_frames(frames))
+    _timed(stages, "timeline_query", repeat, lambda: activity.timeline())
+
+    locations = locations_frame(frames)
+    spatial = _timed(stages, "spatial_build", repeat, lambda: SpatialIndex(locations))
+    _timed(stages, "spatial_clusters", repeat, lambda: spatial.clusters())
+    _timed(stages, "movement", repeat, lambda: MovementAnalyzer(locations).summary())
+
+    return {
+        "rows": rows,
+        "seed": seed,
+        "sheets": {name: len(df) for name, df in frames.items()},
+        "workbook_mb": round(workbook.stat().st_size / 1e6, 1),
+        "generate_seconds": generated,
+        "stages": stages,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[dict]:
+    """Etapas más lentas que en ``baseline`` por encima de la tolerancia."""
+    previous = {scale["rows"]: scale["stages"] for scale in baseline["scales"]}
+    regressions = []
+    for scale in current["scales"]:
+        for stage, result in scale["stages"].items():
+            before = previous.get(scale["rows"], {}).get(stage)
+            if before is None:
+                continue
+            now, then = result["seconds"], before["seconds"]
+            if now > then * (1 + tolerance) and now - then > NOISE_SECONDS:
+                regressions.append({
+                    "rows": scale["rows"], "stage": stage,
+                    "before": then, "now": now, "ratio": round(now / then, 2) if then else None,
+                })
+    return regressions
+
+
+def _print_scale(scale):
+    print(f"\n{scale['rows']:,} filas ({scale['workbook_mb']} MB)")
+    for stage, result in scale["stages"].items():
+        print(f"    {stage:<20} {result['seconds']:>9.3f} s   pico {result['peak_rss_mb']:>8,.0f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Mide las etapas del panel sobre reportes UFED sintéticos.",
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS),
+                        help="Escalas a medir (filas de datos por reporte)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones de cada etapa (se guarda la mínima)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para la ingesta")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Dónde se guardan los reportes generados")
+    parser.add_argument("--out", default=None, help="JSON de resultados (por defecto en benchmarks/results/)")
+    parser.add_argument("--baseline", default=None, help="JSON de una medición anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Aumento permitido respecto de la línea base (0.25 = 25 %%)")
+    args = parser.parse_args(argv)
+
+    Path(args.data_dir).mkdir(parents=True, exist_ok=True)
+    results = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": environment(), "scales": []}
+    for rows in args.rows:
+        scale = bench_scale(rows, repeat=args.repeat, seed=args.seed, data_dir=args.data_dir, workers=args.workers)
+        results["scales"].append(scale)
+        _print_scale(scale)
+
+    status = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        results["baseline"] = str(args.baseline)
+        results["regressions"] = compare(results, baseline, args.tolerance)
+        for item in results["regressions"]:
+            print(f"REGRESIÓN {item['rows']:,} filas, {item['stage']}: "
+                  f"{item['before']:.3f} s -> {item['now']:.3f} s", file=sys.stderr)
+        status = 1 if results["regressions"] else 0
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nResultados: {out}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
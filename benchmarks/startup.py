@@ -0,0 +1,119 @@
+"""Arranque del panel: tiempo hasta pintar la pantalla de bienvenida.
+
+Cada medición corre en un proceso nuevo (módulos sin importar, como un
+servidor recién arrancado) con una carpeta de caché vacía: se importa
+Streamlit, como haría el servidor antes de la primera sesión, y se mide la
+primera ejecución de ``investidata2.py`` sin extracción cargada. La precarga
+en segundo plano de los módulos de análisis se desactiva para ver qué importa
+la pantalla de bienvenida por sí sola.
+
+El comando termina con código 1 si la mediana supera el presupuesto o si la
+pantalla de bienvenida importó alguno de los módulos pesados::
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --budget 0.8 --runs 7
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+APP_PATH = Path(__file__).resolve().parent.parent / "investidata2.py"
+DEFAULT_RUNS = 5
+DEFAULT_BUDGET = 1.0
+# Lo que la pantalla de bienvenida no necesita: se importa al abrir una extracción
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "networkx", "openpyxl", "PIL", "matplotlib")
+
+# Se ejecuta en el proceso hijo; imprime una línea JSON
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_seconds = time.perf_counter() - start
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+start = time.perf_counter()
+app.run()
+landing_seconds = time.perf_counter() - start
+print(json.dumps({
+    "streamlit_seconds": streamlit_seconds,
+    "landing_seconds": landing_seconds,
+    "heavy_modules": [name for name in sys.argv[2:] if name in sys.modules],
+    "modules": len(sys.modules),
+    "errors": [str(e.value) for e in app.exception],
+}))
+"""
+
+
+def measure_once(app_path=APP_PATH) -> dict:
+    with tempfile.TemporaryDirectory(prefix="investidata-startup-") as cache_dir:
+        env = {
+            **os.environ,
+            "INVESTIDATA_CACHE_DIR": cache_dir,
+            "INVESTIDATA_STATE_DB": str(Path(cache_dir) / "estado.sqlite3"),
+            "INVESTIDATA_WARMUP": "0",
+        }
+        result = subprocess.run(
+            [sys.executable, "-c", _CHILD, str(app_path), *HEAVY_MODULES],
+            cwd=Path(app_path).parent, env=env, capture_output=True, text=True, check=True,
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(runs=DEFAULT_RUNS, app_path=APP_PATH) -> dict:
+    samples = [measure_once(app_path) for _ in range(runs)]
+    landing = [sample["landing_seconds"] for sample in samples]
+    return {
+        "runs": runs,
+        "landing_median": round(statistics.median(landing), 4),
+        "landing_min": round(min(landing), 4),
+        "streamlit_median": round(statistics.median(s["streamlit_seconds"] for s in samples), 4),
+        "heavy_modules": sorted({name for sample in samples for name in sample["heavy_modules"]}),
+        "modules": samples[-1]["modules"],
+        "errors": sorted({error for sample in samples for error in sample["errors"]}),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.startup",
+        description="Mide el tiempo hasta pintar la pantalla de bienvenida del panel.",
+    )
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Procesos a medir (se usa la mediana)")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET,
+                        help="Tiempo máximo (segundos) de la primera ejecución del script")
+    parser.add_argument("--out", default=None, help="JSON donde guardar el resultado")
+    args = parser.parse_args(argv)
+
+    from benchmarks.run import environment
+
+    result = {**measure(args.runs), "budget": args.budget, "environment": environment()}
+    print(f"Streamlit importado en {result['streamlit_median']:.3f} s (mediana)")
+    print(f"Pantalla de bienvenida en {result['landing_median']:.3f} s "
+          f"(mediana de {args.runs}, mínimo {result['landing_min']:.3f} s; presupuesto {args.budget:.2f} s)")
+    print(f"Módulos cargados: {result['modules']}")
+
+    status = 0
+    if result["errors"]:
+        print("ERROR en la pantalla de bienvenida: " + "; ".join(result["errors"]), file=sys.stderr)
+        status = 1
+    if result["heavy_modules"]:
+        print("La pantalla de bienvenida importó: " + ", ".join(result["heavy_modules"]), file=sys.stderr)
+        status = 1
+    if result["landing_median"] > args.budget:
+        print(f"PRESUPUESTO SUPERADO: {result['landing_median']:.3f} s > {args.budget:.2f} s", file=sys.stderr)
+        status = 1
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
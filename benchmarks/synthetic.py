@@ -0,0 +1,353 @@
+"""Reportes UFED sintéticos con la forma de una extracción real.
+
+Un libro con la hoja ``Información del dispositivo`` y hojas de mensajes,
+llamadas, ubicaciones y contactos, con los encabezados que reconoce
+:mod:`investidata.sheets`. Los datos imitan una extracción real:
+
+* contactos con frecuencia de Zipf (pocos contactos concentran la mayoría
+  de los mensajes) y números de teléfono colombianos;
+* mensajes con vocabulario común y, en una fracción, palabras de los léxicos
+  de :mod:`investidata.topics`; fechas a lo largo de un año con ritmo diario;
+* ubicaciones que alternan permanencias en unos pocos lugares y trayectos
+  entre ellos, con ruido de GPS.
+
+Las hojas de más de :data:`MAX_SHEET_ROWS` filas (el límite de Excel) se
+reparten en ``Chats (2)``, ``Chats (3)``... El XML de cada hoja se escribe
+directamente por bloques de columnas (openpyxl escribe celda por celda y
+tardaría media hora en 10 millones de filas), con la dimensión declarada
+como la deja Cellebrite, así que la memoria no crece con la escala::
+
+    python -m benchmarks.synthetic 1000000 --out /tmp/ufed_1m.xlsx
+"""
+
+import argparse
+import sys
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from investidata.topics import LEXICONS
+
+MAX_SHEET_ROWS = 1_000_000
+CHUNK_ROWS = 50_000
+# Reparto de las filas entre hojas
+SHARES = {"Chats": 0.6, "Registro de llamadas": 0.15, "Ubicaciones": 0.25}
+HEADERS = {
+    "Chats": ["De", "Para", "Cuerpo", "Marca de tiempo", "Fuente", "Dirección", "Estado"],
+    "Registro de llamadas": ["Nombre", "Número", "Marca de tiempo", "Duración (s)", "Tipo"],
+    "Ubicaciones": ["Marca de tiempo", "Latitud", "Longitud", "Fuente"],
+}
+START = np.datetime64("2024-01-01T00:00:00", "s")
+SPAN_SECONDS = 365 * 86400
+# Fracción de mensajes con alguna palabra de los léxicos
+KEYWORD_RATE = 0.03
+APPS = ("WhatsApp", "Telegram", "SMS", "Signal", "Messenger")
+COMMON_WORDS = (
+    "hola", "bien", "gracias", "mañana", "hoy", "casa", "trabajo", "llego", "ahora", "luego",
+    "listo", "vale", "donde", "cuando", "nos", "vemos", "llamame", "ok", "si", "no", "que",
+    "pasa", "parce", "todo", "tranquilo", "ya", "voy", "salgo", "espera", "mira", "foto",
+    "audio", "plata", "semana", "viernes", "sabado", "noche", "temprano", "tarde", "oficina",
+)
+# Lugares frecuentes alrededor de Bogotá (latitud, longitud)
+PLACES = ((4.6097, -74.0817), (4.6533, -74.0836), (4.7110, -74.0721), (4.5981, -74.0760), (4.6761, -74.0486))
+OWNER = "Propietario"
+
+DEVICE_INFO = [
+    ("IMEI", "356938035643809"),
+    ("Vendor", "Samsung"),
+    ("Model", "SM-G991B"),
+    ("Device Name", "Galaxy S21 sintético"),
+    ("OS Version", "Android 13"),
+]
+
+
+def split_rows(rows: int) -> dict[str, int]:
+    """Filas de cada tipo de hoja para ``rows`` filas en total."""
+    counts = {name: int(rows * share) for name, share in SHARES.items()}
+    counts["Chats"] += rows - sum(counts.values())
+    return counts
+
+
+# -----------------------------------------------------------------------------
+# Datos
+# -----------------------------------------------------------------------------
+
+def _contacts(rng, n):
+    names = np.array([f"Contacto {i:05d}" for i in range(n)], dtype=object)
+    phones = np.array([f"+57 3{number:09d}" for number in rng.integers(0, 10**9, n)], dtype=object)
+    # Zipf acotado: probabilidad proporcional a 1 / rango
+    weights = 1.0 / np.arange(1, n + 1)
+    return names, phones, weights / weights.sum()
+
+
+def _timestamps(rng, n):
+    # Días uniformes en el año; horas con más actividad de día que de madrugada
+    days = rng.integers(0, SPAN_SECONDS // 86400, n)
+    hours = np.clip(rng.normal(15, 4.5, n), 0, 23.99)
+    seconds = days * 86400 + (hours * 3600).astype(np.int64)
+    return np.sort(START + seconds.astype("timedelta64[s]"))
+
+
+def _texts(rng, n):
+    vocabulary = np.array(COMMON_WORDS, dtype=object)
+    keywords = np.array([word for words in LEXICONS.values() for word in words], dtype=object)
+    lengths = rng.integers(2, 14, n)
+    words = vocabulary[rng.integers(0, len(vocabulary), lengths.sum())]
+    flagged = np.flatnonzero(rng.random(n) < KEYWORD_RATE)
+    # La palabra clave reemplaza la primera palabra del mensaje
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    words[starts[flagged]] = keywords[rng.integers(0, len(keywords), flagged.size)]
+    return np.array([" ".join(words[s:s + k]) for s, k in zip(starts, lengths)], dtype=object)
+
+
+def _track(rng, n):
+    """Permanencias en lugares frecuentes unidas por trayectos en línea recta."""
+    lat = np.empty(n)
+    lon = np.empty(n)
+    places = np.array(PLACES)
+    i, here = 0, places[0]
+    while i < n:
+        stay = min(int(rng.integers(20, 200)), n - i)
+        lat[i:i + stay] = here[0] + rng.normal(0, 0.0002, stay)
+        lon[i:i + stay] = here[1] + rng.normal(0, 0.0002, stay)
+        i += stay
+        there = places[rng.integers(0, len(places))]
+        trip = min(int(rng.integers(5, 40)), n - i)
+        steps = np.linspace(0, 1, trip + 2)[1:-1]
+        lat[i:i + trip] = here[0] + (there[0] - here[0]) * steps + rng.normal(0, 0.0005, trip)
+        lon[i:i + trip] = here[1] + (there[1] - here[1]) * steps + rng.normal(0, 0.0005, trip)
+        i += trip
+        here = there
+    return lat.round(6), lon.round(6)
+
+
+def _blocks(kind, rows, rng, contacts):
+    """Bloques de una hoja: un dict encabezado -> arreglo de ``CHUNK_ROWS`` filas."""
+    names, phones, weights = contacts
+    dates = _timestamps(rng, rows)
+    for lo in range(0, rows, CHUNK_ROWS):
+        n = min(CHUNK_ROWS, rows - lo)
+        when = dates[lo:lo + n]
+        who = rng.choice(len(names), n, p=weights)
+        if kind == "Chats":
+            outgoing = rng.random(n) < 0.45
+            yield {
+                "De": np.where(outgoing, OWNER, names[who]),
+                "Para": np.where(outgoing, names[who], OWNER),
+                "Cuerpo": _texts(rng, n),
+                "Marca de tiempo": when,
+                "Fuente": np.array(APPS, dtype=object)[rng.choice(len(APPS), n, p=(0.6, 0.2, 0.1, 0.05, 0.05))],
+                "Dirección": np.where(outgoing, "Saliente", "Entrante"),
+                "Estado": np.full(n, "Leído", dtype=object),
+            }
+        elif kind == "Registro de llamadas":
+            yield {
+                "Nombre": names[who],
+                "Número": phones[who],
+                "Marca de tiempo": when,
+                "Duración (s)": rng.exponential(90, n).astype(np.int64),
+                "Tipo": rng.choice(np.array(["Entrante", "Saliente", "Perdida"], dtype=object), n, p=(0.45, 0.4, 0.15)),
+            }
+        else:
+            lat, lon = _track(rng, n)
+            yield {
+                "Marca de tiempo": when,
+                "Latitud": lat,
+                "Longitud": lon,
+                "Fuente": np.full(n, "GPS", dtype=object),
+            }
+
+
+def _sheet_blocks(rows, seed, contacts):
+    """Hojas del reporte en orden: (nombre, encabezados, filas, bloques)."""
+    rng = np.random.default_rng(seed)
+    n_contacts = contacts or int(np.clip(rows // 200, 20, 5000))
+    people = _contacts(rng, n_contacts)
+    info = pd.DataFrame(DEVICE_INFO, columns=["Nombre", "Valor"])
+    yield "Información del dispositivo", list(info.columns), len(info), iter([dict(info.items())])
+    for kind, total in split_rows(rows).items():
+        blocks = _blocks(kind, total, rng, people)
+        # Partes de MAX_SHEET_ROWS (múltiplo de CHUNK_ROWS) como hojas "Chats (2)"...
+        for part, lo in enumerate(range(0, max(total, 1), MAX_SHEET_ROWS), start=1):
+            count = min(MAX_SHEET_ROWS, total - lo)
+            title = kind if part == 1 else f"{kind} ({part})"
+            yield title, HEADERS[kind], count, (next(blocks) for _ in range(-(-count // CHUNK_ROWS)))
+    names, phones, _ = people
+    yield "Contactos", ["Nombre", "Número"], len(names), iter([{"Nombre": names, "Número": phones}])
+
+
+# -----------------------------------------------------------------------------
+# XLSX
+# -----------------------------------------------------------------------------
+
+_EXCEL_EPOCH = np.datetime64("1899-12-30T00:00:00", "s")
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "{sheets}</Types>"
+)
+_SHEET_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{i}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    "<sheets>{sheets}</sheets></workbook>"
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    "{sheets}"
+    '<Relationship Id="rIdStyles" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/></Relationships>'
+)
+# Estilo 1: fecha y hora (formato integrado 22), como las marcas de tiempo de UFED
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    "</styleSheet>"
+)
+
+
+def _escape(values: pd.Series) -> pd.Series:
+    return (values.str.replace("&", "&amp;", regex=False)
+            .str.replace("<", "&lt;", regex=False)
+            .str.replace(">", "&gt;", regex=False))
+
+
+def _cells(values) -> pd.Series:
+    """XML de las celdas de una columna (sin referencias: van en orden)."""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        serial = (values.astype("datetime64[s]") - _EXCEL_EPOCH).astype(np.int64) / 86400
+        return '<c s="1"><v>' + pd.Series(serial.round(8).astype(str)) + "</v></c>"
+    if np.issubdtype(values.dtype, np.number):
+        return "<c><v>" + pd.Series(values.astype(str)) + "</v></c>"
+    text = _escape(pd.Series(values, dtype=object).astype(str))
+    return '<c t="inlineStr"><is><t xml:space="preserve">' + text + "</t></is></c>"
+
+
+def _column_letter(index):
+    letters = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+
+def _write_sheet(fh, headers, rows, blocks):
+    last = f"{_column_letter(len(headers) - 1)}{rows + 1}"
+    fh.write((
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        f'<dimension ref="A1:{last}"/><sheetData>'
+        f'<row r="1">{"".join(_cells(np.array(headers, dtype=object)))}</row>'
+    ).encode("utf-8"))
+    row = 2
+    for block in blocks:
+        cells = None
+        for name in headers:
+            column = _cells(block[name])
+            cells = column if cells is None else cells + column
+        numbers = pd.Series(np.arange(row, row + len(cells)).astype(str))
+        fh.write("".join('<row r="' + numbers + '">' + cells + "</row>").encode("utf-8"))
+        row += len(cells)
+    fh.write(b"</sheetData></worksheet>")
+
+
+def generate_workbook(path, rows, seed=0, contacts=None) -> dict[str, int]:
+    """Escribe un reporte sintético con ``rows`` filas de datos en total.
+
+    Devuelve las filas de cada hoja escrita.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = {}
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        for i, (title, headers, count, blocks) in enumerate(_sheet_blocks(rows, seed, contacts), start=1):
+            with archive.open(f"xl/worksheets/sheet{i}.xml", "w", force_zip64=True) as fh:
+                _write_sheet(fh, headers, count, blocks)
+            written[title] = count
+        sheets = range(1, len(written) + 1)
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES.format(
+            sheets="".join(_SHEET_TYPE.format(i=i) for i in sheets)))
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _WORKBOOK.format(sheets="".join(
+            f'<sheet name="{title}" sheetId="{i}" r:id="rId{i}"/>' for i, title in zip(sheets, written))))
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS.format(sheets="".join(
+            f'<Relationship Id="rId{i}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{i}.xml"/>' for i in sheets)))
+        archive.writestr("xl/styles.xml", _STYLES)
+    return written
+
+
+def synthetic_lexicon(terms, seed=0) -> dict[str, list[str]]:
+    """Léxico de ``terms`` términos: los de :data:`LEXICONS` más palabras inventadas.
+
+    Una de cada diez es de dos palabras, como las frases de un léxico real.
+    Sirve para medir el escáner de temáticas con léxicos de miles de términos.
+    """
+    rng = np.random.default_rng(seed)
+    lexicons = {topic: list(words) for topic, words in LEXICONS.items()}
+    letters = np.array(list("abcdefghijlmnoprstuvz"), dtype=object)
+    extra = max(terms - sum(len(words) for words in lexicons.values()), 0)
+    for i in range(extra):
+        words = ["".join(rng.choice(letters, rng.integers(4, 11))) for _ in range(1 + (rng.random() < 0.1))]
+        lexicons.setdefault(f"tema{i % 20}", []).append(" ".join(words))
+    return lexicons
+
+
+def synthetic_frames(rows, seed=0, contacts=None) -> dict[str, pd.DataFrame]:
+    """Las mismas hojas como DataFrames en memoria (sin pasar por XLSX)."""
+    return {
+        title: pd.concat([pd.DataFrame(block, columns=headers) for block in blocks], ignore_index=True)
+        for title, headers, _, blocks in _sheet_blocks(rows, seed, contacts)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.synthetic",
+        description="Genera un reporte UFED sintético (XLSX) para medir el rendimiento.",
+    )
+    parser.add_argument("rows", type=int, help="Filas de datos en total (p. ej. 10000 a 10000000)")
+    parser.add_argument("--out", required=True, help="Archivo .xlsx de salida")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--contacts", type=int, default=None, help="Contactos distintos (por defecto según la escala)")
+    args = parser.parse_args(argv)
+
+    written = generate_workbook(args.out, args.rows, seed=args.seed, contacts=args.contacts)
+    for name, count in written.items():
+        print(f"{name}: {count:,} filas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Motores de ingesta y análisis de InvestiData (separados de la interfaz Streamlit)."""
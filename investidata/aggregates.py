@@ -0,0 +1,27 @@
+"""Palabras clave más frecuentes de cada temática para el gráfico de barras del panel.
+
+Salen del resumen del escáner de temáticas (:class:`investidata.topics.TopicScanner`),
+que ya cuenta cada palabra clave de todos los léxicos en una sola pasada: el
+gráfico no vuelve a recorrer los mensajes y sus conteos son los mismos del
+resumen. Se calculan una vez por extracción y se entregan a la página una sola
+vez: cambiar de temática es solo una búsqueda.
+"""
+
+import pandas as pd
+
+from investidata.topics import LEXICONS
+
+TOP_KEYWORDS = 5
+
+
+def chart_payload(by_keyword: pd.DataFrame, lexicons=LEXICONS, top=TOP_KEYWORDS) -> dict:
+    """Las ``top`` palabras de cada temática, de ``by_keyword`` (el ``por_palabra``
+    de :meth:`TopicScanner.summarize`); las que no aparecen cuentan 0."""
+    counts = {(row.tema, row.palabra): int(row.coincidencias) for row in by_keyword.itertuples()}
+    payload = {}
+    for topic, terms in lexicons.items():
+        found = [(term, counts.get((topic, term), 0)) for term in terms]
+        # Orden estable: a igual conteo, el orden del léxico
+        best = sorted(found, key=lambda item: item[1], reverse=True)[:top]
+        payload[topic] = [{"keyword": term, "count": count} for term, count in best]
+    return payload
@@ -0,0 +1,278 @@
+"""Paquetes de caso: la extracción y sus índices, listos para abrir en el panel.
+
+Un paquete es el conjunto columnar de :mod:`investidata.columnar`
+(``<carpeta>/<hash>/``) más un archivo ``recursos.pkl`` con los motores que
+el panel construiría en la primera consulta: índice de búsqueda, gráfico y
+resumen de temáticas, grafo de contactos (con centralidad y comunidades ya
+calculadas), índice temporal, índice espacial e identificadores normalizados
+para correlacionar dispositivos. Los mensajes unificados no se guardan: son
+una copia de las hojas que ya están en Parquet y se vuelven a armar en
+milisegundos. Al leer un paquete de disco, :class:`investidata.cache.ExtractionCache`
+usa esos motores tal cual (:func:`read_resources`) en lugar de volver a
+construirlos.
+
+Los paquetes se preparan por lotes con ``investidata_batch.py`` (reportes
+XLSX, CSV sueltos o carpetas de CSV, una hoja por archivo). ``recursos.pkl``
+es un pickle: solo se abren paquetes generados por el propio laboratorio.
+Listarlos y leer sus motores no requiere este módulo (ver
+:mod:`investidata.catalog`).
+"""
+
+import argparse
+import csv
+import hashlib
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from investidata.aggregates import chart_payload
+from investidata.catalog import (
+    BUNDLE_VERSION,
+    RESOURCES_NAME,
+    is_bundle,
+    is_store,
+    load_resources,
+    read_manifest,
+)
+from investidata.columnar import load_store, write_store
+from investidata.correlation import identifiers_frame
+from investidata.graph import ContactGraph
+from investidata.ingest import file_hash
+from investidata.search import SearchIndex
+from investidata.sheets import locations_frame, messages_frame
+from investidata.spatial import SpatialIndex
+from investidata.timeline import ActivityIndex
+from investidata.topics import TopicScanner
+
+CSV_DELIMITERS = ",;\t|"
+
+
+# -----------------------------------------------------------------------------
+# Motores precalculados
+# -----------------------------------------------------------------------------
+
+def build_resources(frames: dict[str, pd.DataFrame]) -> tuple[dict, dict]:
+    """Motores del panel (con los mismos nombres que usa ``investidata2.py``)
+    y los segundos que tomó cada uno."""
+    resources, seconds = {}, {}
+
+    def timed(name, build):
+        start = time.perf_counter()
+        resources[name] = build()
+        seconds[name] = round(time.perf_counter() - start, 3)
+
+    timed("messages", lambda: messages_frame(frames))
+    messages = resources["messages"]
+
+    def search():
+        index = SearchIndex.build(messages)
+        index.fuzzy_index()  # deja hecho el índice de trigramas de la búsqueda aproximada
+        return index
+
+    timed("search", search)
+    scanner = TopicScanner()
+    timed("topics", lambda: scanner.summarize(scanner.scan(messages)))
+    timed("chart", lambda: chart_payload(resources["topics"]["por_palabra"]))
+
+    def graph():
+        graph = ContactGraph.from_frames(frames)
+        graph.key_contacts()  # deja centralidad y comunidades en su caché
+        return graph
+
+    timed("graph", graph)
+    timed("timeline", lambda: ActivityIndex.from_frames(frames))
+    timed("spatial", lambda: SpatialIndex(locations_frame(frames)))
+    timed("identifiers", lambda: identifiers_frame(frames))
+    return resources, seconds
+
+
+def write_resources(path, resources: dict):
+    path = Path(path)
+    # Los mensajes (y los del índice de búsqueda, ver SearchIndex.__getstate__)
+    # se vuelven a armar con las hojas al abrir el paquete
+    stored = {name: value for name, value in resources.items() if name != "messages"}
+    fd, tmp = tempfile.mkstemp(dir=path, prefix=".tmp-", suffix=".pkl")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            # La versión va en su propio pickle, delante, para comprobarla sin
+            # leer los motores (investidata.catalog.bundle_version)
+            pickle.dump(BUNDLE_VERSION, fh, protocol=5)
+            pickle.dump(stored, fh, protocol=5)
+        os.replace(tmp, path / RESOURCES_NAME)
+    finally:
+        Path(tmp).unlink(missing_ok=True)
+
+
+def read_resources(path, frames: dict[str, pd.DataFrame]) -> dict:
+    """Motores del paquete en ``path``, unidos a sus hojas ya abiertas.
+
+    ``{}`` si no es un paquete de la versión actual.
+    """
+    resources = load_resources(path)
+    if resources:
+        # Las mismas hojas con las que se construyó el índice: mismas filas,
+        # en el mismo orden
+        messages = resources["messages"] = messages_frame(frames)
+        if "search" in resources:
+            resources["search"].messages = messages
+    return resources
+
+
+# -----------------------------------------------------------------------------
+# Reportes CSV
+# -----------------------------------------------------------------------------
+
+def _read_csv(path) -> pd.DataFrame:
+    # Exportaciones de distintas versiones: separador y codificación variables
+    for encoding in ("utf-8-sig", "latin-1"):
+        try:
+            with open(path, encoding=encoding, newline="") as fh:
+                sample = fh.read(64 * 1024)
+            try:
+                delimiter = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+            except csv.Error:
+                delimiter = ","
+            return pd.read_csv(path, sep=delimiter, encoding=encoding, low_memory=False)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"No se pudo leer {path}: codificación desconocida")
+
+
+def _csv_files(source):
+    source = Path(source)
+    return sorted(source.glob("*.csv")) if source.is_dir() else [source]
+
+
+def csv_hash(source) -> str:
+    """Hash de un CSV, o de una carpeta de CSV (nombres y contenido de cada uno)."""
+    files = _csv_files(source)
+    if len(files) == 1 and not Path(source).is_dir():
+        return file_hash(files[0])
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(f"{path.name}\0{file_hash(path)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def csv_frames(source) -> dict[str, pd.DataFrame]:
+    """Una hoja por archivo CSV, con el nombre del archivo sin extensión."""
+    return {path.stem: _read_csv(path) for path in _csv_files(source)}
+
+
+# -----------------------------------------------------------------------------
+# Paquetes
+# -----------------------------------------------------------------------------
+
+def find_reports(inputs) -> list[Path]:
+    """Reportes en ``inputs``: archivos XLSX y CSV, y carpetas que los contienen.
+
+    Dentro de una carpeta, cada XLSX y cada CSV suelto es una extracción, y
+    cada subcarpeta con CSV (exportación por categorías) es una sola.
+    """
+    reports = []
+    for item in map(Path, inputs):
+        if not item.is_dir():
+            reports.append(item)
+            continue
+        reports.extend(sorted(item.glob("*.xlsx")) + sorted(item.glob("*.csv")))
+        reports.extend(sub for sub in sorted(item.iterdir()) if sub.is_dir() and any(sub.glob("*.csv")))
+    return reports
+
+
+def build_bundle(source, out_dir, sheet_workers=None, force=False) -> dict:
+    """Convierte un reporte y guarda sus motores; devuelve un resumen del paquete."""
+    from investidata.parallel import ingest_workbook
+
+    source = Path(source)
+    start = time.perf_counter()
+    is_xlsx = source.suffix.lower() == ".xlsx"
+    key = file_hash(source) if is_xlsx else csv_hash(source)
+    target = Path(out_dir) / key
+    summary = {"report": str(source), "bundle": str(target), "skipped": False}
+
+    if is_bundle(target) and not force:
+        return {**summary, "skipped": True, "seconds": round(time.perf_counter() - start, 3)}
+    if force or not is_store(target):
+        if is_xlsx:
+            ingest_workbook(source, target, max_workers=sheet_workers)
+        else:
+            write_store(csv_frames(source), target, source_name=source.name)
+    summary["ingest_seconds"] = round(time.perf_counter() - start, 3)
+
+    # Los motores se construyen sobre la versión tipada que abrirá el panel
+    resources, summary["resources"] = build_resources(load_store(target))
+    write_resources(target, resources)
+    summary["sheets"] = {sheet["name"]: sheet["rows"] for sheet in read_manifest(target)["sheets"]}
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+def _print_summary(summary):
+    if summary["skipped"]:
+        print(f"{summary['report']} -> {summary['bundle']} (ya existe)")
+        return
+    print(f"{summary['report']} -> {summary['bundle']} ({summary['seconds']:.1f}s)")
+    for name, rows in summary["sheets"].items():
+        print(f"    {name}: {rows:,} filas")
+    built = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in summary["resources"].items())
+    print(f"    índices: {built}")
+
+
+def main(argv=None):
+    from investidata.cache import DEFAULT_CACHE_DIR
+
+    parser = argparse.ArgumentParser(
+        prog="investidata_batch.py",
+        description="Prepara paquetes de caso (extracción e índices) a partir de reportes UFED XLSX o CSV.",
+    )
+    parser.add_argument("inputs", nargs="+", help="Reportes .xlsx/.csv o carpetas que los contienen")
+    parser.add_argument(
+        "--out", default=DEFAULT_CACHE_DIR,
+        help=f"Carpeta de los paquetes (por defecto la caché del panel: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Procesos en total (por defecto, uno por núcleo); se reparten entre reportes y hojas",
+    )
+    parser.add_argument("--force", action="store_true", help="Vuelve a generar los paquetes existentes")
+    args = parser.parse_args(argv)
+
+    reports = find_reports(args.inputs)
+    if not reports:
+        print("No se encontraron reportes XLSX ni CSV.", file=sys.stderr)
+        return 1
+    workers = max(args.workers or os.cpu_count() or 1, 1)
+    report_workers = min(workers, len(reports))
+    sheet_workers = max(workers // report_workers, 1)
+
+    failures = 0
+    if report_workers == 1:
+        for report in reports:
+            try:
+                _print_summary(build_bundle(report, args.out, sheet_workers, args.force))
+            except Exception as exc:
+                failures += 1
+                print(f"ERROR {report}: {exc}", file=sys.stderr)
+        return 1 if failures else 0
+
+    # "spawn", como en investidata.parallel: cada reporte en su propio proceso
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=report_workers, mp_context=context) as pool:
+        futures = {
+            pool.submit(build_bundle, report, args.out, sheet_workers, args.force): report
+            for report in reports
+        }
+        for future in as_completed(futures):
+            try:
+                _print_summary(future.result())
+            except Exception as exc:
+                failures += 1
+                print(f"ERROR {futures[future]}: {exc}", file=sys.stderr)
+    return 1 if failures else 0
@@ -0,0 +1,314 @@
+"""Almacén de extracciones compartido por todas las sesiones del servidor.
+
+Dos niveles: memoria y disco. En memoria, cada extracción (sus hojas y los
+motores derivados: índice de búsqueda, grafo, índice espacial...) existe una
+sola vez por proceso, indexada por el hash del contenido, y todas las
+sesiones que analizan ese caso la comparten en modo de solo lectura. El
+nivel en disco (formato columnar de :mod:`investidata.columnar`) sobrevive a
+reinicios; si la extracción es un paquete de caso (:mod:`investidata.bundle`),
+sus motores también se leen de disco.
+
+Cada sesión declara qué extracción usa (:meth:`ExtractionCache.acquire`);
+Streamlit no avisa cuando una sesión se cierra, así que la referencia caduca
+si la sesión no vuelve a ejecutarse en ``idle_seconds``. Se descartan de
+memoria primero las extracciones sin sesiones y sin uso reciente, y después,
+si se supera ``memory_budget``, las menos usadas (aunque alguna sesión las
+tenga abiertas: se vuelven a leer de disco en su siguiente ejecución).
+"""
+
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from investidata.catalog import RESOURCES_NAME, is_store
+from investidata.perf import span
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("INVESTIDATA_CACHE_DIR", Path.home() / ".cache" / "investidata")
+)
+# Megabytes de 1024 × 1024 bytes, en el presupuesto y en las estadísticas
+MB = 1024 * 1024
+DEFAULT_MEMORY_BUDGET = int(os.environ.get("INVESTIDATA_MEMORY_BUDGET_MB", 4096)) * MB
+DEFAULT_IDLE_SECONDS = int(os.environ.get("INVESTIDATA_IDLE_SECONDS", 30 * 60))
+
+
+def estimate_bytes(value) -> int:
+    """Memoria aproximada de hojas, arreglos y motores (sus atributos de NumPy/pandas)."""
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(estimate_bytes(v) for v in value.values())
+    if hasattr(value, "__dict__"):
+        # Un nivel: los motores guardan sus datos como atributos
+        return sum(
+            estimate_bytes(v) for v in vars(value).values()
+            if isinstance(v, (pd.DataFrame, pd.Series, np.ndarray, dict))
+        )
+    return 0
+
+
+class _Entry:
+    def __init__(self, frames):
+        self.frames = frames
+        self.bytes = estimate_bytes(frames)
+        self.resources = {}         # nombre -> motor derivado
+        self.resource_bytes = {}
+        self.sessions = {}          # id de sesión -> última ejecución
+        self.last_used = 0.0
+
+    @property
+    def total_bytes(self):
+        return self.bytes + sum(self.resource_bytes.values())
+
+
+class ExtractionCache:
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, idle_seconds=DEFAULT_IDLE_SECONDS,
+                 disk_dir=DEFAULT_CACHE_DIR, clock=time.monotonic):
+        self.memory_budget = memory_budget
+        self.idle_seconds = idle_seconds
+        self.disk_dir = Path(disk_dir) if disk_dir is not None else None
+        self._clock = clock
+        self._entries = OrderedDict()   # de la menos a la más usada
+        self._lock = threading.Lock()
+        # Un candado por extracción: dos sesiones que abren el mismo caso a la
+        # vez lo leen (y construyen sus motores) una sola vez. Solo existe
+        # mientras algún hilo lo tiene o lo espera: clave -> [candado, usos]
+        self._key_locks = {}
+
+    @contextmanager
+    def _key_lock(self, key):
+        with self._lock:
+            holder = self._key_locks.setdefault(key, [threading.RLock(), 0])
+            holder[1] += 1
+        try:
+            with holder[0]:
+                yield
+        finally:
+            with self._lock:
+                holder[1] -= 1
+                if not holder[1]:
+                    del self._key_locks[key]
+
+    # --- Nivel en memoria ---
+
+    def _remember(self, key, frames):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.frames is not frames:
+                entry = self._entries[key] = _Entry(frames)
+            self._touch(key, entry)
+            self._evict()
+            return entry
+
+    def _touch(self, key, entry):
+        entry.last_used = self._clock()
+        self._entries.move_to_end(key)
+
+    def _expire_sessions(self, now):
+        for entry in self._entries.values():
+            for session, seen in list(entry.sessions.items()):
+                if now - seen > self.idle_seconds:
+                    del entry.sessions[session]
+
+    def _evict(self):
+        # Con el candado tomado
+        now = self._clock()
+        self._expire_sessions(now)
+        for key, entry in list(self._entries.items()):
+            if not entry.sessions and now - entry.last_used > self.idle_seconds:
+                del self._entries[key]
+        used = sum(entry.total_bytes for entry in self._entries.values())
+        # Primero las que nadie usa; la más reciente se queda siempre
+        for in_use in (False, True):
+            for key, entry in list(self._entries.items())[:-1]:
+                if used <= self.memory_budget:
+                    return
+                if bool(entry.sessions) == in_use:
+                    used -= entry.total_bytes
+                    del self._entries[key]
+
+    def evict(self):
+        """Aplica las reglas de descarte (también se aplican al cargar o usar)."""
+        with self._lock:
+            self._evict()
+
+    # --- Nivel en disco ---
+
+    def _disk_path(self, key):
+        return self.disk_dir / key
+
+    def _read_disk(self, key):
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        if not is_store(path):
+            return None
+        # pandas y pyarrow se importan con la primera extracción que se abre,
+        # no al arrancar (la pantalla de bienvenida no los necesita)
+        from investidata.columnar import load_store
+
+        try:
+            return load_store(path)
+        except Exception:
+            # Conjunto corrupto o de una versión anterior: se vuelve a procesar
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+    def _load_disk(self, key):
+        with span("carga", extraccion=key[:12]) as tags:
+            frames = self._read_disk(key)
+            if frames is None:
+                return None
+            # Paquete de caso (investidata.bundle): sus motores ya construidos se
+            # usan tal cual en lugar de volver a calcularse en la primera consulta
+            resources = {}
+            if (self._disk_path(key) / RESOURCES_NAME).exists():
+                from investidata.bundle import read_resources
+
+                resources = read_resources(self._disk_path(key), frames)
+            tags["filas"] = sum(len(df) for df in frames.values())
+            tags["motores"] = len(resources)
+        entry = self._remember(key, frames)
+        if resources:
+            with self._lock:
+                for name, value in resources.items():
+                    entry.resources.setdefault(name, value)
+                    entry.resource_bytes.setdefault(name, estimate_bytes(value))
+                self._evict()
+        return frames
+
+    def _write_disk(self, key, frames):
+        if self.disk_dir is None:
+            return
+        from investidata.columnar import write_store
+
+        write_store(frames, self._disk_path(key))
+
+    # --- API pública ---
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._touch(key, entry)
+                return entry.frames
+        with self._key_lock(key):
+            with self._lock:
+                if key in self._entries:
+                    return self._entries[key].frames
+            return self._load_disk(key)
+
+    def put(self, key, frames):
+        self._write_disk(key, frames)
+        # Se relee la versión tipada del disco: todas las sesiones
+        # ven exactamente los mismos tipos, venga de memoria o de disco
+        frames = self._read_disk(key) or frames
+        self._remember(key, frames)
+        return frames
+
+    def get_or_load(self, key, loader):
+        frames = self.get(key)
+        if frames is None:
+            with self._key_lock(key):
+                frames = self.get(key)
+                if frames is None:
+                    frames = self.put(key, loader())
+        return frames
+
+    def get_or_build(self, key, build):
+        # ``build(path)`` escribe el conjunto columnar directamente en disco
+        # (p. ej. en streaming), sin tener nunca la hoja completa en memoria
+        frames = self.get(key)
+        if frames is None:
+            if self.disk_dir is None:
+                raise ValueError("get_or_build necesita una caché con nivel en disco")
+            with self._key_lock(key):
+                frames = self.get(key)
+                if frames is None:
+                    build(self._disk_path(key))
+                    frames = self._load_disk(key)
+        return frames
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self.disk_dir is not None and is_store(self._disk_path(key))
+
+    # --- Sesiones y motores derivados ---
+
+    def acquire(self, key, session):
+        """Registra que ``session`` usa la extracción (y deja la que usaba antes)."""
+        with self._lock:
+            now = self._clock()
+            for other, entry in self._entries.items():
+                if other != key:
+                    entry.sessions.pop(session, None)
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.sessions[session] = now
+                self._touch(key, entry)
+
+    def release(self, session):
+        with self._lock:
+            for entry in self._entries.values():
+                entry.sessions.pop(session, None)
+
+    def resource(self, key, name, build):
+        """Motor derivado de la extracción (``build()`` se llama una vez por proceso).
+
+        Vive y se descarta junto con las hojas: si la extracción salió de
+        memoria, se vuelve a construir.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and name in entry.resources:
+                self._touch(key, entry)
+                return entry.resources[name]
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and name in entry.resources:
+                    return entry.resources[name]
+            with span(f"indice:{name}", extraccion=key[:12]):
+                value = build()
+            with self._lock:
+                entry = self._entries.get(key)
+                # Si la extracción ya no está en memoria el motor no se guarda
+                if entry is not None:
+                    entry.resources[name] = value
+                    entry.resource_bytes[name] = estimate_bytes(value)
+                    self._touch(key, entry)
+                    self._evict()
+            return value
+
+    def stats(self) -> dict:
+        """Extracciones en memoria, sesiones que las usan y memoria estimada."""
+        with self._lock:
+            self._expire_sessions(self._clock())
+            entries = [
+                {
+                    "extraccion": key[:12],
+                    "sesiones": len(entry.sessions),
+                    "hojas_mb": entry.bytes / MB,
+                    "motores_mb": sum(entry.resource_bytes.values()) / MB,
+                    "motores": len(entry.resources),
+                }
+                for key, entry in reversed(self._entries.items())
+            ]
+        return {
+            "budget_mb": self.memory_budget / MB,
+            "used_mb": sum(e["hojas_mb"] + e["motores_mb"] for e in entries),
+            "entries": entries,
+        }
@@ -0,0 +1,84 @@
+"""Lo que hay en la carpeta de caché, sin cargar los módulos de análisis.
+
+Saber qué extracciones convertidas (:mod:`investidata.columnar`) y qué
+paquetes de caso (:mod:`investidata.bundle`) hay en disco solo requiere leer
+``manifest.json`` y comprobar si existe ``recursos.pkl``. Este módulo no
+importa pandas, pyarrow ni los motores, así que la pantalla de bienvenida
+puede listar las extracciones sin pagar su importación; esos módulos se cargan
+al abrir una extracción (al leer ``recursos.pkl``, los importa el propio
+pickle).
+"""
+
+import json
+import pickle
+from pathlib import Path
+
+MANIFEST_NAME = "manifest.json"
+RESOURCES_NAME = "recursos.pkl"
+# Cambia cuando cambian las clases guardadas: los paquetes anteriores se
+# abren igual, pero sus motores se vuelven a construir al consultarlos, e
+# ``investidata_batch.py`` los vuelve a generar
+BUNDLE_VERSION = 3
+
+
+def is_store(path) -> bool:
+    return (Path(path) / MANIFEST_NAME).exists()
+
+
+def read_manifest(path) -> dict:
+    return json.loads((Path(path) / MANIFEST_NAME).read_text(encoding="utf-8"))
+
+
+def bundle_version(path) -> int | None:
+    """Versión de ``recursos.pkl`` sin leer los motores (``None`` si no hay).
+
+    El archivo guarda dos pickles seguidos: la versión y después los motores.
+    """
+    target = Path(path) / RESOURCES_NAME
+    try:
+        with open(target, "rb") as fh:
+            version = pickle.load(fh)
+    except Exception:
+        return None
+    # Los paquetes de la versión 1 eran un solo diccionario
+    return version if isinstance(version, int) else None
+
+
+def load_resources(path) -> dict:
+    """Motores guardados en el paquete; ``{}`` si no tiene o son de otra versión."""
+    target = Path(path) / RESOURCES_NAME
+    try:
+        with open(target, "rb") as fh:
+            if pickle.load(fh) != BUNDLE_VERSION:
+                return {}
+            return pickle.load(fh)
+    except Exception:
+        return {}
+
+
+def is_bundle(path) -> bool:
+    """``True`` si ``path`` es un paquete de caso de la versión actual."""
+    return is_store(path) and bundle_version(path) == BUNDLE_VERSION
+
+
+def list_bundles(directory) -> list[dict]:
+    """Extracciones convertidas en ``directory``, de la más reciente a la más antigua."""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    bundles = []
+    for path in directory.iterdir():
+        if path.name.startswith(".") or not is_store(path):
+            continue
+        try:
+            manifest = read_manifest(path)
+        except (OSError, ValueError):
+            continue
+        bundles.append({
+            "key": path.name,
+            "source": manifest.get("source"),
+            "rows": sum(sheet["rows"] for sheet in manifest["sheets"]),
+            "indexed": bundle_version(path) == BUNDLE_VERSION,
+            "modified": path.stat().st_mtime,
+        })
+    return sorted(bundles, key=lambda bundle: bundle["modified"], reverse=True)
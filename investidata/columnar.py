@@ -0,0 +1,306 @@
+"""Conversión de reportes UFED a un conjunto columnar (Parquet) por extracción.
+
+Cada extracción se guarda en ``<carpeta>/<hash>/`` con un ``manifest.json`` y un
+archivo Parquet comprimido por hoja. Las sesiones posteriores lo leen en
+lugar de volver a interpretar el XLSX; al estar comprimido, leerlo copia los
+datos a memoria (no se mapea). Cada hoja se guarda ya en sus tipos compactos
+(:mod:`investidata.schema`): al abrirla, pandas los toma de los metadatos del
+Parquet y no se vuelve a tipar nada.
+
+Uso por lotes (por ejemplo, de noche antes de abrir el panel)::
+
+    python -m investidata.columnar reportes/ otro_reporte.xlsx --out /datos/cache
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from investidata.catalog import MANIFEST_NAME, is_store, read_manifest
+from investidata.ingest import file_hash
+from investidata.schema import ARROW_STRING, BYTES_KEY, CompactPlan, compact_frame
+
+COMPRESSION = "zstd"
+# 3: cada hoja guardada en sus tipos compactos (las anteriores se compactan al abrirlas)
+STORE_VERSION = 3
+
+
+def _typed_column(column):
+    if column.dtype != object:
+        return column
+    kind = pd.api.types.infer_dtype(column, skipna=True)
+    # Tipos numéricos con nulos (Int64/Float64): las celdas vacías no cambian el tipo
+    if kind == "integer":
+        return pd.to_numeric(column, errors="coerce").astype("Int64")
+    if kind in ("floating", "mixed-integer-float", "decimal"):
+        return pd.to_numeric(column, errors="coerce").astype("Float64")
+    if kind in ("datetime", "datetime64", "date"):
+        return pd.to_datetime(column, errors="coerce")
+    if kind == "boolean":
+        return column.astype("boolean")
+    # Texto o columnas mixtas (típico en UFED): se guardan como texto
+    return column.astype("string")
+
+
+def typed_frame(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df.columns = [str(c) for c in df.columns]
+    for name in df.columns:
+        df[name] = _typed_column(df[name])
+    return df
+
+
+def write_chunks(target, chunks):
+    """Escribe bloques ya tipados en un Parquet; el primero fija el esquema."""
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(target, table.schema, compression=COMPRESSION)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        Path(target).unlink(missing_ok=True)
+        raise
+    if writer is None:
+        # Hoja vacía: se guarda igualmente para conservar su nombre
+        pq.write_table(pa.table({}), target, compression=COMPRESSION)
+    else:
+        writer.close()
+    return Path(target)
+
+
+def parquet_rows(path):
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def _read_sheet(directory, files) -> pa.Table:
+    tables = [pq.read_table(Path(directory) / f) for f in files]
+    # Las partes vacías no tienen columnas; no participan en la unión
+    tables = [t for t in tables if t.num_columns] or tables[:1]
+    return tables[0] if len(tables) == 1 else pa.concat_tables(tables)
+
+
+def _row_groups(directory, files):
+    # Una parte de la hoja a la vez (cada bloque escrito es un grupo de filas)
+    for f in files:
+        parquet = pq.ParquetFile(Path(directory) / f)
+        for i in range(parquet.num_row_groups):
+            yield parquet.read_row_group(i).to_pandas()
+
+
+def _write_frame(target, df):
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), target, compression=COMPRESSION)
+
+
+def _text_categories(df):
+    # Arrow devuelve las categorías como ``str``; en memoria son texto de Arrow
+    for name in df.columns:
+        dtype = df[name].dtype
+        if isinstance(dtype, pd.CategoricalDtype) and dtype.categories.dtype != ARROW_STRING:
+            df[name] = df[name].cat.rename_categories(dtype.categories.astype(ARROW_STRING))
+    return df
+
+
+class StoreWriter:
+    """Escribe un conjunto columnar hoja por hoja; se publica al cerrar sin errores.
+
+    ``on_part(hoja, df)``, si se indica, recibe cada parte ya compactada en
+    el orden en que se escribe (p. ej. para construir el grafo de contactos
+    durante la ingesta, sin volver a leer las hojas).
+    """
+
+    def __init__(self, path, source_name=None, on_part=None):
+        self.path = Path(path)
+        self.source_name = source_name
+        self.on_part = on_part
+        self.sheets = []
+        self._tmp_dir = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Se escribe en una carpeta temporal y se renombra al final (atómico)
+        self._tmp_dir = Path(tempfile.mkdtemp(dir=self.path.parent, prefix=".tmp-"))
+        return self
+
+    def _next_file(self):
+        return f"hoja_{len(self.sheets):02d}.parquet"
+
+    def part_path(self, sheet_index, part, attempt=0):
+        # Ruta donde un proceso externo escribe una parte de una hoja; las
+        # partes se registran después con add_parts, en el orden del libro
+        return self._tmp_dir / f"hoja_{sheet_index:02d}-{part:03d}-{attempt}.parquet"
+
+    def add_frame(self, name, df):
+        start = time.perf_counter()
+        file_name = self._next_file()
+        compact = compact_frame(typed_frame(df))
+        _write_frame(self._tmp_dir / file_name, compact)
+        self._written(name, compact)
+        self._record(name, file_name, len(compact), time.perf_counter() - start, compact.attrs[BYTES_KEY])
+
+    def add_parts(self, name, part_files, rows, seconds):
+        start = time.perf_counter()
+        file_name, original = self._compact_files(name, [Path(f).name for f in part_files])
+        self._record(name, file_name, rows, seconds + time.perf_counter() - start, original)
+
+    def _record(self, name, file_name, rows, seconds, original_bytes):
+        self.sheets.append({
+            "name": name,
+            "files": [file_name],
+            "rows": rows,
+            "seconds": round(seconds, 3),
+            BYTES_KEY: original_bytes,
+        })
+
+    def _written(self, name, part):
+        if self.on_part is not None:
+            self.on_part(name, part)
+        return part
+
+    def _compact_files(self, name, files):
+        # Cada bloque o parte se tipa viendo solo sus filas; los tipos compactos
+        # (categorías, enteros pequeños...) se deciden con la hoja completa, en
+        # dos recorridos de sus grupos de filas sin tenerla entera en memoria,
+        # y la hoja queda en un solo archivo
+        rows = sum(parquet_rows(self._tmp_dir / f) for f in files)
+        file_name = self._next_file()
+        tmp = self._tmp_dir / f"{file_name}.compacta"
+        if rows:
+            plan = CompactPlan(rows)
+            for part in _row_groups(self._tmp_dir, files):
+                plan.observe(part)
+            write_chunks(tmp, (self._written(name, plan.apply(part)) for part in _row_groups(self._tmp_dir, files)))
+            original = plan.original_bytes
+        else:
+            # Hoja sin filas: solo conserva sus columnas
+            compact = compact_frame(_read_sheet(self._tmp_dir, files).to_pandas())
+            _write_frame(tmp, compact)
+            self._written(name, compact)
+            original = compact.attrs[BYTES_KEY]
+        for f in files:
+            (self._tmp_dir / f).unlink()
+        os.replace(tmp, self._tmp_dir / file_name)
+        return file_name, original
+
+    def add_chunks(self, name, chunks):
+        # Los bloques ya vienen tipados; el primero fija el esquema de la hoja
+        start = time.perf_counter()
+        file_name = self._next_file()
+        write_chunks(self._tmp_dir / file_name, chunks)
+        file_name, original = self._compact_files(name, [file_name])
+        rows = parquet_rows(self._tmp_dir / file_name)
+        self._record(name, file_name, rows, time.perf_counter() - start, original)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                manifest = {"version": STORE_VERSION, "source": self.source_name, "sheets": self.sheets}
+                (self._tmp_dir / MANIFEST_NAME).write_text(
+                    json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"
+                )
+                if self.path.exists():
+                    shutil.rmtree(self.path)
+                os.replace(self._tmp_dir, self.path)
+        finally:
+            if self._tmp_dir.exists():
+                shutil.rmtree(self._tmp_dir)
+        return False
+
+
+def write_store(frames: dict[str, pd.DataFrame], path, source_name=None):
+    with StoreWriter(path, source_name=source_name) as writer:
+        for name, df in frames.items():
+            writer.add_frame(name, df)
+    return Path(path)
+
+
+def load_store(path) -> dict[str, pd.DataFrame]:
+    path = Path(path)
+    manifest = read_manifest(path)
+    compacted = manifest.get("version", 1) >= STORE_VERSION
+    frames = {}
+    for sheet in manifest["sheets"]:
+        df = _read_sheet(path, sheet["files"]).to_pandas()
+        if compacted:
+            # Los tipos compactos vienen en los metadatos de pandas del Parquet
+            df = _text_categories(df)
+            df.attrs[BYTES_KEY] = sheet[BYTES_KEY]
+        else:
+            # Conjuntos anteriores: cada columna se compacta al abrirlos
+            df = compact_frame(df)
+        frames[sheet["name"]] = df
+    return frames
+
+
+def convert_workbook(source, out_dir, max_workers=None) -> Path:
+    from investidata.parallel import ingest_workbook
+
+    source = Path(source)
+    target = Path(out_dir) / file_hash(source)
+    if is_store(target):
+        return target
+    return ingest_workbook(source, target, max_workers=max_workers)
+
+
+# -----------------------------------------------------------------------------
+# Línea de comandos
+# -----------------------------------------------------------------------------
+
+def _collect_reports(inputs):
+    for item in inputs:
+        item = Path(item)
+        if item.is_dir():
+            yield from sorted(item.glob("*.xlsx"))
+        else:
+            yield item
+
+
+def main(argv=None):
+    from investidata.cache import DEFAULT_CACHE_DIR
+
+    parser = argparse.ArgumentParser(
+        prog="python -m investidata.columnar",
+        description="Convierte reportes UFED (XLSX) al formato columnar que usa InvestiData.",
+    )
+    parser.add_argument("inputs", nargs="+", help="Archivos .xlsx o carpetas que los contienen")
+    parser.add_argument(
+        "--out", default=DEFAULT_CACHE_DIR,
+        help=f"Carpeta de salida (por defecto la caché del panel: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Procesos para interpretar las hojas en paralelo (por defecto, uno por núcleo)",
+    )
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for report in _collect_reports(args.inputs):
+        start = time.perf_counter()
+        try:
+            target = convert_workbook(report, args.out, max_workers=args.workers)
+        except Exception as exc:
+            failures += 1
+            print(f"ERROR {report}: {exc}", file=sys.stderr)
+            continue
+        print(f"{report} -> {target} ({time.perf_counter() - start:.1f}s)")
+        for sheet in read_manifest(target)["sheets"]:
+            print(f"    {sheet['name']}: {sheet['rows']:,} filas en {sheet['seconds']:.1f}s")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""Correlación entre las extracciones de un caso con varios dispositivos.
+
+Cada extracción se reduce a una tabla de identificadores normalizados
+(:func:`identifiers_frame`): teléfonos (también las cuentas de WhatsApp, que
+son números), correos, IMEI, chats grupales de WhatsApp, zonas visitadas y
+encuentros (zona y hora). Los teléfonos se comparan por sus últimos
+:data:`PHONE_DIGITS` dígitos, así ``+57 300 123 4567``, ``3001234567`` y
+``573001234567@s.whatsapp.net`` son el mismo identificador.
+
+:class:`CaseIndex` reúne esas tablas en un índice invertido
+``(tipo, valor) -> {extracción: (eventos, propio)}``. Al agregar un
+dispositivo solo se buscan sus identificadores en el índice (un hash join
+del dispositivo nuevo contra los anteriores) y se suman los pares que
+aparecen; los pares que ya existían no se recalculan. Los identificadores
+"propios" son los del dispositivo (su IMEI o su número, de la hoja de
+información del dispositivo): si otro dispositivo los tiene como contacto,
+el par es un vínculo directo.
+"""
+
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from investidata.ingest import DEVICE_SHEET
+from investidata.sheets import find_columns, find_sheets, locations_frame
+from investidata.text import fold
+
+KINDS = ("telefono", "whatsapp", "correo", "imei", "chat", "zona", "encuentro")
+# Tipos que identifican a una persona o un chat (no un lugar)
+CONTACT_KINDS = ("telefono", "whatsapp", "correo", "imei", "chat")
+PHONE_DIGITS = 10           # número nacional, sin el indicativo del país
+MIN_PHONE_DIGITS = 7
+IMEI_DIGITS = 14            # sin el dígito de control (ni la versión de software)
+ZONE_DEGREES = 0.003        # celdas de unos 330 m de lado (norte-sur)
+SHARED_LIMIT = 500
+
+# Hojas y columnas de las que se sacan identificadores de contactos
+_SHEET_KINDS = ("mensajes", "llamadas", "contactos")
+_COLUMN_ROLES = ("contacto", "telefono", "correo", "chat")
+# Filas de la hoja del dispositivo con su propio número
+_OWN_PHONE_KEYS = {
+    "msisdn", "numero", "numero de telefono", "telefono", "phone number", "own number", "line 1 number",
+}
+
+_IDENTIFIER_RE = re.compile(
+    r"(?P<jid>[\d-]{5,40})@(?P<server>s\.whatsapp\.net|c\.us|g\.us|lid)\b"
+    r"|(?P<correo>[\w.+-]+@[\w-]+(?:\.[\w-]+)+)"
+    r"|(?P<telefono>\+?\d[\d ().-]{5,}\d)"
+)
+_COLUMNS = ["tipo", "valor", "eventos", "propio"]
+
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame({
+        "tipo": pd.Series(dtype=object), "valor": pd.Series(dtype=object),
+        "eventos": pd.Series(dtype="int64"), "propio": pd.Series(dtype=bool),
+    })
+
+
+def _phones(values: pd.Series) -> pd.Series:
+    digits = values.str.replace(r"\D", "", regex=True)
+    return digits.where(digits.str.len() >= MIN_PHONE_DIGITS).str[-PHONE_DIGITS:]
+
+
+def cell_identifiers(cells: pd.Series) -> pd.DataFrame:
+    """Identificadores normalizados de celdas de texto (``De``, ``Número``...).
+
+    Cada celda distinta se analiza una vez; ``eventos`` es el número de
+    celdas en que aparece cada identificador.
+    """
+    counts = cells.dropna().astype(str).value_counts()
+    if counts.empty:
+        return _empty()
+    found = counts.index.to_series().str.extractall(_IDENTIFIER_RE)
+    if found.empty:
+        return _empty()
+    events = counts.reindex(found.index.get_level_values(0)).to_numpy(dtype=np.int64)
+
+    # Cuentas de WhatsApp: las personales son números; los grupos son chats
+    server = found["server"]
+    personal = server.isin(["s.whatsapp.net", "c.us"]).to_numpy()
+    kind = np.full(len(found), None, dtype=object)
+    value = np.full(len(found), None, dtype=object)
+    for mask, label, values in (
+        (personal, "telefono", _phones(found["jid"])),
+        ((server == "g.us").to_numpy(), "chat", found["jid"]),
+        ((server == "lid").to_numpy(), "whatsapp", found["jid"]),
+        (found["correo"].notna().to_numpy(), "correo", found["correo"].str.lower()),
+        (found["telefono"].notna().to_numpy(), "telefono", _phones(found["telefono"])),
+    ):
+        kind[mask] = label
+        value[mask] = values.to_numpy(dtype=object)[mask]
+
+    rows = pd.DataFrame({"tipo": kind, "valor": value, "eventos": events}).dropna()
+    rows = rows.groupby(["tipo", "valor"], as_index=False, sort=False)["eventos"].sum()
+    rows["propio"] = False
+    return rows[_COLUMNS]
+
+
+def device_identifiers(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """IMEI, número y cuentas del propio dispositivo (hoja :data:`DEVICE_SHEET`)."""
+    device_info = frames.get(DEVICE_SHEET)
+    if device_info is None or not {"Nombre", "Valor"} <= set(device_info.columns):
+        return _empty()
+    rows = []
+    for name, raw in device_info[["Nombre", "Valor"]].dropna().itertuples(index=False):
+        key, raw = fold(str(name)).strip(), str(raw)
+        if key.startswith("imei"):
+            digits = re.sub(r"\D", "", raw)
+            if len(digits) >= IMEI_DIGITS:
+                rows.append(("imei", digits[:IMEI_DIGITS]))
+        elif key in _OWN_PHONE_KEYS:
+            rows.extend(cell_identifiers(pd.Series([raw]))[["tipo", "valor"]].itertuples(index=False, name=None))
+        elif "@" in raw:
+            rows.extend(
+                (kind, value) for kind, value in
+                cell_identifiers(pd.Series([raw]))[["tipo", "valor"]].itertuples(index=False, name=None)
+                if kind != "telefono"
+            )
+    if not rows:
+        return _empty()
+    own = pd.DataFrame(rows, columns=["tipo", "valor"]).drop_duplicates()
+    own["eventos"] = 1
+    own["propio"] = True
+    return own[_COLUMNS]
+
+
+def place_identifiers(locations: pd.DataFrame) -> pd.DataFrame:
+    """Zonas visitadas y encuentros (zona y hora) de ``locations``.
+
+    ``locations`` tiene las columnas de :func:`investidata.sheets.locations_frame`.
+    Dos ubicaciones a pocos metros pero a los lados del borde de una celda
+    quedan en zonas distintas.
+    """
+    if locations.empty:
+        return _empty()
+    cells = pd.DataFrame({
+        "lat": np.floor(locations["lat"].to_numpy(dtype=np.float64) / ZONE_DEGREES).astype(np.int64),
+        "lon": np.floor(locations["lon"].to_numpy(dtype=np.float64) / ZONE_DEGREES).astype(np.int64),
+        "hora": pd.to_datetime(locations["fecha"], errors="coerce").dt.floor("h").to_numpy(),
+    })
+
+    def zone_names(groups):
+        # Centro de la celda: legible y el mismo en todos los dispositivos
+        return [
+            f"{(lat + 0.5) * ZONE_DEGREES:.4f},{(lon + 0.5) * ZONE_DEGREES:.4f}"
+            for lat, lon in zip(groups["lat"], groups["lon"])
+        ]
+
+    zones = cells.groupby(["lat", "lon"], sort=False).size().reset_index(name="eventos")
+    zones["tipo"] = "zona"
+    zones["valor"] = zone_names(zones)
+    meetings = cells.dropna(subset=["hora"]).groupby(["lat", "lon", "hora"], sort=False).size()
+    meetings = meetings.reset_index(name="eventos")
+    meetings["tipo"] = "encuentro"
+    meetings["valor"] = [
+        f"{zone} {hour:%Y-%m-%d %H}h" for zone, hour in zip(zone_names(meetings), meetings["hora"])
+    ]
+    places = pd.concat([zones, meetings], ignore_index=True)
+    places["eventos"] = places["eventos"].astype("int64")
+    places["propio"] = False
+    return places[_COLUMNS]
+
+
+def identifiers_frame(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Identificadores normalizados de una extracción.
+
+    Columnas: ``tipo`` (uno de :data:`KINDS`), ``valor``, ``eventos``
+    (celdas o ubicaciones en que aparece) y ``propio`` (identifica al propio
+    dispositivo). Un identificador propio que además aparece como contacto
+    queda como propio.
+    """
+    cells = [
+        frames[name][column]
+        for kind in _SHEET_KINDS
+        for name in find_sheets(frames, kind)
+        for role in _COLUMN_ROLES
+        for column in find_columns(frames[name], role)
+    ]
+    parts = [
+        cell_identifiers(pd.concat(cells, ignore_index=True)) if cells else _empty(),
+        device_identifiers(frames),
+        place_identifiers(locations_frame(frames)),
+    ]
+    identifiers = pd.concat([part for part in parts if not part.empty] or [_empty()], ignore_index=True)
+    identifiers = identifiers.groupby(["tipo", "valor"], as_index=False).agg(
+        eventos=("eventos", "sum"), propio=("propio", "any"),
+    )
+    return identifiers.astype({"eventos": "int64", "propio": bool})[_COLUMNS]
+
+
+class CaseIndex:
+    """Índice de identificadores compartido por las extracciones de los casos.
+
+    Es seguro entre sesiones: cada caso consulta solo los pares de sus
+    extracciones (``keys``).
+    """
+
+    def __init__(self):
+        self._postings = {}         # (tipo, valor) -> {extracción: (eventos, propio)}
+        self._members = {}          # extracción -> [(tipo, valor)]
+        self._pairs = {}            # (a, b) con a < b -> Counter por tipo (y "directo")
+        self._labels = {}
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def __contains__(self, key):
+        return key in self._members
+
+    def __len__(self):
+        return len(self._members)
+
+    def label(self, key) -> str:
+        return self._labels.get(key) or key[:12]
+
+    # --- Construcción incremental ---
+
+    def add(self, key, identifiers: pd.DataFrame, label=None) -> int:
+        """Agrega una extracción; devuelve cuántos de sus identificadores ya estaban en el índice."""
+        with self._lock:
+            if key in self._members:
+                return 0
+            members, matched = [], 0
+            for kind, value, events, own in identifiers[_COLUMNS].itertuples(index=False, name=None):
+                identifier = (kind, value)
+                posting = self._postings.setdefault(identifier, {})
+                if posting:
+                    matched += 1
+                    for other, (_, other_own) in posting.items():
+                        pair = self._pairs.setdefault((min(key, other), max(key, other)), Counter())
+                        pair[kind] += 1
+                        if own != other_own:
+                            pair["directo"] += 1
+                posting[key] = (int(events), bool(own))
+                members.append(identifier)
+            self._members[key] = members
+            self._labels[key] = label
+            self.version += 1
+            return matched
+
+    def remove(self, key):
+        with self._lock:
+            for identifier in self._members.pop(key, []):
+                posting = self._postings[identifier]
+                _, own = posting.pop(key)
+                for other, (_, other_own) in posting.items():
+                    pair = (min(key, other), max(key, other))
+                    self._pairs[pair][identifier[0]] -= 1
+                    if own != other_own:
+                        self._pairs[pair]["directo"] -= 1
+                if not posting:
+                    del self._postings[identifier]
+            for pair in [pair for pair in self._pairs if key in pair]:
+                del self._pairs[pair]
+            self._labels.pop(key, None)
+            self.version += 1
+
+    # --- Consultas ---
+
+    def pairs(self, keys=None) -> pd.DataFrame:
+        """Pares de extracciones que comparten algo, los más relacionados primero.
+
+        Una columna por tipo (identificadores compartidos), ``directos``
+        (identificadores propios de uno que aparecen en el otro) y
+        ``contactos`` (suma de :data:`CONTACT_KINDS`).
+        """
+        keys = None if keys is None else set(keys)
+        with self._lock:
+            rows = [
+                {"a": a, "b": b, "dispositivo_a": self.label(a), "dispositivo_b": self.label(b),
+                 **{kind: counts[kind] for kind in KINDS}, "directos": counts["directo"]}
+                for (a, b), counts in self._pairs.items()
+                if (keys is None or (a in keys and b in keys)) and +counts
+            ]
+        pairs = pd.DataFrame(rows, columns=["a", "b", "dispositivo_a", "dispositivo_b", *KINDS, "directos"])
+        pairs.insert(4, "contactos", pairs[list(CONTACT_KINDS)].sum(axis=1).astype("int64"))
+        return pairs.sort_values(
+            ["directos", "contactos", "encuentro", "zona"], ascending=False, ignore_index=True
+        )
+
+    def shared(self, a, b, kinds=None, limit=SHARED_LIMIT) -> pd.DataFrame:
+        """Identificadores que tienen ``a`` y ``b`` (hash join de sus listas)."""
+        with self._lock:
+            small, large = sorted((a, b), key=lambda key: len(self._members.get(key, ())))
+            rows = []
+            for identifier in self._members.get(small, ()):
+                if kinds is not None and identifier[0] not in kinds:
+                    continue
+                posting = self._postings[identifier]
+                if large in posting:
+                    (events_a, own_a), (events_b, own_b) = posting[a], posting[b]
+                    rows.append((*identifier, events_a, events_b, own_a, own_b))
+        shared = pd.DataFrame(
+            rows, columns=["tipo", "valor", "eventos_a", "eventos_b", "propio_a", "propio_b"]
+        )
+        shared["_orden"] = shared["tipo"].map(KINDS.index)
+        shared["_eventos"] = shared["eventos_a"] + shared["eventos_b"]
+        shared = shared.sort_values(["_orden", "_eventos"], ascending=[True, False], ignore_index=True)
+        return shared.drop(columns=["_orden", "_eventos"]).head(limit)
+
+    def lookup(self, text: str, keys=None) -> pd.DataFrame:
+        """Extracciones en que aparece el teléfono, correo o cuenta escrito en ``text``."""
+        wanted = cell_identifiers(pd.Series([text]))
+        digits = re.sub(r"\D", "", text)
+        if len(digits) >= IMEI_DIGITS:
+            wanted = pd.concat(
+                [wanted, pd.DataFrame({"tipo": ["imei"], "valor": [digits[:IMEI_DIGITS]]})], ignore_index=True
+            )
+        keys = None if keys is None else set(keys)
+        with self._lock:
+            rows = [
+                (kind, value, key, self.label(key), events, own)
+                for kind, value in wanted[["tipo", "valor"]].itertuples(index=False, name=None)
+                for key, (events, own) in self._postings.get((kind, value), {}).items()
+                if keys is None or key in keys
+            ]
+        return pd.DataFrame(rows, columns=["tipo", "valor", "extraccion", "dispositivo", "eventos", "propio"])
@@ -0,0 +1,59 @@
+"""Panel principal como componente bidireccional de Streamlit.
+
+La página (``frontend/``) se monta una sola vez por sesión: los estilos y D3
+viajan con ella (ver :mod:`investidata.dashboard.assets`) y se cargan al
+montar, no en cada rerun. Python envía los datos por
+partes ("slots": tema visual, perfil del dispositivo, gráfico, búsqueda) y en
+cada rerun solo los que cambiaron; el resto viaja como ``null`` y la página
+conserva lo que ya tenía. Las consultas de búsqueda vuelven a Python como el
+valor del componente.
+"""
+
+from pathlib import Path
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from investidata.perf import span
+
+FRONTEND_DIR = Path(__file__).parent / "frontend"
+DEFAULT_KEY = "investidata_dashboard"
+DEFAULT_HEIGHT = 1200
+
+_component = components.declare_component("investidata_dashboard", path=str(FRONTEND_DIR))
+
+
+def last_message(key: str = DEFAULT_KEY) -> dict:
+    """Último mensaje de la página: ``mount`` y ``seq`` más el estado de la página
+    (``query``, ``offset``, ``fuzzy``, ``graph``, ``ego``, ``viewport``, ``near``,
+    ``movement``, ``timeline``, ``media``, ``duplicates``, ``user``, ``persist``)."""
+    return st.session_state.get(key) or {}
+
+
+def render(slots: dict, key: str = DEFAULT_KEY, height: int = DEFAULT_HEIGHT):
+    """Monta el panel y le envía los slots cuya versión cambió.
+
+    ``slots`` mapea nombre → ``(versión, producir)``; ``producir()`` solo se
+    llama cuando la versión difiere de la última enviada a este montaje.
+    """
+    message = last_message(key)
+    sent = st.session_state.get(f"{key}:sent")
+    # Un montaje nuevo (iframe recargado) no conserva nada: se reenvía todo
+    if sent is None or sent.get("mount") != message.get("mount"):
+        sent = {"mount": message.get("mount")}
+
+    args, versions = {}, {}
+    for name, (version, produce) in slots.items():
+        if name in sent and sent[name] == version:
+            args[name] = None
+        else:
+            with span(f"consulta:{name}"):
+                args[name] = produce()
+            versions[name] = version
+
+    with span("render", slots=",".join(versions) or "-"):
+        _component(**args, key=key, default=None, height=height)
+    # Solo después de emitir el componente: si el rerun se interrumpe antes,
+    # los slots se vuelven a enviar en el siguiente
+    sent.update(versions)
+    st.session_state[f"{key}:sent"] = sent
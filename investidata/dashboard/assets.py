@@ -0,0 +1,188 @@
+"""Recursos estáticos del panel: compilación, huellas y cabeceras de caché.
+
+El panel no descarga nada de Internet al montarse (en el laboratorio no hay
+conexión): los estilos son Tailwind ya compilado (``frontend/assets/app.css``,
+solo con las clases que usa la página) y D3 va en ``frontend/vendor/``. Ambos
+se versionan en el repositorio; este módulo los vuelve a generar::
+
+    pip install tailwindcss-bin
+    python -m investidata.dashboard.assets
+    python -m investidata.dashboard.assets --d3 ruta/a/d3.min.js
+
+Cada recurso (también ``main.js``) se enlaza desde ``index.html`` con su
+huella (``?v=<sha256>``), que cambia solo cuando cambia el archivo: después
+de editar ``main.js`` hay que volver a ejecutar el comando.
+:class:`AssetCacheMiddleware` marca esas respuestas como inmutables durante
+un año (si la huella coincide con el archivo servido): el navegador los
+descarga una vez y después los toma de su caché sin preguntar al servidor. Se
+activa al arrancar el panel con ``investidata_app.py``.
+"""
+
+import argparse
+import hashlib
+import re
+import shutil
+import subprocess
+import sys
+import urllib.request
+from pathlib import Path
+from urllib.parse import parse_qs
+
+DASHBOARD_DIR = Path(__file__).parent
+FRONTEND_DIR = DASHBOARD_DIR / "frontend"
+INDEX_HTML = FRONTEND_DIR / "index.html"
+TAILWIND_SOURCE = DASHBOARD_DIR / "tailwind.css"
+CSS_PATH = FRONTEND_DIR / "assets" / "app.css"
+MAIN_JS = FRONTEND_DIR / "main.js"
+
+D3_VERSION = "7.9.0"
+D3_PATH = FRONTEND_DIR / "vendor" / "d3.v7.min.js"
+D3_URL = f"https://cdn.jsdelivr.net/npm/d3@{D3_VERSION}/dist/d3.min.js"
+# Huella de la distribución oficial: un archivo distinto no se acepta
+D3_SHA256 = "f2094bbf6141b359722c4fe454eb6c4b0f0e42cc10cc7af921fc158fceb86539"
+
+MAX_AGE = 365 * 24 * 3600
+FINGERPRINT_LENGTH = 12
+STAMPED = (CSS_PATH, D3_PATH, MAIN_JS)
+
+
+# -----------------------------------------------------------------------------
+# Construcción
+# -----------------------------------------------------------------------------
+
+def fingerprint(path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def asset_fingerprints() -> dict:
+    """Huella actual de cada recurso enlazado, por su ruta dentro de ``frontend/``."""
+    return {
+        path.relative_to(FRONTEND_DIR).as_posix(): fingerprint(path)
+        for path in STAMPED if path.exists()
+    }
+
+
+def tailwind_binary(explicit=None) -> str:
+    """El ejecutable de Tailwind: el indicado, el del paquete ``tailwindcss-bin`` o el del PATH."""
+    if explicit:
+        return str(explicit)
+    try:
+        from tailwindcss_bin import find_tailwindcss_bin
+    except ImportError:
+        pass
+    else:
+        return str(find_tailwindcss_bin())
+    found = shutil.which("tailwindcss")
+    if found is None:
+        raise RuntimeError("No se encontró Tailwind: instala 'tailwindcss-bin' o indica --tailwind.")
+    return found
+
+
+def build_css(binary=None) -> Path:
+    """Compila y minimiza los estilos del panel (solo las clases usadas)."""
+    CSS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    subprocess.run(
+        [tailwind_binary(binary), "--input", str(TAILWIND_SOURCE), "--output", str(CSS_PATH), "--minify"],
+        cwd=DASHBOARD_DIR, check=True, capture_output=True,
+    )
+    return CSS_PATH
+
+
+def vendor_d3(source=None) -> Path:
+    """Copia D3 (de ``source`` o de :data:`D3_URL`) tras comprobar su huella."""
+    if source is not None:
+        data = Path(source).read_bytes()
+    else:
+        with urllib.request.urlopen(D3_URL, timeout=60) as response:
+            data = response.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if digest != D3_SHA256:
+        raise ValueError(f"D3 {D3_VERSION} no coincide con la huella esperada ({digest}).")
+    D3_PATH.parent.mkdir(parents=True, exist_ok=True)
+    D3_PATH.write_bytes(data)
+    return D3_PATH
+
+
+def stamp_index() -> dict:
+    """Actualiza en ``index.html`` la huella de cada recurso; devuelve ``{ruta: huella}``."""
+    html = INDEX_HTML.read_text(encoding="utf-8")
+    stamps = asset_fingerprints()
+    for relative in stamps:
+        html, count = re.subn(
+            rf'(["\']){re.escape(relative)}(?:\?v=[0-9a-f]*)?\1',
+            rf"\g<1>{relative}?v={stamps[relative]}\g<1>",
+            html,
+        )
+        if not count:
+            raise ValueError(f"index.html no enlaza {relative}.")
+    INDEX_HTML.write_text(html, encoding="utf-8")
+    return stamps
+
+
+# -----------------------------------------------------------------------------
+# Servicio
+# -----------------------------------------------------------------------------
+
+class AssetCacheMiddleware:
+    """Middleware ASGI: los recursos del panel pedidos con huella se cachean un año.
+
+    Streamlit sirve los archivos de los componentes con ``Cache-Control:
+    public`` y sin validadores, así que el navegador los vuelve a pedir en cada
+    montaje. Como la huella cambia con el contenido, esas URL son inmutables;
+    una huella que no coincide con el archivo (``index.html`` sin actualizar)
+    conserva las cabeceras de Streamlit.
+    """
+
+    def __init__(self, app, max_age=MAX_AGE, fingerprints=None):
+        self.app = app
+        self.cache_control = f"public, max-age={max_age}, immutable".encode()
+        self.fingerprints = asset_fingerprints() if fingerprints is None else fingerprints
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._is_fingerprinted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_cached(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = [(name, value) for name, value in message.get("headers", [])
+                           if name.lower() != b"cache-control"]
+                headers.append((b"cache-control", self.cache_control))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_cached)
+
+    def _is_fingerprinted(self, scope) -> bool:
+        # /component/<nombre del componente>/<ruta dentro de frontend/>
+        _, found, rest = scope.get("path", "").partition("/component/")
+        relative = rest.partition("/")[2]
+        if not found or relative not in self.fingerprints:
+            return False
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        return query.get("v", [None])[0] == self.fingerprints[relative]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m investidata.dashboard.assets",
+        description="Compila los estilos del panel, copia D3 y actualiza las huellas de index.html.",
+    )
+    parser.add_argument("--tailwind", default=None, help="Ejecutable de Tailwind (por defecto, el de tailwindcss-bin)")
+    parser.add_argument("--d3", default=None,
+                        help=f"Archivo d3.min.js {D3_VERSION} ya descargado (por defecto se conserva el actual "
+                             "o se descarga si falta)")
+    args = parser.parse_args(argv)
+
+    css = build_css(args.tailwind)
+    print(f"{css.relative_to(DASHBOARD_DIR)}: {css.stat().st_size / 1024:.1f} KB")
+    if args.d3 or not D3_PATH.exists():
+        vendor_d3(args.d3)
+    print(f"{D3_PATH.relative_to(DASHBOARD_DIR)}: {D3_PATH.stat().st_size / 1024:.1f} KB")
+    for path, stamp in stamp_index().items():
+        print(f"index.html -> {path}?v={stamp}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
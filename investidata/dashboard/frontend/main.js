@@ -0,0 +1,1295 @@
+// --- 1. Identificador Local del Usuario ---
+// Sin autenticación externa: cada navegador genera su identificador una vez y
+// lo conserva; con él se guardan en el servidor sus preferencias
+function localUserId() {
+    const key = 'investidata:usuario';
+    try {
+        let id = localStorage.getItem(key);
+        if (!id) {
+            id = 'local-' + Math.random().toString(36).slice(2, 11);
+            localStorage.setItem(key, id);
+        }
+        return id;
+    } catch (e) {
+        // Almacenamiento bloqueado: el identificador dura lo que la página
+        return 'local-' + Math.random().toString(36).slice(2, 11);
+    }
+}
+
+const userId = localUserId();
+document.getElementById('user-id').textContent = userId;
+
+// --- 2. Lógica de Navegación y Estado ---
+let currentView = 'dashboard'; // 'dashboard' o 'analysis'
+let currentFocusTopic = 'general'; // Tema actual para el análisis
+
+const dashboardView = document.getElementById('dashboard-view');
+const analysisView = document.getElementById('analysis-view');
+const analysisTitle = document.getElementById('analysis-title');
+const currentTopicDisplay = document.getElementById('current-topic-display');
+const keywordInput = document.getElementById('keyword-input');
+const searchButton = document.getElementById('search-button');
+const fuzzyToggle = document.getElementById('fuzzy-toggle');
+const resultsList = document.getElementById('search-results-list');
+const searchResultsSection = document.getElementById('search-results-section');
+const searchedKeywordSpan = document.getElementById('searched-keyword');
+const resultCountSpan = document.getElementById('result-count');
+const noResultsMessage = document.getElementById('no-results-message');
+
+function switchView(view) {
+    currentView = view;
+    if (view === 'dashboard') {
+        dashboardView.classList.remove('hidden');
+        analysisView.classList.add('hidden');
+    } else {
+        dashboardView.classList.add('hidden');
+        analysisView.classList.remove('hidden');
+    }
+    savePreference('view', view);
+}
+
+window.navigateToAnalysis = function(topic) {
+    currentFocusTopic = topic;
+    savePreference('topic', topic);
+    let titleText = 'Análisis Profundo';
+
+    // Simular el título según el tema
+    switch (topic) {
+        case 'armas': titleText = 'Análisis Temático: Armas y Porte'; break;
+        case 'sexo': titleText = 'Análisis Temático: Delitos Sexuales'; break;
+        case 'matar': titleText = 'Análisis Temático: Homicidio y Amenazas'; break;
+        case 'mensajes': titleText = 'Análisis General de Mensajes'; break;
+        case 'contactos': titleText = 'Análisis de Redes y Contactos Clave'; break;
+        case 'ubicacion': titleText = 'Análisis Geográfico y Patrones de Movimiento'; break;
+        case 'archivos': titleText = 'Análisis de Contenido Multimedia'; break;
+    }
+
+    analysisTitle.textContent = titleText;
+    currentTopicDisplay.textContent = titleText.split(': ')[1] || topic.charAt(0).toUpperCase() + topic.slice(1);
+
+    // Renderizar el gráfico para el tema
+    renderBarChart(getChartData(topic));
+
+    // Cargar sugerencias
+    renderKeywordSuggestions(topic);
+
+    // Ocultar resultados de búsqueda al cambiar de análisis
+    searchResultsSection.classList.add('hidden');
+
+    // La red de contactos solo se calcula y se pide al entrar en su análisis
+    showContacts(topic === 'contactos');
+    showLocations(topic === 'ubicacion');
+    showMedia(topic === 'archivos');
+    showTimeline();
+
+    switchView('analysis');
+}
+
+// Navegación al Dashboard
+document.getElementById('btn-dashboard').addEventListener('click', () => {
+    switchView('dashboard');
+});
+
+// --- 3. Persistencia Local del Estado ---
+// Todo se guarda primero en este navegador (IndexedDB, o en memoria si no está
+// disponible) y la página funciona sin esperar a nadie. Los cambios no se
+// escriben uno a uno: se agrupan y se escriben juntos PERSIST_DELAY ms después
+// del último, tanto en IndexedDB como en el servidor (un solo mensaje por lote).
+// Cada entrada es { key, value, updated, synced }; borrar es guardar null, y
+// entre la copia local y la del servidor gana la modificación más reciente.
+const PERSIST_DELAY = 400;
+
+function memoryBackend() {
+    const rows = new Map();
+    return {
+        getAll: async () => [...rows.values()],
+        putMany: async (entries) => entries.forEach((entry) => rows.set(entry.key, entry)),
+    };
+}
+
+function indexedDbBackend(name = 'investidata', store = 'estado') {
+    const opened = new Promise((resolve, reject) => {
+        const request = indexedDB.open(name, 1);
+        request.onupgradeneeded = () => request.result.createObjectStore(store, { keyPath: 'key' });
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+    // Una transacción por llamada: todo el lote se escribe o no se escribe
+    const run = (mode, work) => opened.then((db) => new Promise((resolve, reject) => {
+        const tx = db.transaction(store, mode);
+        const request = work(tx.objectStore(store));
+        tx.oncomplete = () => resolve(request ? request.result : undefined);
+        tx.onerror = () => reject(tx.error);
+        tx.onabort = () => reject(tx.error);
+    }));
+    return {
+        getAll: () => run('readonly', (objects) => objects.getAll()),
+        putMany: (entries) => run('readwrite', (objects) => { entries.forEach((entry) => objects.put(entry)); }),
+    };
+}
+
+function createPersistence(backend, onFlush, delay = PERSIST_DELAY) {
+    const entries = new Map(); // clave -> entrada (la copia en memoria manda)
+    const dirty = new Map(); // entradas aún no escritas en el backend local
+    let timer = null;
+
+    const ready = backend.getAll().catch((e) => {
+        console.error('Almacenamiento local no disponible; el estado se conserva solo en memoria:', e);
+        backend = memoryBackend();
+        return [];
+    }).then((rows) => rows.forEach(keepNewest));
+
+    function keepNewest(entry) {
+        const current = entries.get(entry.key);
+        if (current && current.updated >= entry.updated) return false;
+        entries.set(entry.key, entry);
+        return true;
+    }
+
+    function write(entry) {
+        entries.set(entry.key, entry);
+        dirty.set(entry.key, entry);
+        clearTimeout(timer);
+        timer = setTimeout(flush, delay);
+    }
+
+    function flush() {
+        clearTimeout(timer);
+        timer = null;
+        if (onFlush) onFlush();
+        if (!dirty.size) return Promise.resolve();
+        const batch = [...dirty.values()];
+        dirty.clear();
+        return ready.then(() => backend.putMany(batch))
+            .catch((e) => console.error('Error al guardar el estado: ', e));
+    }
+
+    return {
+        ready,
+        flush,
+        get(key) {
+            const entry = entries.get(key);
+            return entry && entry.value !== null ? entry.value : undefined;
+        },
+        set(key, value) {
+            write({ key: key, value: value, updated: Date.now(), synced: false });
+        },
+        remove(key) {
+            if (entries.has(key)) write({ key: key, value: null, updated: Date.now(), synced: false });
+        },
+        // Entradas vigentes cuya clave empieza por ``prefix``
+        entries(prefix) {
+            return [...entries.values()].filter((entry) => entry.value !== null && entry.key.startsWith(prefix));
+        },
+        unsynced() {
+            return [...entries.values()].filter((entry) => !entry.synced);
+        },
+        // Copia del servidor: entra solo lo más reciente que lo local
+        merge(remote) {
+            let changed = false;
+            Object.entries(remote).forEach(([key, entry]) => {
+                const row = { key: key, value: entry.value, updated: entry.updated, synced: true };
+                if (keepNewest(row)) {
+                    dirty.set(key, row);
+                    changed = true;
+                }
+            });
+            if (changed) flush();
+            return changed;
+        },
+        // El servidor confirmó estas entradas (si no cambiaron desde el envío)
+        markSynced(sent) {
+            sent.forEach((entry) => {
+                const current = entries.get(entry.key);
+                if (!current || current.updated !== entry.updated || current.synced) return;
+                const row = { ...current, synced: true };
+                entries.set(entry.key, row);
+                dirty.set(entry.key, row);
+            });
+            clearTimeout(timer);
+            timer = setTimeout(flush, delay);
+        },
+    };
+}
+
+// Envío al servidor: cada lote lleva todo lo que aún no confirmó, así que
+// si un mensaje se pierde (Python solo ve el último) el siguiente lo repite
+const outbox = { batch: 0, sent: [] };
+
+function sendPersistBatch() {
+    const pending = persistence.unsynced();
+    if (!pending.length) return;
+    outbox.batch += 1;
+    outbox.sent = pending;
+    sendToPython({
+        persist: {
+            batch: outbox.batch,
+            entries: pending.map((entry) => ({ key: entry.key, value: entry.value, updated: entry.updated })),
+        },
+    });
+}
+
+function receivePersisted(ack) {
+    if (ack.batch !== outbox.batch) return; // Confirmación de un lote ya superado
+    persistence.markSynced(outbox.sent);
+    outbox.sent = [];
+    // Los mensajes siguientes ya no necesitan repetir el lote confirmado
+    requestState.persist = null;
+}
+
+const persistence = createPersistence(
+    typeof indexedDB !== 'undefined' ? indexedDbBackend() : memoryBackend(),
+    () => sendPersistBatch(),
+);
+
+// Al ocultar o cerrar la página no se espera al temporizador
+window.addEventListener('pagehide', () => persistence.flush());
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') persistence.flush();
+});
+
+// Preferencias del usuario: solo se guardan si cambian
+function savePreference(name, value) {
+    if (persistence.get('usuario/' + name) !== value) persistence.set('usuario/' + name, value);
+}
+
+// La vista y la temática se restauran de la copia local, sin esperar al servidor
+function restoreAppState() {
+    persistence.ready.then(() => {
+        if (persistence.get('usuario/view') === 'analysis') {
+            navigateToAnalysis(persistence.get('usuario/topic') || 'mensajes');
+        }
+    });
+}
+
+// Trabajo sobre el caso: búsquedas guardadas y mensajes etiquetados, con claves
+// '<extracción>/busqueda/<consulta>' y '<extracción>/etiqueta/<id>'
+let currentExtraction = null;
+
+function caseKey(kind, id) {
+    return currentExtraction + '/' + kind + '/' + id;
+}
+
+function caseEntries(kind) {
+    if (!currentExtraction) return [];
+    return persistence.entries(currentExtraction + '/' + kind + '/')
+        .sort((a, b) => b.updated - a.updated)
+        .map((entry) => entry.value);
+}
+
+function receiveWorkspace(workspace) {
+    currentExtraction = workspace.extraction;
+    persistence.ready.then(() => {
+        persistence.merge(workspace.entries);
+        renderSavedSearches();
+        renderTagged();
+        drawVisibleResults(true);
+    });
+}
+
+const savedSearchesContainer = document.getElementById('saved-searches');
+const saveSearchButton = document.getElementById('save-search-button');
+
+function isSearchSaved(query) {
+    return Boolean(currentExtraction && query && persistence.get(caseKey('busqueda', query)));
+}
+
+function renderSavedSearches() {
+    const saved = caseEntries('busqueda');
+    document.getElementById('saved-searches-empty').classList.toggle('hidden', saved.length > 0);
+    savedSearchesContainer.replaceChildren(...saved.map((item) => {
+        const chip = document.createElement('span');
+        chip.className = 'inline-flex items-center text-sm bg-primary-blue/10 text-primary-blue rounded-full border border-primary-blue/30';
+        const run = document.createElement('button');
+        run.className = 'px-3 py-1 hover:underline';
+        run.textContent = item.query + (item.fuzzy ? ' ≈' : '');
+        run.title = item.fuzzy ? 'Búsqueda aproximada' : '';
+        run.addEventListener('click', () => {
+            keywordInput.value = item.query;
+            fuzzyToggle.checked = Boolean(item.fuzzy);
+            handleSearch();
+        });
+        const remove = document.createElement('button');
+        remove.className = 'pr-3 pl-1 py-1 text-gray-400 hover:text-red-600';
+        remove.title = 'Quitar';
+        remove.textContent = '×';
+        remove.addEventListener('click', () => {
+            persistence.remove(caseKey('busqueda', item.query));
+            renderSavedSearches();
+        });
+        chip.append(run, remove);
+        return chip;
+    }));
+    updateSaveSearchButton();
+}
+
+function updateSaveSearchButton() {
+    saveSearchButton.textContent = isSearchSaved(search.query) ? '★ Búsqueda guardada' : '☆ Guardar búsqueda';
+    saveSearchButton.disabled = !currentExtraction;
+}
+
+saveSearchButton.addEventListener('click', () => {
+    if (!currentExtraction || !search.query) return;
+    const key = caseKey('busqueda', search.query);
+    if (persistence.get(key)) {
+        persistence.remove(key);
+    } else {
+        persistence.set(key, { query: search.query, fuzzy: search.fuzzy, total: search.total });
+    }
+    renderSavedSearches();
+});
+
+function isTagged(hit) {
+    return Boolean(currentExtraction && persistence.get(caseKey('etiqueta', hit.id)));
+}
+
+function toggleTag(hit) {
+    if (!currentExtraction) return;
+    const key = caseKey('etiqueta', hit.id);
+    if (persistence.get(key)) {
+        persistence.remove(key);
+    } else {
+        persistence.set(key, { id: hit.id, contact: hit.contact, date: hit.date, snippet: hit.snippet });
+    }
+    renderTagged();
+    drawVisibleResults(true);
+}
+
+function renderTagged() {
+    const tagged = caseEntries('etiqueta');
+    document.getElementById('tagged-section').classList.toggle('hidden', tagged.length === 0);
+    document.getElementById('tagged-count').textContent = tagged.length.toLocaleString();
+    document.getElementById('tagged-list').replaceChildren(...tagged.map((hit) => {
+        const item = document.createElement('div');
+        item.className = 'flex items-start justify-between gap-3 p-3 bg-gray-100 rounded-lg border border-gray-200';
+        const body = document.createElement('div');
+        body.className = 'min-w-0';
+        const meta = document.createElement('p');
+        meta.className = 'text-xs text-gray-500 font-mono truncate';
+        meta.textContent = 'ID: ' + hit.id + ' | Contacto: ' + hit.contact + ' | Fecha: ' + hit.date;
+        const text = document.createElement('p');
+        text.className = 'text-gray-800 mt-1 truncate';
+        text.textContent = hit.snippet;
+        body.append(meta, text);
+        const remove = document.createElement('button');
+        remove.className = 'text-gray-400 hover:text-red-600';
+        remove.title = 'Quitar etiqueta';
+        remove.textContent = '×';
+        remove.addEventListener('click', () => toggleTag(hit));
+        item.append(body, remove);
+        return item;
+    }));
+}
+
+// --- 4. Datos de la Extracción y Búsqueda ---
+
+// Estado recibido de Python: cada slot llega una vez y se conserva entre reruns
+let theme = { tooltipOpacity: 0.9 };
+let deviceProfile = {};
+let chartData = {};
+
+function getChartData(topic) {
+    return chartData[topic] || chartData.general || [];
+}
+
+// Búsqueda: las páginas se piden a Python a medida que entran en pantalla
+const ROW_HEIGHT = 72; // Alto fijo por fila: permite calcular qué filas se ven
+const OVERSCAN = 6; // Filas extra por encima y por debajo para un scroll suave
+const MAX_ROWS = 200000; // Límite de la altura del scroll (los navegadores topan ~33M px)
+
+const search = {
+    query: null,
+    fuzzy: false, // Búsqueda aproximada: errores de escritura y variantes, por parecido
+    total: 0,
+    pageSize: 200,
+    pages: new Map(), // offset -> resultados de esa página
+    pending: null, // offset pedido y aún sin respuesta
+};
+
+function highlightedSnippet(hit) {
+    // Resaltado con las posiciones del servidor: sin regex ni innerHTML
+    const p = document.createElement('p');
+    p.className = 'text-gray-800 mt-1 truncate';
+    let last = 0;
+    if (hit.prefix) p.append('…');
+    hit.highlights.forEach(([start, end]) => {
+        p.append(hit.snippet.slice(last, start));
+        const mark = document.createElement('span');
+        mark.className = 'bg-yellow-300 font-bold text-dark-gray rounded-xs p-0.5';
+        mark.textContent = hit.snippet.slice(start, end);
+        p.appendChild(mark);
+        last = end;
+    });
+    p.append(hit.snippet.slice(last));
+    if (hit.suffix) p.append('…');
+    return p;
+}
+
+function buildResultRow(hit, index) {
+    const row = document.createElement('div');
+    row.className = 'absolute left-0 right-0 p-3 bg-gray-100 rounded-lg border border-gray-200 hover:bg-primary-blue/5 transition duration-150';
+    row.style.top = (index * ROW_HEIGHT) + 'px';
+    row.style.height = (ROW_HEIGHT - 8) + 'px';
+    const meta = document.createElement('p');
+    meta.className = 'text-xs text-gray-500 font-mono truncate';
+    if (!hit) {
+        meta.textContent = 'Cargando…';
+        row.appendChild(meta);
+        return row;
+    }
+    meta.textContent = 'ID: ' + hit.id + ' | Contacto: ' + hit.contact + ' | Fecha: ' + hit.date;
+    row.appendChild(meta);
+    row.appendChild(highlightedSnippet(hit));
+    const tag = document.createElement('button');
+    const tagged = isTagged(hit);
+    tag.className = 'absolute top-2 right-3 text-lg ' + (tagged ? 'text-yellow-500' : 'text-gray-300 hover:text-yellow-500');
+    tag.title = tagged ? 'Quitar etiqueta' : 'Etiquetar mensaje';
+    tag.textContent = tagged ? '★' : '☆';
+    tag.addEventListener('click', () => toggleTag(hit));
+    row.appendChild(tag);
+    meta.classList.add('pr-8');
+    return row;
+}
+
+function hitAt(index) {
+    const offset = index - (index % search.pageSize);
+    const page = search.pages.get(offset);
+    if (!page) {
+        requestPage(offset);
+        return null;
+    }
+    return page[index - offset];
+}
+
+const spacer = document.createElement('div');
+resultsList.appendChild(spacer);
+let drawnRange = '';
+
+function drawVisibleResults(force = false) {
+    const rows = Math.min(search.total, MAX_ROWS);
+    const first = Math.max(0, Math.floor(resultsList.scrollTop / ROW_HEIGHT) - OVERSCAN);
+    const last = Math.min(rows, Math.ceil((resultsList.scrollTop + resultsList.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+    if (!force && drawnRange === first + ':' + last) return;
+    drawnRange = first + ':' + last;
+    const fragment = document.createDocumentFragment();
+    for (let i = first; i < last; i++) fragment.appendChild(buildResultRow(hitAt(i), i));
+    spacer.replaceChildren(fragment);
+}
+
+let scrollScheduled = false;
+resultsList.addEventListener('scroll', () => {
+    if (scrollScheduled) return;
+    scrollScheduled = true;
+    requestAnimationFrame(() => {
+        scrollScheduled = false;
+        drawVisibleResults();
+    });
+});
+
+function requestPage(offset) {
+    if (search.pending !== null) return; // Una petición a la vez; el resto al llegar esta
+    search.pending = offset;
+    sendToPython({ query: search.query, offset: offset, fuzzy: search.fuzzy });
+}
+
+function showSearchSummary() {
+    searchResultsSection.classList.remove('hidden');
+    searchedKeywordSpan.textContent = search.query;
+    resultCountSpan.textContent = search.total.toLocaleString();
+    document.getElementById('result-range').textContent = search.total > MAX_ROWS
+        ? 'Se muestran los primeros ' + MAX_ROWS.toLocaleString() + ' resultados; refina la búsqueda para ver el resto.'
+        : '';
+    noResultsMessage.classList.toggle('hidden', search.total > 0);
+    updateSaveSearchButton();
+    spacer.style.height = (Math.min(search.total, MAX_ROWS) * ROW_HEIGHT) + 'px';
+}
+
+function showFuzzyVariants(variants) {
+    // Variantes del vocabulario que se buscaron por cada término escrito
+    const line = document.getElementById('fuzzy-variants');
+    const parts = Object.entries(variants || {}).map(([term, found]) =>
+        term + ': ' + (found.length ? found.join(', ') : 'sin variantes'));
+    line.textContent = parts.length ? 'Variantes buscadas — ' + parts.join(' · ') : '';
+    line.classList.toggle('hidden', !parts.length);
+}
+
+function receiveSearchPage(page) {
+    // Respuestas de una consulta anterior (u otro modo): se descartan
+    if (page.query !== search.query || Boolean(page.fuzzy) !== search.fuzzy) return;
+    if (page.offset === 0) showFuzzyVariants(page.variants);
+    search.total = page.total;
+    search.pageSize = page.limit;
+    search.pages.set(page.offset, page.hits);
+    search.pending = null;
+    showSearchSummary();
+    drawVisibleResults(true);
+}
+
+function handleSearch() {
+    const keyword = keywordInput.value.trim();
+    const fuzzy = fuzzyToggle.checked;
+    if (!keyword || (keyword === search.query && fuzzy === search.fuzzy)) return;
+
+    // La consulta se resuelve en el servidor con el índice invertido
+    search.query = keyword;
+    search.fuzzy = fuzzy;
+    search.total = 0;
+    search.pages = new Map();
+    search.pending = null;
+    resultsList.scrollTop = 0;
+    spacer.replaceChildren();
+    searchResultsSection.classList.remove('hidden');
+    searchedKeywordSpan.textContent = keyword;
+    resultCountSpan.textContent = '…';
+    noResultsMessage.classList.add('hidden');
+    showFuzzyVariants(null);
+    updateSaveSearchButton();
+    requestPage(0);
+}
+
+searchButton.addEventListener('click', handleSearch);
+keywordInput.addEventListener('keydown', (e) => {
+    if (e.key === 'Enter') handleSearch();
+});
+// Cambiar de modo repite la búsqueda actual
+fuzzyToggle.addEventListener('change', () => {
+    if (search.query) handleSearch();
+});
+
+// --- 5. Sugerencias de Palabras Clave ---
+
+// Palabras clave fijas para sugerir
+const fixedSuggestions = {
+    armas: ['pistola', 'calibre', 'fierro', 'munición', 'juguete'],
+    sexo: ['privada', 'fotos', 'cita', 'hotel', 'cliente', 'sexo'],
+    matar: ['eliminar', 'neutralizar', 'anular', 'testigos', 'silenciar'],
+    general: ['dinero', 'encuentro', 'paquete', 'coordenadas', 'dirección']
+};
+
+function renderKeywordSuggestions(topic) {
+    const container = document.getElementById('keyword-suggestions');
+    container.innerHTML = '';
+
+    const suggestions = fixedSuggestions[topic] || fixedSuggestions.general;
+
+    suggestions.forEach(keyword => {
+        const button = document.createElement('button');
+        button.textContent = keyword;
+        button.className = 'px-3 py-1 text-sm bg-gray-200 text-dark-gray rounded-full hover:bg-secondary-cyan hover:text-dark-gray transition duration-150 shadow-xs';
+        button.onclick = () => {
+            keywordInput.value = keyword;
+            handleSearch();
+        };
+        container.appendChild(button);
+    });
+}
+
+// --- 6. Visualización con D3.js (Gráfico de Barras) ---
+
+let lastChartKey = null; // Evita redibujar si no cambió el tema ni el tamaño
+let tooltip = null; // Un único tooltip reutilizado entre renderizados
+
+function renderBarChart(data) {
+    const container = d3.select("#chart-container");
+    const svg = d3.select("#bar-chart");
+
+    const chartKey = currentFocusTopic + ':' + document.getElementById('chart-container').offsetWidth;
+    if (chartKey === lastChartKey) return;
+    lastChartKey = chartKey;
+
+    // Limpiar el SVG anterior
+    svg.selectAll('*').remove();
+
+    const margin = { top: 20, right: 30, bottom: 50, left: 60 };
+
+    // Hacer el gráfico responsivo
+    const containerWidth = document.getElementById('chart-container').offsetWidth;
+    const containerHeight = document.getElementById('chart-container').offsetHeight;
+
+    const width = containerWidth - margin.left - margin.right;
+    const height = containerHeight - margin.top - margin.bottom;
+
+    svg.attr("width", containerWidth)
+       .attr("height", containerHeight);
+
+    const chartGroup = svg.append("g")
+        .attr("transform", `translate(${margin.left},${margin.top})`);
+
+    // 1. Escalas
+    const x = d3.scaleBand()
+        .domain(data.map(d => d.keyword))
+        .range([0, width])
+        .padding(0.3);
+
+    const y = d3.scaleLinear()
+        .domain([0, (d3.max(data, d => d.count) || 1) * 1.1])
+        .range([height, 0]);
+
+    // Tooltip
+    if (!tooltip) {
+        tooltip = d3.select("body").append("div")
+            .attr("class", "tooltip");
+    }
+
+    // 2. Barras
+    chartGroup.selectAll(".bar")
+        .data(data)
+        .enter().append("rect")
+        .attr("class", "bar-chart")
+        .attr("x", d => x(d.keyword))
+        .attr("y", d => y(d.count))
+        .attr("width", x.bandwidth())
+        .attr("height", d => height - y(d.count))
+        .on("mouseover", function(event, d) {
+            d3.select(this).attr("fill", "#1a56db"); // Hover color
+            tooltip.transition()
+                .duration(200)
+                .style("opacity", theme.tooltipOpacity);
+            tooltip.html(`Coincidencias: <strong>${d.count}</strong>`)
+                .style("left", (event.pageX + 10) + "px")
+                .style("top", (event.pageY - 28) + "px");
+        } )
+        .on("mouseout", function() {
+            d3.select(this).attr("fill", "#06b6d4"); // Restore color
+            tooltip.transition()
+                .duration(500)
+                .style("opacity", 0);
+        });
+
+    // 3. Ejes
+    // Eje X (Palabras Clave)
+    chartGroup.append("g")
+        .attr("transform", `translate(0,${height})` )
+        .call(d3.axisBottom(x))
+        .selectAll("text")
+        .style("text-anchor", "middle")
+        .attr("class", "text-dark-gray");
+
+    // Etiqueta del Eje X
+    chartGroup.append("text")
+        .attr("transform", `translate(${width / 2}, ${height + margin.bottom - 10})` )
+        .style("text-anchor", "middle")
+        .text("Palabras Clave Detectadas")
+        .attr("class", "text-sm font-semibold text-dark-gray");
+
+    // Eje Y (Frecuencia)
+    chartGroup.append("g")
+        .call(d3.axisLeft(y).ticks(5))
+        .attr("class", "text-dark-gray");
+
+    // Etiqueta del Eje Y
+    chartGroup.append("text")
+        .attr("transform", "rotate(-90)")
+        .attr("y", 0 - margin.left)
+        .attr("x", 0 - (height / 2))
+        .attr("dy", "1em")
+        .style("text-anchor", "middle")
+        .text("Frecuencia Absoluta")
+        .attr("class", "text-sm font-semibold text-dark-gray");
+}
+
+// --- 7. Renderizado del Perfil del Dispositivo ---
+
+const PROFILE_LABELS = [
+    ['IMEI', 'IMEI Principal'],
+    ['Marca', 'Marca / Fabricante'],
+    ['Modelo', 'Modelo Exacto'],
+    ['Usuario', 'Nombre de Usuario'],
+];
+
+function renderDeviceProfile() {
+    const container = document.getElementById('device-profile-data');
+    container.innerHTML = ''; // Limpiar
+
+    PROFILE_LABELS.forEach(([field, label]) => {
+        const itemDiv = document.createElement('div');
+        // Ajustar el estilo para el diseño de la grilla
+        itemDiv.className = 'p-3 bg-gray-50 rounded-lg border border-gray-200 shadow-inner';
+        const labelP = document.createElement('p');
+        labelP.className = 'text-xs font-semibold text-primary-blue';
+        labelP.textContent = label;
+        const valueP = document.createElement('p');
+        valueP.className = 'text-sm font-mono text-dark-gray break-all mt-0.5';
+        valueP.textContent = deviceProfile[field] ?? 'No disponible';
+        itemDiv.append(labelP, valueP);
+        container.appendChild(itemDiv);
+    });
+}
+
+// --- 8. Red de Contactos ---
+
+const contactsSection = document.getElementById('contacts-section');
+let egoSimulation = null;
+
+function showContacts(visible) {
+    contactsSection.classList.toggle('hidden', !visible);
+    if (visible && !requestState.graph) sendToPython({ graph: true });
+}
+
+function renderContacts(data) {
+    document.getElementById('contacts-summary').textContent =
+        data.nodes.toLocaleString() + ' contactos, ' + data.edges.toLocaleString() + ' vínculos' +
+        (data.approximate ? ' (intermediación aproximada por muestreo)' : '');
+    const rows = document.createDocumentFragment();
+    data.contacts.forEach((contact) => {
+        const row = document.createElement('tr');
+        row.className = 'border-t border-gray-100 cursor-pointer hover:bg-primary-blue/5';
+        [contact.contact, contact.strength.toLocaleString(), contact.degree,
+         contact.betweenness.toFixed(3), contact.community ?? '—'].forEach((value, i) => {
+            const cell = document.createElement('td');
+            cell.className = i === 0 ? 'py-1 pr-2 font-mono break-all' : 'py-1 pr-2';
+            cell.textContent = value;
+            row.appendChild(cell);
+        });
+        row.onclick = () => sendToPython({ ego: contact.contact });
+        rows.appendChild(row);
+    });
+    document.getElementById('contacts-table').replaceChildren(rows);
+}
+
+function renderEgoNetwork(ego) {
+    document.getElementById('ego-center').textContent = ego.center;
+    const element = document.getElementById('ego-graph');
+    const svg = d3.select(element);
+    svg.selectAll('*').remove();
+    if (egoSimulation) egoSimulation.stop();
+
+    const color = d3.scaleOrdinal(d3.schemeTableau10);
+    const maxWeight = d3.max(ego.links, d => d.weight) || 1;
+    const link = svg.append('g')
+        .attr('stroke', '#9ca3af')
+        .selectAll('line')
+        .data(ego.links)
+        .join('line')
+        .attr('stroke-width', d => 1 + 3 * d.weight / maxWeight);
+    const node = svg.append('g')
+        .selectAll('circle')
+        .data(ego.nodes)
+        .join('circle')
+        .attr('r', d => d.id === ego.center ? 9 : 6)
+        .attr('fill', d => d.community === null ? '#1f2937' : color(d.community))
+        .attr('class', 'cursor-pointer')
+        .on('click', (event, d) => sendToPython({ ego: d.id }));
+    node.append('title').text(d => d.id);
+
+    egoSimulation = d3.forceSimulation(ego.nodes)
+        .force('link', d3.forceLink(ego.links).id(d => d.id).distance(60))
+        .force('charge', d3.forceManyBody().strength(-120))
+        .force('center', d3.forceCenter(element.clientWidth / 2, element.clientHeight / 2))
+        .on('tick', () => {
+            link.attr('x1', d => d.source.x).attr('y1', d => d.source.y)
+                .attr('x2', d => d.target.x).attr('y2', d => d.target.y);
+            node.attr('cx', d => d.x).attr('cy', d => d.y);
+        });
+}
+
+// --- 9. Mapa de Ubicaciones ---
+
+// Python agrupa los puntos por vista: al acercar o mover se pide la vista nueva
+const locationSection = document.getElementById('location-section');
+const mapElement = document.getElementById('location-map');
+const mapSvg = d3.select(mapElement);
+const mapLayer = mapSvg.append('g');
+const mapProjection = d3.geoMercator();
+let mapTransform = d3.zoomIdentity;
+let mapFitted = false;
+let mapTimer = null;
+
+function clusterRadius(d) {
+    return Math.min(4 + 2 * Math.log2(d.count), 20);
+}
+
+mapSvg.call(d3.zoom()
+    .scaleExtent([1, 1 << 18])
+    .on('zoom', (event) => {
+        mapTransform = event.transform;
+        mapLayer.attr('transform', mapTransform);
+        // Tamaño constante en pantalla
+        mapLayer.selectAll('circle.cluster')
+            .attr('r', d => clusterRadius(d) / mapTransform.k)
+            .attr('stroke-width', 1 / mapTransform.k);
+        mapLayer.selectAll('circle.near-ring').attr('stroke-width', 2 / mapTransform.k);
+        drawPlaces();
+        clearTimeout(mapTimer);
+        mapTimer = setTimeout(requestViewport, 200);
+    }));
+
+mapSvg.on('click', (event) => {
+    if (!mapFitted) return;
+    const [lon, lat] = mapProjection.invert(mapTransform.invert(d3.pointer(event, mapElement)));
+    const radius = Number(document.getElementById('radius-input').value) || 500;
+    sendToPython({ near: { lat: lat, lon: lon, radius: radius } });
+});
+
+function showLocations(visible) {
+    locationSection.classList.toggle('hidden', !visible);
+    if (visible && !requestState.viewport) {
+        sendToPython({ viewport: { bbox: null, width: mapElement.clientWidth } });
+    }
+    if (visible && !requestState.movement) requestMovement();
+}
+
+function requestViewport() {
+    if (!mapFitted) return;
+    const [west, north] = mapProjection.invert(mapTransform.invert([0, 0]));
+    const [east, south] = mapProjection.invert(mapTransform.invert([mapElement.clientWidth, mapElement.clientHeight]));
+    sendToPython({ viewport: { bbox: [south, west, north, east], width: mapElement.clientWidth } });
+}
+
+function renderClusters(data) {
+    document.getElementById('location-summary').textContent = data.total
+        ? data.total.toLocaleString() + ' ubicaciones; ' + data.clusters.length.toLocaleString() + ' grupos en la vista'
+        : 'La extracción no contiene ubicaciones con coordenadas.';
+    if (!data.bounds) return;
+    if (!mapFitted) {
+        let [south, west, north, east] = data.bounds;
+        // Un único punto no tiene extensión: se le da un margen mínimo
+        const pad = 0.005;
+        if (north - south < pad && east - west < pad) {
+            south -= pad; north += pad; west -= pad; east += pad;
+        }
+        mapProjection.fitExtent(
+            [[20, 20], [mapElement.clientWidth - 20, mapElement.clientHeight - 20]],
+            { type: 'MultiPoint', coordinates: [[west, south], [east, north]] }
+        );
+        mapFitted = true;
+        drawPlaces();
+    }
+    mapLayer.selectAll('circle.cluster')
+        .data(data.clusters)
+        .join('circle')
+        .attr('class', 'cluster')
+        .attr('cx', d => mapProjection([d.lon, d.lat])[0])
+        .attr('cy', d => mapProjection([d.lon, d.lat])[1])
+        .attr('r', d => clusterRadius(d) / mapTransform.k)
+        .attr('fill', '#06b6d4')
+        .attr('fill-opacity', 0.7)
+        .attr('stroke', '#1a56db')
+        .attr('stroke-width', 1 / mapTransform.k)
+        .selectAll('title')
+        .data(d => [d])
+        .join('title')
+        .text(d => d.count === 1 ? 'Ubicación ' + d.id : d.count.toLocaleString() + ' ubicaciones');
+}
+
+function renderNearby(data) {
+    document.getElementById('near-summary').textContent =
+        data.total.toLocaleString() + ' ubicaciones a menos de ' + data.radius + ' m de (' +
+        data.lat.toFixed(5) + ', ' + data.lon.toFixed(5) + ')';
+    const list = document.createDocumentFragment();
+    data.fixes.forEach((fix) => {
+        const row = document.createElement('p');
+        row.textContent = '#' + fix.id + '  ' + fix.date + '  ' + fix.distance + ' m';
+        list.appendChild(row);
+    });
+    document.getElementById('near-list').replaceChildren(list);
+
+    // Círculo del radio consultado, en unidades de la proyección
+    const [cx, cy] = mapProjection([data.lon, data.lat]);
+    const dlat = data.radius / 111320;
+    const r = Math.abs(mapProjection([data.lon, data.lat + dlat])[1] - cy);
+    mapLayer.selectAll('circle.near-ring')
+        .data([data])
+        .join('circle')
+        .attr('class', 'near-ring')
+        .attr('cx', cx)
+        .attr('cy', cy)
+        .attr('r', r)
+        .attr('fill', 'none')
+        .attr('stroke', '#f87171')
+        .attr('stroke-width', 2 / mapTransform.k);
+}
+
+// Lugares frecuentes: Python detecta estancias con el radio y la permanencia
+// elegidos; cada combinación queda en caché en el servidor
+let movementData = null;
+
+function requestMovement() {
+    const radius = Number(document.getElementById('stay-radius-input').value) || 200;
+    const minutes = Number(document.getElementById('stay-dwell-input').value) || 20;
+    document.getElementById('movement-summary').textContent = 'Detectando estancias...';
+    sendToPython({ movement: { radius: radius, dwell: Math.round(minutes * 60) } });
+}
+
+['stay-radius-input', 'stay-dwell-input'].forEach((id) => {
+    document.getElementById(id).addEventListener('change', requestMovement);
+});
+
+function renderMovement(data) {
+    movementData = data;
+    document.getElementById('movement-summary').textContent = data.fixes
+        ? data.stays.toLocaleString() + ' estancias de al menos ' + Math.round(data.dwell / 60) + ' min en ' +
+          data.places.length.toLocaleString() + ' lugares; ' + data.trips.toLocaleString() +
+          ' trayectos (' + data.distance_km.toLocaleString() + ' km)'
+        : 'La extracción no contiene ubicaciones con fecha.';
+
+    const rows = document.createDocumentFragment();
+    data.places.forEach((place, i) => {
+        const row = document.createElement('tr');
+        row.className = 'border-b border-gray-100 hover:bg-gray-50 cursor-pointer';
+        [
+            'L' + (i + 1),
+            place.lat.toFixed(5) + ', ' + place.lon.toFixed(5),
+            place.visits.toLocaleString(),
+            place.hours.toLocaleString(),
+            place.first,
+            place.last,
+        ].forEach((text, j) => {
+            const cell = document.createElement('td');
+            cell.className = (j === 0 ? 'py-1 font-medium' : '') + (j === 2 || j === 3 ? ' text-right' : '') + (j === 1 ? ' font-mono text-xs' : '');
+            cell.textContent = text;
+            row.appendChild(cell);
+        });
+        // Al elegir un lugar se consultan las ubicaciones a su alrededor
+        row.addEventListener('click', () => {
+            sendToPython({ near: { lat: place.lat, lon: place.lon, radius: data.radius } });
+        });
+        rows.appendChild(row);
+    });
+    document.getElementById('places-table').replaceChildren(rows);
+    drawPlaces();
+}
+
+function drawPlaces() {
+    if (!mapFitted || !movementData) return;
+    const size = 10 / mapTransform.k;
+    mapLayer.selectAll('rect.place')
+        .data(movementData.places)
+        .join('rect')
+        .attr('class', 'place')
+        .attr('x', d => mapProjection([d.lon, d.lat])[0] - size / 2)
+        .attr('y', d => mapProjection([d.lon, d.lat])[1] - size / 2)
+        .attr('width', size)
+        .attr('height', size)
+        .attr('fill', '#f59e0b')
+        .attr('stroke', '#92400e')
+        .attr('stroke-width', 1 / mapTransform.k)
+        .selectAll('title')
+        .data((d, i) => [[d, i]])
+        .join('title')
+        .text(([d, i]) => 'L' + (i + 1) + ': ' + d.visits + ' visitas, ' + d.hours + ' h');
+}
+
+// --- 10. Línea de Tiempo de Actividad ---
+
+// Python responde desde intervalos precalculados (minuto, hora, día) y reduce
+// cada serie a unos pocos miles de puntos; acercarse es pedir otro rango
+const TIMELINE_COLORS = { mensajes: '#1a56db', llamadas: '#f87171', ubicaciones: '#06b6d4' };
+const TIMELINE_LEVELS = { minuto: 'por minuto', hora: 'por hora', dia: 'por día' };
+let timelineData = null;
+
+function showTimeline() {
+    if (!requestState.timeline) requestTimeline(null, null);
+}
+
+function requestTimeline(start, end) {
+    document.getElementById('timeline-summary').textContent = 'Cargando actividad...';
+    sendToPython({ timeline: { start: start, end: end } });
+}
+
+document.getElementById('timeline-reset').addEventListener('click', () => requestTimeline(null, null));
+
+function renderTimeline(data) {
+    timelineData = data;
+    const svg = d3.select('#timeline-chart');
+    svg.selectAll('*').remove();
+    const kinds = Object.keys(data.series);
+    if (!kinds.length) {
+        document.getElementById('timeline-summary').textContent = 'La extracción no contiene fechas.';
+        renderHeatmap(data.heatmap);
+        return;
+    }
+    document.getElementById('timeline-summary').textContent =
+        new Date(data.start).toLocaleString() + ' – ' + new Date(data.end).toLocaleString() + ' (' +
+        TIMELINE_LEVELS[data.level] + '): ' +
+        kinds.map(kind => data.totals[kind].toLocaleString() + ' ' + kind).join(', ');
+
+    const element = document.getElementById('timeline-chart');
+    const margin = { top: 10, right: 20, bottom: 30, left: 50 };
+    const width = element.clientWidth - margin.left - margin.right;
+    const height = element.clientHeight - margin.top - margin.bottom;
+    const chartGroup = svg.append('g').attr('transform', `translate(${margin.left},${margin.top})`);
+
+    const x = d3.scaleTime().domain([data.start, data.end]).range([0, width]);
+    const y = d3.scaleLinear()
+        .domain([0, d3.max(kinds, kind => d3.max(data.series[kind], p => p[1])) || 1])
+        .range([height, 0])
+        .nice();
+
+    chartGroup.append('g').attr('transform', `translate(0,${height})`).call(d3.axisBottom(x).ticks(8));
+    chartGroup.append('g').call(d3.axisLeft(y).ticks(4));
+
+    const line = d3.line().x(p => x(p[0])).y(p => y(p[1]));
+    kinds.forEach((kind) => {
+        chartGroup.append('path')
+            .datum(data.series[kind])
+            .attr('fill', 'none')
+            .attr('stroke', TIMELINE_COLORS[kind])
+            .attr('stroke-width', 1.2)
+            .attr('d', line)
+            .append('title')
+            .text(kind);
+    });
+
+    // Leyenda
+    kinds.forEach((kind, i) => {
+        const item = chartGroup.append('g').attr('transform', `translate(${width - 110},${i * 16})`);
+        item.append('rect').attr('width', 10).attr('height', 10).attr('fill', TIMELINE_COLORS[kind]);
+        item.append('text').attr('x', 14).attr('y', 9).attr('class', 'text-xs').text(kind);
+    });
+
+    // Arrastrar selecciona el rango que se pide a Python
+    chartGroup.append('g').call(d3.brushX()
+        .extent([[0, 0], [width, height]])
+        .on('end', (event) => {
+            if (!event.selection) return;
+            const [from, to] = event.selection.map(x.invert);
+            requestTimeline(Math.floor(from / 1000), Math.ceil(to / 1000));
+        }));
+
+    renderHeatmap(data.heatmap);
+}
+
+function renderHeatmap(heatmap) {
+    const svg = d3.select('#activity-heatmap');
+    svg.selectAll('*').remove();
+    const element = document.getElementById('activity-heatmap');
+    const margin = { top: 20, right: 10, bottom: 10, left: 40 };
+    const cellWidth = (element.clientWidth - margin.left - margin.right) / 24;
+    const cellHeight = (element.clientHeight - margin.top - margin.bottom) / 7;
+    const chartGroup = svg.append('g').attr('transform', `translate(${margin.left},${margin.top})`);
+    const color = d3.scaleSequential(d3.interpolateBlues)
+        .domain([0, d3.max(heatmap.counts, row => d3.max(row)) || 1]);
+
+    const cells = heatmap.counts.flatMap((row, day) => row.map((count, hour) => ({ day, hour, count })));
+    chartGroup.selectAll('rect')
+        .data(cells)
+        .join('rect')
+        .attr('x', d => d.hour * cellWidth)
+        .attr('y', d => d.day * cellHeight)
+        .attr('width', cellWidth - 1)
+        .attr('height', cellHeight - 1)
+        .attr('fill', d => color(d.count))
+        .append('title')
+        .text(d => heatmap.weekdays[d.day] + ' ' + d.hour + ':00 — ' + d.count.toLocaleString() + ' eventos');
+
+    chartGroup.selectAll('text.weekday')
+        .data(heatmap.weekdays)
+        .join('text')
+        .attr('class', 'weekday text-xs')
+        .attr('x', -6)
+        .attr('y', (d, i) => i * cellHeight + cellHeight / 2 + 4)
+        .style('text-anchor', 'end')
+        .text(d => d);
+    chartGroup.selectAll('text.hour')
+        .data(d3.range(0, 24, 3))
+        .join('text')
+        .attr('class', 'hour text-xs')
+        .attr('x', d => d * cellWidth + cellWidth / 2)
+        .attr('y', -6)
+        .style('text-anchor', 'middle')
+        .text(d => d + 'h');
+}
+
+// --- 11. Catálogo Multimedia ---
+
+// Python genera las miniaturas de la página en segundo plano; mientras haya
+// pendientes se vuelve a pedir la misma página (con otro tick)
+const MEDIA_PAGE = 48;
+const MEDIA_POLL_MS = 800;
+const MEDIA_MAX_POLLS = 40;
+const MEDIA_ICONS = { video: '🎬', audio: '🎵', documento: '📄', otro: '📁', imagen: '🖼️' };
+const mediaSection = document.getElementById('media-section');
+let mediaPolls = 0;
+let mediaTimer = null;
+let duplicatesTimer = null;
+
+function showMedia(visible) {
+    mediaSection.classList.toggle('hidden', !visible);
+    if (visible && !requestState.media) requestMedia(0);
+    if (visible && !requestState.duplicates) sendToPython({ duplicates: { tick: 0 } });
+}
+
+function requestMedia(offset) {
+    clearTimeout(mediaTimer);
+    mediaPolls = 0;
+    sendToPython({ media: { offset: Math.max(offset, 0), kind: document.getElementById('media-kind').value || null, tick: 0 } });
+}
+
+document.getElementById('media-kind').addEventListener('change', () => requestMedia(0));
+document.getElementById('media-prev').addEventListener('click', () => {
+    if (requestState.media) requestMedia(requestState.media.offset - MEDIA_PAGE);
+});
+document.getElementById('media-next').addEventListener('click', () => {
+    if (requestState.media) requestMedia(requestState.media.offset + MEDIA_PAGE);
+});
+
+function formatBytes(bytes) {
+    if (bytes === null || bytes === undefined) return '';
+    const units = ['B', 'KB', 'MB', 'GB', 'TB'];
+    let i = 0;
+    while (bytes >= 1024 && i < units.length - 1) { bytes /= 1024; i += 1; }
+    return bytes.toFixed(i ? 1 : 0) + ' ' + units[i];
+}
+
+function renderMedia(data) {
+    const summary = data.summary;
+    document.getElementById('media-summary').textContent = summary.files
+        ? summary.files.toLocaleString() + ' archivos (' + formatBytes(summary.bytes) + '): ' +
+          Object.entries(summary.kinds).map(([kind, n]) => n.toLocaleString() + ' ' + kind).join(', ') +
+          (summary.root ? '' : '. Indica la carpeta de archivos exportados para ver miniaturas.')
+        : 'La extracción no contiene hojas de archivos.';
+    document.getElementById('media-range').textContent = data.total
+        ? (data.offset + 1).toLocaleString() + '–' + (data.offset + data.items.length).toLocaleString() +
+          ' de ' + data.total.toLocaleString()
+        : '';
+
+    const cards = document.createDocumentFragment();
+    data.items.forEach((item) => {
+        const card = document.createElement('div');
+        card.className = 'border border-gray-200 rounded-lg p-2 text-xs text-gray-600';
+        card.title = item.path || item.name;
+        const preview = document.createElement('div');
+        preview.className = 'h-24 flex items-center justify-center bg-gray-50 rounded-sm mb-1 overflow-hidden';
+        if (item.thumb) {
+            const img = document.createElement('img');
+            img.src = item.thumb;
+            img.alt = item.name;
+            img.className = 'max-h-24 object-contain';
+            preview.appendChild(img);
+        } else {
+            preview.textContent = item.status === 'pendiente' ? '…' : MEDIA_ICONS[item.kind];
+            preview.classList.add('text-2xl', 'text-gray-400');
+        }
+        const name = document.createElement('p');
+        name.className = 'font-medium text-dark-gray truncate';
+        name.textContent = item.name;
+        const meta = document.createElement('p');
+        meta.textContent = [formatBytes(item.size), item.date].filter(Boolean).join(' · ');
+        card.append(preview, name, meta);
+        cards.appendChild(card);
+    });
+    document.getElementById('media-grid').replaceChildren(cards);
+
+    clearTimeout(mediaTimer);
+    if (data.pending && mediaPolls < MEDIA_MAX_POLLS) {
+        mediaTimer = setTimeout(() => {
+            mediaPolls += 1;
+            sendToPython({ media: { ...requestState.media, tick: mediaPolls } });
+        }, MEDIA_POLL_MS);
+    }
+}
+
+function renderDuplicates(data) {
+    const dedup = data.dedup;
+    document.getElementById('duplicates-summary').textContent =
+        data.exact_total.toLocaleString() + ' grupos de copias exactas (hash del reporte); ' +
+        data.similar_total.toLocaleString() + ' grupos de imágenes parecidas' +
+        (dedup.running ? ' (analizando ' + dedup.done.toLocaleString() + ' de ' + dedup.total.toLocaleString() + '...)' : '');
+
+    const list = document.createDocumentFragment();
+    [['Exactas', data.exact], ['Parecidas', data.similar]].forEach(([label, groups]) => {
+        groups.forEach((group) => {
+            const row = document.createElement('p');
+            row.textContent = label + ': ' + group.map(file => '#' + file.id + ' ' + file.name).join(', ');
+            list.appendChild(row);
+        });
+    });
+    document.getElementById('duplicates-list').replaceChildren(list);
+
+    clearTimeout(duplicatesTimer);
+    if (dedup.running) {
+        duplicatesTimer = setTimeout(() => {
+            sendToPython({ duplicates: { tick: requestState.duplicates.tick + 1 } });
+        }, 3000);
+    }
+}
+
+// --- 12. Comunicación con Streamlit ---
+
+// Identifica este montaje: si el iframe se recarga, Python reenvía todos los slots
+const mountId = Math.random().toString(36).slice(2);
+let messageSeq = 0;
+// Python solo ve el último mensaje: cada uno lleva el estado completo de la página
+const requestState = {
+    query: null, offset: 0, fuzzy: false, graph: false, ego: null, viewport: null, near: null,
+    movement: null, timeline: null, media: null, duplicates: null,
+    user: userId, persist: null,
+};
+
+function postToStreamlit(type, data) {
+    window.parent.postMessage({ isStreamlitMessage: true, type: type, ...data }, '*');
+}
+
+function sendToPython(changes) {
+    Object.assign(requestState, changes);
+    messageSeq += 1;
+    postToStreamlit('streamlit:setComponentValue', {
+        value: { mount: mountId, seq: messageSeq, ...requestState },
+        dataType: 'json',
+    });
+}
+
+function applyTheme(values) {
+    theme = values;
+    const root = document.documentElement.style;
+    root.setProperty('--default-shadow', values.defaultShadow);
+    root.setProperty('--hover-shadow', values.hoverShadow);
+    root.setProperty('--transition-short', values.transitionShort);
+    root.setProperty('--transition-medium', values.transitionMedium);
+    root.setProperty('--tooltip-font-size', values.tooltipFontSize);
+}
+
+// Cada render trae solo los slots que cambiaron; los demás llegan en null
+function onRender(args) {
+    if (args.theme) applyTheme(args.theme);
+    if (args.profile) {
+        deviceProfile = args.profile;
+        renderDeviceProfile();
+    }
+    if (args.chart) {
+        chartData = args.chart;
+        lastChartKey = null;
+        if (currentView === 'analysis') renderBarChart(getChartData(currentFocusTopic));
+    }
+    if (args.search) receiveSearchPage(args.search);
+    if (args.contacts) renderContacts(args.contacts);
+    if (args.ego) renderEgoNetwork(args.ego);
+    if (args.map) renderClusters(args.map);
+    if (args.near) renderNearby(args.near);
+    if (args.movement) renderMovement(args.movement);
+    if (args.timeline) renderTimeline(args.timeline);
+    if (args.media) renderMedia(args.media);
+    if (args.duplicates) renderDuplicates(args.duplicates);
+    if (args.workspace) receiveWorkspace(args.workspace);
+    if (args.persisted) receivePersisted(args.persisted);
+}
+
+window.addEventListener('message', (event) => {
+    if (event.data && event.data.type === 'streamlit:render') onRender(event.data.args);
+});
+
+// Alto del iframe ajustado al contenido, sin barra de scroll interna
+new ResizeObserver(() => {
+    postToStreamlit('streamlit:setFrameHeight', { height: document.body.scrollHeight });
+}).observe(document.body);
+
+// Inicialización de la vista
+renderDeviceProfile();
+restoreAppState();
+postToStreamlit('streamlit:componentReady', { apiVersion: 1 });
+sendToPython({});
+
+// Escucha de resize para hacer el gráfico responsivo (con debounce:
+// se redibuja una sola vez cuando el usuario termina de redimensionar)
+let resizeTimer = null;
+window.addEventListener('resize', () => {
+    clearTimeout(resizeTimer);
+    resizeTimer = setTimeout(() => {
+        if (currentView === 'analysis') {
+            renderBarChart(getChartData(currentFocusTopic));
+            if (timelineData) renderTimeline(timelineData);
+        }
+    }, 150);
+});
+
@@ -0,0 +1,245 @@
+"""Grafo de comunicaciones entre contactos (llamadas y mensajes) sobre networkx.
+
+Es un multigrafo no dirigido con una arista por par de nodos y canal
+(``mensaje``, ``llamada``), con ``peso`` (número de eventos) y la fecha del
+primer y último evento. El dispositivo analizado es el nodo :data:`OWNER`;
+los participantes de un mismo chat grupal quedan además unidos entre sí.
+
+Se construye por bloques (:meth:`ContactGraph.add_sheet`), a medida que la
+ingesta escribe las hojas (:mod:`investidata.jobs`), y las métricas caras
+(centralidad, comunidades) se calculan una vez por versión del grafo. Por
+encima de :data:`APPROX_EDGES` aristas (o de :data:`APPROX_WORK`) la
+intermediación se aproxima con una muestra de :data:`APPROX_SAMPLES` nodos
+de origen.
+"""
+
+import re
+from itertools import combinations
+
+import networkx as nx
+import pandas as pd
+
+from investidata.sheets import find_column, find_sheets
+
+OWNER = "Este dispositivo"
+APPROX_EDGES = 100_000
+# Trabajo de la intermediación exacta (nodos × aristas) a partir del cual
+# también se aproxima: en grafos densos el umbral de aristas llega tarde
+APPROX_WORK = 50_000_000
+APPROX_SAMPLES = 64
+# Chats con más participantes no generan aristas entre todos ellos
+MAX_GROUP_SIZE = 50
+KEY_CONTACTS = 25
+MAX_EGO_NODES = 150
+# Filas por bloque al recorrer las hojas (las mismas que la ingesta en streaming)
+DEFAULT_CHUNK_SIZE = 50_000
+_SPLIT_RE = re.compile(r"[;\n\r]+")
+
+
+def participants(raw) -> list[str]:
+    """Contactos de una celda ``Participantes``/``De`` (uno por línea o con ``;``)."""
+    people = []
+    for part in _SPLIT_RE.split(str(raw)):
+        part = part.strip()
+        if part and part not in people:
+            people.append(part)
+    return people
+
+
+def _earliest(a, b):
+    return min((x for x in (a, b) if pd.notna(x)), default=pd.NaT)
+
+
+def _latest(a, b):
+    return max((x for x in (a, b) if pd.notna(x)), default=pd.NaT)
+
+
+class ContactGraph:
+    def __init__(self):
+        self.graph = nx.MultiGraph()
+        self.version = 0
+        self._cache = {}
+
+    def __len__(self):
+        return self.graph.number_of_nodes()
+
+    @property
+    def approximate(self) -> bool:
+        edges = self.graph.number_of_edges()
+        return edges > APPROX_EDGES or edges * self.graph.number_of_nodes() > APPROX_WORK
+
+    # --- Construcción incremental ---
+
+    def add_events(self, contacts: pd.Series, dates: pd.Series, kind: str):
+        """Agrega un bloque de eventos (una fila por mensaje o llamada)."""
+        events = pd.DataFrame({
+            "contacto": contacts.to_numpy(dtype=object),
+            "fecha": pd.to_datetime(dates, errors="coerce").to_numpy(),
+        }).dropna(subset=["contacto"])
+        if events.empty:
+            return
+        # Primero por valor de la celda: los pares se expanden una vez por
+        # conjunto de participantes y no una vez por evento
+        groups = events.groupby("contacto", sort=False)["fecha"].agg(["size", "min", "max"])
+        for raw, count, first, last in groups.itertuples(name=None):
+            people = participants(raw)
+            pairs = [(OWNER, person) for person in people]
+            if 1 < len(people) <= MAX_GROUP_SIZE:
+                pairs.extend(combinations(people, 2))
+            for u, v in pairs:
+                self._add_edge(u, v, kind, int(count), first, last)
+        self.version += 1
+        self._cache.clear()
+
+    def _add_edge(self, u, v, kind, count, first, last):
+        if self.graph.has_edge(u, v, key=kind):
+            data = self.graph[u][v][kind]
+            data["peso"] += count
+            data["primero"] = _earliest(data["primero"], first)
+            data["ultimo"] = _latest(data["ultimo"], last)
+        else:
+            self.graph.add_edge(u, v, key=kind, peso=count, primero=first, ultimo=last)
+
+    def add_sheet(self, name, df: pd.DataFrame):
+        """Agrega las filas ``df`` de la hoja ``name`` si es de mensajes o de llamadas.
+
+        Acepta la hoja entera o por partes (p. ej. cada bloque que escribe la
+        ingesta, ver :class:`investidata.jobs.IngestJob`): el grafo es el
+        mismo si las hojas llegan en el orden del libro.
+        """
+        if find_sheets({name: df}, "mensajes"):
+            # Como en messages_frame: solo hojas con texto
+            if find_column(df, "texto") is None:
+                return
+            kind = "mensaje"
+        elif find_sheets({name: df}, "llamadas"):
+            kind = "llamada"
+        else:
+            return
+        contact_col = find_column(df, "contacto")
+        if contact_col is None:
+            return
+        date_col = find_column(df, "fecha")
+        dates = df[date_col] if date_col is not None else pd.Series(pd.NaT, index=df.index)
+        self.add_events(df[contact_col], dates, kind)
+
+    @classmethod
+    def from_frames(cls, frames: dict[str, pd.DataFrame], chunk_size=DEFAULT_CHUNK_SIZE):
+        """Grafo de todas las hojas de mensajes y llamadas, leídas por bloques."""
+        graph = cls()
+        for name, df in frames.items():
+            for start in range(0, len(df), chunk_size):
+                graph.add_sheet(name, df.iloc[start:start + chunk_size])
+        return graph
+
+    # --- Métricas (en caché por versión del grafo) ---
+
+    def _cached(self, name, compute):
+        if name not in self._cache:
+            self._cache[name] = compute()
+        return self._cache[name]
+
+    def collapsed(self) -> nx.Graph:
+        """Grafo simple con el ``peso`` de todos los canales sumado."""
+        def compute():
+            simple = nx.Graph()
+            simple.add_nodes_from(self.graph)
+            for u, v, weight in self.graph.edges(data="peso"):
+                if simple.has_edge(u, v):
+                    simple[u][v]["peso"] += weight
+                else:
+                    simple.add_edge(u, v, peso=weight)
+            return simple
+        return self._cached("collapsed", compute)
+
+    def contacts_only(self) -> nx.Graph:
+        # Sin el nodo del dispositivo: está unido a todos, así que todos los
+        # caminos pasarían por él y fundiría todas las comunidades en una
+        def compute():
+            simple = self.collapsed().copy()
+            if OWNER in simple:
+                simple.remove_node(OWNER)
+            return simple
+        return self._cached("contacts_only", compute)
+
+    def centrality(self) -> pd.DataFrame:
+        """Grado, intensidad (eventos) e intermediación de cada contacto.
+
+        La intermediación se mide en saltos entre contactos (sin el
+        dispositivo): señala a quien conecta grupos que no se hablan entre sí.
+        """
+        def compute():
+            simple = self.collapsed()
+            if simple.number_of_nodes() == 0:
+                return pd.DataFrame(columns=["grado", "intensidad", "intermediacion"])
+            contacts = self.contacts_only()
+            samples = min(APPROX_SAMPLES, contacts.number_of_nodes()) if self.approximate else None
+            betweenness = nx.betweenness_centrality(contacts, k=samples, seed=0)
+            table = pd.DataFrame({
+                "grado": pd.Series(dict(simple.degree())),
+                "intensidad": pd.Series(dict(simple.degree(weight="peso"))),
+                "intermediacion": pd.Series(betweenness, dtype=float),
+            }).fillna({"intermediacion": 0.0})
+            table.index.name = "contacto"
+            return table.sort_values(["intermediacion", "intensidad"], ascending=False)
+        return self._cached("centrality", compute)
+
+    def communities(self) -> pd.Series:
+        """Comunidad (Louvain) de cada contacto; 0 es la más numerosa."""
+        def compute():
+            contacts = self.contacts_only()
+            if contacts.number_of_nodes() == 0:
+                return pd.Series(dtype="Int64", name="comunidad")
+            groups = nx.community.louvain_communities(contacts, weight="peso", seed=0)
+            groups = sorted(groups, key=len, reverse=True)
+            labels = {node: i for i, group in enumerate(groups) for node in group}
+            return pd.Series(labels, name="comunidad").rename_axis("contacto")
+        return self._cached("communities", compute)
+
+    # --- Consultas para el panel ---
+
+    def key_contacts(self, limit=KEY_CONTACTS) -> dict:
+        table = self.centrality().drop(index=OWNER, errors="ignore").head(limit)
+        table = table.join(self.communities(), how="left")
+        return {
+            "nodes": self.graph.number_of_nodes(),
+            "edges": self.graph.number_of_edges(),
+            "approximate": self.approximate,
+            "contacts": [
+                {
+                    "contact": str(contact),
+                    "degree": int(row.grado),
+                    "strength": int(row.intensidad),
+                    "betweenness": round(float(row.intermediacion), 6),
+                    "community": None if pd.isna(row.comunidad) else int(row.comunidad),
+                }
+                for contact, row in table.iterrows()
+            ],
+        }
+
+    def ego_network(self, contact, radius=1, limit=MAX_EGO_NODES) -> dict:
+        """Vecindario a ``radius`` saltos de ``contact``, con los vecinos más intensos."""
+        simple = self.collapsed()
+        if contact not in simple:
+            return {"center": contact, "radius": radius, "nodes": [], "links": []}
+        ego = nx.ego_graph(simple, contact, radius=radius)
+        if ego.number_of_nodes() > limit:
+            strength = dict(ego.degree(weight="peso"))
+            keep = sorted((n for n in ego if n != contact), key=strength.get, reverse=True)
+            ego = ego.subgraph([contact, *keep[:limit - 1]])
+        communities = self.communities()
+        return {
+            "center": contact,
+            "radius": radius,
+            "nodes": [
+                {
+                    "id": str(node),
+                    "community": int(communities[node]) if node in communities.index else None,
+                }
+                for node in ego
+            ],
+            "links": [
+                {"source": str(u), "target": str(v), "weight": int(w)}
+                for u, v, w in ego.edges(data="peso")
+            ],
+        }
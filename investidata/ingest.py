@@ -0,0 +1,41 @@
+"""Lectura de reportes UFED (XLSX) y extracción del perfil del dispositivo."""
+
+import hashlib
+import io
+
+import pandas as pd
+
+DEVICE_SHEET = "Información del dispositivo"
+
+
+def content_hash(data: bytes) -> str:
+    # SHA-256 del contenido: identifica la extracción sin importar el nombre del archivo
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path) -> str:
+    # Igual que content_hash, pero leyendo el archivo por bloques
+    with open(path, "rb") as fh:
+        return hashlib.file_digest(fh, "sha256").hexdigest()
+
+
+def parse_workbook(data: bytes) -> dict[str, pd.DataFrame]:
+    # Se abre el libro una sola vez y se leen todas sus hojas
+    with pd.ExcelFile(io.BytesIO(data)) as excel_file:
+        return {name: excel_file.parse(name) for name in excel_file.sheet_names}
+
+
+def device_profile(frames: dict[str, pd.DataFrame]) -> dict[str, str]:
+    device_info = frames.get(DEVICE_SHEET)
+    if device_info is None:
+        device_dict = {}
+    else:
+        # Convertir formato Nombre → Valor
+        device_dict = device_info.set_index("Nombre")["Valor"].to_dict()
+
+    return {
+        "IMEI": str(device_dict.get("IMEI", "No disponible")),
+        "Marca": str(device_dict.get("Vendor", "No disponible")),
+        "Modelo": str(device_dict.get("Model", "No disponible")),
+        "Usuario": str(device_dict.get("Device Name", "No disponible")),
+    }
@@ -0,0 +1,178 @@
+"""Cola de ingesta en segundo plano, compartida por todas las sesiones.
+
+Cada reporte subido se convierte al conjunto columnar en un hilo de trabajo
+(que a su vez reparte las hojas entre procesos, ver
+:mod:`investidata.parallel`), así que el script de Streamlit nunca espera al
+XLSX. La tabla de trabajos está indexada por el hash de la extracción:
+
+* volver a subir el mismo archivo (o un rerun a mitad de la lectura)
+  devuelve el trabajo en curso en lugar de empezar otro;
+* una sesión nueva (navegador reconectado) encuentra el trabajo por el hash
+  y sigue mostrando su avance.
+
+Mientras se escriben las hojas, cada parte alimenta el grafo de contactos
+(:class:`investidata.graph.ContactGraph`), que queda en la caché junto a la
+extracción: la primera vista del grafo no vuelve a recorrer los mensajes.
+
+Estados: ``en_cola``, ``procesando``, ``lista``, ``error`` y ``cancelada``.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from investidata.catalog import read_manifest
+from investidata.perf import recorder
+
+QUEUED, RUNNING, READY, FAILED, CANCELLED = "en_cola", "procesando", "lista", "error", "cancelada"
+ACTIVE_STATES = (QUEUED, RUNNING)
+DEFAULT_JOB_WORKERS = int(os.environ.get("INVESTIDATA_INGEST_WORKERS", 2))
+
+
+class JobCancelled(Exception):
+    """El usuario canceló el trabajo; interrumpe la lectura en el siguiente bloque."""
+
+
+class IngestJob:
+    def __init__(self, key, source_name):
+        self.key = key
+        self.source_name = source_name
+        self.state = QUEUED
+        self.error = None
+        self.sheets = {}            # hoja -> [filas leídas, filas totales]
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+
+    @property
+    def active(self):
+        return self.state in ACTIVE_STATES
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _progress(self, sheet_name, rows_done, rows_total):
+        # Se llama desde el hilo de la ingesta: solo actualiza este objeto
+        if self._cancel.is_set():
+            raise JobCancelled(self.key)
+        self.sheets[sheet_name] = [rows_done, rows_total]
+
+    def progress(self) -> float:
+        """Fracción leída (0 a 1) según las filas declaradas de cada hoja."""
+        if self.state == READY:
+            return 1.0
+        total = sum(rows_total or 0 for _, rows_total in self.sheets.values())
+        done = sum(rows_done for rows_done, _ in self.sheets.values())
+        return min(done / total, 1.0) if total else 0.0
+
+    def summary(self) -> dict:
+        end = self.finished or time.time()
+        return {
+            "extraccion": self.key[:12],
+            "archivo": self.source_name,
+            "estado": self.state,
+            "avance": self.progress(),
+            "segundos": round(end - self.started, 1) if self.started else 0.0,
+            "error": self.error,
+        }
+
+
+class IngestQueue:
+    def __init__(self, cache, max_workers=DEFAULT_JOB_WORKERS):
+        """``cache``: el :class:`investidata.cache.ExtractionCache` donde quedan las extracciones."""
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingesta")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, data: bytes, source_name=None) -> IngestJob:
+        """Encola la conversión del reporte; si ya hay un trabajo vivo o listo
+        para esa extracción, lo devuelve sin empezar otro."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.state in (QUEUED, RUNNING, READY):
+                return job
+            job = self._jobs[key] = IngestJob(key, source_name)
+        # La subida pertenece a la sesión: se copia a disco antes de soltarla
+        spill_dir = Path(self.cache.disk_dir or tempfile.gettempdir()) / ".subidas"
+        spill_dir.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=spill_dir, suffix=".xlsx")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        self._executor.submit(self._run, job, Path(name))
+        return job
+
+    def _run(self, job, path):
+        # openpyxl, pandas y pyarrow se importan con el primer trabajo
+        from investidata.graph import ContactGraph
+        from investidata.parallel import ingest_workbook, sheet_sizes
+
+        try:
+            if job._cancel.is_set():
+                job.state = CANCELLED
+                return
+            job.state, job.started = RUNNING, time.time()
+            # Todas las hojas desde el principio: el avance no llega al 100 %
+            # con la primera hoja terminada
+            job.sheets = {name: [0, rows] for name, rows in sheet_sizes(path).items()}
+            with recorder.span("ingesta", extraccion=job.key[:12], archivo=job.source_name, lane="ingesta") as tags:
+                start = recorder.now_us()
+                graph, built = ContactGraph(), []
+
+                def build(target):
+                    built.append(target)
+                    return ingest_workbook(
+                        path, target, on_progress=job._progress, source_name=job.source_name,
+                        on_part=graph.add_sheet,
+                    )
+
+                frames = self.cache.get_or_build(job.key, build)
+                tags["filas"] = sum(len(df) for df in frames.values())
+            if built:
+                # El mismo nombre de motor que usa el panel (investidata2.get_contact_graph)
+                self.cache.resource(job.key, "graph", lambda: graph)
+            self._record_sheets(job, start)
+            job.state = READY
+        except JobCancelled:
+            job.state = CANCELLED
+        except Exception as exc:
+            job.state, job.error = FAILED, str(exc) or type(exc).__name__
+        finally:
+            job.finished = time.time()
+            path.unlink(missing_ok=True)
+
+    def _record_sheets(self, job, start):
+        # Cada hoja se interpretó en otros procesos: su tiempo (el del
+        # manifiesto) se registra en su propio carril desde el inicio de la ingesta
+        if self.cache.disk_dir is None:
+            return
+        for sheet in read_manifest(self.cache.disk_dir / job.key)["sheets"]:
+            recorder.add(
+                f"hoja:{sheet['name']}", start, sheet["seconds"] * 1e6,
+                extraccion=job.key[:12], filas=sheet["rows"], lane=f"hoja {sheet['name']}",
+            )
+
+    def get(self, key) -> IngestJob | None:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def cancel(self, key):
+        job = self.get(key)
+        if job is not None and job.active:
+            job.cancel()
+
+    def jobs(self) -> list[IngestJob]:
+        """Todos los trabajos, del más reciente al más antiguo."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.submitted, reverse=True)
+
+    def forget(self, key):
+        """Quita un trabajo terminado de la tabla (la extracción sigue en caché)."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.active:
+                del self._jobs[key]
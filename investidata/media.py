@@ -0,0 +1,396 @@
+"""Catálogo de archivos multimedia con miniaturas bajo demanda.
+
+El catálogo sale de las hojas de archivos del reporte
+(:func:`investidata.sheets.media_frame`). Si se indica la carpeta con los
+archivos exportados (siempre dentro de :data:`MEDIA_ROOT`, ver
+:func:`media_folder`), las miniaturas se generan solo para la página que se
+está viendo, en un pool de hilos compartido, y se guardan en una caché en
+disco acotada por tamaño (LRU) que comparten todas las sesiones. Mientras se
+generan, la página las marca como pendientes y vuelve a pedirlas: el hilo del
+script de Streamlit nunca espera a Pillow.
+
+Los duplicados se detectan por el hash del reporte (copias exactas) y por un
+hash perceptual (dHash) que se calcula en segundo plano sobre todas las
+imágenes (copias reescaladas o recomprimidas), en un pool del proceso de
+:data:`DEDUP_WORKERS` hilos. Hay un solo catálogo por extracción y carpeta
+resuelta (:func:`shared_catalog`): escribir la misma carpeta de otra forma, o
+volver a ella, no repite el cálculo. El dHash sale siempre de la
+misma versión reducida de la imagen (:func:`decode`), la genere la miniatura o
+la búsqueda de duplicados.
+"""
+
+import base64
+import hashlib
+import io
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from PIL import Image, UnidentifiedImageError
+
+from investidata.cache import DEFAULT_CACHE_DIR
+
+# Las carpetas de archivos exportados que indica el panel deben estar dentro de esta
+MEDIA_ROOT = Path(os.environ.get("INVESTIDATA_MEDIA_ROOT", Path.home() / "extracciones"))
+PAGE_SIZE = 48
+THUMB_SIZE = (160, 160)
+# Tamaño máximo de la imagen decodificada de la que salen la miniatura y el dHash
+DECODE_SIZE = (THUMB_SIZE[0] * 2, THUMB_SIZE[1] * 2)
+THUMB_QUALITY = 70
+THUMB_WORKERS = 4
+# Hilos del proceso que calculan el dHash de los catálogos (uno por catálogo a la vez)
+DEDUP_WORKERS = 2
+DEFAULT_THUMB_DIR = DEFAULT_CACHE_DIR / "miniaturas"
+DEFAULT_THUMB_BYTES = 256 * 1024 * 1024
+# Bits distintos (de 64) entre dos dHash para considerarlos la misma imagen
+DHASH_DISTANCE = 4
+# Tramos del dHash: dos hashes a DHASH_DISTANCE bits coinciden en al menos uno
+DHASH_BANDS = DHASH_DISTANCE + 1
+# Tramos compartidos por demasiadas imágenes (fondos lisos) no proponen pares
+MAX_BAND_BUCKET = 200
+MAX_GROUPS = 50
+
+_executor = None
+_dedup_executor = None
+_executor_lock = threading.Lock()
+# (extracción, carpeta resuelta) -> catálogo; se libera con el último que lo usa
+_catalogs = weakref.WeakValueDictionary()
+
+
+def thumbnail_executor() -> ThreadPoolExecutor:
+    """Pool de hilos del proceso para las miniaturas (Pillow libera el GIL al decodificar)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=THUMB_WORKERS, thread_name_prefix="miniaturas")
+        return _executor
+
+
+def dedup_executor() -> ThreadPoolExecutor:
+    """Pool de hilos del proceso para el dHash de todos los catálogos."""
+    global _dedup_executor
+    with _executor_lock:
+        if _dedup_executor is None:
+            _dedup_executor = ThreadPoolExecutor(max_workers=DEDUP_WORKERS, thread_name_prefix="dhash")
+        return _dedup_executor
+
+
+def media_folder(text, root=None) -> Path | None:
+    """Carpeta ``text`` (relativa a ``root`` o absoluta), ya resuelta, si existe y
+    está dentro de ``root`` (por defecto :data:`MEDIA_ROOT`); si no, ``None``.
+
+    Se resuelve antes de comparar: ``..`` y los enlaces simbólicos no sacan
+    de ``root``.
+    """
+    root = Path(root or MEDIA_ROOT).resolve()
+    path = (root / str(text).strip()).resolve()
+    return path if path.is_relative_to(root) and path.is_dir() else None
+
+
+def dhash(image: Image.Image) -> int:
+    """Hash perceptual de 64 bits: compara cada píxel con su vecino en 9 × 8 grises."""
+    pixels = image.convert("L").resize((9, 8), Image.Resampling.LANCZOS).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def decode(path) -> tuple[Image.Image, int]:
+    """La imagen en RGB reducida a lo sumo a :data:`DECODE_SIZE`, y su dHash.
+
+    El dHash se calcula siempre sobre esa misma imagen de tamaño fijo: una
+    foto da el mismo hash desde la miniatura o desde la búsqueda de duplicados.
+    """
+    with Image.open(path) as image:
+        # JPEG: decodifica ya reducido (hasta 1/8), mucho más rápido en fotos grandes
+        image.draft("RGB", DECODE_SIZE)
+        image = image.convert("RGB")
+    image.thumbnail(DECODE_SIZE)
+    return image, dhash(image)
+
+
+def make_thumbnail(path) -> tuple[bytes, int]:
+    """Miniatura JPEG de la imagen y su dHash (se aprovecha la misma decodificación)."""
+    image, image_hash = decode(path)
+    image.thumbnail(THUMB_SIZE)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=THUMB_QUALITY)
+    return out.getvalue(), image_hash
+
+
+class ThumbnailCache:
+    """Miniaturas en disco, acotadas por tamaño total; se descartan las menos usadas."""
+
+    def __init__(self, directory=DEFAULT_THUMB_DIR, max_bytes=DEFAULT_THUMB_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Orden de uso reconstruido desde la fecha de acceso de cada archivo
+        entries = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".jpg")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        self._index = OrderedDict((entry.name[:-4], entry.stat().st_size) for entry in entries)
+        self._bytes = sum(self._index.values())
+
+    def _path(self, key):
+        return self.directory / f"{key}.jpg"
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._index
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        try:
+            data = self._path(key).read_bytes()
+            os.utime(self._path(key))
+            return data
+        except OSError:
+            # Borrada desde fuera (o por otro proceso): se regenera
+            with self._lock:
+                self._bytes -= self._index.pop(key, 0)
+            return None
+
+    def put(self, key, data: bytes):
+        temp = self.directory / f"{key}.{threading.get_ident()}.tmp"
+        temp.write_bytes(data)
+        os.replace(temp, self._path(key))
+        with self._lock:
+            self._bytes += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            while self._bytes > self.max_bytes and len(self._index) > 1:
+                old, size = self._index.popitem(last=False)
+                self._bytes -= size
+                self._path(old).unlink(missing_ok=True)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+
+def shared_catalog(key, root, load_media, thumbnails: ThumbnailCache | None = None) -> "MediaCatalog":
+    """El catálogo de la extracción ``key`` con los archivos en ``root``.
+
+    Si ya hay uno para la misma carpeta (ya resuelta), se reutiliza con sus
+    miniaturas pendientes y su dHash; si no, se crea con ``load_media()`` y
+    empieza su búsqueda de duplicados.
+    """
+    root = Path(root).resolve() if root else None
+    with _executor_lock:
+        catalog = _catalogs.get((key, root))
+        if catalog is None:
+            catalog = _catalogs[(key, root)] = MediaCatalog(load_media(), root, thumbnails)
+    catalog.start_dedup()
+    return catalog
+
+
+class MediaCatalog:
+    def __init__(self, media: pd.DataFrame, root=None, thumbnails: ThumbnailCache | None = None,
+                 executor: ThreadPoolExecutor | None = None, dedup: ThreadPoolExecutor | None = None):
+        """``media`` con las columnas de :func:`investidata.sheets.media_frame`;
+        ``root``, la carpeta donde están los archivos exportados (opcional)."""
+        self.media = media
+        self.root = Path(root).resolve() if root else None
+        self.thumbnails = thumbnails
+        self.executor = executor or thumbnail_executor()
+        self.dedup = dedup or dedup_executor()
+        self._lock = threading.Lock()
+        self._pending = {}          # clave de miniatura -> future
+        self._failed = set()
+        self._hashes = {}           # id -> dHash
+        self._dedup_future = None
+        self._dedup_done = 0
+        self._dedup_total = 0
+
+    def __len__(self):
+        return len(self.media)
+
+    # --- Archivos en disco ---
+
+    def resolve(self, ruta, nombre):
+        """Archivo exportado de la fila, solo si está dentro de ``root``."""
+        if self.root is None:
+            return None
+        for candidate in (ruta, nombre):
+            if candidate is None or pd.isna(candidate):
+                continue
+            path = (self.root / str(candidate).replace("\\", "/").lstrip("/")).resolve()
+            if path.is_relative_to(self.root) and path.is_file():
+                return path
+        return None
+
+    @staticmethod
+    def _thumb_key(path: Path):
+        stat = path.stat()
+        return hashlib.sha1(f"{path}|{stat.st_size}|{stat.st_mtime_ns}".encode()).hexdigest()
+
+    def _generate(self, key, path, media_id):
+        try:
+            data, image_hash = make_thumbnail(path)
+            self.thumbnails.put(key, data)
+            with self._lock:
+                self._hashes[media_id] = image_hash
+        except (OSError, UnidentifiedImageError, ValueError, Image.DecompressionBombError):
+            with self._lock:
+                self._failed.add(key)
+        finally:
+            # Se quita de pendientes solo cuando ya está en la caché
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _thumbnail(self, row):
+        """Estado y miniatura (data URI) de una fila; encola la que falte."""
+        if row.tipo != "imagen":
+            return "sin vista previa", None
+        path = self.resolve(row.ruta, row.nombre)
+        if path is None or self.thumbnails is None:
+            return "sin archivo", None
+        key = self._thumb_key(path)
+        data = self.thumbnails.get(key)
+        if data is not None:
+            return "lista", "data:image/jpeg;base64," + base64.b64encode(data).decode("ascii")
+        with self._lock:
+            if key in self._failed:
+                return "sin vista previa", None
+            if key not in self._pending:
+                self._pending[key] = self.executor.submit(self._generate, key, path, row.id)
+        return "pendiente", None
+
+    # --- Consultas para el panel ---
+
+    def page(self, offset=0, limit=PAGE_SIZE, kind=None) -> dict:
+        """Una página del catálogo; las miniaturas que falten se generan en segundo plano."""
+        media = self.media if not kind else self.media[self.media["tipo"] == kind]
+        total = len(media)
+        offset = max(0, min(int(offset), max(total - 1, 0)))
+        items, pending = [], 0
+        for row in media.iloc[offset:offset + limit].itertuples():
+            status, thumb = self._thumbnail(row)
+            pending += status == "pendiente"
+            items.append({
+                "id": int(row.id),
+                "name": str(row.nombre),
+                "path": "" if pd.isna(row.ruta) else str(row.ruta),
+                "kind": row.tipo,
+                "size": None if pd.isna(row.tamano) else int(row.tamano),
+                "date": "" if pd.isna(row.fecha) else str(row.fecha),
+                "status": status,
+                "thumb": thumb,
+            })
+        return {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "kind": kind,
+            "pending": pending,
+            "items": items,
+            "summary": self.summary(),
+        }
+
+    def summary(self) -> dict:
+        kinds = self.media["tipo"].value_counts()
+        return {
+            "files": len(self.media),
+            "bytes": int(self.media["tamano"].sum()),
+            "kinds": {str(kind): int(n) for kind, n in kinds.items()},
+            "root": str(self.root) if self.root else None,
+            "dedup": self.dedup_status(),
+        }
+
+    # --- Duplicados ---
+
+    def start_dedup(self):
+        """Encola en :func:`dedup_executor` el dHash de todas las imágenes con archivo."""
+        with self._lock:
+            if self._dedup_future is not None or self.root is None:
+                return
+            self._dedup_future = self.dedup.submit(self._dedup)
+
+    def _dedup(self):
+        images = self.media[self.media["tipo"] == "imagen"]
+        self._dedup_total = len(images)
+        for row in images.itertuples():
+            if row.id not in self._hashes:
+                path = self.resolve(row.ruta, row.nombre)
+                if path is not None:
+                    try:
+                        _, image_hash = decode(path)
+                        with self._lock:
+                            self._hashes[row.id] = image_hash
+                    except (OSError, UnidentifiedImageError, ValueError, Image.DecompressionBombError):
+                        pass
+            self._dedup_done += 1
+
+    def dedup_status(self) -> dict:
+        running = self._dedup_future is not None and not self._dedup_future.done()
+        return {"running": running, "done": self._dedup_done, "total": self._dedup_total}
+
+    def exact_duplicates(self) -> list[list[int]]:
+        """Grupos de ids con el mismo hash del reporte (MD5/SHA)."""
+        hashed = self.media.dropna(subset=["hash"])
+        groups = hashed.groupby("hash")["id"].agg(list)
+        return sorted((ids for ids in groups if len(ids) > 1), key=len, reverse=True)
+
+    def similar_images(self) -> list[list[int]]:
+        """Grupos de imágenes con dHash a lo sumo a :data:`DHASH_DISTANCE` bits.
+
+        Si dos hashes difieren en pocos bits, al menos uno de los
+        :data:`DHASH_BANDS` tramos coincide: solo se comparan los pares que
+        comparten un tramo, no todos contra todos.
+        """
+        with self._lock:
+            hashes = dict(self._hashes)
+        ids = list(hashes)
+        parent = {i: i for i in ids}
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        width = -(-64 // DHASH_BANDS)
+        for band in range(DHASH_BANDS):
+            buckets = {}
+            for i in ids:
+                buckets.setdefault((hashes[i] >> (band * width)) & ((1 << width) - 1), []).append(i)
+            for bucket in buckets.values():
+                if len(bucket) < 2 or len(bucket) > MAX_BAND_BUCKET:
+                    continue
+                for a in range(len(bucket)):
+                    for b in range(a + 1, len(bucket)):
+                        i, j = bucket[a], bucket[b]
+                        if (hashes[i] ^ hashes[j]).bit_count() <= DHASH_DISTANCE:
+                            parent[find(i)] = find(j)
+
+        groups = {}
+        for i in ids:
+            groups.setdefault(find(i), []).append(i)
+        return sorted((sorted(g) for g in groups.values() if len(g) > 1), key=len, reverse=True)
+
+    def duplicates(self, limit=MAX_GROUPS) -> dict:
+        """Para la página: grupos de copias exactas y de imágenes parecidas."""
+        names = self.media.set_index("id")["nombre"]
+
+        def describe(groups):
+            return [[{"id": int(i), "name": str(names[i])} for i in group] for group in groups[:limit]]
+
+        exact, similar = self.exact_duplicates(), self.similar_images()
+        return {
+            "exact": describe(exact),
+            "exact_total": len(exact),
+            "similar": describe(similar),
+            "similar_total": len(similar),
+            "dedup": self.dedup_status(),
+        }
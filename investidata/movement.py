@@ -0,0 +1,201 @@
+"""Patrones de movimiento: estancias, lugares frecuentes y trayectos.
+
+Todo el cálculo sobre las ubicaciones es vectorizado (NumPy sobre los
+arreglos completos, sin recorrer fila a fila en Python):
+
+1. Las ubicaciones, en orden temporal, se asignan a celdas de una cuadrícula
+   de unos ``radius_m`` de lado y se agrupan las rachas consecutivas en la
+   misma celda.
+2. Las rachas vecinas cuyos centroides están a menos de ``radius_m / 2`` se
+   funden (el ruido del GPS en el borde de una celda parte una estancia en
+   rachas alternas; al caminar, los centroides quedan a una celda de
+   distancia y no se funden).
+3. De cada grupo se conservan las ubicaciones a menos de ``radius_m`` de su
+   centroide (se descartan las de llegada y salida que cruzan la celda); es
+   estancia si entre la primera y la última pasan al menos ``min_dwell_s``.
+
+Es la definición clásica de estancia (radio y tiempo mínimo) en forma
+vectorizada; los límites de una estancia pueden diferir en una ubicación de
+la versión secuencial. Los lugares frecuentes agrupan estancias cercanas y
+los trayectos son los tramos entre estancias consecutivas.
+"""
+
+import numpy as np
+import pandas as pd
+
+from investidata.spatial import haversine_m, mercator
+
+DEFAULT_RADIUS_M = 200
+DEFAULT_MIN_DWELL_S = 20 * 60
+MERGE_PASSES = 4
+# Combinaciones de parámetros recordadas por extracción
+MAX_RESULTS = 16
+EQUATOR_M = 40_075_016.686
+
+
+def _run_starts(keys):
+    if keys.size == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+
+
+class MovementAnalyzer:
+    def __init__(self, locations: pd.DataFrame):
+        """``locations`` con las columnas de :func:`investidata.sheets.locations_frame`.
+
+        El orden temporal y la proyección se calculan una vez; cada
+        combinación de parámetros los reutiliza.
+        """
+        dated = locations.dropna(subset=["fecha"]).sort_values("fecha", kind="stable")
+        self.ids = dated["id"].to_numpy(dtype=np.int64)
+        self.lat = dated["lat"].to_numpy(dtype=np.float64)
+        self.lon = dated["lon"].to_numpy(dtype=np.float64)
+        self.times = dated["fecha"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+        self.x, self.y = mercator(self.lat, self.lon)
+        self._results = {}
+
+    def __len__(self):
+        return self.lat.size
+
+    # --- Estancias ---
+
+    def _groups(self, starts):
+        counts = np.diff(np.append(starts, self.lat.size))
+        return (np.add.reduceat(self.lat, starts) / counts,
+                np.add.reduceat(self.lon, starts) / counts, counts)
+
+    def stay_points(self, radius_m=DEFAULT_RADIUS_M, min_dwell_s=DEFAULT_MIN_DWELL_S) -> pd.DataFrame:
+        """Una fila por estancia: inicio, fin, centroide, ubicaciones que la forman
+        y ``recorrido_m``, la distancia recorrida desde la primera ubicación."""
+        columns = ["inicio", "fin", "lat", "lon", "ubicaciones", "recorrido_m"]
+        if self.lat.size == 0:
+            return pd.DataFrame({
+                "inicio": pd.Series(dtype="datetime64[ns]"), "fin": pd.Series(dtype="datetime64[ns]"),
+                "lat": pd.Series(dtype=float), "lon": pd.Series(dtype=float),
+                "ubicaciones": pd.Series(dtype=np.int64), "recorrido_m": pd.Series(dtype=float),
+            }, columns=columns)
+
+        # Celdas de entre radius_m y 2 × radius_m de lado a la latitud media
+        cell_m = EQUATOR_M * np.cos(np.radians(np.mean(self.lat)))
+        level = int(np.clip(np.floor(np.log2(cell_m / radius_m)), 0, 30))
+        scale = float(1 << level)
+        keys = (np.floor(self.x * scale).astype(np.int64) << level) | np.floor(self.y * scale).astype(np.int64)
+        starts = _run_starts(keys)
+
+        for _ in range(MERGE_PASSES):
+            lat, lon, counts = self._groups(starts)
+            keep = np.concatenate(([True], haversine_m(lat[:-1], lon[:-1], lat[1:], lon[1:]) > radius_m / 2))
+            # Una racha breve (un salto del GPS) entre dos rachas del mismo
+            # sitio se absorbe: A B A es una estancia, A B C al caminar no
+            brief = self.times[starts + counts - 1] - self.times[starts] < min_dwell_s
+            bridged = np.zeros(starts.size, dtype=bool)
+            bridged[1:-1] = brief[1:-1] & (haversine_m(lat[:-2], lon[:-2], lat[2:], lon[2:]) <= radius_m / 2)
+            keep[bridged] = False
+            keep[1:][bridged[:-1]] = False
+            if keep.all():
+                break
+            starts = starts[keep]
+
+        lat, lon, counts = self._groups(starts)
+        # Recorrido acumulado de centroide a centroide: el ruido dentro de una
+        # celda no suma distancia (sumar los pasos crudos sí lo haría)
+        path = np.concatenate(([0.0], np.cumsum(haversine_m(lat[:-1], lon[:-1], lat[1:], lon[1:]))))
+
+        # Solo cuentan las ubicaciones a menos de radius_m del centroide: se
+        # recortan las de llegada y salida que caen en la misma celda
+        inside = haversine_m(np.repeat(lat, counts), np.repeat(lon, counts), self.lat, self.lon) <= radius_m
+        positions = np.arange(self.lat.size)
+        first = np.minimum.reduceat(np.where(inside, positions, self.lat.size), starts)
+        last = np.maximum.reduceat(np.where(inside, positions, -1), starts)
+        found = first <= last
+        first, last = np.where(found, first, 0), np.where(found, last, 0)
+        stays = found & (self.times[last] - self.times[first] >= min_dwell_s)
+
+        kept = np.add.reduceat(inside, starts)
+        return pd.DataFrame({
+            "inicio": pd.to_datetime(self.times[first[stays]], unit="s"),
+            "fin": pd.to_datetime(self.times[last[stays]], unit="s"),
+            "lat": (np.add.reduceat(np.where(inside, self.lat, 0.0), starts) / np.maximum(kept, 1))[stays],
+            "lon": (np.add.reduceat(np.where(inside, self.lon, 0.0), starts) / np.maximum(kept, 1))[stays],
+            "ubicaciones": kept[stays],
+            "recorrido_m": path[stays],
+        }, columns=columns)
+
+    # --- Lugares frecuentes y trayectos ---
+
+    @staticmethod
+    def places(stays: pd.DataFrame, radius_m=DEFAULT_RADIUS_M):
+        """Agrupa estancias a menos de ``radius_m`` en lugares.
+
+        Devuelve el lugar de cada estancia y una tabla de lugares ordenada por
+        permanencia total. Hay pocas estancias (cientos o miles), así que basta
+        con comparar cada una contra los centroides ya creados.
+        """
+        dwell = (stays["fin"] - stays["inicio"]).dt.total_seconds().to_numpy()
+        order = np.argsort(-dwell, kind="stable")
+        lat, lon = stays["lat"].to_numpy(), stays["lon"].to_numpy()
+        centers_lat, centers_lon = [], []
+        labels = np.empty(len(stays), dtype=np.int64)
+        for i in order:
+            if centers_lat:
+                d = haversine_m(lat[i], lon[i], centers_lat, centers_lon)
+                nearest = int(np.argmin(d))
+                if d[nearest] <= radius_m:
+                    labels[i] = nearest
+                    continue
+            labels[i] = len(centers_lat)
+            centers_lat.append(lat[i])
+            centers_lon.append(lon[i])
+
+        table = stays.assign(lugar=labels, permanencia_s=dwell).groupby("lugar").agg(
+            lat=("lat", "mean"), lon=("lon", "mean"), visitas=("inicio", "size"),
+            permanencia_s=("permanencia_s", "sum"), primera=("inicio", "min"), ultima=("fin", "max"),
+        ).sort_values("permanencia_s", ascending=False)
+        return labels, table
+
+    def trips(self, stays: pd.DataFrame, labels) -> pd.DataFrame:
+        """Tramos entre estancias consecutivas: origen, destino, duración y distancia."""
+        if len(stays) < 2:
+            return pd.DataFrame(columns=["origen", "destino", "salida", "llegada", "distancia_m"])
+        path = stays["recorrido_m"].to_numpy()
+        return pd.DataFrame({
+            "origen": labels[:-1],
+            "destino": labels[1:],
+            "salida": stays["fin"].to_numpy()[:-1],
+            "llegada": stays["inicio"].to_numpy()[1:],
+            "distancia_m": np.diff(path),
+        })
+
+    def analyze(self, radius_m=DEFAULT_RADIUS_M, min_dwell_s=DEFAULT_MIN_DWELL_S) -> dict:
+        """Estancias, lugares y trayectos, en caché por combinación de parámetros."""
+        key = (float(radius_m), int(min_dwell_s))
+        if key not in self._results:
+            if len(self._results) >= MAX_RESULTS:
+                self._results.pop(next(iter(self._results)))
+            stays = self.stay_points(radius_m, min_dwell_s)
+            labels, places = self.places(stays, radius_m)
+            self._results[key] = {
+                "estancias": stays.assign(lugar=labels),
+                "lugares": places,
+                "trayectos": self.trips(stays, labels),
+            }
+        return self._results[key]
+
+    def summary(self, radius_m=DEFAULT_RADIUS_M, min_dwell_s=DEFAULT_MIN_DWELL_S, limit=50) -> dict:
+        """Para la página: lugares más frecuentes y totales de trayectos."""
+        result = self.analyze(radius_m, min_dwell_s)
+        trips = result["trayectos"]
+        return {
+            "radius": radius_m,
+            "dwell": min_dwell_s,
+            "fixes": len(self),
+            "stays": len(result["estancias"]),
+            "trips": len(trips),
+            "distance_km": round(float(trips["distancia_m"].sum()) / 1000, 1) if len(trips) else 0.0,
+            "places": [
+                {"place": int(place), "lat": float(row.lat), "lon": float(row.lon),
+                 "visits": int(row.visitas), "hours": round(float(row.permanencia_s) / 3600, 1),
+                 "first": str(row.primera), "last": str(row.ultima)}
+                for place, row in result["lugares"].head(limit).iterrows()
+            ],
+        }
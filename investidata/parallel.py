@@ -0,0 +1,236 @@
+"""Ingesta paralela de todas las hojas de un reporte en un pool de procesos.
+
+Un trabajo por hoja; las hojas gigantes se dividen además en rangos de filas.
+Cada trabajo escribe su parte en Parquet dentro del conjunto en construcción,
+y al final todo queda unido en un único conjunto tipado con el tiempo por hoja
+en el manifiesto. Los procesos avisan las filas de cada bloque que escriben
+(el avance se ve a mitad de una hoja) y, antes de leer el siguiente, miran
+si la ingesta se canceló.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import openpyxl
+
+from investidata.columnar import StoreWriter, parquet_rows, write_chunks
+from investidata.streaming import (
+    DEFAULT_CHUNK_SIZE,
+    ChunkTyper,
+    SchemaDrift,
+    iter_sheet_chunks,
+    stream_workbook,
+)
+
+# Filas por parte cuando una hoja se divide entre varios procesos
+DEFAULT_SPLIT_ROWS = 250_000
+# Por debajo de este tamaño de archivo no compensa arrancar procesos
+PARALLEL_MIN_BYTES = 5 * 1024 * 1024
+# Filas que se leen para fijar los tipos de una hoja antes de repartirla
+TYPE_SAMPLE_ROWS = 2_000
+# Cada cuánto (segundos) el proceso principal recoge el avance de los procesos
+PROGRESS_SECONDS = 0.5
+
+
+class PartCancelled(Exception):
+    """La ingesta se canceló: la parte se detiene antes de leer su siguiente bloque."""
+
+
+def sheet_sizes(path) -> dict[str, int | None]:
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        # max_row sale de la dimensión declarada en el XLSX (puede faltar)
+        return {
+            ws.title: (ws.max_row - 1 if ws.max_row else None) for ws in workbook.worksheets
+        }
+    finally:
+        workbook.close()
+
+
+def split_ranges(rows, split_rows=DEFAULT_SPLIT_ROWS):
+    if not rows or rows <= split_rows:
+        return [(1, None)]
+    return [(lo, min(lo + split_rows - 1, rows)) for lo in range(1, rows + 1, split_rows)]
+
+
+# --- Trabajos que corren dentro del pool ---
+
+# Canales con el proceso principal, recibidos al arrancar cada proceso
+_progress = None    # cola de (hoja, intento, filas) por bloque escrito
+_cancel = None      # evento: la ingesta se canceló
+
+
+def _init_worker(progress, cancel):
+    global _progress, _cancel
+    _progress, _cancel = progress, cancel
+
+
+def _reported(chunks, tag):
+    chunks = iter(chunks)
+    while not _cancel.is_set():
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+        _progress.put((*tag, len(chunk)))
+    raise PartCancelled(tag)
+
+
+def _sample_dtypes(path, sheet_name, text_columns):
+    typer = ChunkTyper(text_columns)
+    chunks = iter_sheet_chunks(path, sheet_name, TYPE_SAMPLE_ROWS, typer=typer, max_row=TYPE_SAMPLE_ROWS)
+    next(chunks, None)
+    chunks.close()
+    return typer.dtypes
+
+
+def _parse_part(path, sheet_name, min_row, max_row, target, dtypes, text_columns, chunk_size, tag):
+    start = time.perf_counter()
+    chunks = iter_sheet_chunks(
+        path, sheet_name, chunk_size,
+        typer=ChunkTyper(text_columns, dtypes), min_row=min_row, max_row=max_row,
+    )
+    write_chunks(target, _reported(chunks, tag))
+    return time.perf_counter() - start
+
+
+# --- Coordinación en el proceso principal ---
+
+class _SheetJob:
+    def __init__(self, index, name, rows, split_rows):
+        self.index = index
+        self.name = name
+        self.rows = rows
+        self.ranges = split_ranges(rows, split_rows)
+        self.text_columns = set()
+        self.attempt = 0
+        self.targets = []
+        self.rows_done = 0
+        self.seconds = 0.0
+        self.stale = []
+
+
+def _spill(source, directory):
+    # Los procesos del pool necesitan una ruta: la subida se vuelca a disco una vez
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=directory, suffix=".xlsx")
+    with os.fdopen(fd, "wb") as fh:
+        source.seek(0)
+        shutil.copyfileobj(source, fh)
+    return Path(name)
+
+
+def ingest_workbook(source, store_path, max_workers=None, split_rows=DEFAULT_SPLIT_ROWS,
+                    chunk_size=DEFAULT_CHUNK_SIZE, on_progress=None, source_name=None, on_part=None):
+    """Convierte un XLSX en conjunto columnar, en paralelo si el tamaño lo justifica.
+
+    ``on_part`` recibe cada parte compactada de cada hoja (ver
+    :class:`investidata.columnar.StoreWriter`).
+    """
+    spilled = None
+    if hasattr(source, "read"):
+        spilled = source = _spill(source, Path(store_path).parent)
+    try:
+        return _ingest_path(
+            Path(source), Path(store_path), max_workers, split_rows,
+            chunk_size, on_progress, source_name or (None if spilled else Path(source).name), on_part,
+        )
+    finally:
+        if spilled is not None:
+            spilled.unlink(missing_ok=True)
+
+
+def _ingest_path(path, store_path, max_workers, split_rows, chunk_size, on_progress, source_name, on_part):
+    sizes = sheet_sizes(path)
+    # Sin dimensión declarada la hoja no se divide, pero sigue yendo a su propio proceso
+    jobs = [_SheetJob(i, name, rows, split_rows) for i, (name, rows) in enumerate(sizes.items())]
+    tasks = sum(len(job.ranges) for job in jobs)
+    max_workers = min(max_workers or os.cpu_count() or 1, tasks)
+
+    if max_workers <= 1 or path.stat().st_size < PARALLEL_MIN_BYTES:
+        return stream_workbook(path, store_path, chunk_size, on_progress, source_name, on_part)
+
+    # "spawn": Streamlit usa hilos y hacer fork con hilos activos puede bloquearse
+    context = multiprocessing.get_context("spawn")
+    progress, cancel = context.SimpleQueue(), context.Event()
+    with StoreWriter(store_path, source_name=source_name, on_part=on_part) as writer, \
+            ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                initializer=_init_worker, initargs=(progress, cancel)) as pool:
+        futures = {}
+
+        def sample(job):
+            future = pool.submit(_sample_dtypes, str(path), job.name, set(job.text_columns))
+            futures[future] = (job, "sample", job.attempt)
+
+        def parse(job, dtypes):
+            job.targets = [writer.part_path(job.index, part, job.attempt) for part in range(len(job.ranges))]
+            for (lo, hi), target in zip(job.ranges, job.targets):
+                future = pool.submit(
+                    _parse_part, str(path), job.name, lo, hi, str(target),
+                    dtypes, set(job.text_columns), chunk_size, (job.index, job.attempt),
+                )
+                futures[future] = (job, (lo, hi), job.attempt)
+
+        for job in jobs:
+            sample(job)
+
+        try:
+            _collect(futures, jobs, sample, parse, progress, on_progress)
+        except BaseException:
+            # Interrumpida (p. ej. cancelada desde on_progress): las partes que
+            # aún no empezaron no se ejecutan y las que corren se detienen
+            # antes de su siguiente bloque
+            cancel.set()
+            for future in futures:
+                future.cancel()
+            raise
+
+        for job in jobs:
+            for target in job.stale:
+                Path(target).unlink(missing_ok=True)
+            writer.add_parts(job.name, job.targets, sum(parquet_rows(t) for t in job.targets), job.seconds)
+    return Path(store_path)
+
+
+def _drain(progress, jobs, on_progress):
+    # Filas escritas desde la última vuelta; las de intentos descartados no cuentan
+    changed = []
+    while not progress.empty():
+        index, attempt, rows = progress.get()
+        job = jobs[index]
+        if attempt == job.attempt:
+            job.rows_done += rows
+            if job not in changed:
+                changed.append(job)
+    if on_progress is not None:
+        for job in changed:
+            on_progress(job.name, job.rows_done, job.rows)
+
+
+def _collect(futures, jobs, sample, parse, progress, on_progress):
+    while futures:
+        finished, _ = wait(futures, timeout=PROGRESS_SECONDS, return_when=FIRST_COMPLETED)
+        _drain(progress, jobs, on_progress)
+        for future in finished:
+            job, kind, attempt = futures.pop(future)
+            if attempt != job.attempt:
+                continue  # resultado de un intento descartado
+            if kind == "sample":
+                parse(job, future.result())
+                continue
+            try:
+                job.seconds += future.result()
+            except SchemaDrift as drift:
+                # Una parte no cabe en los tipos de la muestra: la hoja se
+                # reinicia guardando esa columna como texto
+                job.text_columns.add(drift.column)
+                job.stale.extend(job.targets)
+                job.attempt += 1
+                job.rows_done = 0
+                job.seconds = 0.0
+                sample(job)
@@ -0,0 +1,165 @@
+"""Instrumentación de las etapas calientes: tiempo y memoria por etapa.
+
+Cada etapa (lectura de la subida, interpretación de las hojas, construcción
+de índices, consultas y envío del panel) se registra como un tramo con su
+duración, la memoria residente del proceso antes y después, el hilo que la
+ejecutó y etiquetas (hash de la extracción, filas...). Las etiquetas comunes
+se fijan una vez con :meth:`Recorder.tagged` y las heredan los tramos
+anidados.
+
+El registro es un búfer circular compartido por el proceso (los últimos
+:data:`MAX_SPANS` tramos), así que medir siempre cuesta poco; el panel de la
+barra lateral es opcional. :meth:`Recorder.chrome_trace` exporta los tramos
+en el formato de eventos de Chrome (``chrome://tracing`` o Perfetto).
+"""
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+MAX_SPANS = 5000
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_TAGS = contextvars.ContextVar("investidata_perf_tags", default={})
+
+
+def rss_bytes() -> int:
+    """Memoria residente actual del proceso (pico histórico fuera de Linux)."""
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Recorder:
+    def __init__(self, max_spans=MAX_SPANS):
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        # Origen común de los tiempos (microsegundos), como en las trazas de Chrome
+        self._origin = time.perf_counter()
+
+    def now_us(self):
+        return (time.perf_counter() - self._origin) * 1e6
+
+    @contextmanager
+    def tagged(self, **tags):
+        """Etiquetas para todos los tramos de este bloque (y de sus anidados)."""
+        token = _TAGS.set({**_TAGS.get(), **tags})
+        try:
+            yield
+        finally:
+            _TAGS.reset(token)
+
+    @contextmanager
+    def span(self, name, **tags):
+        """Mide el bloque; ``tags`` se pueden completar dentro (p. ej. filas)."""
+        tags = {**_TAGS.get(), **tags}
+        rss_before = rss_bytes()
+        start = self.now_us()
+        error = None
+        try:
+            yield tags
+        except BaseException as exc:
+            error = type(exc).__name__
+            raise
+        finally:
+            duration = self.now_us() - start
+            rss_after = rss_bytes()
+            if error is not None:
+                tags["error"] = error
+            self._append(name, start, duration, rss_before, rss_after, tags)
+
+    def add(self, name, start_us, duration_us, **tags):
+        """Registra un tramo medido por fuera (p. ej. en otro proceso)."""
+        self._append(name, start_us, duration_us, None, None, {**_TAGS.get(), **tags})
+
+    def _append(self, name, start, duration, rss_before, rss_after, tags):
+        thread = threading.current_thread()
+        with self._lock:
+            self._spans.append({
+                "name": name,
+                "start_us": start,
+                "duration_us": duration,
+                "rss_before": rss_before,
+                "rss_after": rss_after,
+                "thread": tags.pop("lane", thread.name),
+                "tags": tags,
+            })
+
+    # --- Consulta y exportación ---
+
+    def spans(self, **match) -> list[dict]:
+        """Tramos (del más antiguo al más reciente) cuyas etiquetas coinciden con ``match``."""
+        with self._lock:
+            spans = list(self._spans)
+        return [
+            span for span in spans
+            if all(span["tags"].get(key) == value for key, value in match.items())
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def summary(self, **match):
+        """Por etapa (``DataFrame``): veces, tiempo total, medio, p95 y máximo (ms) y memoria añadida (MB)."""
+        import pandas as pd
+
+        rows = [
+            {
+                "etapa": span["name"],
+                "ms": span["duration_us"] / 1000,
+                "mb": ((span["rss_after"] - span["rss_before"]) / 1e6
+                       if span["rss_before"] is not None else 0.0),
+            }
+            for span in self.spans(**match)
+        ]
+        columns = ["etapa", "veces", "total_ms", "media_ms", "p95_ms", "max_ms", "memoria_mb"]
+        if not rows:
+            return pd.DataFrame(columns=columns)
+        grouped = pd.DataFrame(rows).groupby("etapa")
+        summary = pd.DataFrame({
+            "veces": grouped["ms"].size(),
+            "total_ms": grouped["ms"].sum(),
+            "media_ms": grouped["ms"].mean(),
+            "p95_ms": grouped["ms"].quantile(0.95),
+            "max_ms": grouped["ms"].max(),
+            "memoria_mb": grouped["mb"].sum(),
+        }).reset_index()
+        return summary[columns].sort_values("total_ms", ascending=False, ignore_index=True)
+
+    def chrome_trace(self, **match) -> str:
+        """Los tramos como traza de Chrome (JSON): un carril por hilo."""
+        pid = os.getpid()
+        lanes = {}
+        events = []
+        for span in self.spans(**match):
+            tid = lanes.setdefault(span["thread"], len(lanes) + 1)
+            args = dict(span["tags"])
+            if span["rss_before"] is not None:
+                args["rss_mb"] = round(span["rss_after"] / 1e6, 1)
+                args["rss_delta_mb"] = round((span["rss_after"] - span["rss_before"]) / 1e6, 1)
+            events.append({
+                "name": span["name"], "cat": span["name"].split(":")[0], "ph": "X",
+                "ts": round(span["start_us"], 1), "dur": round(span["duration_us"], 1),
+                "pid": pid, "tid": tid, "args": args,
+            })
+        events.extend(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": str(lane)}}
+            for lane, tid in lanes.items()
+        )
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, ensure_ascii=False, default=str)
+
+
+# Un registro por proceso: lo comparten la app, la caché y la cola de ingesta
+recorder = Recorder()
+span = recorder.span
+tagged = recorder.tagged
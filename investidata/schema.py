@@ -0,0 +1,231 @@
+"""Representación compacta en memoria de las hojas de una extracción.
+
+Cada sesión tiene las hojas en memoria, así que su tamaño decide cuántas
+sesiones caben en el servidor. Al guardar una extracción en el formato
+columnar (:mod:`investidata.columnar`), cada columna toma el tipo más pequeño
+que conserva todos sus valores, y así se vuelve a abrir:
+
+* columnas conocidas de UFED (por los alias de :mod:`investidata.sheets`):
+  contactos, teléfonos, aplicaciones, dirección y estado como categorías;
+  fechas en texto como ``datetime64``; texto libre, rutas y hashes como
+  texto de Arrow (nunca como objetos de Python);
+* el resto según sus datos: enteros con nulos en el ``Int`` más pequeño que
+  los contiene y texto repetitivo como categoría cuando ocupa menos.
+
+El tamaño original de cada hoja queda en ``df.attrs`` (y en el manifiesto
+del conjunto) para :func:`memory_report`.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from investidata.sheets import find_column
+
+ARROW_STRING = pd.StringDtype("pyarrow")
+ROLE_KINDS = {
+    "contacto": "categoria",
+    "telefono": "categoria",
+    "aplicacion": "categoria",
+    "direccion": "categoria",
+    "estado": "categoria",
+    "texto": "texto",
+    "archivo": "texto",
+    "ruta": "texto",
+    "hash": "texto",
+    "fecha": "fecha",
+    "tamano": "entero",
+}
+# Texto sin rol conocido: se prueba como categoría si repite al menos la mitad
+CATEGORY_RATIO = 0.5
+_INT_TYPES = ("Int8", "Int16", "Int32", "Int64")
+BYTES_KEY = "bytes_originales"
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def _as_text(column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column
+    return column.astype(ARROW_STRING)
+
+
+_UNITS = ("s", "ms", "us", "ns")
+
+
+class _ColumnPlan:
+    """Tipo compacto de una columna, decidido viendo sus partes una a una."""
+
+    def __init__(self, kind, dtype, total_rows):
+        is_text = dtype == object or pd.api.types.is_string_dtype(dtype)
+        if kind == "fecha":
+            self.mode = "fecha" if is_text else None
+        elif kind == "entero":
+            self.mode = "entero" if pd.api.types.is_integer_dtype(dtype) or dtype == object else None
+        elif not is_text:
+            self.mode = "entero" if pd.api.types.is_integer_dtype(dtype) else None
+        else:
+            self.mode = "texto" if kind == "texto" else "categoria"
+        self.force = kind == "categoria"
+        self.total_rows = total_rows
+        self.ok = True
+        self.low = self.high = None
+        self.unit = self.format = None
+        self.rows = self.values = self.text_bytes = 0
+        self.distinct = set()
+        self._category = None
+
+    def observe(self, column):
+        self.rows += len(column)
+        if self.mode == "entero":
+            numbers = pd.to_numeric(column, errors="coerce")
+            # Nunca se pierde un valor: una celda que no es número deja la columna como está
+            if (numbers.isna() & column.notna()).any():
+                self.ok = False
+            elif not pd.api.types.is_integer_dtype(numbers.dtype) and not (
+                pd.api.types.is_float_dtype(numbers.dtype) and numbers.dropna().mod(1).eq(0).all()
+            ):
+                self.ok = False
+            present = numbers.dropna()
+            if self.ok and len(present):
+                low, high = int(present.min()), int(present.max())
+                self.low = low if self.low is None else min(self.low, low)
+                self.high = high if self.high is None else max(self.high, high)
+        elif self.mode == "fecha":
+            if self.format is None and column.notna().any():
+                # El formato de la primera fecha vale para toda la hoja, como
+                # cuando pandas convierte la columna completa
+                self.format = guess_datetime_format(str(column.dropna().iloc[0]))
+            dates = pd.to_datetime(column, errors="coerce", format=self.format)
+            # Nunca se pierde un valor: si alguna celda no es fecha, queda como texto
+            if not pd.api.types.is_datetime64_any_dtype(dates.dtype) or (dates.isna() & column.notna()).any():
+                self.ok = False
+            elif self.unit is None or _UNITS.index(dates.dt.unit) > _UNITS.index(self.unit):
+                # Todas las partes en la resolución más fina que aparezca
+                self.unit = dates.dt.unit
+        elif self.mode == "categoria":
+            text = _as_text(column)
+            self.values += int(text.count())
+            self.text_bytes += int(text.memory_usage(deep=True, index=False))
+            if self.distinct is not None:
+                self.distinct.update(text.dropna().unique().tolist())
+                # Más distintos que la mitad de la hoja: ya no puede ser categoría
+                # (y no se siguen guardando)
+                if not self.force and len(self.distinct) > CATEGORY_RATIO * self.total_rows:
+                    self.distinct = None
+
+    def category(self):
+        """El ``CategoricalDtype`` de la hoja, o ``None`` si queda como texto."""
+        if self._category is None:
+            self._category = False
+            if self.values and self.distinct is not None and (
+                self.force or len(self.distinct) <= CATEGORY_RATIO * self.values
+            ):
+                dtype = pd.CategoricalDtype(pd.Index(sorted(self.distinct), dtype=ARROW_STRING))
+                codes = pd.Categorical([], dtype=dtype).codes.itemsize
+                # Solo si realmente ocupa menos (en hojas pequeñas no compensa)
+                if codes * self.rows + dtype.categories.memory_usage(deep=True) < self.text_bytes:
+                    self._category = dtype
+        return self._category or None
+
+    def apply(self, column):
+        if self.mode == "entero" and self.ok:
+            low, high = (self.low, self.high) if self.low is not None else (0, 0)
+            for dtype in _INT_TYPES:
+                info = np.iinfo(dtype.lower())
+                if info.min <= low and high <= info.max:
+                    numbers = pd.to_numeric(column, errors="coerce")
+                    if not pd.api.types.is_integer_dtype(numbers.dtype):
+                        numbers = numbers.astype("Int64")
+                    return numbers.astype(dtype)
+        elif self.mode == "fecha":
+            if not self.ok:
+                return _as_text(column)
+            dates = pd.to_datetime(column, errors="coerce", format=self.format)
+            return dates.dt.as_unit(self.unit or "ns")
+        elif self.mode == "texto":
+            return _as_text(column)
+        elif self.mode == "categoria":
+            dtype = self.category()
+            return _as_text(column) if dtype is None else _as_text(column).astype(dtype)
+        return column
+
+
+class CompactPlan:
+    """Tipos compactos de una hoja que se ve por partes (bloques o grupos de filas).
+
+    :meth:`observe` recorre cada parte y acumula por columna lo necesario para
+    decidir (mínimo y máximo de los enteros, si todas las fechas se
+    entienden, los valores distintos del texto repetitivo); :meth:`apply`
+    convierte cada parte al tipo decidido para la hoja completa. Así una hoja
+    grande se compacta sin tenerla entera en memoria, con los mismos tipos
+    que daría :func:`compact_frame` sobre toda la hoja. ``total_rows`` (las
+    filas de la hoja) permite descartar pronto las categorías imposibles.
+    """
+
+    def __init__(self, total_rows: int):
+        self.total_rows = total_rows
+        self.columns = None
+        self.original_bytes = 0
+
+    def observe(self, df: pd.DataFrame):
+        if self.columns is None:
+            kinds = _column_kinds(df)
+            self.columns = {
+                name: _ColumnPlan(kinds.get(name), df[name].dtype, self.total_rows) for name in df.columns
+            }
+        self.original_bytes += df.attrs.get(BYTES_KEY, frame_bytes(df))
+        for name, plan in self.columns.items():
+            plan.observe(df[name])
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame({name: plan.apply(df[name]) for name, plan in self.columns.items()}, index=df.index)
+
+
+def _column_kinds(df):
+    kinds = {}
+    for role, kind in ROLE_KINDS.items():
+        column = find_column(df, role)
+        # El primer rol que reclama una columna gana (p. ej. "Nombre")
+        if column is not None and column not in kinds:
+            kinds[column] = kind
+    return kinds
+
+
+def compact_column(column: pd.Series, kind=None) -> pd.Series:
+    """La columna en su tipo compacto; ``kind`` es el rol conocido, si lo hay."""
+    plan = _ColumnPlan(kind, column.dtype, len(column))
+    plan.observe(column)
+    return plan.apply(column)
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Copia de la hoja con cada columna en su tipo compacto."""
+    plan = CompactPlan(len(df))
+    plan.observe(df)
+    compact = plan.apply(df)
+    compact.attrs[BYTES_KEY] = plan.original_bytes
+    return compact
+
+
+def compact_frames(frames: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    return {name: compact_frame(df) for name, df in frames.items()}
+
+
+def memory_report(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Memoria de cada hoja antes y después de compactarla (MB)."""
+    rows = []
+    for name, df in frames.items():
+        after = frame_bytes(df)
+        before = df.attrs.get(BYTES_KEY, after)
+        rows.append({
+            "hoja": name,
+            "filas": len(df),
+            "antes_mb": before / 1e6,
+            "despues_mb": after / 1e6,
+        })
+    report = pd.DataFrame(rows, columns=["hoja", "filas", "antes_mb", "despues_mb"])
+    report["reduccion"] = 1 - report["despues_mb"] / report["antes_mb"].where(report["antes_mb"] > 0)
+    return report
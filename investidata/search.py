@@ -0,0 +1,410 @@
+"""Índice invertido con posiciones sobre los mensajes de una extracción.
+
+Se construye una vez por extracción y responde búsquedas de palabras,
+prefijos (``pist*``) y frases (``"punto de encuentro"``) sin recorrer el
+corpus. La página recibe solo los ids y fragmentos de los mensajes que
+coinciden.
+
+Estructura (tipo CSR): para el término ``t`` sus apariciones son
+``docs[offsets[t]:offsets[t + 1]]`` y ``positions[...]``, ordenadas por
+mensaje y posición.
+
+La búsqueda aproximada (``fuzzy=True``) tolera errores de escritura y
+variantes de jerga: cada término se amplía a los términos del vocabulario a
+una distancia de edición acotada (:func:`max_distance`), también como
+prefijo (``pist*``), con los números usados como letras ya traducidos
+(``pistol4`` → ``pistola``). Los candidatos salen de un índice de trigramas
+del vocabulario (:class:`TrigramIndex`), así que la distancia solo se
+calcula para unos pocos términos, y los mensajes se ordenan por parecido.
+"""
+
+import bisect
+import re
+
+import numpy as np
+import pandas as pd
+
+from investidata.text import TOKEN_RE, fold, fold_series, folded_with_offsets
+
+SNIPPET_CHARS = 80
+# Resultados por página: la página nunca recibe el conjunto completo
+PAGE_SIZE = 200
+_PHRASE_RE = re.compile(r'"([^"]+)"')
+
+# Búsqueda aproximada
+FUZZY_MAX_LENGTH = 24       # términos más largos (enlaces, códigos) solo se buscan exactos
+MAX_EXPANSIONS = 50         # variantes por término, las más parecidas primero
+_BUILD_CHUNK = 200_000
+# Números usados como letras en la jerga escrita ("pistol4", "m4t4r", "3l1m1n4r")
+_LEET = str.maketrans("0134578", "oieastb")
+
+
+def _dedupe_sorted(values):
+    if values.size == 0:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+def _intersect_sorted(a, b):
+    # Ambos ordenados y sin repetidos: búsqueda binaria en lugar de reordenar
+    if a.size == 0 or b.size == 0:
+        return a[:0]
+    if a.size > b.size:
+        a, b = b, a
+    idx = np.minimum(np.searchsorted(b, a), b.size - 1)
+    return a[b[idx] == a]
+
+
+def canonical(term: str) -> str:
+    """Forma de un término para compararlo en la búsqueda aproximada (sin números por letras)."""
+    return term if term.isdigit() else term.translate(_LEET)
+
+
+def max_distance(term: str) -> int:
+    # Como el "AUTO" habitual: exacto hasta 2 letras, 1 error hasta 5, luego 2
+    return 0 if len(term) < 3 else 1 if len(term) < 6 else 2
+
+
+def edit_distances(key: str, others: list[str], limit: int, prefix: bool = False) -> np.ndarray:
+    """Distancia de edición de ``key`` a cada término de ``others`` (con ``prefix``,
+    al prefijo más parecido de cada uno); ``limit + 1`` donde supera ``limit``.
+
+    Es la tabla de Levenshtein de siempre, fila a fila, pero cada celda se
+    calcula para todos los términos a la vez.
+    """
+    if not others:
+        return np.empty(0, dtype=np.int64)
+    lengths = np.fromiter(map(len, others), dtype=np.int64, count=len(others))
+    width = int(lengths.max())
+    if prefix:
+        # Un prefijo más largo que ``key`` + ``limit`` ya no puede estar a ``limit``
+        width = min(width, len(key) + limit)
+        lengths = np.minimum(lengths, width)
+    width = max(width, 1)
+    chars = np.array(others, dtype=f"<U{width}").view(np.uint32).reshape(len(others), width)
+    previous = np.tile(np.arange(width + 1, dtype=np.int64), (len(others), 1))
+    for i, ch in enumerate(key, start=1):
+        # Sustitución y borrado salen de la fila anterior; la inserción, de esta
+        best = np.minimum(previous[:, :-1] + (chars != ord(ch)), previous[:, 1:] + 1)
+        current = np.empty_like(previous)
+        current[:, 0] = i
+        for j in range(1, width + 1):
+            current[:, j] = np.minimum(best[:, j - 1], current[:, j - 1] + 1)
+        previous = current
+    if prefix:
+        previous[np.arange(width + 1) > lengths[:, None]] = limit + 1
+        distances = previous.min(axis=1)
+    else:
+        distances = previous[np.arange(len(others)), lengths]
+    return np.minimum(distances, limit + 1)
+
+
+def _trigram_codes(keys, left=2, right=2):
+    """Trigramas de cada clave, con relleno, como enteros; y su número por clave."""
+    width = FUZZY_MAX_LENGTH + left + right
+    padded = np.array([" " * left + key + " " * right for key in keys], dtype=f"<U{width}")
+    chars = padded.view(np.uint32).reshape(len(keys), width).astype(np.int64)
+    codes = (chars[:, :-2] << 42) | (chars[:, 1:-1] << 21) | chars[:, 2:]
+    counts = np.fromiter((len(key) + left + right - 2 for key in keys), dtype=np.int64, count=len(keys))
+    return codes, counts
+
+
+class TrigramIndex:
+    """Índice de trigramas del vocabulario (forma :func:`canonical`), tipo CSR.
+
+    Si dos términos están a distancia ``k``, comparten al menos ``n + 2 - 3k``
+    de sus trigramas (con dos espacios de relleno a cada lado): solo los
+    términos que llegan a ese mínimo se comparan con :func:`edit_distances`.
+    """
+
+    def __init__(self, keys, grams, offsets, terms):
+        self.keys = keys                # forma canónica de cada término del vocabulario
+        self.grams = grams              # trigramas distintos, ordenados
+        self.offsets = offsets
+        self.terms = terms              # términos de cada trigrama: terms[offsets[g]:offsets[g + 1]]
+
+    @classmethod
+    def build(cls, vocabulary) -> "TrigramIndex":
+        keys = [canonical(term) for term in vocabulary]
+        term_parts, gram_parts = [], []
+        eligible = [i for i, key in enumerate(keys) if len(key) <= FUZZY_MAX_LENGTH]
+        # Por bloques: la matriz de caracteres de todo el vocabulario no cabe de una vez
+        for start in range(0, len(eligible), _BUILD_CHUNK):
+            ids = np.asarray(eligible[start:start + _BUILD_CHUNK], dtype=np.int64)
+            codes, counts = _trigram_codes([keys[i] for i in ids])
+            valid = np.arange(codes.shape[1]) < counts[:, None]
+            term_parts.append(np.broadcast_to(ids[:, None], codes.shape)[valid])
+            gram_parts.append(codes[valid])
+        if not gram_parts:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(keys, empty, np.zeros(1, dtype=np.int64), empty.astype(np.int32))
+        terms, grams = np.concatenate(term_parts), np.concatenate(gram_parts)
+        order = np.lexsort((terms, grams))
+        terms, grams = terms[order], grams[order]
+        # Un trigrama repetido dentro de un término cuenta una vez
+        keep = np.concatenate(([True], (grams[1:] != grams[:-1]) | (terms[1:] != terms[:-1])))
+        terms, grams = terms[keep], grams[keep]
+        unique_grams, starts = np.unique(grams, return_index=True)
+        offsets = np.append(starts, grams.size).astype(np.int64)
+        return cls(keys, unique_grams, offsets, terms.astype(np.int32))
+
+    def __len__(self):
+        return len(self.keys)
+
+    @staticmethod
+    def query_grams(key: str, prefix: bool = False) -> np.ndarray:
+        # Un prefijo no lleva relleno a la derecha: el término sigue
+        codes, counts = _trigram_codes([key[:FUZZY_MAX_LENGTH]], right=0 if prefix else 2)
+        return np.unique(codes[0, :counts[0]])
+
+    def candidates(self, wanted: np.ndarray, limit: int) -> np.ndarray:
+        """Términos que comparten suficientes trigramas (``wanted``) para estar a ``limit``."""
+        needed = len(wanted) - 3 * limit
+        if needed < 1:
+            return np.empty(0, dtype=np.int64)
+        found = np.searchsorted(self.grams, wanted)
+        found = found[(found < self.grams.size) & (self.grams[np.minimum(found, self.grams.size - 1)] == wanted)]
+        if found.size == 0:
+            return np.empty(0, dtype=np.int64)
+        postings = np.concatenate([self.terms[self.offsets[g]:self.offsets[g + 1]] for g in found])
+        terms, shared = np.unique(postings, return_counts=True)
+        return terms[shared >= needed]
+
+    def expand(self, term: str, prefix: bool = False) -> list[tuple[int, int]]:
+        """``(id del término, distancia)`` de las variantes de ``term`` en el vocabulario.
+
+        Los términos de más de :data:`FUZZY_MAX_LENGTH` letras no están en el
+        índice: se buscan solo exactos (ver :meth:`SearchIndex.fuzzy_match`).
+        """
+        key = canonical(term)
+        if not key or len(key) > FUZZY_MAX_LENGTH:
+            return []
+        wanted = self.query_grams(key, prefix)
+        # Un prefijo corto tiene pocos trigramas: se tolera lo que permite el filtro
+        limit = min(max_distance(key), (len(wanted) - 1) // 3)
+        candidates = self.candidates(wanted, limit).tolist()
+        if limit == 0:
+            if prefix:
+                return [(i, 0) for i in candidates if self.keys[i].startswith(key)]
+            return [(i, 0) for i in candidates if self.keys[i] == key]
+
+        if not prefix:
+            candidates = [i for i in candidates if abs(len(self.keys[i]) - len(key)) <= limit]
+        distances = edit_distances(key, [self.keys[i] for i in candidates], limit, prefix)
+        return [(i, int(d)) for i, d in zip(candidates, distances.tolist()) if d <= limit]
+
+
+class SearchIndex:
+    def __init__(self, messages, vocabulary, offsets, docs, positions):
+        self.messages = messages
+        self.vocabulary = vocabulary          # lista ordenada de términos
+        self.term_ids = {t: i for i, t in enumerate(vocabulary)}
+        self.offsets = offsets
+        self.docs = docs
+        self.positions = positions
+        self._fuzzy = None
+
+    @classmethod
+    def build(cls, messages: pd.DataFrame) -> "SearchIndex":
+        """``messages`` con las columnas de :func:`investidata.sheets.messages_frame`."""
+        tokens = fold_series(messages["texto"]).str.findall(TOKEN_RE.pattern)
+        tokens.index = np.arange(len(tokens))
+        exploded = tokens.explode().dropna()
+
+        if exploded.empty:
+            empty = np.empty(0, dtype=np.int32)
+            return cls(messages, [], np.zeros(1, dtype=np.int64), empty, empty)
+
+        positions = exploded.groupby(level=0).cumcount().to_numpy(dtype=np.int32)
+        docs = exploded.index.to_numpy(dtype=np.int32)
+        # factorize con sort=True: el id del término es su posición en el vocabulario
+        codes, vocabulary = pd.factorize(exploded.to_numpy(dtype=object), sort=True)
+
+        order = np.lexsort((positions, docs, codes))
+        counts = np.bincount(codes, minlength=len(vocabulary))
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        return cls(messages, list(vocabulary), offsets, docs[order], positions[order])
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __getstate__(self):
+        # Los mensajes salen de las hojas de la extracción: no se guardan con
+        # el índice; quien lo lee los vuelve a asignar (investidata.bundle)
+        return {**self.__dict__, "messages": None}
+
+    # --- Postings ---
+
+    def _postings(self, term_id):
+        lo, hi = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.docs[lo:hi], self.positions[lo:hi]
+
+    def _term_keys(self, term):
+        # Clave mensaje/posición en un int64 ordenado, para intersecciones vectorizadas
+        if term.endswith("*"):
+            prefix = term[:-1]
+            lo = bisect.bisect_left(self.vocabulary, prefix)
+            hi = bisect.bisect_left(self.vocabulary, prefix + "\uffff")
+            keys = [self._keys(*self._postings(t)) for t in range(lo, hi)]
+            return np.sort(np.concatenate(keys)) if keys else np.empty(0, dtype=np.int64)
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return np.empty(0, dtype=np.int64)
+        return self._keys(*self._postings(term_id))
+
+    @staticmethod
+    def _keys(docs, positions):
+        return (docs.astype(np.int64) << 32) | positions.astype(np.int64)
+
+    def _phrase_docs(self, terms):
+        # Posiciones consecutivas: se alinea cada término con el primero
+        keys = self._term_keys(terms[0])
+        for shift, term in enumerate(terms[1:], start=1):
+            if keys.size == 0:
+                break
+            keys = _intersect_sorted(keys, self._term_keys(term) - shift)
+        return _dedupe_sorted(keys >> 32)
+
+    # --- Consultas ---
+
+    @staticmethod
+    def parse_query(query: str):
+        """Frases entre comillas y términos sueltos, ya normalizados."""
+        phrases = [TOKEN_RE.findall(fold(p)) for p in _PHRASE_RE.findall(query)]
+        rest = _PHRASE_RE.sub(" ", query)
+        terms = [t + "*" if raw.endswith("*") else t
+                 for raw in rest.split() for t in TOKEN_RE.findall(fold(raw))]
+        return [p for p in phrases if p] + [[t] for t in terms]
+
+    def match(self, query: str) -> np.ndarray:
+        """Posiciones (filas de ``messages``) que contienen todos los términos y frases."""
+        clauses = self.parse_query(query)
+        if not clauses:
+            return np.empty(0, dtype=np.int64)
+        result = None
+        for clause in clauses:
+            docs = self._phrase_docs(clause)
+            result = docs if result is None else _intersect_sorted(result, docs)
+            if result.size == 0:
+                break
+        return result
+
+    # --- Búsqueda aproximada ---
+
+    def fuzzy_index(self) -> TrigramIndex:
+        # Se construye en la primera búsqueda aproximada (los paquetes de caso
+        # lo traen hecho)
+        if self._fuzzy is None:
+            self._fuzzy = TrigramIndex.build(self.vocabulary)
+        return self._fuzzy
+
+    def _exact_ids(self, term):
+        if term.endswith("*"):
+            lo = bisect.bisect_left(self.vocabulary, term[:-1])
+            return range(lo, bisect.bisect_left(self.vocabulary, term[:-1] + "\uffff"))
+        term_id = self.term_ids.get(term)
+        return [] if term_id is None else [term_id]
+
+    def _fuzzy_docs(self, term, limit=MAX_EXPANSIONS):
+        """Mensajes con alguna variante de ``term`` y su parecido (1 si es exacto);
+        también las variantes usadas, las más parecidas primero."""
+        prefix = term.endswith("*")
+        variants = dict(self.fuzzy_index().expand(term.rstrip("*"), prefix=prefix))
+        # Lo que encuentra la búsqueda exacta siempre está (p. ej. términos largos)
+        variants.update((term_id, 0) for term_id in self._exact_ids(term))
+        tolerance = max_distance(canonical(term.rstrip("*"))) + 1
+        ranked = sorted(
+            variants.items(),
+            key=lambda item: (item[1], -(self.offsets[item[0] + 1] - self.offsets[item[0]]), item[0]),
+        )[:limit]
+        if not ranked:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, np.empty(0, dtype=np.float64), []
+        docs = np.concatenate([self._postings(term_id)[0] for term_id, _ in ranked]).astype(np.int64)
+        scores = np.concatenate([
+            np.full(self.offsets[term_id + 1] - self.offsets[term_id], 1.0 - distance / tolerance)
+            for term_id, distance in ranked
+        ])
+        # Por mensaje, la variante más parecida
+        order = np.lexsort((-scores, docs))
+        docs, scores = docs[order], scores[order]
+        first = np.concatenate(([True], docs[1:] != docs[:-1])) if docs.size else docs.astype(bool)
+        return docs[first], scores[first], [self.vocabulary[term_id] for term_id, _ in ranked]
+
+    def fuzzy_match(self, query: str):
+        """Filas que coinciden con todos los términos (con errores) y frases (exactas),
+        ordenadas por parecido; y ``{término: variantes}`` de cada término."""
+        clauses = self.parse_query(query)
+        rows, scores, variants = None, None, {}
+        for clause in clauses:
+            if len(clause) > 1:
+                docs = self._phrase_docs(clause).astype(np.int64)
+                clause_scores = np.ones(docs.size)
+            else:
+                docs, clause_scores, variants[clause[0]] = self._fuzzy_docs(clause[0])
+            if rows is None:
+                rows, scores = docs, clause_scores
+            else:
+                rows, left, right = np.intersect1d(rows, docs, assume_unique=True, return_indices=True)
+                scores = scores[left] + clause_scores[right]
+            if rows.size == 0:
+                break
+        if rows is None:
+            return np.empty(0, dtype=np.int64), variants
+        # Más parecidos primero; a igual parecido, en el orden de la extracción
+        return rows[np.lexsort((rows, -scores))], variants
+
+    def _highlights(self, text, clauses):
+        folded, offsets = folded_with_offsets(text)
+        spans = []
+        for clause in clauses:
+            parts = [re.escape(t[:-1]) + r"\w*" if t.endswith("*") else re.escape(t) for t in clause]
+            pattern = r"(?<!\w)" + r"\W+".join(parts) + r"(?!\w)"
+            for m in re.finditer(pattern, folded):
+                spans.append((offsets[m.start()], offsets[m.end() - 1] + 1))
+        return sorted(spans)
+
+    def hit(self, row, clauses):
+        message = self.messages.iloc[row]
+        text = "" if pd.isna(message["texto"]) else str(message["texto"])
+        spans = self._highlights(text, clauses)
+        # Fragmento centrado en la primera coincidencia
+        start = 0
+        if spans and len(text) > SNIPPET_CHARS:
+            start = max(0, min(spans[0][0] - SNIPPET_CHARS // 4, len(text) - SNIPPET_CHARS))
+        end = start + SNIPPET_CHARS
+        return {
+            "id": int(message["id"]),
+            "contact": "" if pd.isna(message["contacto"]) else str(message["contacto"]),
+            "date": "" if pd.isna(message["fecha"]) else str(message["fecha"]),
+            "snippet": text[start:end],
+            "prefix": start > 0,
+            "suffix": end < len(text),
+            "highlights": [[max(s, start) - start, min(e, end) - start]
+                           for s, e in spans if s < end and e > start],
+        }
+
+    def search(self, query: str, offset: int = 0, limit: int = PAGE_SIZE, fuzzy: bool = False) -> dict:
+        """Una página de resultados más el total; el resaltado viaja como posiciones.
+
+        Con ``fuzzy`` los resultados van ordenados por parecido y ``variants``
+        trae, por término, las variantes del vocabulario que se buscaron.
+        """
+        clauses = self.parse_query(query)
+        variants = {}
+        if fuzzy:
+            rows, variants = self.fuzzy_match(query)
+            # Se resaltan las variantes encontradas, no el término escrito
+            clauses = [c for c in clauses if len(c) > 1] + [[v] for found in variants.values() for v in found]
+        else:
+            rows = self.match(query)
+        offset = max(0, min(offset, max(rows.size - 1, 0)))
+        return {
+            "query": query,
+            "fuzzy": fuzzy,
+            "variants": variants,
+            "total": int(rows.size),
+            "offset": offset,
+            "limit": limit,
+            "hits": [self.hit(int(row), clauses) for row in rows[offset:offset + limit]],
+        }
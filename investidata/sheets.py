@@ -0,0 +1,209 @@
+"""Localización de hojas y columnas conocidas en reportes UFED (español e inglés).
+
+Los nombres exactos cambian entre versiones de Cellebrite y entre idiomas del
+reporte, así que se buscan por alias normalizados (sin tildes ni mayúsculas).
+"""
+
+import pandas as pd
+
+from investidata.text import fold
+
+SHEET_ALIASES = {
+    "mensajes": (
+        "Mensajes instantáneos", "Chats", "Mensajes", "SMS", "MMS", "Correos electrónicos",
+        "Instant Messages", "Messages", "Emails",
+    ),
+    "llamadas": ("Registro de llamadas", "Llamadas", "Call Log", "Calls"),
+    "ubicaciones": ("Ubicaciones", "Ubicaciones de dispositivo", "Locations", "Device Locations"),
+    "contactos": ("Contactos", "Contacts"),
+    "archivos": (
+        "Imágenes", "Videos", "Audio", "Documentos", "Archivos",
+        "Images", "Audios", "Documents", "Files",
+    ),
+}
+
+COLUMN_ALIASES = {
+    "texto": ("Cuerpo", "Mensaje", "Texto", "Contenido", "Body", "Message", "Text", "Content"),
+    "contacto": (
+        "De", "Desde", "Remitente", "Participantes", "Para", "Nombre",
+        "From", "Sender", "Participants", "To", "Name",
+    ),
+    "fecha": (
+        "Marca de tiempo", "Marca de tiempo: Fecha", "Fecha", "Hora", "Fecha de creación",
+        "Timestamp", "Timestamp: Date", "Date", "Time", "Created",
+    ),
+    "aplicacion": ("Fuente", "Aplicación", "Source", "Application", "App"),
+    "direccion": ("Dirección", "Tipo", "Direction", "Type"),
+    "telefono": ("Número", "Número de teléfono", "Teléfono", "Number", "Phone number", "Phone"),
+    "correo": ("Correo electrónico", "Correo", "Email", "E-mail", "Email address"),
+    "chat": ("Chat", "ID del chat", "Conversación", "Chat ID", "Conversation", "Thread"),
+    "estado": ("Estado", "Status", "Leído", "Read"),
+    "latitud": ("Latitud", "Latitude", "Lat"),
+    "longitud": ("Longitud", "Longitude", "Lon", "Long", "Lng"),
+    # Latitud y longitud juntas en una celda: "4.6097, -74.0817"
+    "coordenadas": ("Coordenadas", "Posición", "Coordinates", "Position", "Location"),
+    "archivo": ("Nombre de archivo", "Nombre", "Archivo", "File name", "Filename", "Name", "File"),
+    "ruta": ("Ruta", "Ruta de acceso", "Ruta del archivo", "Path", "File path", "Full path"),
+    "tamano": ("Tamaño (bytes)", "Tamaño", "Size (bytes)", "Size"),
+    "hash": ("MD5", "SHA256", "SHA-256", "SHA1", "Hash"),
+}
+
+MEDIA_TYPES = {
+    "imagen": (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".heic", ".tif", ".tiff"),
+    "video": (".mp4", ".mov", ".3gp", ".avi", ".mkv", ".webm", ".m4v"),
+    "audio": (".mp3", ".m4a", ".aac", ".wav", ".ogg", ".opus", ".amr"),
+    "documento": (".pdf", ".doc", ".docx", ".xls", ".xlsx", ".txt", ".ppt", ".pptx"),
+}
+
+_COORDS_RE = r"(-?\d+(?:\.\d+)?)\s*[,;]\s*(-?\d+(?:\.\d+)?)"
+
+
+def _key(name) -> str:
+    return fold(str(name)).strip()
+
+
+def find_sheets(frames: dict[str, pd.DataFrame], kind: str) -> list[str]:
+    # Coincidencia exacta con el alias o como prefijo ("Chats (2)", "SMS - SIM 1")
+    aliases = [_key(a) for a in SHEET_ALIASES[kind]]
+    found = []
+    for name in frames:
+        key = _key(name)
+        if any(key == a or key.startswith(a + " ") for a in aliases):
+            found.append(name)
+    return found
+
+
+def find_column(df: pd.DataFrame, role: str):
+    columns = {_key(c): c for c in df.columns}
+    for alias in COLUMN_ALIASES[role]:
+        if _key(alias) in columns:
+            return columns[_key(alias)]
+    return None
+
+
+def find_columns(df: pd.DataFrame, role: str) -> list:
+    # Todas las columnas del rol (p. ej. "De" y "Para"), en el orden de la hoja
+    aliases = {_key(alias) for alias in COLUMN_ALIASES[role]}
+    return [c for c in df.columns if _key(c) in aliases]
+
+
+def messages_frame(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Une todas las hojas de mensajes en un DataFrame con columnas canónicas.
+
+    Columnas: ``id`` (posición estable dentro de la extracción), ``hoja``,
+    ``contacto``, ``texto`` y ``fecha``.
+    """
+    parts = []
+    for name in find_sheets(frames, "mensajes"):
+        df = frames[name]
+        text_col = find_column(df, "texto")
+        if text_col is None:
+            continue
+        contact_col = find_column(df, "contacto")
+        date_col = find_column(df, "fecha")
+        parts.append(pd.DataFrame({
+            "hoja": name,
+            "contacto": df[contact_col] if contact_col is not None else pd.NA,
+            "texto": df[text_col],
+            "fecha": df[date_col] if date_col is not None else pd.NA,
+        }))
+
+    if not parts:
+        messages = pd.DataFrame(columns=["hoja", "contacto", "texto", "fecha"])
+    else:
+        messages = pd.concat(parts, ignore_index=True)
+    messages.insert(0, "id", range(len(messages)))
+    return messages
+
+
+def locations_frame(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Une todas las hojas de ubicaciones en un DataFrame con columnas canónicas.
+
+    Columnas: ``id``, ``hoja``, ``lat``, ``lon`` (grados, ``float64``) y
+    ``fecha``. Se descartan las filas sin coordenadas válidas y el punto
+    (0, 0), que los reportes usan como "sin posición".
+    """
+    parts = []
+    for name in find_sheets(frames, "ubicaciones"):
+        df = frames[name]
+        lat_col, lon_col = find_column(df, "latitud"), find_column(df, "longitud")
+        if lat_col is not None and lon_col is not None:
+            lat, lon = df[lat_col], df[lon_col]
+        else:
+            coords_col = find_column(df, "coordenadas")
+            if coords_col is None:
+                continue
+            coords = df[coords_col].astype("string").str.extract(_COORDS_RE)
+            lat, lon = coords[0], coords[1]
+        date_col = find_column(df, "fecha")
+        parts.append(pd.DataFrame({
+            "hoja": name,
+            "lat": pd.to_numeric(lat, errors="coerce").astype("float64"),
+            "lon": pd.to_numeric(lon, errors="coerce").astype("float64"),
+            "fecha": pd.to_datetime(df[date_col], errors="coerce") if date_col is not None else pd.NaT,
+        }))
+
+    if not parts:
+        locations = pd.DataFrame({
+            "hoja": pd.Series(dtype=object), "lat": pd.Series(dtype="float64"),
+            "lon": pd.Series(dtype="float64"), "fecha": pd.Series(dtype="datetime64[ns]"),
+        })
+    else:
+        locations = pd.concat(parts, ignore_index=True)
+    valid = (
+        locations["lat"].between(-90, 90) & locations["lon"].between(-180, 180)
+        & ~((locations["lat"] == 0) & (locations["lon"] == 0))
+    )
+    locations = locations[valid].reset_index(drop=True)
+    locations.insert(0, "id", range(len(locations)))
+    return locations
+
+
+def media_frame(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Une todas las hojas de archivos (imágenes, videos, audio, documentos).
+
+    Columnas: ``id``, ``hoja``, ``nombre``, ``ruta`` (tal como la escribe el
+    reporte), ``tipo`` (según la extensión: ``imagen``, ``video``, ``audio``,
+    ``documento`` u ``otro``), ``tamano`` (bytes, ``Int64``), ``fecha`` y
+    ``hash``. Se descartan las filas sin nombre ni ruta.
+    """
+    parts = []
+    for name in find_sheets(frames, "archivos"):
+        df = frames[name]
+        file_col, path_col = find_column(df, "archivo"), find_column(df, "ruta")
+        if file_col is None and path_col is None:
+            continue
+        size_col, date_col, hash_col = (find_column(df, role) for role in ("tamano", "fecha", "hash"))
+        paths = df[path_col].astype("string") if path_col is not None else pd.Series(pd.NA, index=df.index, dtype="string")
+        # Sin nombre, el nombre es el final de la ruta
+        names = paths.str.split(r"[\\/]").str[-1]
+        if file_col is not None:
+            names = df[file_col].astype("string").fillna(names)
+        parts.append(pd.DataFrame({
+            "hoja": name,
+            "nombre": names,
+            "ruta": paths,
+            "tamano": pd.to_numeric(df[size_col], errors="coerce").astype("Int64") if size_col is not None else pd.NA,
+            "fecha": pd.to_datetime(df[date_col], errors="coerce") if date_col is not None else pd.NaT,
+            "hash": df[hash_col].astype("string").str.strip().str.lower() if hash_col is not None else pd.NA,
+        }))
+
+    if not parts:
+        media = pd.DataFrame({
+            "hoja": pd.Series(dtype=object), "nombre": pd.Series(dtype="string"),
+            "ruta": pd.Series(dtype="string"), "tamano": pd.Series(dtype="Int64"),
+            "fecha": pd.Series(dtype="datetime64[ns]"), "hash": pd.Series(dtype="string"),
+        })
+    else:
+        media = pd.concat(parts, ignore_index=True).astype(
+            {"nombre": "string", "ruta": "string", "tamano": "Int64", "hash": "string"}
+        )
+    media = media[media["nombre"].notna()].reset_index(drop=True)
+
+    extension = media["nombre"].fillna(media["ruta"]).str.lower().str.extract(r"(\.[a-z0-9]+)$")[0]
+    kind = pd.Series("otro", index=media.index, dtype=object)
+    for label, extensions in MEDIA_TYPES.items():
+        kind[extension.isin(extensions).fillna(False).to_numpy(dtype=bool)] = label
+    media.insert(3, "tipo", kind)
+    media.insert(0, "id", range(len(media)))
+    return media
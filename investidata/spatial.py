@@ -0,0 +1,200 @@
+"""Índice espacial y agrupación por zoom de las ubicaciones de una extracción.
+
+Cada punto se proyecta a Web Mercator y se codifica como una clave Morton
+(orden Z) de :data:`MAX_LEVEL` niveles; los puntos se guardan ordenados por esa
+clave. En orden Z todas las celdas de cualquier nivel son tramos contiguos
+del arreglo, así que:
+
+* los grupos de un nivel salen de una sola pasada (``np.add.reduceat``) y se
+  guardan como una pirámide, calculada una vez por nivel;
+* una consulta por área o radio solo mira los tramos de unas pocas celdas
+  (búsqueda binaria) antes del filtro exacto.
+
+La página recibe como mucho :data:`MAX_POINTS` grupos por vista.
+"""
+
+import numpy as np
+import pandas as pd
+
+MAX_LEVEL = 24              # celdas de ~2 m en el ecuador
+MAX_POINTS = 3000
+CLUSTER_PIXELS = 24         # tamaño aproximado de un grupo en pantalla
+EARTH_RADIUS_M = 6_371_008.8
+_MAX_LAT = 85.05112878      # límite de Web Mercator
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Distancia en metros entre arreglos de puntos (grados), vectorizada."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def mercator(lat, lon):
+    """Coordenadas Web Mercator normalizadas a [0, 1) (x hacia el este, y hacia el sur)."""
+    lat = np.radians(np.clip(np.asarray(lat, dtype=np.float64), -_MAX_LAT, _MAX_LAT))
+    x = (np.asarray(lon, dtype=np.float64) + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0
+    return np.clip(x, 0.0, np.nextafter(1.0, 0)), np.clip(y, 0.0, np.nextafter(1.0, 0))
+
+
+def _spread(v):
+    # Intercala ceros entre los bits: 0b1011 -> 0b01000101
+    v = v.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF),
+                        (4, 0x0F0F0F0F0F0F0F0F), (2, 0x3333333333333333),
+                        (1, 0x5555555555555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def morton(cx, cy):
+    return _spread(cx) | (_spread(cy) << np.uint64(1))
+
+
+class SpatialIndex:
+    def __init__(self, locations: pd.DataFrame):
+        """``locations`` con las columnas de :func:`investidata.sheets.locations_frame`."""
+        lat = locations["lat"].to_numpy(dtype=np.float64)
+        lon = locations["lon"].to_numpy(dtype=np.float64)
+        x, y = mercator(lat, lon)
+        scale = float(1 << MAX_LEVEL)
+        codes = morton((x * scale).astype(np.uint64), (y * scale).astype(np.uint64))
+        order = np.argsort(codes, kind="stable")
+
+        self.locations = locations
+        self.rows = order                   # fila de ``locations`` de cada punto
+        self.codes = codes[order]
+        self.lat = lat[order]
+        self.lon = lon[order]
+        self._levels = {}
+
+    def __len__(self):
+        return self.codes.size
+
+    def bounds(self):
+        """``[sur, oeste, norte, este]`` de todos los puntos, o ``None`` si no hay."""
+        if not len(self):
+            return None
+        return [float(self.lat.min()), float(self.lon.min()),
+                float(self.lat.max()), float(self.lon.max())]
+
+    # --- Pirámide de grupos ---
+
+    def level(self, level: int) -> dict:
+        """Grupos de un nivel: clave de celda, número de puntos y centroide."""
+        if level not in self._levels:
+            cells = self.codes >> np.uint64(2 * (MAX_LEVEL - level))
+            starts = np.flatnonzero(np.concatenate(([True], cells[1:] != cells[:-1]))) if cells.size else np.empty(0, dtype=np.int64)
+            counts = np.diff(np.append(starts, cells.size))
+            self._levels[level] = {
+                "cells": cells[starts],
+                "starts": starts,
+                "counts": counts,
+                "lat": np.add.reduceat(self.lat, starts) / counts if starts.size else self.lat[:0],
+                "lon": np.add.reduceat(self.lon, starts) / counts if starts.size else self.lon[:0],
+            }
+        return self._levels[level]
+
+    def clusters(self, bbox=None, width_px=1024, max_points=MAX_POINTS) -> dict:
+        """Grupos visibles en ``bbox`` (``[sur, oeste, norte, este]``) para una vista
+        de ``width_px`` píxeles: celdas de unos :data:`CLUSTER_PIXELS` píxeles,
+        más gruesas si aun así se supera ``max_points``."""
+        bbox = bbox or self.bounds()
+        if bbox is None:
+            return {"bounds": None, "total": 0, "level": 0, "clusters": []}
+        south, west, north, east = bbox
+        (x0, x1), _ = mercator([south, north], [west, east])
+        span = max(x1 - x0, 1.0 / (1 << MAX_LEVEL))
+        level = int(np.clip(np.floor(np.log2(width_px / CLUSTER_PIXELS / span)), 0, MAX_LEVEL))
+
+        while True:
+            groups = self.level(level)
+            visible = (
+                (groups["lat"] >= south) & (groups["lat"] <= north)
+                & (groups["lon"] >= west) & (groups["lon"] <= east)
+            )
+            if level == 0 or np.count_nonzero(visible) <= max_points:
+                break
+            level -= 1
+
+        idx = np.flatnonzero(visible)
+        counts = groups["counts"][idx]
+        single = counts == 1
+        # Los grupos de un solo punto llevan el id de la ubicación
+        ids = np.full(idx.size, -1, dtype=np.int64)
+        ids[single] = self.locations["id"].to_numpy()[self.rows[groups["starts"][idx][single]]]
+        return {
+            "bounds": self.bounds(),
+            "total": len(self),
+            "level": level,
+            "clusters": [
+                {"lat": round(float(la), 6), "lon": round(float(lo), 6), "count": int(c),
+                 "id": int(i) if i >= 0 else None}
+                for la, lo, c, i in zip(groups["lat"][idx], groups["lon"][idx], counts, ids)
+            ],
+        }
+
+    # --- Consultas por área ---
+
+    def _candidates(self, south, west, north, east):
+        # Nivel en el que el área ocupa a lo sumo 4 × 4 celdas; cada celda es
+        # un tramo contiguo de ``codes``
+        (x0, x1), (y_south, y_north) = mercator([south, north], [west, east])
+        span = max(x1 - x0, y_south - y_north, 1.0 / (1 << MAX_LEVEL))
+        level = int(np.clip(np.floor(np.log2(4 / span)), 0, MAX_LEVEL))
+        scale = float(1 << level)
+        cxs = np.arange(int(x0 * scale), int(x1 * scale) + 1, dtype=np.uint64)
+        cys = np.arange(int(y_north * scale), int(y_south * scale) + 1, dtype=np.uint64)
+        cx, cy = np.meshgrid(cxs, cys)
+        shift = np.uint64(2 * (MAX_LEVEL - level))
+        lows = np.sort(morton(cx.ravel(), cy.ravel())) << shift
+        highs = lows + (np.uint64(1) << shift)
+        starts = np.searchsorted(self.codes, lows, side="left")
+        ends = np.searchsorted(self.codes, highs, side="left")
+        spans = [np.arange(s, e) for s, e in zip(starts, ends) if e > s]
+        return np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+
+    def _result(self, positions, distances=None, limit=None) -> pd.DataFrame:
+        found = self.locations.iloc[self.rows[positions]].copy()
+        if distances is not None:
+            found["distancia_m"] = distances
+            found = found.sort_values("distancia_m", kind="stable")
+        else:
+            found = found.sort_values("id", kind="stable")
+        return found.head(limit) if limit is not None else found
+
+    def within_bbox(self, south, west, north, east, limit=None) -> pd.DataFrame:
+        """Ubicaciones dentro del rectángulo (no cruza el antimeridiano)."""
+        positions = self._candidates(south, west, north, east)
+        inside = (
+            (self.lat[positions] >= south) & (self.lat[positions] <= north)
+            & (self.lon[positions] >= west) & (self.lon[positions] <= east)
+        )
+        return self._result(positions[inside], limit=limit)
+
+    def within_radius(self, lat, lon, meters, limit=None) -> pd.DataFrame:
+        """Ubicaciones a menos de ``meters`` del punto, ordenadas por distancia."""
+        dlat = np.degrees(meters / EARTH_RADIUS_M)
+        dlon = dlat / max(np.cos(np.radians(min(abs(lat) + dlat, 89.9))), 1e-6)
+        positions = self._candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+        distances = haversine_m(lat, lon, self.lat[positions], self.lon[positions])
+        near = distances <= meters
+        return self._result(positions[near], distances[near], limit=limit)
+
+    def nearby(self, lat, lon, meters, limit=200) -> dict:
+        """Para la página: total y las ``limit`` ubicaciones más cercanas al punto."""
+        found = self.within_radius(lat, lon, meters)
+        return {
+            "lat": lat,
+            "lon": lon,
+            "radius": meters,
+            "total": len(found),
+            "fixes": [
+                {"id": int(row.id), "lat": float(row.lat), "lon": float(row.lon),
+                 "date": "" if pd.isna(row.fecha) else str(row.fecha),
+                 "distance": round(float(row.distancia_m), 1)}
+                for row in found.head(limit).itertuples()
+            ],
+        }
@@ -0,0 +1,199 @@
+"""Persistencia del trabajo de los investigadores, con escrituras agrupadas.
+
+Lo que la página guarda (vista y temática actuales, búsquedas guardadas,
+mensajes etiquetados) llega en lotes y se escribe en un almacén
+intercambiable: SQLite en el servidor por defecto, o en memoria. Cada
+entrada es ``(ámbito, clave) -> valor`` con la hora de su última
+modificación:
+
+* ámbito ``usuario:<id>`` para las preferencias de cada navegador;
+* ámbito ``extraccion:<hash>`` para el trabajo sobre un caso, compartido por
+  todas las sesiones que lo analizan.
+
+Gana la modificación más reciente (también entre sesiones y al reenviar un
+lote), y borrar es guardar ``None``: la entrada queda como lápida para que un
+navegador desconectado no la resucite al sincronizar.
+
+:class:`StateStore` no escribe en cada llamada: acumula los cambios y los
+escribe juntos, en una transacción, ``delay`` segundos después del primero
+(o antes si el lote llega a ``max_batch``).
+"""
+
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from investidata.cache import DEFAULT_CACHE_DIR
+
+DEFAULT_STATE_PATH = Path(os.environ.get("INVESTIDATA_STATE_DB", DEFAULT_CACHE_DIR / "estado.sqlite3"))
+DEFAULT_DELAY = 0.5
+MAX_BATCH = 500
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._rows = {}             # (ámbito, clave) -> (valor, actualizado)
+        self._lock = threading.Lock()
+
+    def load(self, scope) -> dict:
+        with self._lock:
+            return {key: row for (s, key), row in self._rows.items() if s == scope}
+
+    def write(self, rows):
+        with self._lock:
+            for scope, key, value, updated in rows:
+                current = self._rows.get((scope, key))
+                if current is None or updated >= current[1]:
+                    self._rows[(scope, key)] = (value, updated)
+
+
+class SQLiteBackend:
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Una conexión compartida por los hilos, serializada con el candado
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS estado ("
+                " ambito TEXT NOT NULL, clave TEXT NOT NULL, valor TEXT,"
+                " actualizado REAL NOT NULL, PRIMARY KEY (ambito, clave))"
+            )
+
+    def load(self, scope) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT clave, valor, actualizado FROM estado WHERE ambito = ?", (scope,)
+            ).fetchall()
+        return {key: (None if value is None else json.loads(value), updated) for key, value, updated in rows}
+
+    def write(self, rows):
+        encoded = [
+            (scope, key, None if value is None else json.dumps(value, ensure_ascii=False), updated)
+            for scope, key, value, updated in rows
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO estado (ambito, clave, valor, actualizado) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (ambito, clave) DO UPDATE SET"
+                " valor = excluded.valor, actualizado = excluded.actualizado"
+                " WHERE excluded.actualizado >= estado.actualizado",
+                encoded,
+            )
+
+
+class StateStore:
+    def __init__(self, backend=None, delay=DEFAULT_DELAY, max_batch=MAX_BATCH):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.delay = delay
+        self.max_batch = max_batch
+        self._pending = {}          # (ámbito, clave) -> (valor, actualizado)
+        self._lock = threading.Lock()
+        self._timer = None
+        # Lo que quede pendiente al cerrar el servidor también se escribe
+        atexit.register(self.flush)
+
+    def put(self, scope, key, value, updated=None):
+        """Guarda ``value`` (``None`` borra); ``updated`` en milisegundos desde 1970."""
+        self.put_many([(scope, key, value, updated)])
+
+    def put_many(self, rows):
+        now = time.time() * 1000
+        with self._lock:
+            for scope, key, value, updated in rows:
+                updated = now if updated is None else float(updated)
+                current = self._pending.get((scope, key))
+                if current is None or updated >= current[1]:
+                    self._pending[(scope, key)] = (value, updated)
+            if len(self._pending) >= self.max_batch:
+                flush_now = True
+            else:
+                flush_now = False
+                if self._timer is None:
+                    self._timer = threading.Timer(self.delay, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if flush_now:
+            self.flush()
+
+    def flush(self):
+        """Escribe ya los cambios pendientes (una transacción)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            rows = [(scope, key, value, updated) for (scope, key), (value, updated) in self._pending.items()]
+            self._pending = {}
+        if rows:
+            self.backend.write(rows)
+
+    def load(self, scope, include_deleted=False) -> dict:
+        """Entradas del ámbito como ``{clave: {"value", "updated"}}``, con lo pendiente incluido."""
+        entries = dict(self.backend.load(scope))
+        with self._lock:
+            for (s, key), row in self._pending.items():
+                if s == scope and (key not in entries or row[1] >= entries[key][1]):
+                    entries[key] = row
+        return {
+            key: {"value": value, "updated": updated}
+            for key, (value, updated) in entries.items()
+            if include_deleted or value is not None
+        }
+
+
+# --- Intercambio con la página ---
+# La página guarda con claves locales ``usuario/<clave>`` (preferencias) y
+# ``<extracción>/<clave>`` (trabajo sobre el caso, con el hash abreviado a 12)
+_USER_PREFIX = "usuario"
+_EXTRACTION_ID = re.compile(r"[0-9a-f]{12}")
+_USER_ID = re.compile(r"[\w-]{1,64}")
+
+
+def rows_from_page(entries, user: str = None) -> list[tuple]:
+    """Filas ``(ámbito, clave, valor, actualizado)`` de un lote enviado por la página.
+
+    Las entradas con claves o identificadores que no tienen la forma esperada
+    se descartan.
+    """
+    user = str(user or "")
+    rows = []
+    for entry in entries or []:
+        prefix, _, key = str(entry.get("key", "")).partition("/")
+        updated = entry.get("updated")
+        if not key or not isinstance(updated, (int, float)):
+            continue
+        if prefix == _USER_PREFIX:
+            if not _USER_ID.fullmatch(user):
+                continue
+            scope = f"usuario:{user}"
+        elif _EXTRACTION_ID.fullmatch(prefix):
+            scope = f"extraccion:{prefix}"
+        else:
+            continue
+        rows.append((scope, key, entry.get("value"), updated))
+    return rows
+
+
+def entries_for_page(store: StateStore, extraction: str, user: str = None) -> dict:
+    """Lo guardado para la extracción (y las preferencias de ``user``), con claves locales.
+
+    Incluye las lápidas, para que la página borre lo que otra sesión borró.
+    """
+    extraction = extraction[:12]
+    entries = {
+        f"{extraction}/{key}": entry
+        for key, entry in store.load(f"extraccion:{extraction}", include_deleted=True).items()
+    }
+    if user and _USER_ID.fullmatch(user):
+        entries.update(
+            (f"{_USER_PREFIX}/{key}", entry)
+            for key, entry in store.load(f"usuario:{user}", include_deleted=True).items()
+        )
+    return entries
@@ -0,0 +1,228 @@
+"""Lectura en streaming de hojas XLSX muy grandes (openpyxl en modo read-only).
+
+Las filas se leen en bloques tipados y cada bloque se escribe de inmediato al
+conjunto columnar, así que la memoria máxima depende del tamaño de bloque y
+no del tamaño de la hoja.
+"""
+
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+
+from investidata.columnar import StoreWriter, typed_frame
+
+try:
+    # Interno de openpyxl (probado con 3.1, ver requirements.txt): permite
+    # saltar filas sin interpretarlas. Sin él se usa ``iter_rows``
+    from openpyxl.worksheet._reader import WorkSheetParser
+except ImportError:
+    WorkSheetParser = None
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+class SchemaDrift(Exception):
+    """Un bloque posterior no cabe en el tipo inferido con el primer bloque."""
+
+    def __init__(self, column):
+        # ``column`` como único argumento: la excepción viaja bien entre procesos
+        super().__init__(column)
+        self.column = column
+
+    def __str__(self):
+        return f"La columna {self.column!r} cambia de tipo dentro de la hoja"
+
+
+class ChunkTyper:
+    """Infiere los tipos con el primer bloque y los mantiene en los siguientes."""
+
+    def __init__(self, text_columns=(), dtypes=None):
+        self.text_columns = set(text_columns)
+        # ``dtypes`` permite fijar los tipos de antemano (partes de una hoja en paralelo)
+        self.dtypes = dtypes
+
+    def __call__(self, df):
+        if self.dtypes is None:
+            typed = typed_frame(df)
+            for name in self.text_columns & set(typed.columns):
+                typed[name] = df[name].astype("string")
+            self.dtypes = typed.dtypes
+            return typed
+
+        typed = df.copy()
+        for name, dtype in self.dtypes.items():
+            column = df[name]
+            if pd.api.types.is_string_dtype(dtype):
+                typed[name] = column.astype(dtype)
+                continue
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                converted = pd.to_datetime(column, errors="coerce")
+            elif pd.api.types.is_bool_dtype(dtype):
+                converted = column.astype("boolean")
+            else:
+                converted = pd.to_numeric(column, errors="coerce")
+            # Nunca se pierde un valor: si no se puede convertir, se avisa
+            if (converted.isna() & column.notna()).any():
+                raise SchemaDrift(name)
+            try:
+                typed[name] = converted.astype(dtype)
+            except (TypeError, ValueError):
+                raise SchemaDrift(name)
+        return typed
+
+
+if WorkSheetParser is not None:
+    class _RangeParser(WorkSheetParser):
+        """Parser de openpyxl que no interpreta las celdas de las filas a saltar."""
+
+        def __init__(self, *args, skip_before=1, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.skip_before = skip_before
+
+        def parse_row(self, row):
+            r = row.get("r")
+            if r is not None and r.isdigit() and int(r) < self.skip_before:
+                self.row_counter = int(r)
+                return self.row_counter, []
+            return super().parse_row(row)
+else:
+    _RangeParser = None
+
+
+def _range_parser(sheet, min_row):
+    """El parser que salta filas, o ``None`` si esta versión de openpyxl no lo admite."""
+    if _RangeParser is None:
+        return None, None
+    src = None
+    try:
+        workbook = sheet.parent
+        src = sheet._get_source()
+        parser = _RangeParser(
+            src, sheet._shared_strings, data_only=workbook.data_only,
+            epoch=workbook.epoch, date_formats=workbook._date_formats,
+            timedelta_formats=workbook._timedelta_formats, skip_before=min_row,
+        )
+    except Exception:
+        # Internos distintos (atributos, firma del constructor...): vía pública
+        if src is not None:
+            src.close()
+        return None, None
+    return parser, src
+
+
+def _iter_row_range(sheet, min_row, max_row):
+    """Como ``iter_rows(min_row, max_row, values_only=True)`` pero sin el coste
+    de interpretar las filas anteriores (importante al dividir hojas gigantes).
+
+    Omite las filas sin celdas y no rellena con ``None`` a la derecha de la
+    última celda: quien lo usa descarta las filas vacías y completa el ancho.
+    """
+    parser, src = _range_parser(sheet, min_row)
+    if parser is None:
+        yield from sheet.iter_rows(min_row=min_row, max_row=max_row, values_only=True)
+        return
+
+    with src:
+        for idx, cells in parser.parse():
+            if idx < min_row:
+                continue
+            if max_row is not None and idx > max_row:
+                break
+            if not cells:
+                continue
+            values = [None] * cells[-1]["column"]
+            for cell in cells:
+                values[cell["column"] - 1] = cell["value"]
+            yield tuple(values)
+
+
+def _open(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return openpyxl.load_workbook(source, read_only=True, data_only=True)
+
+
+def _header(values):
+    names = []
+    for i, value in enumerate(values):
+        name = str(value) if value is not None else f"Unnamed: {i}"
+        # Mismo criterio que pandas para encabezados repetidos
+        base, n = name, 1
+        while name in names:
+            name = f"{base}.{n}"
+            n += 1
+        names.append(name)
+    return names
+
+
+def sheet_names(source):
+    workbook = _open(source)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def iter_sheet_chunks(source, sheet_name, chunk_size=DEFAULT_CHUNK_SIZE,
+                      on_progress=None, typer=None, min_row=1, max_row=None):
+    """Genera DataFrames tipados de hasta ``chunk_size`` filas de una hoja."""
+    typer = typer or ChunkTyper()
+    workbook = _open(source)
+    try:
+        sheet = workbook[sheet_name]
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _header(header)
+        width = len(columns)
+        total = (sheet.max_row - 1) if sheet.max_row else None
+
+        if min_row > 1 or max_row is not None:
+            # Rango de filas de datos (1 = primera fila después del encabezado)
+            rows = _iter_row_range(sheet, min_row + 1, None if max_row is None else max_row + 1)
+
+        done = 0
+        buffer = []
+        for row in rows:
+            if not any(cell is not None for cell in row):
+                continue
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                yield typer(pd.DataFrame.from_records(buffer, columns=columns))
+                done += len(buffer)
+                buffer = []
+                if on_progress is not None:
+                    on_progress(sheet_name, done, total)
+        if buffer:
+            yield typer(pd.DataFrame.from_records(buffer, columns=columns))
+            done += len(buffer)
+        if on_progress is not None:
+            on_progress(sheet_name, done, done)
+    finally:
+        workbook.close()
+
+
+def stream_sheet(writer, source, sheet_name, chunk_size=DEFAULT_CHUNK_SIZE, on_progress=None):
+    text_columns = set()
+    while True:
+        try:
+            chunks = iter_sheet_chunks(
+                source, sheet_name, chunk_size, on_progress, ChunkTyper(text_columns)
+            )
+            return writer.add_chunks(sheet_name, chunks)
+        except SchemaDrift as drift:
+            # Caso raro: se relee la hoja guardando esa columna como texto
+            text_columns.add(drift.column)
+
+
+def stream_workbook(source, path, chunk_size=DEFAULT_CHUNK_SIZE, on_progress=None, source_name=None,
+                    on_part=None):
+    if source_name is None and isinstance(source, (str, Path)):
+        source_name = Path(source).name
+    with StoreWriter(path, source_name=source_name, on_part=on_part) as writer:
+        for name in sheet_names(source):
+            stream_sheet(writer, source, name, chunk_size, on_progress)
+    return Path(path)
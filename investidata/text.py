@@ -0,0 +1,43 @@
+"""Normalización de texto en español: minúsculas y sin tildes (á→a, ñ→n, ü→u)."""
+
+import re
+import unicodedata
+
+import pandas as pd
+
+TOKEN_RE = re.compile(r"\w+")
+# Marcas diacríticas combinables que quedan tras la descomposición NFKD
+_COMBINING = "[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]"
+_COMBINING_RE = re.compile(_COMBINING)
+
+
+def fold(text: str) -> str:
+    return _COMBINING_RE.sub("", unicodedata.normalize("NFKD", text.lower()))
+
+
+def fold_series(texts: pd.Series) -> pd.Series:
+    # Versión vectorizada de fold() para columnas completas
+    return (
+        texts.fillna("").astype(str)
+        .str.lower()
+        .str.normalize("NFKD")
+        .str.replace(_COMBINING, "", regex=True)
+    )
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(fold(text))
+
+
+def folded_with_offsets(text: str):
+    """Texto normalizado más, para cada carácter, su posición en el original.
+
+    Permite traducir coincidencias sobre el texto normalizado a posiciones del
+    texto original (resaltado), aunque un carácter se expanda (p. ej. "ﬁ").
+    """
+    chars, offsets = [], []
+    for i, ch in enumerate(text):
+        for folded in fold(ch):
+            chars.append(folded)
+            offsets.append(i)
+    return "".join(chars), offsets
@@ -0,0 +1,169 @@
+"""Índice temporal de actividad: mensajes, llamadas y ubicaciones por intervalo.
+
+Las fechas de todas las hojas se cuentan una vez en intervalos de un minuto
+(solo los minutos con actividad, ordenados) y de ahí salen los niveles de
+hora y día con ``np.add.reduceat``, más el mapa de calor hora × día de la
+semana. Una consulta por rango es una búsqueda binaria sobre el nivel
+adecuado: acercarse a unas fechas no vuelve a leer las hojas.
+
+La línea de tiempo se reduce con mínimo/máximo por tramo (conserva los picos
+que un promedio borraría) hasta :data:`MAX_POINTS` puntos por serie.
+"""
+
+import numpy as np
+import pandas as pd
+
+from investidata.sheets import find_column, find_sheets, locations_frame, messages_frame
+
+KINDS = ("mensajes", "llamadas", "ubicaciones")
+LEVELS = {"minuto": 60, "hora": 3600, "dia": 86400}
+MAX_POINTS = 1500
+# Intervalos de un nivel que se expanden (con ceros) antes de reducir
+MAX_DENSE = 200_000
+WEEKDAYS = ("Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom")
+
+
+def _seconds(dates) -> np.ndarray:
+    """Fechas válidas como segundos desde 1970 (``int64``), sin las vacías."""
+    dates = pd.to_datetime(pd.Series(dates), errors="coerce").dropna()
+    return dates.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+def _reduce(keys, counts, width):
+    # Reagrupa intervalos ordenados en intervalos más anchos
+    coarse = keys // width
+    if coarse.size == 0:
+        return coarse, counts
+    starts = np.flatnonzero(np.concatenate(([True], coarse[1:] != coarse[:-1])))
+    return coarse[starts], np.add.reduceat(counts, starts, axis=0)
+
+
+def _minmax(times, values, max_points):
+    """Reduce una serie a ``max_points`` puntos: el mínimo y el máximo de cada tramo."""
+    if values.size <= max_points:
+        return times, values
+    bins = max(max_points // 2, 1)
+    size = -(-values.size // bins)
+    pad = bins * size - values.size
+    padded = np.concatenate((values, np.full(pad, values[-1])))
+    rows = padded.reshape(bins, size)
+    offsets = np.arange(bins) * size
+    low = offsets + rows.argmin(axis=1)
+    high = offsets + rows.argmax(axis=1)
+    # En orden temporal dentro de cada tramo, sin repetir si coinciden
+    picks = np.unique(np.minimum(np.concatenate((low, high)), values.size - 1))
+    return times[picks], values[picks]
+
+
+class ActivityIndex:
+    def __init__(self, events: dict[str, np.ndarray]):
+        """``events`` mapea cada tipo de :data:`KINDS` a sus fechas en segundos."""
+        times = [np.asarray(events.get(kind, ()), dtype=np.int64) for kind in KINDS]
+        # Un conteo por minuto con actividad y tipo de evento: una sola
+        # ordenación de la clave combinada minuto × tipo
+        combined, found = np.unique(
+            np.concatenate([t // 60 * len(KINDS) + i for i, t in enumerate(times)]), return_counts=True
+        )
+        minutes = combined // len(KINDS)
+        starts = np.flatnonzero(np.concatenate(([True], minutes[1:] != minutes[:-1]))) if minutes.size else minutes
+        keys = minutes[starts]
+        counts = np.zeros((keys.size, len(KINDS)), dtype=np.int64)
+        counts[np.repeat(np.arange(keys.size), np.diff(np.append(starts, minutes.size))), combined % len(KINDS)] = found
+
+        self.levels = {"minuto": (keys * 60, counts)}
+        for name, width in LEVELS.items():
+            if name != "minuto":
+                coarse, grouped = _reduce(keys, counts, width // 60)
+                self.levels[name] = (coarse * width, grouped)
+        self.totals = counts.sum(axis=0)
+
+    def __len__(self):
+        return int(self.totals.sum())
+
+    @classmethod
+    def from_frames(cls, frames: dict[str, pd.DataFrame]):
+        """Índice de todas las hojas de mensajes, llamadas y ubicaciones."""
+        calls = []
+        for name in find_sheets(frames, "llamadas"):
+            date_col = find_column(frames[name], "fecha")
+            if date_col is not None:
+                calls.append(_seconds(frames[name][date_col]))
+        return cls({
+            "mensajes": _seconds(messages_frame(frames)["fecha"]),
+            "llamadas": np.concatenate(calls) if calls else np.empty(0, dtype=np.int64),
+            "ubicaciones": _seconds(locations_frame(frames)["fecha"]),
+        })
+
+    def bounds(self):
+        """Primer y último segundo con actividad, o ``None`` si no hay fechas."""
+        keys, _ = self.levels["minuto"]
+        if keys.size == 0:
+            return None
+        return int(keys[0]), int(keys[-1]) + 60
+
+    # --- Consultas por rango ---
+
+    def range_counts(self, start=None, end=None, level="hora"):
+        """Intervalos de ``level`` en ``[start, end)`` (segundos): inicio de
+        cada intervalo y conteos por tipo, solo los que tienen actividad."""
+        keys, counts = self.levels[level]
+        lo = 0 if start is None else np.searchsorted(keys, start - start % LEVELS[level])
+        hi = keys.size if end is None else np.searchsorted(keys, end, side="left")
+        return keys[lo:hi], counts[lo:hi]
+
+    @staticmethod
+    def _level_for(start, end):
+        # El nivel más fino cuyo rango cabe en MAX_DENSE intervalos
+        for name, width in LEVELS.items():
+            if (end - start) / width <= MAX_DENSE:
+                return name
+        return "dia"
+
+    def timeline(self, start=None, end=None, max_points=MAX_POINTS) -> dict:
+        """Para la página: una serie por tipo de evento en ``[start, end)``.
+
+        ``start`` y ``end`` en segundos (``None``: desde el principio o hasta
+        el final); las fechas de la respuesta van en milisegundos, como las
+        usa D3.
+        """
+        bounds = self.bounds()
+        if bounds is None:
+            return {"start": None, "end": None, "level": None, "bucket": None,
+                    "totals": {}, "series": {}, "heatmap": self.heatmap()}
+        start = bounds[0] if start is None else max(int(start), bounds[0])
+        end = bounds[1] if end is None else min(int(end), bounds[1])
+        end = max(end, start + 60)
+        level = self._level_for(start, end)
+        width = LEVELS[level]
+
+        keys, counts = self.range_counts(start, end, level)
+        first = start - start % width
+        dense = np.zeros(((end - first - 1) // width + 1, len(KINDS)), dtype=np.int64)
+        dense[(keys - first) // width] = counts
+        times = first + np.arange(dense.shape[0], dtype=np.int64) * width
+
+        series = {}
+        for i, kind in enumerate(KINDS):
+            if not self.totals[i]:
+                continue
+            t, v = _minmax(times, dense[:, i], max_points)
+            series[kind] = [[int(x) * 1000, int(y)] for x, y in zip(t, v)]
+        return {
+            "start": start * 1000,
+            "end": end * 1000,
+            "level": level,
+            "bucket": width,
+            "totals": {kind: int(n) for kind, n in zip(KINDS, counts.sum(axis=0))},
+            "series": series,
+            "heatmap": self.heatmap(start, end),
+        }
+
+    def heatmap(self, start=None, end=None) -> dict:
+        """Eventos por día de la semana (lunes primero) y hora del día."""
+        keys, counts = self.range_counts(start, end, "hora")
+        hours = keys // 3600
+        # El 1 de enero de 1970 fue jueves (índice 3 con lunes en 0)
+        weekday = (hours // 24 + 3) % 7
+        grid = np.zeros((7, 24), dtype=np.int64)
+        np.add.at(grid, (weekday, hours % 24), counts.sum(axis=1))
+        return {"weekdays": list(WEEKDAYS), "counts": grid.tolist()}
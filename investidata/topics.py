@@ -0,0 +1,205 @@
+"""Escáner de temáticas: todos los léxicos a la vez, sin importar cuántos términos haya.
+
+Las coincidencias deben empezar al inicio de una palabra (``pistola`` cuenta
+también ``pistolas``), así que basta mirar las palabras de los mensajes: se
+extraen en C con una expresión regular fija y cada palabra *distinta* pasa una
+sola vez por el autómata Aho–Corasick de los términos, que devuelve las
+palabras clave que son su prefijo. El costo crece con el texto y el
+vocabulario, no con el tamaño del léxico. Los términos de varias palabras
+(``punto de encuentro``) recorren con el mismo autómata solo los mensajes que
+contienen su primera palabra. Se obtienen los conteos por temática, por
+palabra clave y por contacto de todos los léxicos simultáneamente.
+"""
+
+import csv
+import re
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from investidata.text import fold, fold_series
+
+# Palabra: letras y dígitos seguidos; lo demás (espacios, signos, "_") separa.
+# La misma definición en Python (términos) y en RE2 (mensajes, con Arrow)
+WORD_RE = re.compile(r"[^\W_]+")
+SEPARATORS = r"[^\pL\pN]+"
+
+# Léxicos base: las mismas temáticas y sugerencias del panel
+LEXICONS = {
+    "armas": ["pistola", "calibre", "fierro", "munición", "juguete", "arma"],
+    "sexo": ["privada", "fotos", "cita", "hotel", "cliente", "sexo"],
+    "matar": ["eliminar", "neutralizar", "anular", "testigos", "silenciar", "deshacer", "matar"],
+    "general": ["dinero", "encuentro", "paquete", "coordenadas", "dirección"],
+}
+
+
+def load_lexicon(path) -> dict[str, list[str]]:
+    """Léxico propio desde CSV (columnas ``tema,termino``) o texto (``tema: termino``)."""
+    path = Path(path)
+    lexicons = {}
+    with open(path, encoding="utf-8", newline="") as fh:
+        if path.suffix.lower() == ".csv":
+            rows = ((r["tema"], r["termino"]) for r in csv.DictReader(fh))
+        else:
+            rows = (line.split(":", 1) for line in fh if ":" in line and not line.startswith("#"))
+        for topic, term in rows:
+            topic, term = topic.strip(), term.strip()
+            if topic and term:
+                lexicons.setdefault(topic, []).append(term)
+    return lexicons
+
+
+class KeywordAutomaton:
+    def __init__(self, lexicons: dict[str, list[str]]):
+        # Se compila como DFA completo (transiciones heredadas de los enlaces
+        # de fallo) para que el recorrido sea una búsqueda en dict por carácter
+        self.keywords = []          # (tema, palabra original, longitud normalizada)
+        goto = [{}]
+        outputs = [[]]
+        for topic, terms in lexicons.items():
+            for term in terms:
+                folded = fold(term).strip()
+                if not folded:
+                    continue
+                state = 0
+                for ch in folded:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[state][ch] = nxt
+                        goto.append({})
+                        outputs.append([])
+                    state = nxt
+                outputs[state].append(len(self.keywords))
+                self.keywords.append((topic, term, len(folded)))
+
+        fail = [0] * len(goto)
+        delta = [dict(edges) for edges in goto]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                fail[nxt] = delta[fail[state]].get(ch, 0) if state else 0
+            # Transiciones que faltan: las del estado de fallo
+            for ch, target in delta[fail[state]].items():
+                delta[state].setdefault(ch, target)
+
+        self.delta = delta
+        self.outputs = outputs
+        self._prefixes = {}
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def scan(self, text: str):
+        """(posición final, índice de palabra clave) de cada coincidencia en ``text``."""
+        delta, outputs = self.delta, self.outputs
+        state = 0
+        hits = []
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                for k in outputs[state]:
+                    hits.append((i, k))
+        return hits
+
+    def prefix_keywords(self, text: str) -> list[int]:
+        """Índices de las palabras clave que son prefijo de ``text``."""
+        found = self._prefixes.get(text)
+        if found is None:
+            found = self._prefixes[text] = [
+                k for end, k in self.scan(text) if end + 1 == self.keywords[k][2]
+            ]
+        return found
+
+
+class TopicScanner:
+    def __init__(self, lexicons=None):
+        self.lexicons = lexicons or LEXICONS
+        self.automaton = KeywordAutomaton(self.lexicons)
+        # Términos que no son una sola palabra: su propio autómata y, para
+        # elegir qué mensajes recorrer, su primera palabra ("" si empiezan con
+        # un signo: entonces se recorren todos)
+        compound = {}
+        self.compound_keys = []
+        self.leads = set()
+        for k, (topic, term, _) in enumerate(self.automaton.keywords):
+            folded = fold(term).strip()
+            if WORD_RE.fullmatch(folded) is None:
+                compound.setdefault(topic, []).append(term)
+                self.compound_keys.append(k)
+                lead = WORD_RE.match(folded)
+                self.leads.add(lead.group() if lead else "")
+        self.compound = KeywordAutomaton(compound) if compound else None
+
+    def scan(self, messages: pd.DataFrame) -> pd.DataFrame:
+        """Una fila por coincidencia: ``fila``, ``tema``, ``palabra`` y ``contacto``."""
+        texts = pa.array(fold_series(messages["texto"]), type=pa.large_string())
+        if isinstance(texts, pa.ChunkedArray):
+            texts = texts.combine_chunks()
+        # Palabras de todos los mensajes y su vocabulario, en C++ (Arrow)
+        words = pc.split_pattern_regex(texts, SEPARATORS)
+        flat = pc.list_flatten(words)
+        present = pc.not_equal(flat, "")
+        word_rows = pc.filter(pc.list_parent_indices(words), present).to_numpy().astype(np.int64)
+        encoded = pc.dictionary_encode(pc.filter(flat, present))
+        codes = encoded.indices.to_numpy()
+        vocabulary = encoded.dictionary.to_pylist()
+
+        # Cada palabra distinta pasa una vez por el autómata
+        per_word = [np.asarray(self.automaton.prefix_keywords(word), dtype=np.int64) for word in vocabulary]
+        counts = np.array([len(k) for k in per_word] or [0], dtype=np.int64)[codes]
+        found = np.flatnonzero(counts)
+        rows = [np.repeat(word_rows[found], counts[found])]
+        keys = [np.concatenate([per_word[c] for c in codes[found]] or [np.empty(0, dtype=np.int64)])]
+
+        if self.compound is not None:
+            if "" in self.leads:
+                candidates = np.arange(len(texts))
+            else:
+                is_lead = np.array([word in self.leads for word in vocabulary] or [False])
+                candidates = np.unique(word_rows[is_lead[codes]])
+            extra_rows, extra_keys = [], []
+            for row, text in zip(candidates.tolist(), texts.take(candidates).to_pylist()):
+                for end, k in self.compound.scan(text):
+                    start = end - self.compound.keywords[k][2] + 1
+                    # Solo coincidencias que empiezan al inicio de una palabra
+                    if start == 0 or not text[start - 1].isalnum():
+                        extra_rows.append(row)
+                        extra_keys.append(self.compound_keys[k])
+            rows.append(np.asarray(extra_rows, dtype=np.int64))
+            keys.append(np.asarray(extra_keys, dtype=np.int64))
+
+        rows, keys = np.concatenate(rows), np.concatenate(keys)
+        order = np.argsort(rows, kind="stable")
+        rows, keys = rows[order], keys[order]
+        keywords = self.automaton.keywords
+        topics = np.array([kw[0] for kw in keywords] or [""], dtype=object)
+        terms = np.array([kw[1] for kw in keywords] or [""], dtype=object)
+        contacts = messages["contacto"].to_numpy(dtype=object)
+        return pd.DataFrame({
+            "fila": rows,
+            "tema": topics[keys] if keys.size else np.empty(0, dtype=object),
+            "palabra": terms[keys] if keys.size else np.empty(0, dtype=object),
+            "contacto": contacts[rows] if rows.size else np.empty(0, dtype=object),
+        })
+
+    @staticmethod
+    def summarize(hits: pd.DataFrame) -> dict[str, pd.DataFrame]:
+        return {
+            "por_tema": hits.groupby("tema").agg(
+                coincidencias=("fila", "size"), mensajes=("fila", "nunique")
+            ).sort_values("coincidencias", ascending=False),
+            "por_palabra": hits.groupby(["tema", "palabra"]).size()
+                .rename("coincidencias").reset_index()
+                .sort_values(["tema", "coincidencias"], ascending=[True, False]),
+            "por_contacto": hits.groupby(["tema", "contacto"]).size()
+                .rename("coincidencias").reset_index()
+                .sort_values(["tema", "coincidencias"], ascending=[True, False]),
+        }
@@ -0,0 +1,65 @@
+"""Precarga en segundo plano de los módulos de análisis.
+
+La pantalla de bienvenida no necesita pandas ni los motores (grafo, mapa,
+miniaturas...), así que ``investidata2.py`` no los importa al arrancar: cada
+motor importa su módulo al construirse. Para que la primera extracción no
+pague esas importaciones, :func:`start` las hace en un hilo después de pintar
+la primera página, mientras el investigador elige un archivo. Importar dos
+veces el mismo módulo no cuesta nada: si la sesión lo necesita antes de que
+termine la precarga, simplemente espera a que Python acabe de importarlo.
+
+Cada importación queda en el panel de rendimiento como ``precarga:<módulo>``.
+Se desactiva con ``INVESTIDATA_WARMUP=0`` (p. ej. para medir el arranque).
+"""
+
+import importlib
+import os
+import threading
+
+from investidata.perf import span
+
+ENABLED = os.environ.get("INVESTIDATA_WARMUP", "1") != "0"
+# En el orden en que los usa el panel al abrir una extracción
+ANALYSIS_MODULES = (
+    "pandas",
+    "investidata.sheets",
+    "investidata.schema",
+    "investidata.ingest",
+    "investidata.columnar",
+    "investidata.bundle",
+    "investidata.parallel",
+    "investidata.topics",
+    "investidata.search",
+    "investidata.aggregates",
+    "investidata.graph",
+    "investidata.spatial",
+    "investidata.movement",
+    "investidata.timeline",
+    "investidata.media",
+    "investidata.correlation",
+)
+
+
+def preload(modules=ANALYSIS_MODULES) -> dict:
+    """Importa ``modules`` en orden; devuelve ``{módulo: error}`` de los que fallaron.
+
+    Un módulo que no se puede importar (dependencia opcional ausente) no
+    detiene la precarga: el error aparecerá cuando el panel lo use.
+    """
+    failed = {}
+    for name in modules:
+        try:
+            with span(f"precarga:{name.rpartition('.')[2]}"):
+                importlib.import_module(name)
+        except Exception as exc:
+            failed[name] = f"{type(exc).__name__}: {exc}"
+    return failed
+
+
+def start(modules=ANALYSIS_MODULES) -> threading.Thread | None:
+    """Lanza :func:`preload` en un hilo de fondo (``None`` si está desactivada)."""
+    if not ENABLED:
+        return None
+    thread = threading.Thread(target=preload, args=(modules,), name="precarga", daemon=True)
+    thread.start()
+    return thread
@@ -1,15 +1,22 @@
 import streamlit as st
-import streamlit.components.v1 as components
-import pandas as pd
-import io
+import os
+import uuid
+
+# Solo lo que necesita la pantalla de bienvenida: pandas y los motores de
+# análisis se importan al abrir una extracción (o antes, en la precarga)
+from investidata import dashboard, perf, warmup
+from investidata.cache import ExtractionCache
+from investidata.catalog import list_bundles
+from investidata.jobs import CANCELLED, FAILED, READY, IngestQueue
+from investidata.state import SQLiteBackend, StateStore, entries_for_page, rows_from_page
 
 # -----------------------------------------------------------------------------
 # 1. DEFINICIÓN SEGURA DE VALORES CSS EN PYTHON 
 # -----------------------------------------------------------------------------
 
 # Sombras 
-DEFAULT_SHADOW_CSS = "box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1), 0 2px 4px -2px rgba(0, 0, 0, 0.06);"
-HOVER_SHADOW_CSS = "box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1), 0 4px 6px -4px rgba(0, 0, 0, 0.1);"
+DEFAULT_SHADOW_CSS = "0 4px 6px -1px rgba(0, 0, 0, 0.1), 0 2px 4px -2px rgba(0, 0, 0, 0.06)"
+HOVER_SHADOW_CSS = "0 10px 15px -3px rgba(0, 0, 0, 0.1), 0 4px 6px -4px rgba(0, 0, 0, 0.1)"
 
 # Tiempos de Transición 
 TRANSITION_TIME_SHORT = "0.2s"
@@ -21,6 +28,16 @@ FONT_SIZE_TOOLTIP = "0.875rem"
 # Opacidad (Se usará en la inyección de JavaScript/D3)
 TOOLTIP_OPACITY_VAL = "0.9" 
 
+# Valores que el panel aplica como variables CSS (slot "theme" del componente)
+DASHBOARD_THEME = {
+    "defaultShadow": DEFAULT_SHADOW_CSS,
+    "hoverShadow": HOVER_SHADOW_CSS,
+    "transitionShort": TRANSITION_TIME_SHORT,
+    "transitionMedium": TRANSITION_TIME_MEDIUM,
+    "tooltipFontSize": FONT_SIZE_TOOLTIP,
+    "tooltipOpacity": TOOLTIP_OPACITY_VAL,
+}
+
 
 # -----------------------------------------------------------------------------
 # 2. Lógica de Streamlit (Parte de Python)
@@ -28,11 +45,144 @@ TOOLTIP_OPACITY_VAL = "0.9"
 
 st.set_page_config(layout="wide", page_title="InvestiData Forense")
 
+
+# --- Caché de extracciones compartida por todas las sesiones del servidor ---
+@st.cache_resource
+def get_extraction_cache():
+    return ExtractionCache()
+
+
+# --- Cola de ingesta: convierte los XLSX subidos sin bloquear las sesiones ---
+@st.cache_resource
+def get_ingest_queue():
+    return IngestQueue(get_extraction_cache())
+
+
+# --- Estado guardado por la página (búsquedas, etiquetas, preferencias) ---
+@st.cache_resource
+def get_state_store():
+    return StateStore(SQLiteBackend())
+
+
+# --- Paquetes de caso ya preparados en disco (investidata_batch.py) ---
+@st.cache_data(ttl=60, show_spinner=False)
+def get_bundles():
+    return list_bundles(get_extraction_cache().disk_dir)
+
+
+# --- Motores de análisis: uno por extracción (el hash identifica los datos) ---
+# Viven en el almacén compartido junto a las hojas y se descartan con ellas.
+# Cada uno importa su módulo al construirse: el arranque no los paga
+def get_messages(extraction_hash, frames):
+    from investidata.sheets import messages_frame
+
+    return get_extraction_cache().resource(extraction_hash, "messages", lambda: messages_frame(frames))
+
+
+def get_search_index(extraction_hash, frames):
+    from investidata.search import SearchIndex
+
+    return get_extraction_cache().resource(
+        extraction_hash, "search", lambda: SearchIndex.build(get_messages(extraction_hash, frames))
+    )
+
+
+def get_chart_data(extraction_hash, frames):
+    from investidata.aggregates import chart_payload
+
+    # Las 5 palabras más frecuentes de cada temática, del resumen de temáticas
+    return get_extraction_cache().resource(
+        extraction_hash, "chart", lambda: chart_payload(get_topic_summary(extraction_hash, frames)["por_palabra"])
+    )
+
+
+def get_contact_graph(extraction_hash, frames):
+    from investidata.graph import ContactGraph
+
+    # Centralidad y comunidades quedan en caché dentro del propio grafo
+    return get_extraction_cache().resource(extraction_hash, "graph", lambda: ContactGraph.from_frames(frames))
+
+
+def get_spatial_index(extraction_hash, frames):
+    from investidata.sheets import locations_frame
+    from investidata.spatial import SpatialIndex
+
+    return get_extraction_cache().resource(
+        extraction_hash, "spatial", lambda: SpatialIndex(locations_frame(frames))
+    )
+
+
+def get_movement(extraction_hash, frames):
+    from investidata.movement import MovementAnalyzer
+    from investidata.sheets import locations_frame
+
+    # Cada combinación de radio y permanencia queda en caché dentro del analizador
+    return get_extraction_cache().resource(
+        extraction_hash, "movement", lambda: MovementAnalyzer(locations_frame(frames))
+    )
+
+
+def get_activity_index(extraction_hash, frames):
+    from investidata.timeline import ActivityIndex
+
+    return get_extraction_cache().resource(
+        extraction_hash, "timeline", lambda: ActivityIndex.from_frames(frames)
+    )
+
+
+@st.cache_resource
+def get_thumbnail_cache():
+    from investidata.media import ThumbnailCache
+
+    # Una sola caché de miniaturas en disco, compartida por todas las sesiones
+    return ThumbnailCache()
+
+
+def get_media_catalog(extraction_hash, media_root, frames):
+    from investidata.media import shared_catalog
+    from investidata.sheets import media_frame
+
+    # media_root ya viene resuelto (media_folder); los duplicados visuales se
+    # calculan en segundo plano, una vez por extracción y carpeta
+    return get_extraction_cache().resource(
+        extraction_hash, f"media:{media_root}",
+        lambda: shared_catalog(extraction_hash, media_root, lambda: media_frame(frames), get_thumbnail_cache()),
+    )
+
+
+def get_topic_summary(extraction_hash, frames):
+    from investidata.topics import TopicScanner
+
+    def build():
+        scanner = TopicScanner()
+        return scanner.summarize(scanner.scan(get_messages(extraction_hash, frames)))
+    return get_extraction_cache().resource(extraction_hash, "topics", build)
+
+
+# --- Correlación entre los dispositivos de un caso ---
+# El índice es uno por servidor: cada extracción se agrega una vez (solo se
+# cruzan sus identificadores con los ya agregados) y cada caso consulta sus pares
+@st.cache_resource
+def get_case_index():
+    from investidata.correlation import CaseIndex
+
+    return CaseIndex()
+
+
+def get_identifiers(extraction_hash, frames):
+    from investidata.correlation import identifiers_frame
+
+    return get_extraction_cache().resource(extraction_hash, "identifiers", lambda: identifiers_frame(frames))
+
+
 # --- Estado de la Sesión para manejar la carga ---
 if "file_uploaded" not in st.session_state:
     st.session_state["file_uploaded"] = False
 if "df_loaded" not in st.session_state:
     st.session_state["df_loaded"] = None
+# Identifica a la sesión ante el almacén compartido (referencias por extracción)
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
 
 
 # --- SIDEBAR: Carga de Archivo ---
@@ -45,31 +195,179 @@ uploaded_file = st.sidebar.file_uploader(
     help="Debe ser el reporte de extracción que contiene las múltiples hojas de datos (mensajes, llamadas, ubicaciones, etc.).",
 )
 
+# --- Conversión de las extracciones en segundo plano ---
+# La subida solo encola el trabajo: el script no espera al XLSX y la sesión
+# puede seguir analizando otra extracción mientras tanto. El hash queda en la
+# URL para que un navegador reconectado vuelva a encontrar su extracción.
+ingest_queue = get_ingest_queue()
+
+if "extraction_hash" not in st.session_state and st.query_params.get("extraccion"):
+    st.session_state["extraction_hash"] = st.query_params["extraccion"]
+
 if uploaded_file is not None:
-    st.session_state["file_uploaded"] = True
-    
-    st.sidebar.success(f"Archivo cargado: {uploaded_file.name}")
-    st.sidebar.info("Procesando datos reales...")
+    # El hash se calcula una vez por archivo subido, no en cada rerun
+    if st.session_state.get("upload_id") != uploaded_file.file_id:
+        from investidata.ingest import content_hash
+
+        st.session_state["upload_id"] = uploaded_file.file_id
+        with perf.span("subida", archivo=uploaded_file.name) as tags:
+            data = uploaded_file.getvalue()
+            st.session_state["extraction_hash"] = content_hash(data)
+            tags.update(extraccion=st.session_state["extraction_hash"][:12], bytes=len(data))
+        if st.session_state["extraction_hash"] not in get_extraction_cache():
+            ingest_queue.submit(st.session_state["extraction_hash"], data, uploaded_file.name)
+            st.session_state.setdefault("ingest_jobs", set()).add(st.session_state["extraction_hash"])
+        st.query_params["extraccion"] = st.session_state["extraction_hash"]
+elif st.session_state.get("upload_id") is not None:
+    # Se quitó el archivo del cargador: la sesión deja esa extracción
+    st.session_state["upload_id"] = None
+    st.session_state.pop("extraction_hash", None)
+    st.query_params.pop("extraccion", None)
+
+# Extracciones listas en el servidor (convertidas aquí o preparadas por lotes):
+# se puede pasar de una a otra sin esperar
+ready = {job.key: job.source_name for job in ingest_queue.jobs() if job.state == READY}
+for bundle in get_bundles():
+    ready.setdefault(bundle["key"], bundle["source"])
+extraction_hash = st.session_state.get("extraction_hash")
+if extraction_hash and extraction_hash not in ready:
+    job = ingest_queue.get(extraction_hash)
+    ready[extraction_hash] = job.source_name if job is not None else None
+
+
+def extraction_label(key):
+    return f"{ready.get(key) or 'Extracción'} · {key[:8]}"
+
+
+if len(ready) > 1 or (ready and not extraction_hash):
+    options = list(ready)
+    chosen = st.sidebar.selectbox(
+        "Extracción en análisis",
+        options,
+        index=options.index(extraction_hash) if extraction_hash in ready else None,
+        format_func=extraction_label,
+        placeholder="Elige una extracción ya procesada",
+    )
+    if chosen is not None and chosen != extraction_hash:
+        extraction_hash = st.session_state["extraction_hash"] = chosen
+        st.query_params["extraccion"] = chosen
+
+# Caso con varios dispositivos: las extracciones elegidas se correlacionan
+# (contactos, chats y lugares en común) debajo del panel
+case_keys = []
+processed = [key for key in ready if key in get_extraction_cache()]
+if len(processed) > 1:
+    case_keys = st.sidebar.multiselect(
+        "Dispositivos del caso",
+        processed,
+        key="case_keys",
+        format_func=extraction_label,
+        placeholder="Elige dos o más extracciones",
+    )
 
-    # Leer el Excel real
-    excel_file = pd.ExcelFile(uploaded_file)
-    device_info = excel_file.parse("Información del dispositivo")
 
-    # Convertir formato Nombre → Valor
-    device_dict = device_info.set_index("Nombre")["Valor"].to_dict()
+def session_jobs(extraction_hash):
+    """Trabajos de esta sesión: los que encoló y el de la extracción que tiene abierta."""
+    own = st.session_state.get("ingest_jobs", set())
+    return [
+        job for job in get_ingest_queue().jobs()
+        if job.key == extraction_hash or (job.key in own and job.active)
+    ]
+
+
+def ingest_panel(extraction_hash):
+    jobs = [job for job in session_jobs(extraction_hash) if job.state != READY]
+    for job in jobs:
+        summary = job.summary()
+        st.progress(
+            summary["avance"],
+            text=f"{summary['archivo'] or summary['extraccion']}: {summary['estado']} ({summary['segundos']:.0f} s)",
+        )
+        for sheet_name, (rows_done, rows_total) in job.sheets.items():
+            total = f" de {rows_total:,}" if rows_total else ""
+            st.caption(f"{sheet_name}: {rows_done:,}{total} filas")
+        if job.state == FAILED:
+            st.error(f"No se pudo procesar el archivo: {job.error}")
+        elif job.state == CANCELLED:
+            st.info("Procesamiento cancelado. Vuelve a cargar el archivo para reintentarlo.")
+        elif st.button("Cancelar", key=f"cancelar-{job.key}"):
+            get_ingest_queue().cancel(job.key)
+    # Al terminar los trabajos en curso se recarga la app (extracción lista,
+    # selector actualizado) y el panel deja de consultarse cada segundo
+    if not any(job.active for job in jobs) and st.session_state.get("ingest_polling"):
+        st.session_state["ingest_polling"] = False
+        st.rerun(scope="app")
+
+
+polling = any(job.active for job in session_jobs(extraction_hash))
+st.session_state["ingest_polling"] = polling
+with st.sidebar:
+    st.fragment(ingest_panel, run_every=1 if polling else None)(extraction_hash)
+
+# Las hojas solo se leen cuando la extracción está lista (en memoria o en disco)
+job = ingest_queue.get(extraction_hash) if extraction_hash else None
+frames = None
+if extraction_hash and (job is None or job.state == READY):
+    frames = get_extraction_cache().get(extraction_hash)
+    if frames is None and job is None:
+        # Hash de la URL que este servidor no conoce (caché borrada)
+        st.session_state.pop("extraction_hash", None)
+        st.query_params.pop("extraccion", None)
+        extraction_hash = None
+
+if frames is not None:
+    import pandas as pd
+
+    from investidata.ingest import device_profile
+    from investidata.schema import memory_report
+
+    st.session_state["file_uploaded"] = True
+    get_extraction_cache().acquire(extraction_hash, st.session_state["session_id"])
+    st.sidebar.success(f"Extracción cargada: {ready.get(extraction_hash) or extraction_hash[:12]}")
+
+    # Memoria de las hojas antes y después de compactar sus tipos al cargarlas,
+    # y del almacén compartido por todas las sesiones del servidor
+    report = memory_report(frames)
+    store = get_extraction_cache().stats()
+    with st.sidebar.expander("🧮 Memoria de la extracción"):
+        before, after = report["antes_mb"].sum(), report["despues_mb"].sum()
+        st.caption(f"{before:,.1f} MB → {after:,.1f} MB ({before / after if after else 1:,.1f}× menos)")
+        st.dataframe(
+            report.style.format({"antes_mb": "{:,.2f}", "despues_mb": "{:,.2f}", "reduccion": "{:.0%}"}),
+            hide_index=True,
+        )
+        st.caption(
+            f"Servidor: {store['used_mb']:,.0f} MB de {store['budget_mb']:,.0f} MB "
+            f"en {len(store['entries'])} extracciones compartidas"
+        )
+        st.dataframe(pd.DataFrame(store["entries"]).round(1), hide_index=True)
 
     # Guardar en session_state con claves uniformes
-    st.session_state["df_loaded"] = {
-        "IMEI": device_dict.get("IMEI", "No disponible"),
-        "Marca": device_dict.get("Vendor", "No disponible"),
-        "Modelo": device_dict.get("Model", "No disponible"),
-        "Usuario": device_dict.get("Device Name", "No disponible"),
-    }
+    st.session_state["df_loaded"] = device_profile(frames)
+
+    # Carpeta con los archivos exportados junto al reporte (para las miniaturas);
+    # solo dentro de la carpeta de extracciones del servidor
+    from investidata.media import MEDIA_ROOT, media_folder
+
+    media_root = st.sidebar.text_input(
+        "Carpeta de archivos exportados (opcional)",
+        value=os.environ.get("INVESTIDATA_MEDIA_DIR", ""),
+        help=f"Carpeta dentro de {MEDIA_ROOT} donde están las imágenes y videos de la extracción; las rutas del reporte se buscan dentro de ella.",
+    ).strip() or None
+    if media_root:
+        folder = media_folder(media_root)
+        if folder is None:
+            st.sidebar.warning(
+                f"La carpeta de archivos no existe o está fuera de {MEDIA_ROOT}; el catálogo se muestra sin miniaturas."
+            )
+        media_root = str(folder) if folder else None
 
 else:
     st.session_state["file_uploaded"] = False
     st.session_state["df_loaded"] = None
-    st.sidebar.warning("Esperando la carga del archivo XLSX.")
+    get_extraction_cache().release(st.session_state["session_id"])
+    if job is None or not job.active:
+        st.sidebar.warning("Esperando la carga del archivo XLSX.")
 
 # -----------------------------------------------------------------------------
 # 3. Contenido Principal del Dashboard
@@ -78,710 +376,6 @@ else:
 st.markdown("# InvestiData: Plataforma Inteligente Forense")
 st.markdown("---")
 
-if st.session_state.file_uploaded and st.session_state.df_loaded:
-    # --- Si el archivo está cargado, renderizamos el Dashboard ---
-    
-    # Inyectamos el valor simulado del IMEI en el HTML
-    imei_val = st.session_state["df_loaded"]["IMEI"]
-
-
-    
-    # Definimos la plantilla HTML 
-    # NOTA: Todos los corchetes internos de JS/D3/Tailwind config deben ser ESCAPADOS ({{ }})
-    HTML_TEMPLATE = """
-    <!DOCTYPE html>
-    <html lang="es">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>InvestiData - Panel de Control Forense</title>
-        <!-- Carga de Tailwind CSS -->
-        <script src="https://cdn.tailwindcss.com"></script>
-        <!-- Carga de D3.js para visualizaciones -->
-        <script src="https://d3js.org/d3.v7.min.js"></script>
-        <!-- Configuración y Estilos de Tailwind -->
-        <script>
-            // CORCHETES ESCAPADOS EN CONFIGURACIÓN TAILWIND
-            tailwind.config = {{{{
-                theme: {{{{
-                    extend: {{{{
-                        colors: {{{{
-                            'primary-blue': '#1a56db', 
-                            'secondary-cyan': '#06b6d4', 
-                            'accent-red': '#f87171', 
-                            'dark-gray': '#1f2937', 
-                        }}}},
-                        fontFamily: {{{{
-                            sans: ['Inter', 'sans-serif'],
-                        }}}},
-                    }}}},
-                }}}},
-            }}}}
-        </script>
-        <style>
-            /* Estilos personalizados para el dashboard */
-            .card-shadow {{
-                /* INYECTADO: Sombra con 0.1 y 0.06 */
-                {{DEFAULT_SHADOW}}
-                /* Marcadores de posición CSS */
-                transition: transform {{TRANSITION_SHORT}}, box-shadow {{TRANSITION_SHORT}};
-            }}
-            .card-shadow:hover {{
-                transform: translateY(-3px);
-                /* INYECTADO: Sombra de hover */
-                {{HOVER_SHADOW}}
-            }}
-            /* Estilo para el gráfico D3 */
-            .bar-chart rect {{
-                fill: #06b6d4;
-                transition: fill {{TRANSITION_MEDIUM}} ease;
-            }}
-            .bar-chart rect:hover {{
-                fill: #1a56db;
-            }}
-            .tooltip {{
-                position: absolute;
-                text-align: center;
-                padding: 8px;
-                background: #1f2937;
-                color: white;
-                border-radius: 6px;
-                pointer-events: none;
-                opacity: 0;
-                transition: opacity {{TRANSITION_MEDIUM}};
-                font-size: {{FONT_SIZE}};
-                z-index: 100;
-            }}
-        </style>
-    </head>
-    <body class="bg-gray-100 min-h-screen font-sans antialiased">
-
-        <!-- Encabezado Fijo con Logo -->
-        <header class="bg-dark-gray shadow-xl">
-            <div class="max-w-7xl mx-auto py-4 px-4 sm:px-6 lg:px-8 flex justify-between items-center">
-                <div class="flex items-center space-x-3">
-                    <!-- Logo SVG: Lupa (Investigación) y Bits (Datos) -->
-                    <svg xmlns="http://www.w3.org/2000/svg" class="h-8 w-8 text-secondary-cyan" fill="none" viewBox="0 0 24 24" stroke="currentColor" stroke-width="2">
-                        <path stroke-linecap="round" stroke-linejoin="round" d="M21 21l-6-6m2-5a7 7 0 11-14 0 7 7 0 0114 0z" />
-                        <path stroke-linecap="round" stroke-linejoin="round" d="M10 4v4m0 0v4m0-4h4m-4 0h-4" class="text-white opacity-70" />
-                    </svg>
-                    <h1 class="text-3xl font-extrabold text-white tracking-wider">
-                        InvestiData
-                    </h1>
-                </div>
-                <button id="btn-dashboard" class="px-4 py-2 bg-primary-blue hover:bg-secondary-cyan hover:text-dark-gray text-white font-semibold rounded-lg transition duration-150">
-                    Panel Principal
-                </button>
-            </div>
-        </header>
-
-        <!-- Contenido Principal -->
-        <main class="max-w-7xl mx-auto py-8 px-4 sm:px-6 lg:px-8">
-            <div id="loading-message" class="text-center text-lg text-gray-600 mt-20 hidden">
-                Cargando datos y autenticando...
-            </div>
-
-            <!-- ID de Usuario (MANDATORIO para apps multiusuario) -->
-            <div class="mb-4 text-sm text-gray-500 flex justify-end">
-                ID de Usuario (Firebase): <span id="user-id" class="font-mono text-dark-gray ml-2 break-all">Cargando...</span>
-            </div>
-
-            <!-- VISTA DEL DASHBOARD PRINCIPAL -->
-            <div id="dashboard-view" class="space-y-8">
-                
-                <!-- Panel de Perfil del Dispositivo (Identificación Forense) - EN LA CIMA -->
-                <div class="bg-white p-6 rounded-xl shadow-xl border border-primary-blue/20">
-                    <h3 class="text-2xl font-bold text-dark-gray mb-4 flex items-center">
-                        <svg xmlns="http://www.w3.org/2000/svg" class="h-6 w-6 text-primary-blue mr-2" fill="none" viewBox="0 0 24 24" stroke="currentColor">
-                            <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 18h.01M8 21h8a2 2 0 002-2V5a2 2 0 00-2-2H8a2 2 0 00-2 2v14a2 2 0 002 2z" />
-                        </svg>
-                        Perfil del Dispositivo Analizado
-                    </h3>
-                    <div id="device-profile-data" class="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-4 gap-4 text-gray-700">
-                        <!-- Los datos se insertarán aquí por JavaScript -->
-                    </div>
-                </div>
-                
-                <h2 class="text-2xl font-bold text-dark-gray border-b-2 border-secondary-cyan pb-2">Panel de Control General</h2>
-
-                <div class="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6">
-                    <!-- Tarjeta de Mensajes Analizados -->
-                    <div class="bg-white p-6 rounded-xl card-shadow cursor-pointer border-t-4 border-primary-blue" onclick="navigateToAnalysis('mensajes')">
-                        <p class="text-sm font-medium text-gray-500">Total Mensajes</p>
-                        <p class="text-4xl font-extrabold text-dark-gray mt-1">1,245</p>
-                        <p class="text-sm text-green-600 mt-2 font-medium">Hallazgos: 48 (3.8%)</p>
-                    </div>
-                    <!-- Tarjeta de Contactos Clave -->
-                    <div class="bg-white p-6 rounded-xl card-shadow cursor-pointer border-t-4 border-accent-red" onclick="navigateToAnalysis('contactos')">
-                        <p class="text-sm font-medium text-gray-500">Contactos SOSPECHOSOS</p>
-                        <p class="text-4xl font-extrabold text-accent-red mt-1">12</p>
-                        <p class="text-sm text-gray-600 mt-2">Vínculos detectados: 35</p>
-                    </div>
-                    <!-- Tarjeta de Geo-localizaciones -->
-                    <div class="bg-white p-6 rounded-xl card-shadow cursor-pointer border-t-4 border-secondary-cyan" onclick="navigateToAnalysis('ubicacion')">
-                        <p class="text-sm font-medium text-gray-500">Ubicaciones Relevantes</p>
-                        <p class="text-4xl font-extrabold text-dark-gray mt-1">4</p>
-                        <p class="text-sm text-gray-600 mt-2">Patrones Nocturnos: 2</p>
-                    </div>
-                    <!-- Tarjeta de Archivos Multimedia -->
-                    <div class="bg-white p-6 rounded-xl card-shadow cursor-pointer border-t-4 border-primary-blue" onclick="navigateToAnalysis('archivos')">
-                        <p class="text-sm font-medium text-gray-500">Archivos con Coincidencias</p>
-                        <p class="text-4xl font-extrabold text-dark-gray mt-1">203</p>
-                        <p class="text-sm text-gray-600 mt-2">Contenido Filtrado: 14%</p>
-                    </div>
-                </div>
-
-                <!-- Panel de Análisis Temático y Búsqueda -->
-                <div class="bg-white p-8 rounded-xl shadow-xl border border-primary-blue/20 mt-8">
-                    <h3 class="text-xl font-bold text-primary-blue mb-4">Análisis por Temática Criminal</h3>
-                    <p class="text-gray-600 mb-4">Haz clic en un tema para ver el análisis detallado de coincidencias y patrones de comunicación.</p>
-
-                    <!-- Botones Temáticos (Clickables) -->
-                    <div class="flex flex-wrap gap-4 mb-8">
-                        <button class="px-6 py-3 bg-red-600 text-white font-semibold rounded-full hover:bg-red-700 shadow-md transition duration-150" onclick="navigateToAnalysis('matar')">
-                            <span class="text-xl mr-1">🔪</span> Homicidio
-                        </button>
-                        <button class="px-6 py-3 bg-yellow-600 text-white font-semibold rounded-full hover:bg-yellow-700 shadow-md transition duration-150" onclick="navigateToAnalysis('armas')">
-                            <span class="text-xl mr-1">🔫</span> Armas / Porte
-                        </button>
-                        <button class="px-6 py-3 bg-purple-600 text-white font-semibold rounded-full hover:bg-purple-700 shadow-md transition duration-150" onclick="navigateToAnalysis('sexo')">
-                            <span class="text-xl mr-1">🔞</span> Delitos Sexuales
-                        </button>
-                    </div>
-                </div>
-            </div>
-
-            <!-- VISTA DE ANÁLISIS PROFUNDO / BÚSQUEDA -->
-            <div id="analysis-view" class="space-y-8 hidden">
-                <h2 id="analysis-title" class="text-3xl font-bold text-dark-gray border-b-2 border-secondary-cyan pb-2">Análisis Profundo</h2>
-
-                <!-- Panel de Búsqueda de Palabras Clave -->
-                <div class="bg-white p-6 rounded-xl shadow-xl border border-gray-200">
-                    <h3 class="text-xl font-semibold text-dark-gray mb-4">Búsqueda Rápida de Palabras Clave</h3>
-                    <div class="flex space-x-3">
-                        <input type="text" id="keyword-input" placeholder="Escribe tu palabra clave (ej: dinero, encuentro, dirección...)" class="flex-grow p-3 border-2 border-gray-300 rounded-lg focus:border-primary-blue focus:ring focus:ring-primary-blue/20">
-                        <button id="search-button" class="px-6 py-3 bg-primary-blue text-white font-semibold rounded-lg hover:bg-secondary-cyan hover:text-dark-gray transition duration-150">
-                            Buscar
-                        </button>
-                    </div>
-                    <div class="mt-4">
-                        <p class="text-sm font-medium text-gray-600 mb-2">Sugerencias de Palabras Clave:</p>
-                        <div id="keyword-suggestions" class="flex flex-wrap gap-2">
-                            <!-- Las sugerencias se insertarán aquí por JS -->
-                        </div>
-                    </div>
-                </div>
-
-                <!-- Sección de Visualizaciones -->
-                <div class="grid grid-cols-1 lg:col-span-2 gap-6">
-                    <!-- Gráfico de Coincidencias -->
-                    <div class="lg:col-span-2 bg-white p-6 rounded-xl shadow-xl border border-gray-200">
-                        <h4 class="text-lg font-semibold text-dark-gray mb-4">Gráfico Estadístico de Coincidencias por Frecuencia</h4>
-                        <div id="chart-container" class="w-full h-80">
-                            <svg id="bar-chart"></svg>
-                        </div>
-                        <p class="text-sm text-gray-500 mt-4">Frecuencia de las 5 coincidencias más importantes en el dispositivo.</p>
-                    </div>
-
-                    <!-- Resumen y Hallazgos Clave -->
-                    <div class="lg:col-span-1 bg-white p-6 rounded-xl shadow-xl border border-gray-200">
-                        <h4 class="text-lg font-semibold text-dark-gray mb-4">Resumen de Hallazgos</h4>
-                        <div id="hallazgos-resumen" class="space-y-4">
-                            <p class="text-gray-700 leading-relaxed">
-                                <span class="font-bold text-accent-red">Análisis Categórico:</span> Se detectó una alta concentración de mensajes relacionados con el tema "<span id="current-topic-display" class="font-bold text-primary-blue">---</span>", específicamente en los contactos *Juan P.* y *María L*.
-                            </p>
-                            <p class="text-gray-700 leading-relaxed">
-                                <span class="font-bold text-primary-blue">Patrón Temporal:</span> El 85% de las coincidencias ocurrieron entre las 23:00 y 02:00 horas, indicando actividad nocturna.
-                            </p>
-                            <p class="text-gray-700 leading-relaxed">
-                                <span class="font-bold text-primary-blue">Geográfico:</span> Una dirección fue mencionada 7 veces en mensajes codificados.
-                            </p>
-                        </div>
-                    </div>
-                </div>
-
-                <!-- Resultados de Búsqueda -->
-                <div id="search-results-section" class="bg-white p-6 rounded-xl shadow-xl border border-gray-200 hidden">
-                    <h4 class="text-lg font-semibold text-dark-gray mb-4">Resultados para "<span id="searched-keyword" class="text-secondary-cyan font-mono"></span>" (<span id="result-count">0</span>)</h4>
-                    <div id="search-results-list" class="space-y-3 max-h-96 overflow-y-auto">
-                        <p class="text-gray-500 italic" id="no-results-message">No se encontraron mensajes que coincidan con la palabra clave.</p>
-                        <!-- Los mensajes de resultado se insertarán aquí -->
-                    </div>
-                </div>
-            </div>
-
-        </main>
-
-        <!-- Scripts de Firebase y Lógica de la Aplicación -->
-        <script type="module">
-            // Importaciones de Firebase (requeridas para persistencia/autenticación)
-            import {{ initializeApp }} from "https://www.gstatic.com/firebasejs/11.6.1/firebase-app.js";
-            import {{ getAuth, signInAnonymously, signInWithCustomToken, onAuthStateChanged }} from "https://www.gstatic.com/firebasejs/11.6.1/firebase-auth.js";
-            import {{ getFirestore, doc, setDoc, getDoc }} from "https://www.gstatic.com/firebasejs/11.6.1/firebase-firestore.js";
-            import {{ setLogLevel }} from "https://www.gstatic.com/firebasejs/11.6.1/firebase-firestore.js";
-
-            // Establecer nivel de log para depuración de Firestore
-            setLogLevel('error'); 
-
-            // Variables Globales
-            let app;
-            let db;
-            let auth;
-            let userId = null;
-            let isAuthReady = false;
-
-            // Configuración de Firebase (proporcionada por el entorno)
-            const firebaseConfig = JSON.parse(typeof __firebase_config !== 'undefined' ? __firebase_config : '{{}}');
-            const appId = typeof __app_id !== 'undefined' ? __app_id : 'default-app-id';
-            const initialAuthToken = typeof __initial_auth_token !== 'undefined' ? __initial_auth_token : null;
-
-            const loadingMessage = document.getElementById('loading-message');
-            loadingMessage.classList.remove('hidden');
-
-            // --- 1. Inicialización de Firebase y Autenticación ---
-            if (Object.keys(firebaseConfig).length > 0) {{{{ // ESCAPE DE LLAVES
-                app = initializeApp(firebaseConfig);
-                db = getFirestore(app);
-                auth = getAuth(app);
-
-                // Asegurar la autenticación antes de usar Firestore
-                onAuthStateChanged(auth, async (user) => {{{{ // ESCAPE DE LLAVES
-                    if (!user) {{{{ // ESCAPE DE LLAVES
-                        try {{{{ // ESCAPE DE LLAVES
-                            if (initialAuthToken) {{{{ // ESCAPE DE LLAVES
-                                await signInWithCustomToken(auth, initialAuthToken);
-                            }}}} else {{{{ // ESCAPE DE LLAVES
-                                await signInAnonymously(auth);
-                            }}}} // ESCAPE DE LLAVES
-                            // La lógica se ejecutará nuevamente cuando onAuthStateChanged detecte el usuario
-                        }}}} catch (error) {{{{ // ESCAPE DE LLAVES
-                            console.error("Error en la autenticación:", error);
-                            document.getElementById('user-id').textContent = 'Error de Auth';
-                            isAuthReady = true;
-                            loadingMessage.classList.add('hidden');
-                        }}}} // ESCAPE DE LLAVES
-                    }}}} else {{{{ // ESCAPE DE LLAVES
-                        userId = user.uid;
-                        document.getElementById('user-id').textContent = userId;
-                        isAuthReady = true;
-                        loadingMessage.classList.add('hidden');
-                        // Una vez autenticado, cargar el estado o inicializar la app
-                        loadAppState();
-                    }}}} // ESCAPE DE LLAVES
-                }}}}); // ESCAPE DE LLAVES
-            }}}} else {{{{ // ESCAPE DE LLAVES
-                console.error("Configuración de Firebase no disponible. La persistencia de datos estará deshabilitada.");
-                userId = 'Anon-Simulated-' + Math.random().toString(36).substr(2, 9);
-                document.getElementById('user-id').textContent = userId;
-                isAuthReady = true;
-                loadingMessage.classList.add('hidden');
-            }}}} // ESCAPE DE LLAVES
-
-            // --- 2. Lógica de Navegación y Estado ---
-            let currentView = 'dashboard'; // 'dashboard' o 'analysis'
-            let currentFocusTopic = 'general'; // Tema actual para el análisis
-
-            const dashboardView = document.getElementById('dashboard-view');
-            const analysisView = document.getElementById('analysis-view');
-            const analysisTitle = document.getElementById('analysis-title');
-            const currentTopicDisplay = document.getElementById('current-topic-display');
-            const keywordInput = document.getElementById('keyword-input');
-            const searchButton = document.getElementById('search-button');
-            const resultsList = document.getElementById('search-results-list');
-            const searchResultsSection = document.getElementById('search-results-section');
-            const searchedKeywordSpan = document.getElementById('searched-keyword');
-            const resultCountSpan = document.getElementById('result-count');
-            const noResultsMessage = document.getElementById('no-results-message');
-
-            function switchView(view) {{{{ // ESCAPE DE LLAVES
-                currentView = view;
-                if (view === 'dashboard') {{{{ // ESCAPE DE LLAVES
-                    dashboardView.classList.remove('hidden');
-                    analysisView.classList.add('hidden');
-                }}}} else {{{{ // ESCAPE DE LLAVES
-                    dashboardView.classList.add('hidden');
-                    analysisView.classList.remove('hidden');
-                }}}} // ESCAPE DE LLAVES
-                saveAppState();
-            }}}} // ESCAPE DE LLAVES
-
-            window.navigateToAnalysis = function(topic) {{{{ // ESCAPE DE LLAVES
-                currentFocusTopic = topic;
-                let titleText = 'Análisis Profundo';
-                
-                // Simular el título según el tema
-                switch (topic) {{{{ // ESCAPE DE LLAVES
-                    case 'armas': titleText = 'Análisis Temático: Armas y Porte'; break;
-                    case 'sexo': titleText = 'Análisis Temático: Delitos Sexuales'; break;
-                    case 'matar': titleText = 'Análisis Temático: Homicidio y Amenazas'; break;
-                    case 'mensajes': titleText = 'Análisis General de Mensajes'; break;
-                    case 'contactos': titleText = 'Análisis de Redes y Contactos Clave'; break;
-                    case 'ubicacion': titleText = 'Análisis Geográfico y Patrones de Movimiento'; break;
-                    case 'archivos': titleText = 'Análisis de Contenido Multimedia'; break;
-                }}}} // ESCAPE DE LLAVES
-
-                analysisTitle.textContent = titleText;
-                currentTopicDisplay.textContent = titleText.split(': ')[1] || topic.charAt(0).toUpperCase() + topic.slice(1);
-                
-                // Renderizar el gráfico para el tema
-                renderBarChart(getMockChartData(topic));
-                
-                // Cargar sugerencias
-                renderKeywordSuggestions(topic);
-                
-                // Ocultar resultados de búsqueda al cambiar de análisis
-                searchResultsSection.classList.add('hidden');
-                
-                switchView('analysis');
-            }}}} // ESCAPE DE LLAVES
-
-            // Navegación al Dashboard
-            document.getElementById('btn-dashboard').addEventListener('click', () => {{{{ // ESCAPE DE LLAVES
-                switchView('dashboard');
-            }}}}); // ESCAPE DE LLAVES
-
-            // --- 3. Firebase: Persistencia del Estado ---
-            async function saveAppState() {{{{ // ESCAPE DE LLAVES
-                if (!isAuthReady || !db) return;
-                try {{{{ // ESCAPE DE LLAVES
-                    // Corregido: Uso de plantilla literal de JS para las variables de Firebase
-                    const userSettingsRef = doc(db, `artifacts/\${{appId}}/users/\${{userId}}/investidata_settings`, 'dashboard_state');
-                    await setDoc(userSettingsRef, {{{{ // ESCAPE DE LLAVES
-                        currentView: currentView,
-                        currentFocusTopic: currentFocusTopic,
-                        lastUpdated: new Date().toISOString()
-                    }}}}, {{{{ merge: true }}}} ); // ESCAPE DE LLAVES
-                    // console.log("Estado de la aplicación guardado.");
-                }}}} catch (e) {{{{ // ESCAPE DE LLAVES
-                    console.error("Error al guardar el estado: ", e);
-                }}}} // ESCAPE DE LLAVES
-            }}}} // ESCAPE DE LLAVES
-
-            async function loadAppState() {{{{ // ESCAPE DE LLAVES
-                if (!isAuthReady || !db) return;
-                try {{{{ // ESCAPE DE LLAVES
-                    // Corregido: Uso de plantilla literal de JS para las variables de Firebase
-                    const userSettingsRef = doc(db, `artifacts/\${{appId}}/users/\${{userId}}/investidata_settings`, 'dashboard_state');
-                    const docSnap = await getDoc(userSettingsRef);
-
-                    if (docSnap.exists()) {{{{ // ESCAPE DE LLAVES
-                        const data = docSnap.data();
-                        // Restaurar el último estado visitado
-                        if (data.currentView === 'analysis') {{{{ // ESCAPE DE LLAVES
-                            navigateToAnalysis(data.currentFocusTopic || 'mensajes');
-                        }}}} else {{{{ // ESCAPE DE LLAVES
-                            switchView('dashboard');
-                        }}}} // ESCAPE DE LLAVES
-                        // console.log("Estado de la aplicación cargado.");
-                    }}}} else {{{{ // ESCAPE DE LLAVES
-                        switchView('dashboard');
-                    }}}} // ESCAPE DE LLAVES
-                }}}} catch (e) {{{{ // ESCAPE DE LLAVES
-                    console.error("Error al cargar el estado: ", e);
-                    switchView('dashboard'); // Fallback
-                }}}} // ESCAPE DE LLAVES
-            }}}} // ESCAPE DE LLAVES
-
-            // --- 4. Datos Simulados y Funcionalidad de Búsqueda ---
-            
-            // Mock de Datos del Perfil del Dispositivo
-            const mockDeviceProfile = {{{{ // ESCAPE DE LLAVES
-                imei: '{imei_val}', // Usamos la variable inyectada desde Python
-                marca: 'Samsung',
-                modelo: 'Galaxy S21 (SM-G991U)',
-                usuario: 'JRivera_user',
-                correo_asociado: 'j.rivera.clave@fake-mail.com',
-                whatsapp_id: '+57 310 123 4567',
-                facebook_profile: 'JuanRivera1985',
-                instagram_id: 'riveraj_official'
-            }}}} // ESCAPE DE LLAVES ;
-
-            // Mock de Datos Forenses (Mensajes)
-            const mockMessages = [ // ESCAPE DE LLAVES
-                {{ id: 1, contact: 'Juan P.', text: 'El paquete ya está listo. Trae el juguete nuevo (arma).', date: '2025-11-20' }}, // ESCAPE DE LLAVES
-                {{ id: 2, contact: 'María L.', text: 'Nos vemos a las 10pm en el lugar de siempre. Confirma el precio.', date: '2025-11-21' }}, // ESCAPE DE LLAVES
-                {{ id: 3, contact: 'Contacto X', text: 'Hay que anular el negocio si no traen el dinero pronto.', date: '2025-11-21' }}, // ESCAPE DE LLAVES
-                {{ id: 4, contact: 'Juan P.', text: 'Tengo las coordenadas del punto de encuentro. Es vital no fallar.', date: '2025-11-22' }}, // ESCAPE DE LLAVES
-                {{ id: 5, contact: 'El Jefe', text: 'Si se resiste, hay que neutralizarlo (matar). Sin testigos.', date: '2025-11-23' }}, // ESCAPE DE LLAVES
-                {{ id: 6, contact: 'María L.', text: 'Las fotos de la mercancía. ¿Necesitas algo más del sexo?', date: '2025-11-24' }}, // ESCAPE DE LLAVES
-                {{ id: 7, contact: 'Contacto X', text: 'Revisa las cuentas y el balance.', date: '2025-11-25' }}, // ESCAPE DE LLAVES
-                {{ id: 8, contact: 'Juan P.', text: 'La pistola está en el escondite. Asegúrate de llevarla.', date: '2025-11-26' }}, // ESCAPE DE LLAVES
-                {{ id: 9, contact: 'El Jefe', text: 'El objetivo debe ser eliminado antes del amanecer.', date: '2025-11-27' }}, // ESCAPE DE LLAVES
-                {{ id: 10, contact: 'María L.', text: 'Te envío los detalles para la reunión privada. Es un cliente importante.', date: '2025-11-28' }}, // ESCAPE DE LLAVES
-            ]; // ESCAPE DE LLAVES
-
-            // Función para simular datos de gráfico por tema
-            function getMockChartData(topic) {{{{ // ESCAPE DE LLAVES
-                let data = []; // ESCAPE DE LLAVES
-                switch (topic) {{{{ // ESCAPE DE LLAVES
-                    case 'armas':
-                        data = [ // ESCAPE DE LLAVES
-                            {{ keyword: 'pistola', count: 35 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'juguete', count: 18 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'fierro', count: 12 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'munición', count: 9 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'calibre', count: 5 }}, // ESCAPE DE LLAVES
-                        ]; // ESCAPE DE LLAVES
-                        break;
-                    case 'sexo':
-                        data = [ // ESCAPE DE LLAVES
-                            {{ keyword: 'privada', count: 42 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'fotos', count: 31 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'cita', count: 19 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'cliente', count: 15 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'hotel', count: 10 }}, // ESCAPE DE LLAVES
-                        ]; // ESCAPE DE LLAVES
-                        break;
-                    case 'matar':
-                        data = [ // ESCAPE DE LLAVES
-                            {{ keyword: 'eliminar', count: 55 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'neutralizar', count: 40 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'anular', count: 28 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'deshacer', count: 15 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'silenciar', count: 10 }}, // ESCAPE DE LLAVES
-                        ]; // ESCAPE DE LLAVES
-                        break;
-                    default:
-                        data = [ // ESCAPE DE LLAVES
-                            {{ keyword: 'dinero', count: 50 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'encuentro', count: 40 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'dirección', count: 30 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'paquete', count: 20 }}, // ESCAPE DE LLAVES
-                            {{ keyword: 'coordenadas', count: 10 }}, // ESCAPE DE LLAVES
-                        ]; // ESCAPE DE LLAVES
-                        break;
-                }}}} // ESCAPE DE LLAVES
-                return data;
-            }}}} // ESCAPE DE LLAVES
-
-            // Lógica de Búsqueda
-            function handleSearch() {{{{ // ESCAPE DE LLAVES
-                const keyword = keywordInput.value.trim().toLowerCase();
-                if (!keyword) return;
-
-                const results = mockMessages.filter(msg =>
-                    msg.text.toLowerCase().includes(keyword)
-                );
-
-                // Mostrar resultados
-                resultsList.innerHTML = '';
-                searchResultsSection.classList.remove('hidden');
-                searchedKeywordSpan.textContent = keyword;
-                resultCountSpan.textContent = results.length;
-                noResultsMessage.classList.add('hidden');
-
-                if (results.length === 0) {{{{ // ESCAPE DE LLAVES
-                    noResultsMessage.classList.remove('hidden');
-                }}}} else {{{{ // ESCAPE DE LLAVES
-                    results.forEach(msg => {{{{ // ESCAPE DE LLAVES
-                        const resultItem = document.createElement('div');
-                        resultItem.className = 'p-3 bg-gray-100 rounded-lg border border-gray-200 hover:bg-primary-blue/5 transition duration-150';
-                        // Resaltar la palabra clave encontrada
-                        const highlightedText = msg.text.replace(new RegExp('(' + keyword + ')', 'gi'), '<span class="bg-yellow-300 font-bold text-dark-gray rounded-sm p-0.5">\$1</span>'); // ESCAPE DE LLAVES
-                        // ESCAPE DE LLAVES EN LAS PLANTILLAS LITERALES DE JS
-                        resultItem.innerHTML = `
-                            <p class="text-xs text-gray-500 font-mono">ID: \${{msg.id}} | Contacto: \${{msg.contact}} | Fecha: \${{msg.date}}</p>
-                            <p class="text-gray-800 mt-1">\${{highlightedText}}</p>
-                        `;
-                        resultsList.appendChild(resultItem);
-                    }}}}); // ESCAPE DE LLAVES
-                }}}} // ESCAPE DE LLAVES
-            }}}} // ESCAPE DE LLAVES
-
-            searchButton.addEventListener('click', handleSearch);
-            keywordInput.addEventListener('keypress', (e) => {{{{ // ESCAPE DE LLAVES
-                if (e.key === 'Enter') {{{{ // ESCAPE DE LLAVES
-                    handleSearch();
-                }}}} // ESCAPE DE LLAVES
-            }}}}); // ESCAPE DE LLAVES
-
-            // --- 5. Sugerencias de Palabras Clave ---
-
-            // Palabras clave fijas para sugerir
-            const fixedSuggestions = {{{{ // ESCAPE DE LLAVES
-                armas: ['pistola', 'calibre', 'fierro', 'munición', 'juguete'],
-                sexo: ['privada', 'fotos', 'cita', 'hotel', 'cliente', 'sexo'],
-                matar: ['eliminar', 'neutralizar', 'anular', 'testigos', 'silenciar'],
-                general: ['dinero', 'encuentro', 'paquete', 'coordenadas', 'dirección']
-            }}}} // ESCAPE DE LLAVES;
-
-            function renderKeywordSuggestions(topic) {{{{ // ESCAPE DE LLAVES
-                const container = document.getElementById('keyword-suggestions');
-                container.innerHTML = '';
-                
-                const suggestions = fixedSuggestions[topic] || fixedSuggestions.general;
-
-                suggestions.forEach(keyword => {{{{ // ESCAPE DE LLAVES
-                    const button = document.createElement('button');
-                    button.textContent = keyword;
-                    button.className = 'px-3 py-1 text-sm bg-gray-200 text-dark-gray rounded-full hover:bg-secondary-cyan hover:text-dark-gray transition duration-150 shadow-sm';
-                    button.onclick = () => {{{{ // ESCAPE DE LLAVES
-                        keywordInput.value = keyword;
-                        handleSearch();
-                    }}}} // ESCAPE DE LLAVES;
-                    container.appendChild(button);
-                }}}}); // ESCAPE DE LLAVES
-            }}}} // ESCAPE DE LLAVES
-
-            // --- 6. Visualización con D3.js (Gráfico de Barras) ---
-
-            function renderBarChart(data) {{{{ // ESCAPE DE LLAVES
-                const container = d3.select("#chart-container");
-                const svg = d3.select("#bar-chart");
-                
-                // Limpiar el SVG anterior
-                svg.selectAll('*').remove();
-
-                const margin = {{{{ top: 20, right: 30, bottom: 50, left: 60 }}}}; // ESCAPE DE LLAVES
-                
-                // Hacer el gráfico responsivo
-                const containerWidth = document.getElementById('chart-container').offsetWidth;
-                const containerHeight = document.getElementById('chart-container').offsetHeight;
-                
-                const width = containerWidth - margin.left - margin.right;
-                const height = containerHeight - margin.top - margin.bottom;
-
-                svg.attr("width", containerWidth)
-                   .attr("height", containerHeight);
-
-                // CORRECCIÓN: Usar la plantilla literal de JS con doble escape para Python
-                const chartGroup = svg.append("g")
-                    .attr("transform", `translate(\${{margin.left}},\${{margin.top}})` );
-
-                // 1. Escalas
-                const x = d3.scaleBand()
-                    .domain(data.map(d => d.keyword))
-                    .range([0, width])
-                    .padding(0.3);
-
-                const y = d3.scaleLinear()
-                    .domain([0, d3.max(data, d => d.count) * 1.1])
-                    .range([height, 0]);
-
-                // Tooltip
-                const tooltip = d3.select("body").append("div")
-                    .attr("class", "tooltip");
-
-                // 2. Barras
-                chartGroup.selectAll(".bar")
-                    .data(data)
-                    .enter().append("rect")
-                    .attr("class", "bar-chart")
-                    // CORRECCIÓN: Los argumentos de D3 necesitan ser doblemente escapados (d => x(d.keyword))
-                    .attr("x", d => x(d.keyword))
-                    .attr("y", d => y(d.count))
-                    .attr("width", x.bandwidth())
-                    .attr("height", d => height - y(d.count))
-                    .on("mouseover", function(event, d) {{{{ // ESCAPE DE LLAVES
-                        d3.select(this).attr("fill", "#1a56db"); // Hover color
-                        tooltip.transition()
-                            .duration(200)
-                            // CORRECCIÓN CLAVE: Se pasa la variable como string simple para evitar conflictos de doble llave.
-                            .style("opacity", "{{TOOLTIP_OPACITY}}"); 
-                        // CORRECCIÓN: El contenido de la plantilla literal necesita ESCAPE DE LLAVES
-                        tooltip.html(`Coincidencias: <strong>\${{d.count}}</strong>`)
-                            .style("left", (event.pageX + 10) + "px")
-                            .style("top", (event.pageY - 28) + "px");
-                    }}}} ) // ESCAPE DE LLAVES
-                    .on("mouseout", function() {{{{ // ESCAPE DE LLAVES
-                        d3.select(this).attr("fill", "#06b6d4"); // Restore color
-                        tooltip.transition()
-                            .duration(500)
-                            .style("opacity", 0);
-                    }}}}); // ESCAPE DE LLAVES
-
-                // 3. Ejes
-                // Eje X (Palabras Clave)
-                chartGroup.append("g")
-                    // CORRECCIÓN: Usar la plantilla literal de JS con doble escape para Python
-                    .attr("transform", `translate(0,\${{height}})` )
-                    .call(d3.axisBottom(x))
-                    .selectAll("text")
-                    .style("text-anchor", "middle")
-                    .attr("class", "text-dark-gray");
-
-                // Etiqueta del Eje X
-                chartGroup.append("text")
-                    // CORRECCIÓN: Usar la plantilla literal de JS con doble escape para Python
-                    .attr("transform", `translate(\${{width / 2}}, \${{height + margin.bottom - 10}})` )
-                    .style("text-anchor", "middle")
-                    .text("Palabras Clave Detectadas")
-                    .attr("class", "text-sm font-semibold text-dark-gray");
-
-                // Eje Y (Frecuencia)
-                chartGroup.append("g")
-                    .call(d3.axisLeft(y).ticks(5))
-                    .attr("class", "text-dark-gray");
-
-                // Etiqueta del Eje Y
-                chartGroup.append("text")
-                    .attr("transform", "rotate(-90)")
-                    .attr("y", 0 - margin.left)
-                    // CORRECCIÓN: Usar la plantilla literal de JS con doble escape para Python
-                    .attr("x", 0 - (\${{height}} / 2))
-                    .attr("dy", "1em")
-                    .style("text-anchor", "middle")
-                    .text("Frecuencia Absoluta")
-                    .attr("class", "text-sm font-semibold text-dark-gray");
-            }}}} // ESCAPE DE LLAVES
-            
-            // --- 7. Renderizado del Perfil del Dispositivo ---
-            
-            function renderDeviceProfile() {{{{ // ESCAPE DE LLAVES
-                const container = document.getElementById('device-profile-data');
-                container.innerHTML = ''; // Limpiar
-
-                const data = [ // ESCAPE DE LLAVES
-                    {{ label: 'IMEI Principal', value: mockDeviceProfile.imei }}, // ESCAPE DE LLAVES
-                    {{ label: 'Marca / Fabricante', value: mockDeviceProfile.marca }}, // ESCAPE DE LLAVES
-                    {{ label: 'Modelo Exacto', value: mockDeviceProfile.modelo }}, // ESCAPE DE LLAVES
-                    {{ label: 'Nombre de Usuario', value: mockDeviceProfile.usuario }}, // ESCAPE DE LLAVES
-                    {{ label: 'Correo Asociado (Cuentas)', value: mockDeviceProfile.correo_asociado }}, // ESCAPE DE LLAVES
-                    {{ label: 'ID de WhatsApp', value: mockDeviceProfile.whatsapp_id }}, // ESCAPE DE LLAVES
-                    {{ label: 'Perfil de Facebook', value: mockDeviceProfile.facebook_profile }}, // ESCAPE DE LLAVES
-                    {{ label: 'ID de Instagram', value: mockDeviceProfile.instagram_id }} // ESCAPE DE LLAVES
-                ]; // ESCAPE DE LLAVES
-
-                data.forEach(item => {{{{ // ESCAPE DE LLAVES
-                    const itemDiv = document.createElement('div');
-                    // Ajustar el estilo para el diseño de la grilla
-                    itemDiv.className = 'p-3 bg-gray-50 rounded-lg border border-gray-200 shadow-inner'; 
-                    // CORRECCIÓN: Se escapan las llaves en las plantillas literales.
-                    itemDiv.innerHTML = `
-                        <p class="text-xs font-semibold text-primary-blue">\${{item.label}}</p>
-                        <p class="text-sm font-mono text-dark-gray break-all mt-0.5">\${{item.value}}</p>
-                    `;
-                    container.appendChild(itemDiv);
-                }}}}); // ESCAPE DE LLAVES
-            }}}} // ESCAPE DE LLAVES
-
-
-            // Inicialización de la vista
-            window.onload = function() {{{{ // ESCAPE DE LLAVES
-                renderDeviceProfile(); // Llamar a la función al inicio
-                if (isAuthReady) {{{{ // ESCAPE DE LLAVES
-                    loadAppState();
-                }}}} // ESCAPE DE LLAVES
-                // Asegurarse de que el gráfico se renderice si se carga directamente en análisis
-                if (currentView === 'analysis') {{{{ // ESCAPE DE LLAVES
-                    renderBarChart(getMockChartData(currentFocusTopic));
-                }}}} else {{{{ // ESCAPE DE LLAVES
-                     // Mostrar el dashboard por defecto si no hay estado cargado
-                     switchView('dashboard');
-                }}}} // ESCAPE DE LLAVES
-            }}}} // ESCAPE DE LLAVES;
-
-            // Escucha de resize para hacer el gráfico responsivo
-            window.addEventListener('resize', () => {{{{ // ESCAPE DE LLAVES
-                 if (currentView === 'analysis') {{{{ // ESCAPE DE LLAVES
-                    renderBarChart(getMockChartData(currentFocusTopic));
-                }}}} // ESCAPE DE LLAVES
-            }}}}); // ESCAPE DE LLAVES
-
-        </script>
-    </body>
-    </html>
-    """
 # --------------------------------------------------------------------
 # 🔵 ESTA PARTE ES LA QUE ESTABA MAL UBICADA → AHORA ESTÁ CORRECTA
 # --------------------------------------------------------------------
@@ -789,40 +383,115 @@ if st.session_state.file_uploaded and st.session_state.df_loaded:
 # SOLO ejecutar dashboard si df_loaded tiene datos reales
 if st.session_state["file_uploaded"] and st.session_state["df_loaded"]:
 
-    # Mostrar debug SOLO cuando ya existe la data
-    st.write("DEBUG TYPE:", type(st.session_state["df_loaded"]))
-    st.write("DEBUG VALUE:", st.session_state["df_loaded"])
-
-    imei_val = st.session_state["df_loaded"]["IMEI"]
-    marca_val = st.session_state["df_loaded"]["Marca"]
-    modelo_val = st.session_state["df_loaded"]["Modelo"]
-    usuario_val = st.session_state["df_loaded"]["Usuario"]
-
-    # Construcción del HTML_FINAL (NO LO MODIFIQUÉ)
-    HTML_FINAL = (
-        HTML_TEMPLATE
-            .replace("{{IMEI_VAL}}", imei_val)
-            .replace("{{MARCA_VAL}}", marca_val)
-            .replace("{{MODELO_VAL}}", modelo_val)
-            .replace("{{USUARIO_VAL}}", usuario_val)
-            .replace("{DEFAULT_SHADOW}", DEFAULT_SHADOW_CSS)
-            .replace("{HOVER_SHADOW}", HOVER_SHADOW_CSS)
-            .replace("{TRANSITION_SHORT}", TRANSITION_TIME_SHORT)
-            .replace("{TRANSITION_MEDIUM}", TRANSITION_TIME_MEDIUM)
-            .replace("{FONT_SIZE}", FONT_SIZE_TOOLTIP)
-            .replace("{TOOLTIP_OPACITY}", TOOLTIP_OPACITY_VAL)
-    )
-
-    components.html(
-        HTML_FINAL,
-        height=1200,
-        scrolling=True
-    )
+    # --- Coincidencias de todas las temáticas (una sola pasada por los mensajes) ---
+    topic_summary = get_topic_summary(extraction_hash, frames)
+    with st.expander("📊 Coincidencias por temática en los mensajes reales"):
+        col_tema, col_contacto = st.columns(2)
+        col_tema.dataframe(topic_summary["por_tema"])
+        col_contacto.dataframe(topic_summary["por_contacto"], hide_index=True)
+
+    # --- Panel principal: se monta una vez y recibe solo los datos que cambian ---
+    # Las búsquedas, la red de contactos y el mapa se piden desde la página; el
+    # servidor responde solo lo pedido (nada se calcula hasta abrir su análisis)
+    search_index = get_search_index(extraction_hash, frames)
+    message = dashboard.last_message()
+    query = message.get("query")
+    offset = message.get("offset", 0)
+    fuzzy = bool(message.get("fuzzy"))
+    want_graph = bool(message.get("graph"))
+    ego = message.get("ego")
+    viewport = message.get("viewport")
+    near = message.get("near")
+    movement = message.get("movement")
+    timeline = message.get("timeline")
+    media = message.get("media")
+    duplicates = message.get("duplicates")
+
+    # Lote de cambios guardados por la página: cada mensaje repite el último
+    # lote sin confirmar, así que se aplica una sola vez por montaje
+    user = message.get("user")
+    persist = message.get("persist")
+    applied = st.session_state.get("persist_applied")
+    if applied and applied[0] != message.get("mount"):
+        applied = None
+    if persist and applied != (message.get("mount"), persist.get("batch")):
+        get_state_store().put_many(rows_from_page(persist.get("entries"), user))
+        applied = st.session_state["persist_applied"] = (message.get("mount"), persist.get("batch"))
+
+    # Consultas y envío del panel, etiquetados con la extracción (panel de rendimiento)
+    with perf.tagged(extraccion=extraction_hash[:12], filas=sum(len(df) for df in frames.values())):
+        dashboard.render({
+            "theme": (DASHBOARD_THEME, lambda: DASHBOARD_THEME),
+            "profile": (extraction_hash, lambda: st.session_state["df_loaded"]),
+            "chart": (extraction_hash, lambda: get_chart_data(extraction_hash, frames)),
+            "search": (
+                (extraction_hash, query, offset, fuzzy),
+                lambda: search_index.search(query, offset=offset, fuzzy=fuzzy) if query else None,
+            ),
+            "contacts": (
+                (extraction_hash, want_graph),
+                lambda: get_contact_graph(extraction_hash, frames).key_contacts() if want_graph else None,
+            ),
+            "ego": (
+                (extraction_hash, ego),
+                lambda: get_contact_graph(extraction_hash, frames).ego_network(ego) if ego else None,
+            ),
+            "map": (
+                (extraction_hash, viewport),
+                lambda: get_spatial_index(extraction_hash, frames).clusters(
+                    viewport.get("bbox"), viewport.get("width", 1024)
+                ) if viewport else None,
+            ),
+            "near": (
+                (extraction_hash, near),
+                lambda: get_spatial_index(extraction_hash, frames).nearby(
+                    near["lat"], near["lon"], near["radius"]
+                ) if near else None,
+            ),
+            "movement": (
+                (extraction_hash, movement),
+                lambda: get_movement(extraction_hash, frames).summary(
+                    movement["radius"], movement["dwell"]
+                ) if movement else None,
+            ),
+            "timeline": (
+                (extraction_hash, timeline),
+                lambda: get_activity_index(extraction_hash, frames).timeline(
+                    timeline.get("start"), timeline.get("end")
+                ) if timeline else None,
+            ),
+            # Las miniaturas se generan en segundo plano: la página vuelve a pedir
+            # la misma página (con otro ``tick``) mientras queden pendientes
+            "media": (
+                (extraction_hash, media_root, media),
+                lambda: get_media_catalog(extraction_hash, media_root, frames).page(
+                    media.get("offset", 0), kind=media.get("kind")
+                ) if media else None,
+            ),
+            "duplicates": (
+                (extraction_hash, media_root, duplicates),
+                lambda: get_media_catalog(extraction_hash, media_root, frames).duplicates() if duplicates else None,
+            ),
+            # Lo guardado para esta extracción, al abrirla; y la confirmación de cada lote
+            "workspace": (
+                (extraction_hash, user),
+                lambda: {
+                    "extraction": extraction_hash[:12],
+                    "entries": entries_for_page(get_state_store(), extraction_hash, user),
+                },
+            ),
+            "persisted": (applied, lambda: {"batch": applied[1]} if applied else None),
+        })
 
 
 # --------------------------------------------------------------------
 # 🔴 SI NO HAY ARCHIVO CARGADO → MENSAJE DE BIENVENIDA
 # --------------------------------------------------------------------
+elif job is not None and job.active:
+    st.info(
+        f"Procesando {job.source_name or 'la extracción'} en segundo plano. El avance se muestra "
+        "en la barra lateral; el panel se abre al terminar."
+    )
 else:
     st.markdown("""
         <div class="p-8 bg-white rounded-xl shadow-xl border-l-4 border-secondary-cyan mt-10">
@@ -837,3 +506,92 @@ else:
             </ul>
         </div>
     """, unsafe_allow_html=True)
+
+# -----------------------------------------------------------------------------
+# 4. Caso con varios dispositivos
+# -----------------------------------------------------------------------------
+
+if len(case_keys) > 1:
+    from investidata.correlation import CONTACT_KINDS, KINDS
+
+    case_index = get_case_index()
+    for key in case_keys:
+        if key in case_index:
+            continue
+        # Primera vez que un caso usa la extracción: se leen sus hojas (o su
+        # paquete, que ya trae los identificadores) y se cruzan con el índice
+        with st.spinner(f"Agregando {extraction_label(key)} al caso..."), perf.span(
+            "correlacion", extraccion=key[:12]
+        ) as tags:
+            device_frames = get_extraction_cache().get(key)
+            if device_frames is not None:
+                tags["coincidencias"] = case_index.add(key, get_identifiers(key, device_frames), ready.get(key))
+
+    st.markdown("## 🔗 Dispositivos del caso")
+    pairs = case_index.pairs(case_keys)
+    if pairs.empty:
+        st.info("Los dispositivos del caso no comparten contactos, chats ni lugares.")
+    else:
+        st.caption(
+            "Identificadores en común por par de dispositivos; «directos» son el número o el IMEI "
+            "de un dispositivo que aparece entre los contactos del otro."
+        )
+        st.dataframe(pairs.drop(columns=["a", "b"]), hide_index=True)
+        pair = st.selectbox(
+            "Par de dispositivos",
+            list(zip(pairs["a"], pairs["b"])),
+            format_func=lambda pair: f"{case_index.label(pair[0])} ↔ {case_index.label(pair[1])}",
+        )
+        kinds = st.multiselect("Tipos de identificador", KINDS, default=list(CONTACT_KINDS))
+        st.dataframe(case_index.shared(*pair, kinds=kinds), hide_index=True)
+
+    wanted = st.text_input("Buscar un teléfono, correo o IMEI en los dispositivos del caso").strip()
+    if wanted:
+        found = case_index.lookup(wanted, case_keys)
+        if found.empty:
+            st.caption("Ningún dispositivo del caso lo tiene.")
+        else:
+            st.dataframe(found.drop(columns=["extraccion"]), hide_index=True)
+
+# -----------------------------------------------------------------------------
+# 5. Panel de rendimiento (opcional)
+# -----------------------------------------------------------------------------
+
+# Las etapas se miden siempre (ver investidata.perf); el panel solo las muestra
+if st.sidebar.toggle("⏱️ Panel de rendimiento", key="perf_panel"):
+    only_current = bool(extraction_hash) and st.sidebar.checkbox("Solo esta extracción", value=True)
+    match = {"extraccion": extraction_hash[:12]} if only_current else {}
+    with st.sidebar.expander("⏱️ Rendimiento", expanded=True):
+        st.caption("Tiempo por etapa (ms) y memoria residente añadida (MB)")
+        st.dataframe(perf.recorder.summary(**match).round(1), hide_index=True)
+        recent = [
+            {
+                "etapa": span["name"],
+                "ms": round(span["duration_us"] / 1000, 1),
+                "hilo": span["thread"],
+                "etiquetas": ", ".join(f"{k}={v}" for k, v in span["tags"].items() if k != "extraccion"),
+            }
+            for span in reversed(perf.recorder.spans(**match)[-25:])
+        ]
+        st.caption("Últimas etapas")
+        st.dataframe(recent, hide_index=True)
+        st.download_button(
+            "Exportar traza (chrome://tracing, Perfetto)",
+            perf.recorder.chrome_trace(**match),
+            file_name=f"traza-{extraction_hash[:8] if only_current else 'servidor'}.json",
+            mime="application/json",
+        )
+
+
+# -----------------------------------------------------------------------------
+# 6. Precarga de los módulos de análisis
+# -----------------------------------------------------------------------------
+
+# Después de pintar la página: el servidor importa pandas y los motores en
+# segundo plano (una vez por proceso) mientras el investigador elige un archivo
+@st.cache_resource
+def start_warmup():
+    return warmup.start()
+
+
+start_warmup()
@@ -0,0 +1,18 @@
+"""Arranque del panel con cabeceras de caché para sus recursos estáticos.
+
+Igual que ``streamlit run investidata2.py``, pero los estilos, D3 y la lógica
+de la página (con su huella en la URL) se sirven como inmutables: cada
+navegador los descarga una sola vez::
+
+    streamlit run investidata_app.py
+    uvicorn investidata_app:app --host 0.0.0.0 --port 8501
+"""
+
+from pathlib import Path
+
+from starlette.middleware import Middleware
+from streamlit.starlette import App
+
+from investidata.dashboard.assets import AssetCacheMiddleware
+
+app = App(Path(__file__).parent / "investidata2.py", middleware=[Middleware(AssetCacheMiddleware)])
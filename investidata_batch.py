@@ -0,0 +1,17 @@
+"""Prepara paquetes de caso por lotes, sin pasar por el panel web.
+
+Convierte cada reporte UFED (XLSX, CSV o carpeta de CSV) y guarda junto a él
+los índices que usa el panel (ver :mod:`investidata.bundle`)::
+
+    python investidata_batch.py /lab/entrantes --out ~/.cache/investidata --workers 8
+
+Con ``--out`` en la carpeta de caché del panel (``INVESTIDATA_CACHE_DIR``),
+los paquetes aparecen en el selector de extracciones de la barra lateral.
+"""
+
+import sys
+
+from investidata.bundle import main
+
+if __name__ == "__main__":
+    sys.exit(main())
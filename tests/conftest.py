@@ -0,0 +1,62 @@
+"""Extracción UFED mínima, construida a mano, para las pruebas de los motores."""
+
+import io
+
+import pandas as pd
+import pytest
+
+from investidata.ingest import DEVICE_SHEET
+
+
+def build_frames() -> dict[str, pd.DataFrame]:
+    return {
+        DEVICE_SHEET: pd.DataFrame({
+            "Nombre": ["IMEI", "Vendor", "Model", "Device Name"],
+            "Valor": ["356938035643809", "Samsung", "SM-G991B", "Galaxy de prueba"],
+        }),
+        "Chats": pd.DataFrame({
+            "De": ["Ana", "Beto", "Ana", "Carla", "Beto"],
+            "Para": ["Propietario", "Propietario", "Beto", "Propietario", "Ana"],
+            "Cuerpo": [
+                "Mañana llevo la pistola",
+                "hola, ¿dónde nos vemos?",
+                "la plata está lista",
+                "Nos vemos en la casa",
+                "mañana no puedo",
+            ],
+            "Marca de tiempo": pd.to_datetime([
+                "2024-01-01 08:00", "2024-01-01 09:30", "2024-01-02 10:00",
+                "2024-01-03 18:45", "2024-01-05 21:15",
+            ]),
+            "Fuente": ["WhatsApp", "WhatsApp", "Telegram", "SMS", "WhatsApp"],
+        }),
+        "Registro de llamadas": pd.DataFrame({
+            "Nombre": ["Ana", "Carla", "Ana"],
+            "Número": ["+57 3001112233", "+57 3104445566", "+57 3001112233"],
+            "Marca de tiempo": pd.to_datetime(["2024-01-01 07:00", "2024-01-02 12:00", "2024-01-04 16:30"]),
+            "Duración (s)": [60, 125, 30],
+            "Tipo": ["Entrante", "Saliente", "Perdida"],
+        }),
+        "Ubicaciones": pd.DataFrame({
+            "Marca de tiempo": pd.to_datetime([
+                "2024-01-01 08:00", "2024-01-01 08:20", "2024-01-01 08:40", "2024-01-01 09:30",
+            ]),
+            "Latitud": [4.6097, 4.6098, 4.6097, 4.7110],
+            "Longitud": [-74.0817, -74.0816, -74.0818, -74.0721],
+        }),
+    }
+
+
+@pytest.fixture
+def frames():
+    return build_frames()
+
+
+@pytest.fixture
+def workbook(frames) -> bytes:
+    # El mismo reporte escrito como XLSX, como lo exporta el lector de UFED
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        for name, df in frames.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+    return buffer.getvalue()
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from investidata.aggregates import chart_payload
+from investidata.topics import TopicScanner
+
+LEXICONS = {"armas": ["pistola", "calibre", "fierro"], "dinero": ["plata", "lukas"]}
+
+
+def test_chart_payload_from_topic_summary():
+    messages = pd.DataFrame({
+        "contacto": ["Ana", "Beto", "Ana"],
+        "texto": ["el fierro y la pistola", "otro fierro", "plata plata plata"],
+    })
+    summary = TopicScanner.summarize(TopicScanner(LEXICONS).scan(messages))
+    payload = chart_payload(summary["por_palabra"], LEXICONS, top=2)
+    assert payload == {
+        "armas": [{"keyword": "fierro", "count": 2}, {"keyword": "pistola", "count": 1}],
+        "dinero": [{"keyword": "plata", "count": 3}, {"keyword": "lukas", "count": 0}],
+    }
+
+
+def test_ties_keep_lexicon_order():
+    empty = pd.DataFrame(columns=["tema", "palabra", "coincidencias"])
+    payload = chart_payload(empty, LEXICONS)
+    assert [item["keyword"] for item in payload["armas"]] == ["pistola", "calibre", "fierro"]
+    assert {item["count"] for items in payload.values() for item in items} == {0}
@@ -0,0 +1,73 @@
+import asyncio
+import re
+
+import pytest
+
+from investidata.dashboard import assets
+from investidata.dashboard.assets import AssetCacheMiddleware, asset_fingerprints, fingerprint
+
+
+def test_index_links_current_fingerprints():
+    # Tras editar main.js, los estilos o D3 hay que volver a estampar index.html
+    html = assets.INDEX_HTML.read_text(encoding="utf-8")
+    for relative, stamp in asset_fingerprints().items():
+        assert f"{relative}?v={stamp}" in html
+
+
+def test_stamp_index(tmp_path, monkeypatch):
+    frontend = tmp_path / "frontend"
+    (frontend / "assets").mkdir(parents=True)
+    css, script = frontend / "assets" / "app.css", frontend / "main.js"
+    css.write_text("body{}")
+    script.write_text("console.log(1)")
+    index = frontend / "index.html"
+    index.write_text('<link href="assets/app.css?v=0123abcd"><script src=\'main.js\'></script>')
+    monkeypatch.setattr(assets, "FRONTEND_DIR", frontend)
+    monkeypatch.setattr(assets, "INDEX_HTML", index)
+    monkeypatch.setattr(assets, "STAMPED", (css, script, frontend / "vendor" / "falta.js"))
+
+    stamps = assets.stamp_index()
+    assert stamps == {"assets/app.css": fingerprint(css), "main.js": fingerprint(script)}
+    assert re.fullmatch(
+        r'<link href="assets/app\.css\?v=[0-9a-f]{12}"><script src=\'main\.js\?v=[0-9a-f]{12}\'></script>',
+        index.read_text(),
+    )
+    index.write_text("<p>sin enlaces</p>")
+    with pytest.raises(ValueError):
+        assets.stamp_index()
+
+
+def test_vendor_d3_checks_the_hash(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "D3_PATH", tmp_path / "vendor" / "d3.min.js")
+    fake = tmp_path / "d3.js"
+    fake.write_text("// otro d3")
+    with pytest.raises(ValueError):
+        assets.vendor_d3(fake)
+    assert assets.vendor_d3(assets.FRONTEND_DIR / "vendor" / "d3.v7.min.js").exists()
+
+
+def _request(middleware, path, query=b""):
+    sent = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/javascript"), (b"Cache-Control", b"public")]})
+        await send({"type": "http.response.body", "body": b"..."})
+
+    async def send(message):
+        sent.append(message)
+
+    middleware.app = app
+    asyncio.run(middleware({"type": "http", "path": path, "query_string": query}, None, send))
+    return dict(sent[0]["headers"])
+
+
+def test_middleware_marks_fingerprinted_assets_immutable():
+    middleware = AssetCacheMiddleware(None, max_age=60, fingerprints={"main.js": "abc123"})
+    path = "/component/investidata.dashboard.investidata_dashboard/main.js"
+    assert _request(middleware, path, b"v=abc123")[b"cache-control"] == b"public, max-age=60, immutable"
+    assert b"Cache-Control" not in _request(middleware, path, b"v=abc123")
+    # Huella vieja, sin huella u otro archivo: las cabeceras de Streamlit
+    assert _request(middleware, path, b"v=viejo")[b"Cache-Control"] == b"public"
+    assert _request(middleware, path)[b"Cache-Control"] == b"public"
+    assert _request(middleware, "/main.js", b"v=abc123")[b"Cache-Control"] == b"public"
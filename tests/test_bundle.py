@@ -0,0 +1,84 @@
+import pickle
+from pathlib import Path
+
+import pytest
+
+from investidata.bundle import build_bundle, csv_frames, csv_hash, find_reports, read_resources
+from investidata.cache import ExtractionCache
+from investidata.catalog import BUNDLE_VERSION, RESOURCES_NAME, bundle_version, is_bundle, list_bundles, load_resources
+from investidata.columnar import load_store
+
+
+@pytest.fixture
+def bundle(tmp_path, workbook):
+    report = tmp_path / "reporte.xlsx"
+    report.write_bytes(workbook)
+    return build_bundle(report, tmp_path / "paquetes")
+
+
+def test_bundle_is_built_once(tmp_path, bundle):
+    target = Path(bundle["bundle"])
+    assert is_bundle(target) and bundle_version(target) == BUNDLE_VERSION
+    assert bundle["sheets"]["Chats"] == 5
+    assert set(bundle["resources"]) >= {"messages", "search", "topics", "chart", "graph", "spatial"}
+    assert build_bundle(tmp_path / "reporte.xlsx", tmp_path / "paquetes")["skipped"]
+    assert not build_bundle(tmp_path / "reporte.xlsx", tmp_path / "paquetes", force=True)["skipped"]
+    assert [b["key"] for b in list_bundles(tmp_path / "paquetes")] == [target.name]
+
+
+def test_messages_are_not_pickled(tmp_path, bundle):
+    target = Path(bundle["bundle"])
+    with open(target / RESOURCES_NAME, "rb") as fh:
+        assert pickle.load(fh) == BUNDLE_VERSION
+        stored = pickle.load(fh)
+    assert "messages" not in stored
+    assert stored["search"].messages is None
+
+    resources = read_resources(target, load_store(target))
+    assert len(resources["messages"]) == 5
+    assert resources["search"].messages is resources["messages"]
+    assert resources["search"].match("manana").tolist() == [0, 4]
+
+
+def test_cache_uses_the_bundled_engines(tmp_path, bundle):
+    key = Path(bundle["bundle"]).name
+    cache = ExtractionCache(disk_dir=tmp_path / "paquetes")
+    assert cache.get(key) is not None
+    index = cache.resource(key, "search", lambda: pytest.fail("el índice viene en el paquete"))
+    assert index.search("pistola")["hits"][0]["contact"] == "Ana"
+    assert cache.resource(key, "chart", lambda: None)["armas"][0] == {"keyword": "pistola", "count": 1}
+
+
+def test_bundles_of_another_version_are_ignored(tmp_path, bundle):
+    target = Path(bundle["bundle"])
+    with open(target / RESOURCES_NAME, "wb") as fh:
+        pickle.dump(BUNDLE_VERSION - 1, fh)
+        pickle.dump({"search": None}, fh)
+    assert not is_bundle(target)
+    assert load_resources(target) == {}
+    assert read_resources(target, load_store(target)) == {}
+    # Los paquetes de la versión 1 eran un solo diccionario
+    with open(target / RESOURCES_NAME, "wb") as fh:
+        pickle.dump({"search": None}, fh)
+    assert bundle_version(target) is None
+
+
+def test_csv_reports(tmp_path):
+    folder = tmp_path / "exportacion"
+    folder.mkdir()
+    (folder / "Chats.csv").write_text("De;Cuerpo\nAna;hola\nBeto;la plata\n", encoding="utf-8")
+    (folder / "Contactos.csv").write_bytes("Nombre,Número\nPeña,123\n".encode("latin-1"))
+    (tmp_path / "suelto.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+    (tmp_path / "reporte.xlsx").write_bytes(b"")
+    (tmp_path / "notas.txt").write_text("no es un reporte")
+
+    assert find_reports([tmp_path]) == [tmp_path / "reporte.xlsx", tmp_path / "suelto.csv", folder]
+    frames = csv_frames(folder)
+    assert frames["Chats"]["Cuerpo"].tolist() == ["hola", "la plata"]
+    assert frames["Contactos"]["Nombre"].tolist() == ["Peña"]
+    first = csv_hash(folder)
+    (folder / "Chats.csv").write_text("De;Cuerpo\nAna;hola\n", encoding="utf-8")
+    assert csv_hash(folder) != first
+
+    summary = build_bundle(folder, tmp_path / "paquetes")
+    assert summary["sheets"] == {"Chats": 1, "Contactos": 1}
@@ -0,0 +1,144 @@
+import threading
+
+import numpy as np
+import pytest
+
+from investidata.cache import MB, ExtractionCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _frames(mb=1):
+    # Una "hoja" de ``mb`` megabytes
+    return {"hoja": np.zeros(mb * MB // 8)}
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def _cache(clock, budget_mb=10, idle=60):
+    return ExtractionCache(memory_budget=budget_mb * MB, idle_seconds=idle, disk_dir=None, clock=clock)
+
+
+def test_idle_extractions_without_sessions_are_dropped(clock):
+    cache = _cache(clock)
+    cache.put("a", _frames())
+    cache.put("b", _frames())
+    cache.acquire("b", "sesion-1")
+    clock.now = 30
+    cache.get("a")
+    clock.now = 50
+    cache.evict()
+    # "b" sigue abierta; "a" solo lleva 20 s sin uso
+    assert "a" in cache and "b" in cache
+    clock.now = 100
+    cache.evict()
+    # "a" lleva 70 s sin uso; la sesión de "b" no volvió a ejecutarse y caducó
+    assert "a" not in cache and "b" not in cache
+
+
+def test_budget_evicts_unused_first_then_least_recent(clock):
+    cache = _cache(clock, budget_mb=3)
+    for key in "abc":
+        cache.put(key, _frames())
+    cache.acquire("a", "s1")
+    cache.put("d", _frames())
+    # Se pasa del presupuesto: sale "b", la menos usada sin sesiones
+    assert [k for k in "abcd" if k in cache] == ["a", "c", "d"]
+    cache.acquire("c", "s2")
+    cache.acquire("d", "s3")
+    cache.put("e", _frames())
+    # Todas en uso: sale la menos usada aunque tenga sesión; la más reciente se queda
+    assert [k for k in "acde" if k in cache] == ["c", "d", "e"]
+    cache.put("grande", _frames(5))
+    assert "grande" in cache
+
+
+def test_sessions_are_references(clock):
+    cache = _cache(clock)
+    cache.put("a", _frames())
+    cache.put("b", _frames())
+    cache.acquire("a", "s1")
+    cache.acquire("a", "s2")
+    cache.acquire("b", "s1")      # s1 cambia de extracción
+    stats = {e["extraccion"]: e["sesiones"] for e in cache.stats()["entries"]}
+    assert stats == {"a": 1, "b": 1}
+    cache.release("s2")
+    assert {e["extraccion"]: e["sesiones"] for e in cache.stats()["entries"]} == {"a": 0, "b": 1}
+    # Una sesión que no vuelve a ejecutarse caduca
+    clock.now = 61
+    assert {e["extraccion"]: e["sesiones"] for e in cache.stats()["entries"]} == {"a": 0, "b": 0}
+
+
+def test_resources_are_built_once_and_dropped_with_the_extraction(clock):
+    cache = _cache(clock, budget_mb=3)
+    cache.put("a", _frames())
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"datos": np.zeros(MB // 8)}
+
+    first = cache.resource("a", "indice", build)
+    assert cache.resource("a", "indice", build) is first
+    assert len(builds) == 1
+    stats = cache.stats()
+    assert stats["budget_mb"] == 3
+    assert stats["entries"][0]["hojas_mb"] == pytest.approx(1.0)
+    assert stats["entries"][0]["motores_mb"] == pytest.approx(1.0)
+    assert stats["used_mb"] == pytest.approx(2.0)
+
+    cache.put("b", _frames(2))
+    assert "a" not in cache
+    # Sin la extracción en memoria el motor no se guarda
+    cache.resource("a", "indice", build)
+    assert len(builds) == 2 and "a" not in cache
+
+
+def test_disk_tier_survives_a_new_process(tmp_path, frames):
+    ExtractionCache(disk_dir=tmp_path).put("clave", frames)
+    reopened = ExtractionCache(disk_dir=tmp_path)
+    assert "clave" in reopened
+    loaded = reopened.get_or_load("clave", lambda: pytest.fail("no debe volver a leer el XLSX"))
+    assert loaded["Chats"]["Cuerpo"].tolist() == frames["Chats"]["Cuerpo"].tolist()
+    assert reopened.get("otra") is None
+
+
+def test_get_or_build_needs_disk(clock):
+    with pytest.raises(ValueError):
+        _cache(clock).get_or_build("a", lambda path: None)
+
+
+def test_concurrent_builds_share_one_lock_that_is_then_dropped(clock):
+    cache = _cache(clock)
+    cache.put("a", _frames())
+    started, release = threading.Event(), threading.Event()
+    builds = []
+
+    def build():
+        builds.append(1)
+        started.set()
+        release.wait(5)
+        return "motor"
+
+    threads = [threading.Thread(target=cache.resource, args=("a", "indice", build)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    assert list(cache._key_locks) == ["a"]
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert builds == [1]
+    # Ningún candado sobrevive a su uso, por muchas extracciones que pasen
+    for i in range(100):
+        cache.get_or_load(f"caso{i}", _frames)
+    assert cache._key_locks == {}
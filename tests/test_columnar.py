@@ -0,0 +1,62 @@
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from investidata import columnar
+from investidata.catalog import MANIFEST_NAME, is_store, read_manifest
+from investidata.columnar import STORE_VERSION, load_store, typed_frame, write_store
+from investidata.schema import BYTES_KEY, compact_frame
+
+
+def test_roundtrip_keeps_rows_and_compact_dtypes(tmp_path, frames):
+    store = write_store(frames, tmp_path / "caso", source_name="reporte.xlsx")
+    assert is_store(store)
+    manifest = read_manifest(store)
+    assert manifest["version"] == STORE_VERSION
+    assert manifest["source"] == "reporte.xlsx"
+    assert [s["name"] for s in manifest["sheets"]] == list(frames)
+
+    loaded = load_store(store)
+    for name, df in frames.items():
+        expected = compact_frame(typed_frame(df))
+        assert loaded[name].dtypes.to_dict() == expected.dtypes.to_dict()
+        pd.testing.assert_frame_equal(loaded[name], expected)
+        assert loaded[name].attrs[BYTES_KEY] == expected.attrs[BYTES_KEY]
+
+
+def test_load_does_not_retype_current_stores(tmp_path, frames, monkeypatch):
+    store = write_store(frames, tmp_path / "caso")
+
+    def fail(df):
+        raise AssertionError("load_store no debe volver a tipar las hojas")
+
+    monkeypatch.setattr(columnar, "compact_frame", fail)
+    loaded = load_store(store)
+    assert loaded["Chats"]["Cuerpo"].tolist() == frames["Chats"]["Cuerpo"].tolist()
+    assert loaded["Registro de llamadas"]["Duración (s)"].dtype == "Int8"
+
+
+def test_older_stores_are_compacted_on_load(tmp_path, frames):
+    store = tmp_path / "caso"
+    store.mkdir()
+    df = frames["Registro de llamadas"]
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), store / "hoja_00.parquet")
+    manifest = {
+        "version": 2,
+        "sheets": [{"name": "Registro de llamadas", "files": ["hoja_00.parquet"], "rows": len(df), "seconds": 0}],
+    }
+    (store / MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf-8")
+
+    loaded = load_store(store)["Registro de llamadas"]
+    assert loaded.dtypes.to_dict() == compact_frame(df).dtypes.to_dict()
+
+
+def test_failed_write_leaves_nothing(tmp_path, frames):
+    with pytest.raises(RuntimeError):
+        with columnar.StoreWriter(tmp_path / "caso") as writer:
+            writer.add_frame("Chats", frames["Chats"])
+            raise RuntimeError("interrumpido")
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,108 @@
+import pandas as pd
+import pytest
+
+from investidata.correlation import (
+    CaseIndex,
+    cell_identifiers,
+    device_identifiers,
+    identifiers_frame,
+    place_identifiers,
+)
+from investidata.ingest import DEVICE_SHEET
+
+
+def _as_set(identifiers):
+    return set(identifiers[["tipo", "valor"]].itertuples(index=False, name=None))
+
+
+def test_phone_forms_are_one_identifier():
+    cells = pd.Series([
+        "+57 300 123 4567", "3001234567", "573001234567@s.whatsapp.net",
+        "Ana <ANA.P@Correo.com>", "1203630@g.us", "99887766@lid", "Tel 123", None,
+    ])
+    found = cell_identifiers(cells).set_index(["tipo", "valor"])["eventos"].to_dict()
+    assert found == {
+        ("telefono", "3001234567"): 3,
+        ("correo", "ana.p@correo.com"): 1,
+        ("chat", "1203630"): 1,
+        ("whatsapp", "99887766"): 1,
+    }
+
+
+def test_device_identifiers():
+    frames = {DEVICE_SHEET: pd.DataFrame({
+        "Nombre": ["IMEI", "MSISDN", "Cuenta", "Vendor"],
+        "Valor": ["35-693803-564380-9", "+57 300 111 2233", "dueño@correo.com", "Samsung"],
+    })}
+    own = device_identifiers(frames)
+    assert _as_set(own) == {("imei", "35693803564380"), ("telefono", "3001112233"), ("correo", "dueño@correo.com")}
+    assert own["propio"].all()
+    assert device_identifiers({}).empty
+
+
+def test_places_and_meetings():
+    locations = pd.DataFrame({
+        "lat": [4.6097, 4.6098, 4.7110],
+        "lon": [-74.0817, -74.0816, -74.0721],
+        "fecha": pd.to_datetime(["2024-01-01 08:05", "2024-01-01 08:50", None]),
+    })
+    places = place_identifiers(locations).set_index(["tipo", "valor"])["eventos"].to_dict()
+    assert places == {
+        ("zona", "4.6095,-74.0805"): 2,
+        ("zona", "4.7115,-74.0715"): 1,
+        ("encuentro", "4.6095,-74.0805 2024-01-01 08h"): 2,
+    }
+
+
+def _device(msisdn, contacts, lat=4.6097):
+    return {
+        DEVICE_SHEET: pd.DataFrame({"Nombre": ["MSISDN"], "Valor": [msisdn]}),
+        "Contactos": pd.DataFrame({"Nombre": [f"c{i}" for i in range(len(contacts))], "Número": contacts}),
+        "Ubicaciones": pd.DataFrame({
+            "Latitud": [lat], "Longitud": [-74.0817], "Marca de tiempo": pd.to_datetime(["2024-01-01 08:10"]),
+        }),
+    }
+
+
+@pytest.fixture
+def devices():
+    return {
+        "a" * 64: _device("3001112233", ["3104445566", "3205556677"]),
+        # Tiene al dueño de "a" como contacto y comparte otro contacto
+        "b" * 64: _device("3119998877", ["+57 300 111 2233", "310 444 5566"], lat=4.7),
+        # Solo coincide en el lugar y la hora con "a"
+        "c" * 64: _device("3150000000", ["3990001122"]),
+    }
+
+
+def test_case_index_pairs(devices):
+    index = CaseIndex()
+    matched = [index.add(key, identifiers_frame(frames), label=key[0].upper()) for key, frames in devices.items()]
+    assert matched == [0, 2, 2]
+    pairs = index.pairs()
+    assert [(row.dispositivo_a, row.dispositivo_b) for row in pairs.itertuples()] == [("A", "B"), ("A", "C")]
+    ab, ac = pairs.iloc[0], pairs.iloc[1]
+    assert (ab["telefono"], ab["directos"], ab["contactos"], ab["zona"]) == (2, 1, 2, 0)
+    assert (ac["telefono"], ac["zona"], ac["encuentro"]) == (0, 1, 1)
+    # Cada caso ve solo sus extracciones
+    assert index.pairs(keys=["a" * 64, "c" * 64])["dispositivo_b"].tolist() == ["C"]
+
+    shared = index.shared("a" * 64, "b" * 64)
+    assert set(shared[["tipo", "valor", "propio_a", "propio_b"]].itertuples(index=False, name=None)) == {
+        ("telefono", "3001112233", True, False), ("telefono", "3104445566", False, False),
+    }
+    found = index.lookup("+57 (310) 444-5566")
+    assert sorted(found["dispositivo"]) == ["A", "B"]
+
+
+def test_incremental_index_matches_a_rebuild(devices):
+    incremental = CaseIndex()
+    for key, frames in devices.items():
+        incremental.add(key, identifiers_frame(frames))
+    incremental.remove("b" * 64)
+    rebuilt = CaseIndex()
+    for key in ("a" * 64, "c" * 64):
+        rebuilt.add(key, identifiers_frame(devices[key]))
+    pd.testing.assert_frame_equal(incremental.pairs(), rebuilt.pairs())
+    assert "b" * 64 not in incremental and len(incremental) == 2
+    assert incremental.add("a" * 64, identifiers_frame(devices["a" * 64])) == 0
@@ -0,0 +1,57 @@
+import pytest
+import streamlit as st
+
+from investidata import dashboard
+
+KEY = "panel_de_prueba"
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    # Sin servidor: se registra lo que recibiría la página
+    calls = []
+    monkeypatch.setattr(dashboard, "_component", lambda **kwargs: calls.append(kwargs))
+    yield calls
+    for name in (KEY, f"{KEY}:sent"):
+        st.session_state.pop(name, None)
+
+
+def _slots(versions, produced):
+    def producer(name):
+        def produce():
+            produced.append(name)
+            return f"{name}-v{versions[name]}"
+        return produce
+    return {name: (version, producer(name)) for name, version in versions.items()}
+
+
+def test_only_changed_slots_are_sent(sent):
+    produced = []
+    dashboard.render(_slots({"theme": 1, "chart": 1}, produced), key=KEY)
+    dashboard.render(_slots({"theme": 1, "chart": 1}, produced), key=KEY)
+    dashboard.render(_slots({"theme": 1, "chart": 2}, produced), key=KEY)
+    assert [{k: call[k] for k in ("theme", "chart")} for call in sent] == [
+        {"theme": "theme-v1", "chart": "chart-v1"},
+        {"theme": None, "chart": None},
+        {"theme": None, "chart": "chart-v2"},
+    ]
+    # Lo que no cambió ni siquiera se calcula
+    assert produced == ["theme", "chart", "chart"]
+
+
+def test_new_mount_gets_every_slot(sent):
+    produced = []
+    st.session_state[KEY] = {"mount": "a", "seq": 1}
+    dashboard.render(_slots({"theme": 1}, produced), key=KEY)
+    dashboard.render(_slots({"theme": 1}, produced), key=KEY)
+    # La página se recargó: anuncia otro montaje
+    st.session_state[KEY] = {"mount": "b", "seq": 1}
+    dashboard.render(_slots({"theme": 1}, produced), key=KEY)
+    assert [call["theme"] for call in sent] == ["theme-v1", None, "theme-v1"]
+    assert dashboard.last_message(KEY) == {"mount": "b", "seq": 1}
+
+
+def test_search_box_is_wired():
+    script = (dashboard.FRONTEND_DIR / "main.js").read_text(encoding="utf-8")
+    assert "searchButton.addEventListener('click', handleSearch)" in script
+    assert "keywordInput.addEventListener('keydown'" in script
@@ -0,0 +1,121 @@
+import pickle
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from investidata.search import SearchIndex, TrigramIndex, canonical, edit_distances, max_distance
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _mutate(rng, word, edits):
+    letters = "abcdeilmnoprstuz"
+    for _ in range(edits):
+        i = rng.randrange(len(word) + 1)
+        op = rng.choice("isd") if word else "i"
+        if op == "i":
+            word = word[:i] + rng.choice(letters) + word[i:]
+        elif op == "s" and i < len(word):
+            word = word[:i] + rng.choice(letters) + word[i + 1:]
+        elif i < len(word):
+            word = word[:i] + word[i + 1:]
+    return word
+
+
+@pytest.fixture
+def words():
+    rng = random.Random(11)
+    base = ["pistola", "calibre", "fierro", "municion", "encuentro", "paquete", "plata", "dinero", "hotel", "cita"]
+    return sorted({_mutate(rng, rng.choice(base), rng.randrange(4)) for _ in range(400)} | set(base))
+
+
+def test_canonical_and_max_distance():
+    assert canonical("pistol4") == "pistola"
+    assert canonical("m4t4r") == "matar"
+    assert canonical("2024") == "2024"
+    assert [max_distance(w) for w in ("ok", "hola", "pistola")] == [0, 1, 2]
+
+
+def test_edit_distances_match_levenshtein(words):
+    for key in ("pistola", "fiero", "plta", "encuentros"):
+        for limit in (1, 2, 3):
+            expected = [min(levenshtein(key, w), limit + 1) for w in words]
+            assert edit_distances(key, words, limit).tolist() == expected
+
+
+def test_prefix_distances(words):
+    for key in ("pist", "muni", "encu"):
+        expected = [min(min(levenshtein(key, w[:n]) for n in range(len(w) + 1)), 2) for w in words]
+        assert edit_distances(key, words, 1, prefix=True).tolist() == expected
+    assert edit_distances("x", [], 1).size == 0
+
+
+def test_trigram_filter_never_drops_a_variant(words):
+    index = TrigramIndex.build(words)
+    for key in ("pistola", "calibre", "municion", "encuentro", "paquete", "dinero", "fierro"):
+        wanted = TrigramIndex.query_grams(key)
+        for limit in (1, 2):
+            within = {i for i, w in enumerate(words) if levenshtein(key, w) <= limit}
+            assert within <= set(index.candidates(wanted, limit).tolist())
+        expected = {i for i, w in enumerate(words) if levenshtein(key, w) <= max_distance(key)}
+        assert {i for i, _ in index.expand(key)} == expected
+
+
+def test_expand_with_numbers_and_prefixes():
+    index = TrigramIndex.build(["pistola", "pistolas", "pisto", "calibre", "x" * 30])
+    variants = {index.keys[i]: d for i, d in index.expand("pistol4")}
+    # Siete letras admiten dos ediciones: "pisto" también es variante
+    assert variants == {"pistola": 0, "pistolas": 1, "pisto": 2}
+    assert {index.keys[i] for i, _ in index.expand("pist", prefix=True)} == {"pistola", "pistolas", "pisto"}
+    assert index.expand("x" * 30) == []
+
+
+@pytest.fixture
+def messages():
+    return pd.DataFrame({
+        "id": range(5), "hoja": "Chats", "contacto": "Ana", "fecha": pd.NA,
+        "texto": [
+            "llevo la pistola",
+            "la pistol4 está lista",
+            "pistolas para el viernes",
+            "nos vemos en el punto de encuentro",
+            "una pstola y plata",
+        ],
+    })
+
+
+def test_fuzzy_match_ranks_by_similarity(messages):
+    index = SearchIndex.build(messages)
+    rows, variants = index.fuzzy_match("pistola")
+    # Exactas primero (también "pistol4"), luego a una y dos ediciones
+    assert rows.tolist() == [0, 1, 2, 4]
+    assert set(variants["pistola"][:2]) == {"pistola", "pistol4"}
+    assert set(variants["pistola"]) == {"pistola", "pistol4", "pistolas", "pstola"}
+    assert index.fuzzy_match('"punto de encuentro" pistola')[0].tolist() == []
+    assert index.fuzzy_match("plata pistola")[0].tolist() == [4]
+    assert index.match("pistola").tolist() == [0]
+
+
+def test_fuzzy_search_highlights_variants(messages):
+    page = SearchIndex.build(messages).search("pistola", fuzzy=True)
+    assert page["total"] == 4 and page["fuzzy"]
+    hit = page["hits"][1]
+    assert hit["snippet"][slice(*hit["highlights"][0])] == "pistol4"
+
+
+def test_trigram_index_is_kept_when_pickled(messages):
+    index = SearchIndex.build(messages)
+    trigrams = index.fuzzy_index()
+    restored = pickle.loads(pickle.dumps(index))
+    assert restored.messages is None
+    assert np.array_equal(restored.fuzzy_index().grams, trigrams.grams)
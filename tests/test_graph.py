@@ -0,0 +1,73 @@
+import io
+
+import pandas as pd
+
+from investidata.columnar import load_store
+from investidata.graph import OWNER, ContactGraph, participants
+from investidata.streaming import stream_workbook
+
+
+def test_participants():
+    assert participants("Ana; Beto\nAna\r\n Carla ") == ["Ana", "Beto", "Carla"]
+    assert participants("Ana") == ["Ana"]
+
+
+def test_from_frames_weights_per_channel(frames):
+    graph = ContactGraph.from_frames(frames)
+    edges = graph.graph
+    assert edges[OWNER]["Ana"]["mensaje"]["peso"] == 2
+    assert edges[OWNER]["Ana"]["llamada"]["peso"] == 2
+    assert edges[OWNER]["Carla"]["llamada"]["peso"] == 1
+    assert edges[OWNER]["Ana"]["mensaje"]["primero"] == pd.Timestamp("2024-01-01 08:00")
+    assert edges[OWNER]["Ana"]["mensaje"]["ultimo"] == pd.Timestamp("2024-01-02 10:00")
+    collapsed = graph.collapsed()
+    assert {v: collapsed[OWNER][v]["peso"] for v in collapsed[OWNER]} == {"Ana": 4, "Beto": 2, "Carla": 2}
+
+
+def test_chunks_build_the_same_graph(frames):
+    whole = ContactGraph.from_frames(frames)
+    chunked = ContactGraph.from_frames(frames, chunk_size=2)
+    assert sorted(whole.graph.edges(keys=True, data="peso")) == sorted(chunked.graph.edges(keys=True, data="peso"))
+    assert chunked.version > whole.version
+
+
+def test_ingest_parts_build_the_same_graph(workbook, tmp_path):
+    graph = ContactGraph()
+    store = stream_workbook(io.BytesIO(workbook), tmp_path / "caso", chunk_size=2, on_part=graph.add_sheet)
+    expected = ContactGraph.from_frames(load_store(store))
+    assert list(graph.graph.nodes) == list(expected.graph.nodes)
+    assert sorted(graph.graph.edges(keys=True, data=True)) == sorted(expected.graph.edges(keys=True, data=True))
+
+
+def test_group_chats_and_bridges():
+    graph = ContactGraph()
+    dates = pd.Series(pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]))
+    graph.add_events(pd.Series(["Ana; Beto", "Beto; Carla", "Beto; Carla"]), dates, "mensaje")
+    assert graph.graph["Ana"]["Beto"]["mensaje"]["peso"] == 1
+    assert graph.graph["Beto"]["Carla"]["mensaje"]["peso"] == 2
+    assert not graph.graph.has_edge("Ana", "Carla")
+
+    # Beto une a Ana con Carla (el dispositivo no cuenta como puente)
+    centrality = graph.centrality()
+    assert centrality.loc["Beto", "intermediacion"] == 1.0
+    assert centrality.loc["Ana", "intermediacion"] == 0.0
+    key = graph.key_contacts()
+    assert key["contacts"][0]["contact"] == "Beto"
+    assert OWNER not in {c["contact"] for c in key["contacts"]}
+
+
+def test_metrics_are_recomputed_after_new_events():
+    graph = ContactGraph()
+    graph.add_events(pd.Series(["Ana"]), pd.Series([pd.NaT]), "llamada")
+    assert graph.centrality().loc["Ana", "intensidad"] == 1
+    graph.add_events(pd.Series(["Ana", "Ana"]), pd.Series([pd.NaT, pd.NaT]), "llamada")
+    assert graph.centrality().loc["Ana", "intensidad"] == 3
+
+
+def test_ego_network(frames):
+    graph = ContactGraph.from_frames(frames)
+    ego = graph.ego_network("Ana")
+    assert {node["id"] for node in ego["nodes"]} == {"Ana", OWNER}
+    assert [({link["source"], link["target"]}, link["weight"]) for link in ego["links"]] == [({"Ana", OWNER}, 4)]
+    assert graph.ego_network("Nadie")["nodes"] == []
+    assert len(graph.ego_network(OWNER, limit=2)["nodes"]) == 2
@@ -0,0 +1,41 @@
+from investidata.cache import ExtractionCache
+from investidata.ingest import DEVICE_SHEET, content_hash, device_profile, file_hash, parse_workbook
+
+
+def test_content_hash_ignores_file_name(tmp_path, workbook):
+    first, second = tmp_path / "reporte.xlsx", tmp_path / "copia con otro nombre.xlsx"
+    first.write_bytes(workbook)
+    second.write_bytes(workbook)
+    assert file_hash(first) == file_hash(second) == content_hash(workbook)
+    assert content_hash(workbook + b"\0") != content_hash(workbook)
+
+
+def test_parse_workbook_reads_every_sheet(workbook, frames):
+    parsed = parse_workbook(workbook)
+    assert list(parsed) == list(frames)
+    assert parsed["Chats"]["Cuerpo"].tolist() == frames["Chats"]["Cuerpo"].tolist()
+    assert len(parsed["Ubicaciones"]) == 4
+
+
+def test_device_profile(frames):
+    assert device_profile(frames) == {
+        "IMEI": "356938035643809", "Marca": "Samsung",
+        "Modelo": "SM-G991B", "Usuario": "Galaxy de prueba",
+    }
+    missing = {name: df for name, df in frames.items() if name != DEVICE_SHEET}
+    assert set(device_profile(missing).values()) == {"No disponible"}
+
+
+def test_same_content_is_parsed_once(workbook):
+    cache = ExtractionCache(disk_dir=None)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return parse_workbook(workbook)
+
+    key = content_hash(workbook)
+    first = cache.get_or_load(key, loader)
+    second = cache.get_or_load(key, loader)
+    assert len(calls) == 1
+    assert first is second
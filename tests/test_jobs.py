@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from investidata import parallel
+from investidata.cache import ExtractionCache
+from investidata.ingest import content_hash
+from investidata.jobs import CANCELLED, FAILED, READY, IngestJob, IngestQueue, JobCancelled
+
+
+def _wait(job, timeout=30):
+    deadline = time.monotonic() + timeout
+    while job.finished is None:
+        assert time.monotonic() < deadline, "el trabajo no terminó"
+        time.sleep(0.01)
+    return job
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return IngestQueue(ExtractionCache(disk_dir=tmp_path / "cache"), max_workers=1)
+
+
+def test_job_is_ingested_once(queue, workbook):
+    key = content_hash(workbook)
+    job = queue.submit(key, workbook, "reporte.xlsx")
+    assert queue.submit(key, workbook, "reporte.xlsx") is job
+    _wait(job)
+    assert job.state == READY and job.progress() == 1.0
+    assert job.sheets["Chats"] == [5, 5]
+    assert key in queue.cache
+    assert queue.submit(key, workbook) is job
+    assert not list((queue.cache.disk_dir / ".subidas").iterdir())
+    assert queue.jobs() == [job]
+    # El grafo se armó durante la ingesta y ya está en la caché
+    graph = queue.cache.resource(key, "graph", lambda: pytest.fail("se volvió a construir el grafo"))
+    assert graph.graph.number_of_edges()
+
+
+def test_cancel_stops_a_running_job(queue, workbook, monkeypatch):
+    started, resume = threading.Event(), threading.Event()
+    real = parallel.ingest_workbook
+
+    def slow_ingest(*args, **kwargs):
+        started.set()
+        resume.wait(10)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(parallel, "ingest_workbook", slow_ingest)
+    key = content_hash(workbook)
+    job = queue.submit(key, workbook)
+    assert started.wait(10)
+    queue.cancel(key)
+    resume.set()
+    _wait(job)
+    assert job.state == CANCELLED
+    assert key not in queue.cache
+    # Cancelada, se puede volver a subir
+    queue.forget(key)
+    assert queue.get(key) is None
+    monkeypatch.setattr(parallel, "ingest_workbook", real)
+    assert _wait(queue.submit(key, workbook)).state == READY
+
+
+def test_cancel_before_start(queue, workbook, monkeypatch):
+    # Un trabajo ocupa el único hilo; el segundo se cancela mientras espera
+    resume = threading.Event()
+    real = parallel.ingest_workbook
+    monkeypatch.setattr(parallel, "ingest_workbook", lambda *a, **k: resume.wait(10) and real(*a, **k))
+    first = queue.submit("primera", workbook)
+    second = queue.submit("segunda", workbook)
+    queue.cancel("segunda")
+    resume.set()
+    assert _wait(second).state == CANCELLED
+    assert second.started is None
+    assert _wait(first).state == READY
+
+
+def test_failed_job_reports_the_error(queue):
+    job = _wait(queue.submit("rota", b"no es un xlsx"))
+    assert job.state == FAILED and job.error
+    # Un trabajo con error se puede reintentar
+    assert queue.submit("rota", b"no es un xlsx") is not job
+
+
+def test_progress_counts_declared_rows():
+    job = IngestJob("clave", "reporte.xlsx")
+    job.sheets = {"Chats": [0, 100], "Ubicaciones": [0, 300]}
+    job._progress("Chats", 100, 100)
+    job._progress("Ubicaciones", 100, 300)
+    assert job.progress() == 0.5
+    job.cancel()
+    with pytest.raises(JobCancelled):
+        job._progress("Ubicaciones", 200, 300)
+    assert job.summary()["avance"] == 0.5
@@ -0,0 +1,140 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from PIL import Image
+
+from investidata.media import (
+    DHASH_DISTANCE,
+    MediaCatalog,
+    ThumbnailCache,
+    decode,
+    make_thumbnail,
+    media_folder,
+    shared_catalog,
+)
+from investidata.sheets import media_frame
+
+
+def _picture(path, size, phase=0.0, quality=90):
+    # Patrón suave: sobrevive a reescalar y recomprimir (el ruido no)
+    w, h = size
+    y, x = np.mgrid[0:h, 0:w]
+    red = 127 + 127 * np.sin(x / w * 6 + phase)
+    green = 127 + 127 * np.cos(y / h * 4 + phase)
+    blue = 255 * x / w
+    pixels = np.stack([red, green, blue], axis=-1).astype(np.uint8)
+    Image.fromarray(pixels).save(path, "JPEG", quality=quality)
+    return path
+
+
+def test_media_folder_stays_under_root(tmp_path):
+    root = tmp_path / "raiz"
+    (root / "caso1" / "fotos").mkdir(parents=True)
+    (tmp_path / "fuera").mkdir()
+    (root / "atajo").symlink_to(tmp_path / "fuera")
+    assert media_folder("caso1/fotos", root) == (root / "caso1" / "fotos").resolve()
+    assert media_folder(f" {root / 'caso1'} ", root) == (root / "caso1").resolve()
+    assert media_folder("../fuera", root) is None
+    assert media_folder(str(tmp_path / "fuera"), root) is None
+    assert media_folder("atajo", root) is None
+    assert media_folder("caso2", root) is None
+
+
+def test_thumbnail_and_dedup_share_the_hash(tmp_path):
+    photo = _picture(tmp_path / "foto.jpg", (1600, 1200))
+    image, image_hash = decode(photo)
+    assert max(image.size) <= 320 and image.mode == "RGB"
+    data, thumb_hash = make_thumbnail(photo)
+    assert thumb_hash == image_hash
+    assert data[:2] == b"\xff\xd8"
+    # Una copia reducida y recomprimida queda a pocos bits
+    copy = _picture(tmp_path / "copia.jpg", (400, 300), quality=40)
+    assert (decode(copy)[1] ^ image_hash).bit_count() <= DHASH_DISTANCE
+
+
+def test_thumbnail_cache_evicts_least_recently_used(tmp_path):
+    cache = ThumbnailCache(tmp_path / "miniaturas", max_bytes=250)
+    for key in "abc":
+        cache.put(key, bytes(100))
+    # "a" salió al superar el tope; "b" se usa y "c" pasa a ser la más antigua
+    assert "a" not in cache and cache.size_bytes == 200
+    assert cache.get("b") == bytes(100)
+    cache.put("d", bytes(100))
+    assert "c" not in cache and "b" in cache and "d" in cache
+    assert not (tmp_path / "miniaturas" / "c.jpg").exists()
+    # Otro proceso reconstruye el índice desde la carpeta
+    reopened = ThumbnailCache(tmp_path / "miniaturas", max_bytes=250)
+    assert reopened.size_bytes == 200 and "b" in reopened
+
+
+def test_cache_forgets_files_removed_from_outside(tmp_path):
+    cache = ThumbnailCache(tmp_path, max_bytes=1_000)
+    cache.put("a", b"123")
+    os.unlink(tmp_path / "a.jpg")
+    assert cache.get("a") is None
+    assert cache.size_bytes == 0
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    root = tmp_path / "exportado"
+    (root / "DCIM").mkdir(parents=True)
+    _picture(root / "DCIM" / "a.jpg", (1200, 900))
+    _picture(root / "DCIM" / "b.jpg", (600, 450), quality=50)
+    _picture(root / "DCIM" / "c.jpg", (1200, 900), phase=2.0)
+    sheet = pd.DataFrame({
+        "Nombre de archivo": ["a.jpg", "b.jpg", "c.jpg", "nota.pdf", "d.jpg"],
+        "Ruta": ["/DCIM/a.jpg", "DCIM\\b.jpg", "/DCIM/c.jpg", "/Docs/nota.pdf", "/../../etc/d.jpg"],
+        "Tamaño": [10, 20, 30, 40, 50],
+        "MD5": ["AA", "bb", "aa", None, None],
+    })
+    # Pool propio: el compartido del proceso no se cierra en las pruebas
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield MediaCatalog(
+            media_frame({"Imágenes": sheet}), root=root,
+            thumbnails=ThumbnailCache(tmp_path / "miniaturas"), executor=executor,
+        )
+
+
+def test_catalog_page_generates_thumbnails_in_background(catalog):
+    first = catalog.page()
+    assert first["total"] == 5
+    assert [item["status"] for item in first["items"]] == [
+        "pendiente", "pendiente", "pendiente", "sin vista previa", "sin archivo",
+    ]
+    catalog.executor.shutdown(wait=True)
+    second = catalog.page()
+    assert [item["status"] for item in second["items"][:3]] == ["lista"] * 3
+    assert second["items"][0]["thumb"].startswith("data:image/jpeg;base64,")
+    assert catalog.page(kind="documento")["total"] == 1
+
+
+def test_catalog_duplicates(catalog):
+    catalog.start_dedup()
+    catalog._dedup_future.result()
+    assert catalog.dedup_status() == {"running": False, "done": 4, "total": 4}
+    found = catalog.duplicates()
+    assert [[item["name"] for item in group] for group in found["exact"]] == [["a.jpg", "c.jpg"]]
+    assert [[item["name"] for item in group] for group in found["similar"]] == [["a.jpg", "b.jpg"]]
+
+
+def test_shared_catalog_per_resolved_folder(tmp_path):
+    root = tmp_path / "exportado"
+    (root / "DCIM").mkdir(parents=True)
+    _picture(root / "DCIM" / "a.jpg", (300, 200))
+    loads = []
+
+    def load_media():
+        loads.append(1)
+        return media_frame({"Imágenes": pd.DataFrame({"Nombre de archivo": ["a.jpg"], "Ruta": ["/DCIM/a.jpg"]})})
+
+    catalog = shared_catalog("caso", root, load_media)
+    # La misma carpeta escrita de otra forma: mismo catálogo y un solo dHash en curso
+    assert shared_catalog("caso", f"{root}/DCIM/..", load_media) is catalog
+    assert shared_catalog("otro", root, load_media) is not catalog
+    assert len(loads) == 2
+    catalog._dedup_future.result()
+    assert catalog.dedup_status() == {"running": False, "done": 1, "total": 1}
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from investidata.movement import MovementAnalyzer
+
+HOME = (4.6097, -74.0817)
+WORK = (4.6533, -74.0836)
+START = pd.Timestamp("2024-03-01 07:00")
+
+
+def _track(segments):
+    """Ubicaciones cada ``step`` minutos: ``(lugar o (desde, hasta), fijaciones, step)``."""
+    rows, now = [], START
+    for where, fixes, step in segments:
+        for i in range(fixes):
+            if isinstance(where[0], tuple):
+                (lat0, lon0), (lat1, lon1) = where
+                t = (i + 1) / (fixes + 1)
+                lat, lon = lat0 + (lat1 - lat0) * t, lon0 + (lon1 - lon0) * t
+            else:
+                # Ruido de GPS de unos 5 m, alternado
+                lat, lon = where[0] + 0.00004 * (-1) ** i, where[1]
+            rows.append((lat, lon, now))
+            now += pd.Timedelta(minutes=step)
+    lat, lon, dates = zip(*rows)
+    return pd.DataFrame({"id": range(len(rows)), "lat": lat, "lon": lon, "fecha": dates})
+
+
+@pytest.fixture
+def day():
+    return _track([
+        (HOME, 13, 5),              # una hora en casa
+        ((HOME, WORK), 6, 2),       # trayecto de unos 5 km
+        (WORK, 13, 5),              # una hora en la oficina
+        ((WORK, HOME), 6, 2),
+        (HOME, 9, 5),               # 40 minutos en casa
+    ])
+
+
+def test_stay_points(day):
+    stays = MovementAnalyzer(day).stay_points(radius_m=200, min_dwell_s=20 * 60)
+    assert len(stays) == 3
+    assert stays["ubicaciones"].tolist() == [13, 13, 9]
+    assert stays["inicio"].iloc[0] == START
+    assert stays["fin"].iloc[0] == START + pd.Timedelta(hours=1)
+    assert stays["lat"].iloc[1] == pytest.approx(WORK[0], abs=1e-4)
+    assert stays["recorrido_m"].is_monotonic_increasing
+
+
+def test_short_stops_are_not_stays(day):
+    assert len(MovementAnalyzer(day).stay_points(min_dwell_s=50 * 60)) == 2
+    walk = _track([((HOME, WORK), 30, 1)])
+    assert MovementAnalyzer(walk).stay_points().empty
+
+
+def test_gps_jump_does_not_split_a_stay():
+    track = _track([(HOME, 13, 5)])
+    # Un salto de unos 400 m en medio de la estancia
+    track.loc[6, "lat"] += 0.0036
+    stays = MovementAnalyzer(track).stay_points()
+    assert len(stays) == 1
+    assert stays["ubicaciones"].iloc[0] == 12
+
+
+def test_places_and_trips(day):
+    result = MovementAnalyzer(day).analyze()
+    places, trips = result["lugares"], result["trayectos"]
+    assert places["visitas"].tolist() == [2, 1]
+    home = places.index[0]
+    assert result["estancias"]["lugar"].tolist() == [home, 1 - home, home]
+    assert trips[["origen", "destino"]].values.tolist() == [[home, 1 - home], [1 - home, home]]
+    assert trips["distancia_m"].to_numpy() == pytest.approx([4_850, 4_850], rel=0.05)
+
+
+def test_summary_is_cached_per_parameters(day):
+    analyzer = MovementAnalyzer(day)
+    assert analyzer.analyze() is analyzer.analyze()
+    summary = analyzer.summary()
+    assert (summary["fixes"], summary["stays"], summary["trips"]) == (len(day), 3, 2)
+    assert summary["places"][0]["visits"] == 2
+
+
+def test_locations_without_dates():
+    undated = pd.DataFrame({"id": [0], "lat": [HOME[0]], "lon": [HOME[1]], "fecha": [pd.NaT]})
+    analyzer = MovementAnalyzer(undated)
+    assert len(analyzer) == 0
+    assert analyzer.summary()["stays"] == 0
+    assert np.isclose(analyzer.summary()["distance_km"], 0.0)
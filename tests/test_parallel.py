@@ -0,0 +1,84 @@
+import queue
+import threading
+
+import pandas as pd
+import pytest
+
+from investidata import parallel
+from investidata.columnar import load_store
+from investidata.parallel import PartCancelled, _init_worker, _reported, ingest_workbook, split_ranges
+
+ROWS = 2_100
+
+
+@pytest.fixture
+def drifting_workbook(tmp_path, monkeypatch):
+    # Pequeño, pero repartido entre procesos como un reporte grande
+    monkeypatch.setattr(parallel, "PARALLEL_MIN_BYTES", 0)
+    codes = list(range(ROWS))
+    # Fuera de la muestra de tipos: la hoja se reinicia con la columna como texto
+    codes[-1] = "sin código"
+    path = tmp_path / "reporte.xlsx"
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        pd.DataFrame({"Nombre": [f"c{i}" for i in range(ROWS)], "Código": codes}).to_excel(
+            writer, sheet_name="Contactos", index=False
+        )
+        pd.DataFrame({"Cuerpo": ["hola", "chao", "ok"]}).to_excel(writer, sheet_name="Chats", index=False)
+    return path
+
+
+def test_split_ranges():
+    assert split_ranges(None, 10) == [(1, None)]
+    assert split_ranges(10, 10) == [(1, None)]
+    assert split_ranges(25, 10) == [(1, 10), (11, 20), (21, 25)]
+
+
+def test_parallel_ingest_retries_drifting_sheet(tmp_path, drifting_workbook):
+    progress, parts = [], []
+    store = ingest_workbook(
+        drifting_workbook, tmp_path / "caso", max_workers=2, split_rows=1_000, chunk_size=500,
+        on_progress=lambda sheet, done, total: progress.append((sheet, done, total)),
+        on_part=lambda sheet, df: parts.append((sheet, df)),
+    )
+    frames = load_store(store)
+    # Las partes compactadas llegan en el orden del libro, solo las del intento válido
+    assert [sheet for sheet, _ in parts][0] == "Contactos" and parts[-1][0] == "Chats"
+    pd.testing.assert_frame_equal(
+        pd.concat([df for sheet, df in parts if sheet == "Contactos"], ignore_index=True), frames["Contactos"]
+    )
+    contacts = frames["Contactos"]
+    assert len(contacts) == ROWS
+    assert contacts["Código"].astype(str).tolist()[-2:] == [str(ROWS - 2), "sin código"]
+    assert contacts["Nombre"].tolist()[:3] == ["c0", "c1", "c2"]
+    assert frames["Chats"]["Cuerpo"].tolist() == ["hola", "chao", "ok"]
+    # El avance nunca supera las filas de la hoja (los intentos descartados no cuentan)
+    assert all(done <= total for _, done, total in progress)
+
+
+def test_cancel_from_progress_discards_store(tmp_path, drifting_workbook):
+    class Cancelled(Exception):
+        pass
+
+    def on_progress(sheet, done, total):
+        raise Cancelled
+
+    with pytest.raises(Cancelled):
+        ingest_workbook(
+            drifting_workbook, tmp_path / "caso", max_workers=2,
+            split_rows=500, chunk_size=100, on_progress=on_progress,
+        )
+    assert not (tmp_path / "caso").exists()
+    assert not list(tmp_path.glob(".tmp-*"))
+
+
+def test_worker_reports_chunks_and_stops_when_cancelled():
+    progress, cancel = queue.SimpleQueue(), threading.Event()
+    _init_worker(progress, cancel)
+    chunks = _reported(iter([[1, 2], [3], [4, 5, 6]]), (0, 1))
+    assert next(chunks) == [1, 2]
+    assert next(chunks) == [3]
+    cancel.set()
+    with pytest.raises(PartCancelled):
+        next(chunks)
+    assert [progress.get(), progress.get()] == [(0, 1, 2), (0, 1, 1)]
+    assert progress.empty()
@@ -0,0 +1,73 @@
+import json
+import threading
+
+import pytest
+
+from investidata.perf import Recorder, rss_bytes
+
+
+def test_spans_inherit_tags_and_record_errors():
+    recorder = Recorder()
+    with recorder.tagged(extraccion="abc"):
+        with recorder.span("carga", filas=1) as tags:
+            tags["filas"] = 10
+        with pytest.raises(KeyError):
+            with recorder.span("consulta:busqueda"):
+                raise KeyError("x")
+    with recorder.span("fuera"):
+        pass
+
+    spans = recorder.spans(extraccion="abc")
+    assert [s["name"] for s in spans] == ["carga", "consulta:busqueda"]
+    assert spans[0]["tags"] == {"extraccion": "abc", "filas": 10}
+    assert spans[1]["tags"]["error"] == "KeyError"
+    assert spans[0]["duration_us"] >= 0 and spans[0]["rss_after"] > 0
+    assert recorder.spans()[-1]["tags"] == {}
+
+
+def test_buffer_is_bounded():
+    recorder = Recorder(max_spans=3)
+    for i in range(5):
+        recorder.add(f"etapa{i}", 0, 1)
+    assert [s["name"] for s in recorder.spans()] == ["etapa2", "etapa3", "etapa4"]
+    recorder.clear()
+    assert recorder.spans() == []
+
+
+def test_summary_per_stage():
+    recorder = Recorder()
+    for ms in (10, 20, 30):
+        recorder.add("busqueda", 0, ms * 1000)
+    recorder.add("grafo", 0, 100_000)
+    summary = recorder.summary()
+    assert summary["etapa"].tolist() == ["grafo", "busqueda"]
+    row = summary.set_index("etapa").loc["busqueda"]
+    assert (row["veces"], row["total_ms"], row["media_ms"], row["max_ms"]) == (3, 60, 20, 30)
+    assert Recorder().summary().empty
+
+
+def test_chrome_trace_has_a_lane_per_thread():
+    recorder = Recorder()
+    recorder.add("hoja:Chats", 0, 5_000, lane="hoja Chats", filas=3)
+
+    def build():
+        with recorder.span("indice:search"):
+            pass
+
+    with recorder.span("carga"):
+        pass
+    worker = threading.Thread(target=build, name="otro")
+    worker.start()
+    worker.join()
+    trace = json.loads(recorder.chrome_trace())
+    events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    lanes = {e["args"]["name"]: e["tid"] for e in trace["traceEvents"] if e["ph"] == "M"}
+    assert set(lanes) == {"hoja Chats", threading.current_thread().name, "otro"}
+    assert len(set(lanes.values())) == 3
+    assert events[0]["args"] == {"filas": 3}
+    assert events[0]["dur"] == 5_000 and events[0]["cat"] == "hoja"
+    assert "rss_mb" in events[1]["args"]
+
+
+def test_rss_bytes():
+    assert rss_bytes() > 1024 * 1024
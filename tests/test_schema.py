@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from investidata.schema import ARROW_STRING, BYTES_KEY, compact_column, compact_frame, memory_report
+
+
+@pytest.mark.parametrize("values, dtype", [
+    ([1, 2, 100], "Int8"),
+    ([1, None, 300], "Int16"),
+    ([1.0, 2.0, np.nan], "Int8"),
+    ([-70_000, 5], "Int32"),
+    ([2**40, 1], "Int64"),
+])
+def test_integers_take_the_smallest_type(values, dtype):
+    column = compact_column(pd.Series(values, dtype=object), "entero")
+    assert column.dtype == dtype
+    assert column.dropna().astype("int64").tolist() == [int(v) for v in values if pd.notna(v)]
+
+
+def test_non_integers_are_kept():
+    floats = pd.Series([1.5, 2.0])
+    assert compact_column(floats, "entero") is floats
+    mixed = pd.Series(["12", "doce"], dtype=object)
+    assert compact_column(mixed, "entero") is mixed
+
+
+def test_dates_never_lose_values():
+    dates = compact_column(pd.Series(["2024-01-01 10:00", "2024-02-03 18:30", None]), "fecha")
+    assert pd.api.types.is_datetime64_any_dtype(dates)
+    mixed = compact_column(pd.Series(["2024-01-01", "ayer"]), "fecha")
+    assert mixed.dtype == ARROW_STRING
+    assert mixed.tolist() == ["2024-01-01", "ayer"]
+
+
+def test_repetitive_text_becomes_category():
+    repeated = pd.Series(["WhatsApp", "Telegram", "SMS"] * 400, dtype=object)
+    assert isinstance(compact_column(repeated).dtype, pd.CategoricalDtype)
+    unique = pd.Series([f"mensaje {i}" for i in range(1_200)], dtype=object)
+    assert compact_column(unique).dtype == ARROW_STRING
+    # El texto libre nunca es categoría, aunque se repita
+    assert compact_column(repeated, "texto").dtype == ARROW_STRING
+
+
+def test_compact_frame_uses_ufed_roles():
+    rows = 1_000
+    df = pd.DataFrame({
+        "De": np.tile(["Ana", "Beto", "Carla", "Dora"], rows // 4).astype(object),
+        "Cuerpo": np.tile(["hola", "chao"], rows // 2).astype(object),
+        "Marca de tiempo": pd.date_range("2024-01-01", periods=rows, freq="min").astype(str).astype(object),
+        "Tamaño": np.arange(rows, dtype=np.int64),
+        "Otra": np.arange(rows, dtype=np.float64) / 2,
+    })
+    compact = compact_frame(df)
+    assert isinstance(compact["De"].dtype, pd.CategoricalDtype)
+    assert compact["Cuerpo"].dtype == ARROW_STRING
+    assert pd.api.types.is_datetime64_any_dtype(compact["Marca de tiempo"])
+    assert compact["Tamaño"].dtype == "Int16"
+    assert compact["Otra"].dtype == "float64"
+    assert compact["De"].astype(str).tolist() == df["De"].tolist()
+
+    report = memory_report({"Chats": compact}).iloc[0]
+    assert report["antes_mb"] == compact.attrs[BYTES_KEY] / 1e6
+    assert report["despues_mb"] < report["antes_mb"]
+    assert 0 < report["reduccion"] < 1
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from investidata.search import SearchIndex
+from investidata.sheets import messages_frame
+
+
+@pytest.fixture
+def index(frames):
+    return SearchIndex.build(messages_frame(frames))
+
+
+def test_csr_postings(index):
+    assert index.vocabulary == sorted(index.vocabulary)
+    assert index.offsets[0] == 0 and index.offsets[-1] == index.docs.size == index.positions.size
+    docs, positions = index._postings(index.term_ids["la"])
+    assert docs.tolist() == [0, 2, 3]
+    assert positions.tolist() == [2, 0, 3]
+    docs, positions = index._postings(index.term_ids["manana"])
+    assert docs.tolist() == [0, 4]
+    assert positions.tolist() == [0, 0]
+
+
+@pytest.mark.parametrize("query, rows", [
+    ("manana", [0, 4]),
+    ("MAÑANA", [0, 4]),
+    ("DONDE", [1]),
+    ("la manana", [0]),
+    ('"nos vemos"', [1, 3]),
+    ('"vemos nos"', []),
+    ('"nos vemos" casa', [3]),
+    ("pl*", [2]),
+    ("p*", [0, 2, 4]),
+    ("inexistente", []),
+    ("", []),
+])
+def test_match(index, query, rows):
+    assert index.match(query).tolist() == rows
+
+
+def test_empty_messages():
+    index = SearchIndex.build(messages_frame({}))
+    assert len(index) == 0
+    assert index.match("hola").tolist() == []
+
+
+def test_null_texts_are_skipped():
+    messages = pd.DataFrame({
+        "id": [0, 1], "hoja": "Chats", "contacto": pd.NA,
+        "texto": [None, "hola"], "fecha": pd.NA,
+    })
+    index = SearchIndex.build(messages)
+    assert index.match("hola").tolist() == [1]
+    assert np.array_equal(index.docs, [1])
+
+
+def test_search_pages_results():
+    messages = pd.DataFrame({
+        "id": range(450), "hoja": "Chats", "contacto": "Ana",
+        "texto": [f"hola número {i}" if i % 3 == 0 else f"chao {i}" for i in range(450)],
+        "fecha": pd.NA,
+    })
+    index = SearchIndex.build(messages)
+    first = index.search("hola", limit=100)
+    assert first["total"] == 150
+    assert [hit["id"] for hit in first["hits"]] == list(range(0, 300, 3))
+    last = index.search("hola", offset=120, limit=100)
+    assert last["offset"] == 120
+    assert [hit["id"] for hit in last["hits"]] == list(range(360, 450, 3))
+    # Un desplazamiento fuera de rango se lleva a la última fila
+    assert index.search("hola", offset=10_000, limit=10)["offset"] == 149
+    assert index.search("nada")["hits"] == []
+
+
+def test_hit_highlights_original_text(index):
+    hit = index.search("manana")["hits"][0]
+    assert hit == {
+        "id": 0, "contact": "Ana", "date": "2024-01-01 08:00:00",
+        "snippet": "Mañana llevo la pistola", "prefix": False, "suffix": False,
+        "highlights": [[0, 6]],
+    }
+    phrase = index.search('"nos vemos"')["hits"][1]
+    assert phrase["snippet"][slice(*phrase["highlights"][0])] == "Nos vemos"
+
+
+def test_long_snippet_is_centred_on_the_match():
+    text = "relleno " * 30 + "pistola " + "relleno " * 30
+    messages = pd.DataFrame({"id": [0], "hoja": "Chats", "contacto": "Ana", "texto": [text], "fecha": pd.NA})
+    hit = SearchIndex.build(messages).search("pistola")["hits"][0]
+    assert hit["prefix"] and hit["suffix"]
+    start, end = hit["highlights"][0]
+    assert hit["snippet"][start:end] == "pistola"
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from investidata.spatial import SpatialIndex, haversine_m, morton
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(7)
+    lat = 4.65 + rng.normal(0, 0.05, 2_000)
+    lon = -74.08 + rng.normal(0, 0.05, 2_000)
+    return pd.DataFrame({"id": np.arange(2_000) * 10, "lat": lat, "lon": lon, "fecha": pd.NaT})
+
+
+def test_morton_interleaves_bits():
+    cx = np.array([1, 0, 3, 2, 0b1011], dtype=np.uint64)
+    cy = np.array([0, 1, 3, 0, 0], dtype=np.uint64)
+    assert morton(cx, cy).tolist() == [1, 2, 15, 4, 0b01000101]
+
+
+def test_haversine():
+    assert haversine_m(0, 0, 1, 0) == pytest.approx(111_195, rel=1e-4)
+    assert haversine_m(4.6, -74.0, 4.6, -74.0) == 0
+
+
+@pytest.mark.parametrize("bbox", [
+    (4.60, -74.10, 4.70, -74.05),
+    (4.649, -74.081, 4.651, -74.079),
+    (4.0, -75.0, 5.0, -73.0),
+    (10.0, 10.0, 11.0, 11.0),
+])
+def test_within_bbox_matches_brute_force(points, bbox):
+    south, west, north, east = bbox
+    expected = points[points.lat.between(south, north) & points.lon.between(west, east)]
+    found = SpatialIndex(points).within_bbox(*bbox)
+    assert found["id"].tolist() == expected["id"].tolist()
+
+
+@pytest.mark.parametrize("meters", [50, 1_000, 8_000])
+def test_within_radius_matches_brute_force(points, meters):
+    distances = haversine_m(4.65, -74.08, points.lat, points.lon)
+    expected = set(points.id[distances <= meters])
+    found = SpatialIndex(points).within_radius(4.65, -74.08, meters)
+    assert set(found["id"]) == expected
+    assert found["distancia_m"].is_monotonic_increasing
+    assert SpatialIndex(points).nearby(4.65, -74.08, meters, limit=3)["total"] == len(expected)
+
+
+def test_clusters_cover_every_point(points):
+    index = SpatialIndex(points)
+    view = index.clusters(width_px=800)
+    assert view["total"] == 2_000
+    assert sum(c["count"] for c in view["clusters"]) == 2_000
+    coarse = index.clusters(width_px=800, max_points=10)
+    assert len(coarse["clusters"]) <= 10
+    assert coarse["level"] < view["level"]
+    assert sum(c["count"] for c in coarse["clusters"]) == 2_000
+
+
+def test_single_point_clusters_carry_the_id():
+    locations = pd.DataFrame({"id": [5, 9], "lat": [4.6, 6.2], "lon": [-74.0, -75.5], "fecha": pd.NaT})
+    clusters = SpatialIndex(locations).clusters(width_px=100_000)["clusters"]
+    assert sorted(c["id"] for c in clusters) == [5, 9]
+
+
+def test_empty_index():
+    empty = pd.DataFrame({"id": [], "lat": [], "lon": [], "fecha": []})
+    index = SpatialIndex(empty)
+    assert index.bounds() is None
+    assert index.clusters()["clusters"] == []
+    assert index.within_radius(4.6, -74.0, 100).empty
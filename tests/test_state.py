@@ -0,0 +1,110 @@
+import pytest
+
+from investidata.state import MemoryBackend, SQLiteBackend, StateStore, entries_for_page, rows_from_page
+
+EXTRACTION = "0123456789ab"
+
+
+class CountingBackend(MemoryBackend):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def write(self, rows):
+        self.batches.append(len(rows))
+        super().write(rows)
+
+
+@pytest.fixture(params=["memoria", "sqlite"])
+def backend(request, tmp_path):
+    return MemoryBackend() if request.param == "memoria" else SQLiteBackend(tmp_path / "estado.sqlite3")
+
+
+def test_newer_write_wins(backend):
+    store = StateStore(backend, delay=60)
+    store.put("extraccion:x", "vista", "mapa", updated=2_000)
+    store.put("extraccion:x", "vista", "grafo", updated=1_000)   # llega tarde, es más vieja
+    store.flush()
+    assert store.load("extraccion:x") == {"vista": {"value": "mapa", "updated": 2_000}}
+    # Ya escrita: también gana la más reciente en el almacén
+    store.put("extraccion:x", "vista", "linea", updated=1_500)
+    store.flush()
+    assert store.load("extraccion:x")["vista"]["value"] == "mapa"
+    store.put("extraccion:x", "vista", {"tab": "linea", "zoom": [1, 2]}, updated=3_000)
+    store.flush()
+    assert store.load("extraccion:x")["vista"]["value"] == {"tab": "linea", "zoom": [1, 2]}
+
+
+def test_deletes_are_tombstones(backend):
+    store = StateStore(backend, delay=60)
+    store.put("extraccion:x", "etiqueta:7", ["arma"], updated=1_000)
+    store.put("extraccion:x", "etiqueta:7", None, updated=2_000)
+    store.flush()
+    assert store.load("extraccion:x") == {}
+    assert store.load("extraccion:x", include_deleted=True)["etiqueta:7"]["value"] is None
+    # Un navegador desconectado reenvía la versión vieja: no la resucita
+    store.put("extraccion:x", "etiqueta:7", ["arma"], updated=1_000)
+    store.flush()
+    assert store.load("extraccion:x") == {}
+
+
+def test_writes_are_batched():
+    backend = CountingBackend()
+    store = StateStore(backend, delay=60, max_batch=3)
+    store.put("usuario:a", "tema", "oscuro", updated=1)
+    store.put("usuario:a", "tema", "claro", updated=2)
+    assert backend.batches == []
+    # Lo pendiente ya se ve al leer
+    assert store.load("usuario:a")["tema"]["value"] == "claro"
+    store.put_many([("usuario:a", "b", 1, 3), ("usuario:a", "c", 1, 4)])
+    assert backend.batches == [3]
+    store.flush()
+    assert backend.batches == [3]
+
+
+def test_timer_flushes_after_delay():
+    backend = CountingBackend()
+    store = StateStore(backend, delay=0.01)
+    store.put("usuario:a", "tema", "oscuro")
+    timer = store._timer
+    timer.join(5)
+    assert backend.batches == [1]
+    assert store._timer is None
+
+
+def test_sqlite_survives_reopening(tmp_path):
+    store = StateStore(SQLiteBackend(tmp_path / "estado.sqlite3"))
+    store.put("extraccion:x", "busquedas", ["pistola", "plata"], updated=10)
+    store.flush()
+    reopened = StateStore(SQLiteBackend(tmp_path / "estado.sqlite3"))
+    assert reopened.load("extraccion:x") == {"busquedas": {"value": ["pistola", "plata"], "updated": 10}}
+
+
+def test_rows_from_page_validates_keys():
+    entries = [
+        {"key": f"{EXTRACTION}/vista", "value": "mapa", "updated": 5},
+        {"key": "usuario/tema", "value": "oscuro", "updated": 6},
+        {"key": "usuario/", "value": 1, "updated": 1},
+        {"key": "../../etc/vista", "value": 1, "updated": 1},
+        {"key": f"{EXTRACTION}/sin-fecha", "value": 1},
+        {"key": f"{EXTRACTION}/fecha-texto", "value": 1, "updated": "ayer"},
+    ]
+    assert rows_from_page(entries, user="navegador-1") == [
+        (f"extraccion:{EXTRACTION}", "vista", "mapa", 5),
+        ("usuario:navegador-1", "tema", "oscuro", 6),
+    ]
+    # Sin un id de usuario válido no se guardan preferencias
+    assert rows_from_page(entries, user="no válido/") == [(f"extraccion:{EXTRACTION}", "vista", "mapa", 5)]
+
+
+def test_entries_for_page_roundtrip():
+    store = StateStore(delay=60)
+    page = [
+        {"key": f"{EXTRACTION}/vista", "value": "mapa", "updated": 5},
+        {"key": f"{EXTRACTION}/etiqueta:1", "value": None, "updated": 6},
+        {"key": "usuario/tema", "value": "oscuro", "updated": 7},
+    ]
+    store.put_many(rows_from_page(page, user="nav"))
+    entries = entries_for_page(store, EXTRACTION + "cdef" * 13, user="nav")
+    assert entries == {entry["key"]: {"value": entry["value"], "updated": entry["updated"]} for entry in page}
+    assert "usuario/tema" not in entries_for_page(store, EXTRACTION, user="otro")
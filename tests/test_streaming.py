@@ -0,0 +1,131 @@
+import datetime as dt
+import io
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from investidata import streaming
+
+from investidata.columnar import StoreWriter, load_store, typed_frame
+from investidata.schema import CompactPlan, compact_frame
+from investidata.streaming import ChunkTyper, SchemaDrift, _iter_row_range, iter_sheet_chunks, stream_workbook
+
+
+def _xlsx(sheets) -> bytes:
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+    return buffer.getvalue()
+
+
+def test_chunks_are_typed_and_bounded(workbook):
+    progress = []
+    chunks = list(iter_sheet_chunks(
+        io.BytesIO(workbook), "Chats", chunk_size=2,
+        on_progress=lambda sheet, done, total: progress.append((done, total)),
+    ))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert all(c.dtypes.equals(chunks[0].dtypes) for c in chunks)
+    assert pd.api.types.is_datetime64_any_dtype(chunks[0]["Marca de tiempo"])
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+
+
+def test_row_range(workbook):
+    chunks = list(iter_sheet_chunks(io.BytesIO(workbook), "Chats", min_row=2, max_row=4))
+    assert pd.concat(chunks)["De"].tolist() == ["Beto", "Ana", "Carla"]
+
+
+def _ragged_workbook() -> bytes:
+    # Filas vacías, celdas sueltas, fechas, números, booleanos y texto compartido
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Chats"
+    sheet.append(["De", "Cuerpo", "Marca de tiempo", "Tamaño", "Leído"])
+    for i in range(1, 40):
+        if i % 7 == 0:
+            sheet.append([])
+            continue
+        sheet.append([f"c{i % 3}", "hola" if i % 2 else None, dt.datetime(2024, 1, 1, i % 24), i * 10, i % 5 == 0])
+    sheet["G12"] = "suelta"
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _rows(rows):
+    # Como los consume iter_sheet_chunks: sin filas vacías ni None a la derecha
+    result = []
+    for row in rows:
+        row = list(row)
+        while row and row[-1] is None:
+            row.pop()
+        if row:
+            result.append(tuple(row))
+    return result
+
+
+@pytest.mark.parametrize("min_row, max_row", [(2, None), (5, 20), (13, 13), (30, 60)])
+def test_row_range_matches_public_iter_rows(min_row, max_row):
+    workbook = openpyxl.load_workbook(io.BytesIO(_ragged_workbook()), read_only=True, data_only=True)
+    sheet = workbook["Chats"]
+    public = list(sheet.iter_rows(min_row=min_row, max_row=max_row, values_only=True))
+    assert _rows(_iter_row_range(sheet, min_row, max_row)) == _rows(public)
+    workbook.close()
+
+
+def test_row_range_falls_back_when_the_parser_changes(monkeypatch):
+    class Changed:
+        def __init__(self, src):
+            self.src = src
+
+    data = _ragged_workbook()
+    expected = pd.concat(iter_sheet_chunks(io.BytesIO(data), "Chats", min_row=3, max_row=25))
+    # Otra firma del constructor: TypeError al construirlo, y se usa iter_rows
+    monkeypatch.setattr(streaming, "_RangeParser", Changed)
+    fallback = pd.concat(iter_sheet_chunks(io.BytesIO(data), "Chats", min_row=3, max_row=25))
+    pd.testing.assert_frame_equal(fallback, expected)
+    monkeypatch.setattr(streaming, "_RangeParser", None)
+    pd.testing.assert_frame_equal(pd.concat(iter_sheet_chunks(io.BytesIO(data), "Chats", min_row=3, max_row=25)), expected)
+
+
+def test_typer_reports_drift():
+    typer = ChunkTyper()
+    typer(pd.DataFrame({"n": [1, 2]}))
+    with pytest.raises(SchemaDrift) as error:
+        typer(pd.DataFrame({"n": [3, "sin número"]}, dtype=object))
+    assert error.value.column == "n"
+
+
+def test_drifting_column_is_stored_as_text(tmp_path):
+    codes = [1, 2, 3, 4, "A-5"]
+    data = _xlsx({"Contactos": pd.DataFrame({"Nombre": list("abcde"), "Código": codes})})
+    store = stream_workbook(io.BytesIO(data), tmp_path / "caso", chunk_size=2)
+    contacts = load_store(store)["Contactos"]
+    assert contacts["Código"].astype(str).tolist() == ["1", "2", "3", "4", "A-5"]
+    assert contacts["Nombre"].tolist() == list("abcde")
+
+
+def test_chunked_sheet_is_compacted_one_chunk_at_a_time(tmp_path, monkeypatch):
+    rows = 600
+    sheet = typed_frame(pd.DataFrame({
+        "Fuente": ["WhatsApp", "SMS", "Telegram"] * (rows // 3),
+        # El segundo tramo necesita nanosegundos; el tamaño pasa de Int8 a Int16
+        "Marca de tiempo": ["2024-01-01 10:00:00.000001"] * 300 + ["2024-01-01 10:00:00.123456789"] * 300,
+        "Tamaño": range(rows),
+        "Cuerpo": [f"mensaje {i}" for i in range(rows)],
+    }))
+    seen = []
+    observe = CompactPlan.observe
+    monkeypatch.setattr(CompactPlan, "observe", lambda plan, df: (seen.append(len(df)), observe(plan, df)))
+
+    with StoreWriter(tmp_path / "caso") as writer:
+        writer.add_chunks("Chats", (sheet.iloc[i:i + 100] for i in range(0, rows, 100)))
+    loaded = load_store(tmp_path / "caso")["Chats"]
+    # Nunca la hoja entera en memoria, y los mismos tipos que con la hoja completa
+    assert seen and max(seen) == 100
+    pd.testing.assert_frame_equal(loaded, compact_frame(sheet))
+    assert isinstance(loaded["Fuente"].dtype, pd.CategoricalDtype)
+    assert loaded["Tamaño"].dtype == "Int16"
+    assert loaded["Marca de tiempo"].dt.unit == "ns"
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from benchmarks import synthetic
+from benchmarks.run import compare
+from benchmarks.synthetic import generate_workbook, split_rows, synthetic_frames, synthetic_lexicon
+from investidata.ingest import device_profile, parse_workbook
+from investidata.sheets import locations_frame, messages_frame
+from investidata.topics import LEXICONS
+
+
+def test_split_rows_adds_up():
+    counts = split_rows(1_001)
+    assert sum(counts.values()) == 1_001
+    assert counts == {"Chats": 601, "Registro de llamadas": 150, "Ubicaciones": 250}
+
+
+def test_workbook_matches_the_frames(tmp_path):
+    written = generate_workbook(tmp_path / "ufed.xlsx", 2_000, seed=3)
+    parsed = parse_workbook((tmp_path / "ufed.xlsx").read_bytes())
+    frames = synthetic_frames(2_000, seed=3)
+    assert {name: len(df) for name, df in parsed.items()} == written
+    assert list(parsed) == list(frames)
+    assert parsed["Chats"]["Cuerpo"].tolist() == frames["Chats"]["Cuerpo"].tolist()
+    pd.testing.assert_series_equal(
+        parsed["Ubicaciones"]["Marca de tiempo"].dt.round("s"),
+        frames["Ubicaciones"]["Marca de tiempo"].astype("datetime64[ns]"), check_dtype=False,
+    )
+    # Reconocible por los motores
+    assert device_profile(parsed)["Marca"] == "Samsung"
+    assert len(messages_frame(parsed)) == written["Chats"]
+    assert len(locations_frame(parsed)) == written["Ubicaciones"]
+
+
+def test_same_seed_same_data():
+    first, second = synthetic_frames(500, seed=1), synthetic_frames(500, seed=1)
+    assert first["Chats"].equals(second["Chats"])
+    assert not first["Chats"].equals(synthetic_frames(500, seed=2)["Chats"])
+
+
+def test_large_sheets_are_split(tmp_path, monkeypatch):
+    monkeypatch.setattr(synthetic, "MAX_SHEET_ROWS", 400)
+    monkeypatch.setattr(synthetic, "CHUNK_ROWS", 100)
+    written = generate_workbook(tmp_path / "ufed.xlsx", 2_000)
+    assert [name for name in written if name.startswith("Chats")] == ["Chats", "Chats (2)", "Chats (3)"]
+    assert written["Chats"] + written["Chats (2)"] + written["Chats (3)"] == 1_200
+
+
+def test_compare_reports_regressions_above_noise():
+    def run(**seconds):
+        return {"scales": [{"rows": 1_000, "stages": {k: {"seconds": v} for k, v in seconds.items()}}]}
+
+    baseline = run(ingesta=1.0, busqueda=0.01, grafo=2.0)
+    current = run(ingesta=1.5, busqueda=0.03, grafo=2.1, nueva=9.0)
+    assert compare(current, baseline, tolerance=0.25) == [
+        {"rows": 1_000, "stage": "ingesta", "before": 1.0, "now": 1.5, "ratio": 1.5},
+    ]
+
+
+def test_synthetic_lexicon_keeps_the_base_terms():
+    lexicons = synthetic_lexicon(500, seed=1)
+    assert sum(len(terms) for terms in lexicons.values()) == 500
+    assert all(lexicons[topic] == terms for topic, terms in LEXICONS.items())
+    assert any(" " in term for terms in lexicons.values() for term in terms)
+    assert synthetic_lexicon(500, seed=1) == lexicons
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from investidata.timeline import KINDS, ActivityIndex, _minmax
+
+
+def _epoch(text):
+    return int(pd.Timestamp(text).timestamp())
+
+
+def test_minmax_keeps_peaks():
+    values = np.zeros(10_000, dtype=np.int64)
+    values[1234], values[8765] = 50, 7
+    times = np.arange(values.size)
+    t, v = _minmax(times, values, 100)
+    assert v.size <= 100
+    assert 50 in v and 7 in v
+    assert t[v.argmax()] == 1234
+    assert np.all(np.diff(t) > 0)
+    small = np.array([1, 2, 3])
+    assert _minmax(small, small, 100)[1] is small
+
+
+def test_counts_per_level(frames):
+    index = ActivityIndex.from_frames(frames)
+    assert dict(zip(KINDS, index.totals.tolist())) == {"mensajes": 5, "llamadas": 3, "ubicaciones": 4}
+    assert len(index) == 12
+    days, counts = index.range_counts(level="dia")
+    assert [pd.Timestamp(d, unit="s").day for d in days] == [1, 2, 3, 4, 5]
+    assert counts[:, 0].tolist() == [2, 1, 1, 0, 1]
+    # Un rango que empieza a media hora incluye la hora completa
+    hours, counts = index.range_counts(_epoch("2024-01-01 08:30"), _epoch("2024-01-01 10:00"), "hora")
+    assert [pd.Timestamp(h, unit="s").hour for h in hours] == [8, 9]
+    assert counts.sum(axis=0).tolist() == [2, 0, 4]
+
+
+def test_heatmap_by_weekday_and_hour(frames):
+    grid = np.array(ActivityIndex.from_frames(frames).heatmap()["counts"])
+    # El 1 de enero de 2024 fue lunes
+    assert grid[0, 7] == 1
+    assert grid[0, 8] == 4
+    assert grid[0, 9] == 2
+    assert grid[4, 21] == 1
+    assert grid.sum() == 12
+
+
+def test_timeline_picks_level_and_downsamples():
+    rng = np.random.default_rng(3)
+    start = _epoch("2022-01-01")
+    messages = start + rng.integers(0, 2 * 365 * 86400, 20_000)
+    index = ActivityIndex({"mensajes": messages})
+    whole = index.timeline(max_points=300)
+    assert whole["level"] == "hora"
+    assert whole["totals"]["mensajes"] == 20_000
+    assert len(whole["series"]["mensajes"]) <= 300
+    assert set(whole["series"]) == {"mensajes"}
+    # Al acercarse a un día se usan minutos y los conteos se recalculan
+    day = index.timeline(start + 86400 * 100, start + 86400 * 101)
+    assert day["level"] == "minuto"
+    in_day = np.count_nonzero((messages >= start + 86400 * 100) & (messages < start + 86400 * 101))
+    assert day["totals"]["mensajes"] == in_day
+    assert day["start"] == (start + 86400 * 100) * 1000
+
+
+def test_empty_index():
+    index = ActivityIndex({})
+    assert index.bounds() is None
+    assert index.timeline()["series"] == {}
+    assert np.array(index.heatmap()["counts"]).sum() == 0
@@ -0,0 +1,97 @@
+import random
+
+import pandas as pd
+
+from investidata.text import fold
+from investidata.topics import KeywordAutomaton, TopicScanner, load_lexicon
+
+
+def _messages(texts, contacts=None):
+    return pd.DataFrame({
+        "id": range(len(texts)),
+        "contacto": contacts or [f"c{i}" for i in range(len(texts))],
+        "texto": texts,
+    })
+
+
+def test_automaton_reports_overlapping_terms():
+    automaton = KeywordAutomaton({"t": ["he", "she", "his", "hers"]})
+    words = [automaton.keywords[k][1] for k in range(len(automaton))]
+    hits = {(end, words[k]) for end, k in automaton.scan("ushers")}
+    assert hits == {(3, "she"), (3, "he"), (5, "hers")}
+    assert automaton.scan("xyz") == []
+
+
+def test_prefix_keywords():
+    automaton = KeywordAutomaton({"a": ["arma"], "b": ["armado", "dado"]})
+    found = {automaton.keywords[k][1] for k in automaton.prefix_keywords("armados")}
+    # "dado" aparece dentro, pero no empieza donde empieza la palabra
+    assert found == {"arma", "armado"}
+
+
+def test_scan_counts_every_lexicon_at_word_starts():
+    scanner = TopicScanner({"armas": ["pistola", "munición"], "dinero": ["plata"], "mixto": ["pistolas"]})
+    messages = _messages(
+        ["Pistolas y MUNICION", "la plata, la plata", "apistola", None, "nada"],
+        contacts=["Ana", "Beto", "Ana", "Carla", "Beto"],
+    )
+    hits = scanner.scan(messages)
+    assert sorted(zip(hits["fila"], hits["tema"], hits["palabra"], hits["contacto"])) == [
+        (0, "armas", "munición", "Ana"),
+        (0, "armas", "pistola", "Ana"),
+        (0, "mixto", "pistolas", "Ana"),
+        (1, "dinero", "plata", "Beto"),
+        (1, "dinero", "plata", "Beto"),
+    ]
+
+    summary = TopicScanner.summarize(hits)
+    assert summary["por_tema"].loc["dinero"].tolist() == [2, 1]
+    assert summary["por_tema"].loc["armas"].tolist() == [2, 1]
+    by_keyword = summary["por_palabra"].set_index(["tema", "palabra"])["coincidencias"]
+    assert by_keyword[("dinero", "plata")] == 2
+
+
+def test_multiword_terms_and_signs():
+    scanner = TopicScanner({"lugar": ["punto de encuentro", "punto"], "signo": ["#plata"]})
+    messages = _messages(["En el PUNTO DE encuentro", "puntos de encuentro", "la #plata", "x#plata"])
+    hits = scanner.scan(messages)
+    assert sorted(zip(hits["fila"], hits["palabra"])) == [
+        (0, "punto"), (0, "punto de encuentro"), (1, "punto"), (2, "#plata"),
+    ]
+
+
+def _reference(lexicons, texts):
+    # Fuerza bruta: cada término en cada inicio de palabra de cada mensaje
+    found = []
+    for row, text in enumerate(fold(t or "") for t in texts):
+        for start in range(len(text)):
+            if start and text[start - 1].isalnum():
+                continue
+            for topic, terms in lexicons.items():
+                found += [(row, topic, term) for term in terms if text.startswith(fold(term), start)]
+    return sorted(found)
+
+
+def test_scan_matches_brute_force():
+    rng = random.Random(5)
+    lexicons = {"a": ["arma", "armas", "armamento", "9mm", "de-a", "ña"], "b": ["arma", "punto de", "x_y"]}
+    pieces = ["arma", "Armas", "armamento", "punto de", "punto  de", "9mm", "3arma", "dé-A", "ÑA", "x_y", "_arma", ",", " "]
+    texts = ["".join(rng.choice(pieces) + rng.choice(["", " ", "."]) for _ in range(rng.randrange(10)))
+             for _ in range(300)] + [None]
+    hits = TopicScanner(lexicons).scan(_messages(texts))
+    assert sorted(zip(hits["fila"], hits["tema"], hits["palabra"])) == _reference(lexicons, texts)
+
+
+def test_scan_without_matches():
+    hits = TopicScanner({"armas": ["pistola"]}).scan(_messages(["hola", "chao"]))
+    assert hits.empty
+    assert list(hits.columns) == ["fila", "tema", "palabra", "contacto"]
+
+
+def test_load_lexicon(tmp_path):
+    csv_path = tmp_path / "lexico.csv"
+    csv_path.write_text("tema,termino\narmas,fierro\narmas, changón \ndinero,lukas\n", encoding="utf-8")
+    txt_path = tmp_path / "lexico.txt"
+    txt_path.write_text("# comentario\narmas: fierro\ndinero: lukas\nsin separador\n", encoding="utf-8")
+    assert load_lexicon(csv_path) == {"armas": ["fierro", "changón"], "dinero": ["lukas"]}
+    assert load_lexicon(txt_path) == {"armas": ["fierro"], "dinero": ["lukas"]}
@@ -0,0 +1,29 @@
+from benchmarks.startup import measure_once
+from investidata import warmup
+from investidata.perf import recorder
+
+
+def test_preload_reports_missing_modules():
+    recorder.clear()
+    failed = warmup.preload(("investidata.text", "investidata.no_existe"))
+    assert list(failed) == ["investidata.no_existe"]
+    assert failed["investidata.no_existe"].startswith("ModuleNotFoundError")
+    spans = recorder.spans()
+    assert [s["name"] for s in spans] == ["precarga:text", "precarga:no_existe"]
+    assert spans[1]["tags"]["error"] == "ModuleNotFoundError"
+
+
+def test_start_runs_in_the_background(monkeypatch):
+    monkeypatch.setattr(warmup, "ENABLED", True)
+    thread = warmup.start(("investidata.text",))
+    thread.join(10)
+    assert thread.daemon and not thread.is_alive()
+    monkeypatch.setattr(warmup, "ENABLED", False)
+    assert warmup.start() is None
+
+
+def test_landing_page_does_not_import_the_engines():
+    # Proceso nuevo: la pantalla de bienvenida sin precarga
+    result = measure_once()
+    assert result["errors"] == []
+    assert result["heavy_modules"] == []